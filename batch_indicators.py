@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Moteur d'Indicateurs Multi-Symboles - Calcul vectorisé
+Tous les candidats du scan analysés en une passe sur une matrice (symboles × bougies)
+"""
+
+import numpy as np
+from typing import Dict, List, Sequence
+
+
+class CandleMatrix:
+    """Matrices OHLCV alignées à droite (même nombre de bougies par symbole)"""
+
+    def __init__(self, symbols: List[str], ohlcv: np.ndarray):
+        # ohlcv: (symboles, bougies, 6) -> timestamp, open, high, low, close, volume
+        self.symbols = symbols
+        self.timestamp = ohlcv[:, :, 0]
+        self.open = ohlcv[:, :, 1]
+        self.high = ohlcv[:, :, 2]
+        self.low = ohlcv[:, :, 3]
+        self.close = ohlcv[:, :, 4]
+        self.volume = ohlcv[:, :, 5]
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @property
+    def length(self) -> int:
+        return self.close.shape[1] if len(self.symbols) else 0
+
+    @classmethod
+    def from_klines(cls, klines_by_symbol: Dict[str, Sequence], min_length: int,
+                    max_length: int = None) -> 'CandleMatrix':
+        """Construit la matrice depuis des klines ccxt [[ts, o, h, l, c, v], ...]
+
+        Les symboles avec moins de `min_length` bougies sont écartés, les autres
+        sont tronqués à la plus courte longueur commune (dernières bougies).
+        """
+        kept = {s: k for s, k in klines_by_symbol.items() if k is not None and len(k) >= min_length}
+        if not kept:
+            return cls([], np.empty((0, 0, 6)))
+
+        length = min(len(k) for k in kept.values())
+        if max_length:
+            length = min(length, max_length)
+
+        symbols = list(kept.keys())
+        ohlcv = np.array([kept[s][-length:] for s in symbols], dtype=np.float64)
+        return cls(symbols, ohlcv)
+
+
+def ema_last(closes: np.ndarray, period: int) -> np.ndarray:
+    """Dernière EMA par ligne (amorcée par SMA, identique à StreamingEMA)"""
+    n = closes.shape[1]
+    if n < period:
+        return np.full(closes.shape[0], np.nan)
+
+    alpha = 2.0 / (period + 1)
+    ema = closes[:, :period].mean(axis=1)
+    for i in range(period, n):
+        ema += alpha * (closes[:, i] - ema)
+    return ema
+
+
+def rsi_last(closes: np.ndarray, period: int = 14) -> np.ndarray:
+    """Dernier RSI de Wilder par ligne (identique à StreamingRSI)"""
+    n = closes.shape[1]
+    if n < period + 1:
+        return np.full(closes.shape[0], np.nan)
+
+    deltas = np.diff(closes, axis=1)
+    gains = np.clip(deltas, 0, None)
+    losses = np.clip(-deltas, 0, None)
+
+    avg_gain = gains[:, :period].mean(axis=1)
+    avg_loss = losses[:, :period].mean(axis=1)
+    for i in range(period, deltas.shape[1]):
+        avg_gain = (avg_gain * (period - 1) + gains[:, i]) / period
+        avg_loss = (avg_loss * (period - 1) + losses[:, i]) / period
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    # Aucune perte : 100 si hausse, 50 si plat
+    no_loss = avg_loss == 0
+    rsi[no_loss] = np.where(avg_gain[no_loss] > 0, 100.0, 50.0)
+    return rsi
+
+
+def volume_ratio_last(volumes: np.ndarray, window: int = 20) -> np.ndarray:
+    """Volume de la dernière bougie en % de la moyenne des `window` dernières"""
+    avg_volume = volumes[:, -window:].mean(axis=1)
+    current_volume = volumes[:, -1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(avg_volume > 0, current_volume / avg_volume * 100, 0.0)
+    return ratio
+
+
+def pump_percent_last(closes: np.ndarray) -> np.ndarray:
+    """Variation % entre les deux dernières clôtures"""
+    previous = closes[:, -2]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(previous > 0, (closes[:, -1] - previous) / previous * 100, np.nan)
+
+
+def candle_ratios_last(matrix: CandleMatrix) -> Dict[str, np.ndarray]:
+    """Ratios corps/range et mèche haute/range de la dernière bougie"""
+    open_, high = matrix.open[:, -1], matrix.high[:, -1]
+    low, close = matrix.low[:, -1], matrix.close[:, -1]
+
+    candle_range = high - low
+    body = np.abs(close - open_)
+    upper_wick = high - np.maximum(open_, close)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        body_ratio = np.where(candle_range > 0, body / candle_range, 0.0)
+        upper_wick_ratio = np.where(candle_range > 0, upper_wick / candle_range, 1.0)
+    return {
+        'body_ratio': body_ratio,
+        'upper_wick_ratio': upper_wick_ratio,
+        'has_range': candle_range > 0
+    }
+
+
+def _healthy_from_ratios(ratios: Dict[str, np.ndarray], min_candle_body_ratio: float,
+                         max_upper_wick_ratio: float) -> np.ndarray:
+    return (ratios['has_range'] &
+            (ratios['body_ratio'] >= min_candle_body_ratio) &
+            (ratios['upper_wick_ratio'] <= max_upper_wick_ratio))
+
+
+def healthy_candle_mask(matrix: CandleMatrix, min_candle_body_ratio: float = 0.6,
+                        max_upper_wick_ratio: float = 0.3) -> np.ndarray:
+    """Équivalent vectorisé de is_healthy_candle() sur la dernière bougie"""
+    return _healthy_from_ratios(candle_ratios_last(matrix), min_candle_body_ratio, max_upper_wick_ratio)
+
+
+def compute_scan_indicators(matrix: CandleMatrix, rsi_period: int = 14, ema_fast: int = 9,
+                            ema_slow: int = 21, volume_window: int = 20,
+                            min_candle_body_ratio: float = 0.6,
+                            max_upper_wick_ratio: float = 0.3) -> Dict[str, np.ndarray]:
+    """Tous les indicateurs du scan approfondi, un vecteur par indicateur"""
+    ratios = candle_ratios_last(matrix)
+    return {
+        'rsi': rsi_last(matrix.close, rsi_period),
+        'ema_fast': ema_last(matrix.close, ema_fast),
+        'ema_slow': ema_last(matrix.close, ema_slow),
+        'volume_ratio': volume_ratio_last(matrix.volume, volume_window),
+        'body_ratio': ratios['body_ratio'],
+        'upper_wick_ratio': ratios['upper_wick_ratio'],
+        'healthy_candle': _healthy_from_ratios(ratios, min_candle_body_ratio, max_upper_wick_ratio)
+    }
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests des indicateurs vectorisés du scan
+Comparaison ligne par ligne avec StreamingRSI / StreamingEMA sur les mêmes bougies
+"""
+
+import math
+import random
+import unittest
+
+import numpy as np
+
+from batch_indicators import CandleMatrix, compute_scan_indicators, ema_last, pump_percent_last, rsi_last
+from streaming_indicators import StreamingEMA, StreamingRSI
+
+
+def make_klines(count, seed, start=100.0, flat=False):
+    """Klines ccxt [[ts, o, h, l, c, v], ...] pseudo-aléatoires"""
+    rng = random.Random(seed)
+    klines = []
+    close = start
+    for i in range(count):
+        open_ = close
+        close = open_ if flat else open_ * (1 + rng.uniform(-0.02, 0.02))
+        high = max(open_, close) * 1.005
+        low = min(open_, close) * 0.995
+        klines.append([1_700_000_000_000 + i * 60_000, open_, high, low, close, rng.uniform(10, 100)])
+    return klines
+
+
+def streaming_last(closes, indicator):
+    indicator.seed(closes)
+    return indicator.value
+
+
+class TestBatchIndicators(unittest.TestCase):
+
+    def test_matches_streaming_on_ragged_histories(self):
+        klines = {
+            'A/USDT': make_klines(120, 1),
+            'B/USDT': make_klines(60, 2),   # Plus courte : fixe la longueur commune
+            'C/USDT': make_klines(90, 3),
+            'D/USDT': make_klines(10, 4),   # Trop courte : écartée
+        }
+        matrix = CandleMatrix.from_klines(klines, min_length=30)
+
+        self.assertEqual(matrix.symbols, ['A/USDT', 'B/USDT', 'C/USDT'])
+        self.assertEqual(matrix.length, 60)
+
+        indicators = compute_scan_indicators(matrix, rsi_period=14, ema_fast=9, ema_slow=21)
+        for row, symbol in enumerate(matrix.symbols):
+            closes = [k[4] for k in klines[symbol][-60:]]
+            self.assertAlmostEqual(indicators['rsi'][row], streaming_last(closes, StreamingRSI(14)), places=9)
+            self.assertAlmostEqual(indicators['ema_fast'][row], streaming_last(closes, StreamingEMA(9)), places=9)
+            self.assertAlmostEqual(indicators['ema_slow'][row], streaming_last(closes, StreamingEMA(21)), places=9)
+
+            expected_pump = (closes[-1] - closes[-2]) / closes[-2] * 100
+            self.assertAlmostEqual(pump_percent_last(matrix.close)[row], expected_pump, places=9)
+
+    def test_short_history_is_nan_like_warming_streams(self):
+        closes = np.array([[k[4] for k in make_klines(10, 5)]])
+
+        self.assertTrue(math.isnan(rsi_last(closes, 14)[0]))
+        self.assertTrue(math.isnan(ema_last(closes, 21)[0]))
+        rsi = StreamingRSI(14)
+        rsi.seed(closes[0])
+        self.assertIsNone(rsi.value)
+
+        # Juste assez de bougies : première valeur identique
+        closes = np.array([[k[4] for k in make_klines(15, 6)]])
+        self.assertAlmostEqual(rsi_last(closes, 14)[0], streaming_last(closes[0], StreamingRSI(14)), places=9)
+
+    def test_flat_series_and_zero_close(self):
+        matrix = CandleMatrix.from_klines({'FLAT/USDT': make_klines(30, 7, flat=True)}, min_length=30)
+        self.assertEqual(rsi_last(matrix.close, 14)[0], streaming_last(matrix.close[0], StreamingRSI(14)))
+        self.assertEqual(rsi_last(matrix.close, 14)[0], 50.0)
+
+        closes = np.array([[0.0, 1.0], [2.0, 3.0]])
+        pump = pump_percent_last(closes)
+        self.assertTrue(math.isnan(pump[0]))
+        self.assertAlmostEqual(pump[1], 50.0)
+
+    def test_empty_matrix(self):
+        matrix = CandleMatrix.from_klines({'A/USDT': make_klines(5, 8), 'B/USDT': None}, min_length=30)
+        self.assertEqual(len(matrix), 0)
+        self.assertEqual(matrix.length, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mode Démon - Moteur de trading sans interface graphique
+Le moteur tourne seul (ni tkinter ni matplotlib) et se pilote par une API HTTP locale,
+en TCP sur 127.0.0.1 ou sur un socket Unix : start, stop, status, positions, trades, reload
+"""
+
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from log_pipeline import get_logger, setup_logging, shutdown_logging
+
+logger = get_logger('daemon')
+
+
+def _json_default(value):
+    """datetime et types numpy des positions -> JSON"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+class BotController:
+    """Cycle de vie du moteur piloté à distance (un nouveau bot à chaque démarrage, comme l'interface)"""
+
+    def __init__(self, config_manager, bot_factory: Optional[Callable] = None, max_log_lines: int = 200):
+        self.config_manager = config_manager
+        self.bot_factory = bot_factory
+        self.bot = None
+        self.started_at = None
+        self.lock = threading.Lock()
+        self.starting = False  # bot.start() en cours (connexion, watchlist) : ni second démarrage ni arrêt
+        self.start_finished = threading.Event()  # Levé quand aucun démarrage n'est en cours
+        self.start_finished.set()
+        self.log_lines = deque(maxlen=max_log_lines)
+        self.log_count = 0  # Numéro de la dernière ligne reçue (pour /logs?since=)
+
+    def _create_bot(self):
+        if self.bot_factory is None:
+            # Import différé : le démon répond avant que ccxt/pandas soient chargés
+            from crypto_bot_engine import CryptoTradingBot
+            self.bot_factory = CryptoTradingBot
+        return self.bot_factory(self.config_manager)
+
+    def _on_log_message(self, line: str):
+        with self.lock:
+            self.log_count += 1
+            self.log_lines.append((self.log_count, line))
+
+    @property
+    def running(self) -> bool:
+        return self.starting or (self.bot is not None and self.bot.is_running)
+
+    def start(self) -> Dict:
+        """Crée et démarre le bot en arrière-plan (connexion exchange, watchlist, WebSockets)"""
+        with self.lock:
+            if self.running:
+                return {'ok': False, 'error': 'Bot déjà en cours d\'exécution'}
+            self.starting = True
+            self.start_finished.clear()
+            self.started_at = time.time()
+        threading.Thread(target=self._run_start, name='bot-start', daemon=True).start()
+        logger.info("🚀 Démarrage du bot demandé")
+        return {'ok': True, 'starting': True}
+
+    def _run_start(self):
+        # Hors du verrou : le moteur journalise dès sa construction (_on_log_message prend le verrou)
+        try:
+            bot = self._create_bot()
+            bot.add_callback('log_message', self._on_log_message)
+            self.bot = bot
+            bot.start()
+        except Exception as e:
+            logger.error(f"❌ Échec du démarrage du bot: {e}")
+        finally:
+            with self.lock:
+                self.starting = False
+            self.start_finished.set()
+
+    def stop(self) -> Dict:
+        """Sauvegarde le portefeuille puis arrête le bot"""
+        with self.lock:
+            if self.starting:
+                return {'ok': False, 'error': 'Démarrage en cours'}
+            bot = self.bot
+            if bot is None or not bot.is_running:
+                return {'ok': False, 'error': 'Bot arrêté'}
+        bot.save_portfolio_state()
+        bot.stop()
+        logger.info("🛑 Bot arrêté via l'API")
+        return {'ok': True}
+
+    def shutdown(self):
+        """Arrêt du démon : attend la fin d'un démarrage en cours, puis sauvegarde et arrête le bot"""
+        self.start_finished.wait()
+        if self.running:
+            self.stop()
+
+    def status(self) -> Dict:
+        bot = self.bot
+        status = {
+            'running': self.running,
+            'starting': self.starting,
+            'uptime_seconds': round(time.time() - self.started_at, 1) if self.running else 0,
+            'pid': os.getpid()
+        }
+        if bot is not None:
+            websocket_manager = getattr(bot, 'websocket_manager', None)
+            status.update({
+                'simulation_mode': bot.simulation_mode,
+                'balance': bot.balance,
+                'exchange_connected': getattr(bot, 'exchange', None) is not None,
+                'websocket_connected': bool(websocket_manager and websocket_manager.is_connected()),
+                'portfolio': bot.get_portfolio_snapshot()
+            })
+        return status
+
+    def positions(self) -> List[Dict]:
+        if self.bot is None:
+            return []
+        return [dict(position) for position in list(self.bot.open_positions) if position.get('status') == 'open']
+
+    def trades(self, limit: int = 50) -> List[Dict]:
+        """Trades fermés, plus récents en tête"""
+        if self.bot is None:
+            return []
+        return [dict(trade) for trade in reversed(self.bot.closed_trades[-limit:])]
+
+    def logs(self, since: int = 0) -> Dict:
+        with self.lock:
+            lines = [line for number, line in self.log_lines if number > since]
+            return {'last': self.log_count, 'lines': lines}
+
+    def reload_config(self) -> Dict:
+        """Relit config.txt ; le bot en marche reprend la config de scan (comme la sauvegarde auto)"""
+        self.config_manager.load_config()
+        if self.bot is not None:
+            self.bot.scan_config = self.config_manager.get_scan_config()
+        logger.info("🔄 Configuration rechargée via l'API")
+        return {'ok': True, 'parameters': len(self.config_manager.config),
+                'restart_required': self.running}
+
+
+class ControlRequestHandler(BaseHTTPRequestHandler):
+    """Routes JSON de l'API de contrôle (GET lecture, POST commandes)"""
+
+    server_version = 'ScalpingBotDaemon/1.0'
+
+    def _routes(self) -> Dict:
+        controller = self.server.controller
+        query = parse_qs(urlparse(self.path).query)
+        return {
+            ('GET', '/status'): controller.status,
+            ('GET', '/positions'): controller.positions,
+            ('GET', '/trades'): lambda: controller.trades(int(query.get('limit', ['50'])[0])),
+            ('GET', '/logs'): lambda: controller.logs(int(query.get('since', ['0'])[0])),
+            ('POST', '/start'): controller.start,
+            ('POST', '/stop'): controller.stop,
+            ('POST', '/reload'): controller.reload_config
+        }
+
+    def _handle(self, method: str):
+        token = self.server.token
+        if token and self.headers.get('X-Bot-Token') != token:
+            self._send(401, {'error': 'Jeton invalide'})
+            return
+        route = self._routes().get((method, urlparse(self.path).path.rstrip('/')))
+        if route is None:
+            self._send(404, {'error': f"Route inconnue: {method} {self.path}"})
+            return
+        try:
+            self._send(200, route())
+        except ValueError as e:
+            self._send(400, {'error': str(e)})
+        except Exception as e:
+            logger.error(f"❌ Erreur API {method} {self.path}: {e}")
+            self._send(500, {'error': str(e)})
+
+    def _send(self, code: int, payload):
+        body = json.dumps(payload, default=_json_default, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        self._handle('POST')
+
+    def log_message(self, format, *args):
+        logger.debug(f"API {format % args}")
+
+
+class UnixControlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Même API sur un socket Unix (accès limité au propriétaire du fichier)"""
+
+    daemon_threads = True
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)  # Socket resté d'un arrêt brutal
+        super().server_bind()
+        os.chmod(self.server_address, 0o600)
+
+
+def make_server(controller: BotController, host: str = '127.0.0.1', port: int = 8765,
+                socket_path: Optional[str] = None, token: Optional[str] = None):
+    """Serveur de contrôle : socket Unix si `socket_path`, sinon TCP host:port"""
+    if socket_path:
+        server = UnixControlServer(socket_path, ControlRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), ControlRequestHandler)
+        server.daemon_threads = True
+    server.controller = controller
+    server.token = token or None
+    return server
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class DaemonClient:
+    """Client de l'API de contrôle (interface distante, scripts de supervision)"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765, socket_path: Optional[str] = None,
+                 token: Optional[str] = None, timeout: float = 5.0):
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.token = token
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str):
+        if self.socket_path:
+            connection = _UnixHTTPConnection(self.socket_path, self.timeout)
+        else:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        headers = {'X-Bot-Token': self.token} if self.token else {}
+        try:
+            connection.request(method, path, headers=headers)
+            response = connection.getresponse()
+            payload = json.loads(response.read().decode('utf-8'))
+        finally:
+            connection.close()
+        if response.status != 200:
+            raise RuntimeError(f"API démon {response.status}: {payload.get('error')}")
+        return payload
+
+    def status(self) -> Dict:
+        return self._request('GET', '/status')
+
+    def positions(self) -> List[Dict]:
+        return self._request('GET', '/positions')
+
+    def trades(self, limit: int = 50) -> List[Dict]:
+        return self._request('GET', f'/trades?limit={limit}')
+
+    def logs(self, since: int = 0) -> Dict:
+        return self._request('GET', f'/logs?since={since}')
+
+    def start(self) -> Dict:
+        return self._request('POST', '/start')
+
+    def stop(self) -> Dict:
+        return self._request('POST', '/stop')
+
+    def reload_config(self) -> Dict:
+        return self._request('POST', '/reload')
+
+
+def main(argv: Optional[List[str]] = None):
+    """Point d'entrée : python bot_daemon.py [--start] [--port 8765 | --socket /run/bot.sock]"""
+    from config_manager import ConfigManager
+
+    parser = argparse.ArgumentParser(description="Bot de scalping sans interface, piloté par API locale")
+    parser.add_argument('--config', default='config.txt', help="Fichier de configuration")
+    parser.add_argument('--host', help="Adresse d'écoute (DAEMON_HOST)")
+    parser.add_argument('--port', type=int, help="Port d'écoute (DAEMON_PORT)")
+    parser.add_argument('--socket', help="Socket Unix à la place du TCP (DAEMON_SOCKET)")
+    parser.add_argument('--start', action='store_true', help="Démarrer le bot immédiatement (AUTO_START_BOT)")
+    args = parser.parse_args(argv)
+
+    config = ConfigManager(args.config)
+    setup_logging(
+        log_file=config.get('LOG_FILE', 'bot.log'),
+        level=config.get('LOG_LEVEL', 'INFO'),
+        max_bytes=config.get('LOG_MAX_BYTES', 5_000_000),
+        backup_count=config.get('LOG_BACKUP_COUNT', 5)
+    )
+
+    controller = BotController(config)
+    server = make_server(
+        controller,
+        host=args.host or config.get('DAEMON_HOST', '127.0.0.1'),
+        port=args.port if args.port is not None else config.get('DAEMON_PORT', 8765),
+        socket_path=args.socket or config.get('DAEMON_SOCKET') or None,
+        token=config.get('DAEMON_TOKEN') or os.getenv('DAEMON_TOKEN')
+    )
+    address = server.server_address
+    logger.info(f"🛰️ API de contrôle en écoute sur {address if isinstance(address, str) else '%s:%s' % address[:2]}")
+
+    def request_shutdown(signum, frame):
+        # shutdown() attend la fin de serve_forever : depuis un autre thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, request_shutdown)
+    signal.signal(signal.SIGINT, request_shutdown)
+
+    if args.start or config.get('AUTO_START_BOT', False):
+        controller.start()
+
+    try:
+        server.serve_forever()
+    finally:
+        controller.shutdown()
+        server.server_close()
+        if isinstance(address, str) and os.path.exists(address):
+            os.unlink(address)
+        logger.info("✅ Démon arrêté")
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
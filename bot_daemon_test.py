@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Tests du mode démon
+API de contrôle locale (TCP et socket Unix) autour d'un bot simulé
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+
+from bot_daemon import BotController, DaemonClient, make_server
+
+
+class FakeConfig:
+    def __init__(self):
+        self.config = {'SCAN_INTERVAL': 1}
+        self.reloads = 0
+
+    def load_config(self):
+        self.reloads += 1
+        return self.config
+
+    def get_scan_config(self):
+        return {'reloads': self.reloads}
+
+
+class FakeBot:
+    """Interface du moteur utilisée par le contrôleur"""
+
+    def __init__(self, config_manager):
+        self.config_manager = config_manager
+        self.is_running = False
+        self.simulation_mode = True
+        self.balance = 1000.0
+        self.exchange = None
+        self.websocket_manager = None
+        self.callbacks = {'log_message': []}
+        self.open_positions = [
+            {'symbol': 'BTC/USDT', 'status': 'open', 'timestamp': datetime(2024, 1, 1, 12, 0)},
+            {'symbol': 'ETH/USDT', 'status': 'closed'}
+        ]
+        self.closed_trades = [{'symbol': f"T{i}", 'net_pnl': i} for i in range(5)]
+        self.saved = False
+        self.started = threading.Event()
+
+    def add_callback(self, event_type, callback):
+        self.callbacks[event_type].append(callback)
+
+    def start(self):
+        self.is_running = True
+        for callback in self.callbacks['log_message']:
+            callback("[12:00:00] ✅ Bot démarré avec succès")
+        self.started.set()
+
+    def stop(self):
+        self.is_running = False
+
+    def save_portfolio_state(self):
+        self.saved = True
+
+    def get_portfolio_snapshot(self):
+        return {'cash': self.balance, 'open_positions': 1}
+
+
+class SlowBot(FakeBot):
+    """Démarrage long (connexion exchange, watchlist) libéré par le test"""
+
+    release = None
+    fail = False
+
+    def start(self):
+        self.release.wait(5)
+        if self.fail:
+            raise RuntimeError("exchange injoignable")
+        super().start()
+
+
+class TestBotDaemon(unittest.TestCase):
+
+    def _serve(self, **server_options):
+        self.controller = BotController(FakeConfig(), bot_factory=FakeBot)
+        server = make_server(self.controller, **server_options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_tcp_lifecycle(self):
+        server = self._serve(port=0)
+        client = DaemonClient(port=server.server_address[1])
+
+        self.assertFalse(client.status()['running'])
+        self.assertTrue(client.start()['ok'])
+        self.assertTrue(self.controller.start_finished.wait(2))
+        self.assertTrue(self.controller.bot.started.is_set())
+        self.assertFalse(client.start()['ok'])
+
+        status = client.status()
+        self.assertTrue(status['running'])
+        self.assertEqual(status['portfolio'], {'cash': 1000.0, 'open_positions': 1})
+
+        positions = client.positions()
+        self.assertEqual([p['symbol'] for p in positions], ['BTC/USDT'])
+        self.assertEqual(positions[0]['timestamp'], '2024-01-01T12:00:00')
+        self.assertEqual([t['symbol'] for t in client.trades(limit=2)], ['T4', 'T3'])
+        self.assertEqual(client.logs(), {'last': 1, 'lines': ["[12:00:00] ✅ Bot démarré avec succès"]})
+        self.assertEqual(client.logs(since=1)['lines'], [])
+
+        reload = client.reload_config()
+        self.assertTrue(reload['restart_required'])
+        self.assertEqual(self.controller.bot.scan_config, {'reloads': 1})
+
+        bot = self.controller.bot
+        self.assertTrue(client.stop()['ok'])
+        self.assertTrue(bot.saved)
+        self.assertFalse(client.status()['running'])
+
+    def test_token_and_unknown_route(self):
+        server = self._serve(port=0, token='secret')
+        port = server.server_address[1]
+
+        with self.assertRaisesRegex(RuntimeError, '401'):
+            DaemonClient(port=port).status()
+        client = DaemonClient(port=port, token='secret')
+        self.assertFalse(client.status()['running'])
+        with self.assertRaisesRegex(RuntimeError, '404'):
+            client._request('GET', '/inconnue')
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "socket Unix")
+    def test_unix_socket(self):
+        socket_path = os.path.join(tempfile.mkdtemp(), 'bot.sock')
+        self._serve(socket_path=socket_path)
+
+        client = DaemonClient(socket_path=socket_path)
+        self.assertFalse(client.status()['running'])
+        self.assertEqual(os.stat(socket_path).st_mode & 0o777, 0o600)
+
+    def _slow_controller(self, fail=False):
+        release = threading.Event()
+        bot_class = type('SlowTestBot', (SlowBot,), {'release': release, 'fail': fail})
+        self.addCleanup(release.set)
+        return BotController(FakeConfig(), bot_factory=bot_class), release
+
+    def _wait_started(self, controller):
+        if not controller.start_finished.wait(5):
+            self.fail("démarrage jamais terminé")
+
+    def test_slow_start_blocks_second_start_and_stop(self):
+        controller, release = self._slow_controller()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(controller.start())) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sum(result['ok'] for result in results), 1)
+        self.assertTrue(controller.starting)
+        self.assertTrue(controller.running)
+        self.assertTrue(controller.status()['starting'])
+        self.assertEqual(controller.stop(), {'ok': False, 'error': 'Démarrage en cours'})
+
+        release.set()
+        self._wait_started(controller)
+        self.assertTrue(controller.bot.started.is_set())
+        self.assertTrue(controller.running)
+        self.assertFalse(controller.start()['ok'])
+        self.assertEqual(controller.stop(), {'ok': True})
+        self.assertFalse(controller.running)
+
+    def test_failed_start_allows_retry(self):
+        controller, release = self._slow_controller(fail=True)
+        self.assertTrue(controller.start()['ok'])
+        release.set()
+        self._wait_started(controller)
+
+        self.assertFalse(controller.running)
+        type(controller.bot).fail = False
+        self.assertTrue(controller.start()['ok'])
+        self._wait_started(controller)
+        self.assertTrue(controller.running)
+
+    def test_shutdown_during_start_stops_bot(self):
+        controller, release = self._slow_controller()
+        self.assertTrue(controller.start()['ok'])
+        shutdown = threading.Thread(target=controller.shutdown)
+        shutdown.start()
+        shutdown.join(0.2)
+        self.assertTrue(shutdown.is_alive())  # Attend la fin du démarrage
+
+        release.set()
+        shutdown.join(5)
+        self.assertFalse(shutdown.is_alive())
+        self.assertTrue(controller.bot.saved)
+        self.assertFalse(controller.running)
+
+    def test_import_does_not_load_gui_or_engine(self):
+        code = ("import sys, bot_daemon; "
+                "print(sorted(m for m in ('tkinter', 'matplotlib', 'ccxt', 'pandas') if m in sys.modules))")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(result.stdout.strip(), '[]', result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
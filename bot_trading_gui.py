@@ -1,10 +1,3 @@
-from dotenv import load_dotenv
-import os
-load_dotenv()
-API_KEY = os.getenv('API_KEY')
-API_SECRET = os.getenv('API_SECRET')
-import os
-load_dotenv()
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
@@ -19,10 +12,47 @@ import time
 from datetime import datetime
 from config_manager import ConfigManager
 from crypto_bot_engine import CryptoTradingBot
+from trade_table import TradeStore, VirtualTable
+from ui_scheduler import LogBuffer, UIScheduler
 
 class ScalpingBotGUI:
     """Interface graphique complète pour le bot scalping"""
     
+    # Colonnes des tableaux virtualisés : (clé, titre, largeur, alignement)
+    HISTORY_COLUMNS = [
+        ('time', 'Heure', 95, 'w'), ('symbol', 'Symbole', 85, 'w'),
+        ('entry', 'Entrée', 90, 'e'), ('exit', 'Sortie', 90, 'e'),
+        ('pnl', 'P&L', 80, 'e'), ('pnl_percent', '%', 55, 'e'),
+        ('duration', 'Durée', 60, 'e'), ('reason', 'Raison', 150, 'w'), ('fees', 'Frais', 55, 'e')
+    ]
+    POSITION_COLUMNS = [
+        ('time', 'Heure', 65, 'w'), ('symbol', 'Symbole', 85, 'w'), ('price', 'Entrée', 95, 'e'),
+        ('quantity', 'Quantité', 110, 'e'), ('stop_loss', 'Stop Loss', 95, 'e'),
+        ('take_profit', 'Take Profit', 95, 'e'), ('value', 'Valeur', 70, 'e'), ('momentum', 'Momentum', 70, 'e')
+    ]
+    
+    # Raison de fermeture -> emoji
+    REASON_ICONS = {
+        'TAKE_PROFIT': '🎯',
+        'TAKE_PROFIT_INTELLIGENT': '🎯',
+        'TP_MOMENTUM_DECLINE': '📉',      # TP dépassé + momentum devient négatif
+        'TP_TRAILING_STOP': '📉',        # Trailing stop après TP (baisse depuis plus haut)
+        'TP_TIME_LIMIT': '⏰',           # Trop longtemps au TP sans momentum
+        'STOP_LOSS': '🛑',
+        'MOMENTUM_DECLINE': '📊',
+        'TIMEOUT': '⏱️',
+        'MANUAL': '👤',
+        'TRAILING_STOP': '📈',
+        'IMMEDIATE_EXIT': '🚨',           # Chute significative immédiate
+        'RAPID_EXIT': '⚡',              # Chute rapide dans les premières minutes
+        'EARLY_PROFIT_EXIT': '💰',       # Vente anticipée sur profit + momentum faible
+        'STRONG_PROFIT_EXIT': '🎉',      # Vente sur profit excellent
+        'TRAILING_STOP_PROFIT': '📉',    # Trailing stop sur profit
+        'STAGNATION_TIMEOUT': '💤',      # Position stagnante
+        'NEGATIVE_TIMEOUT': '⬇️',        # Position négative trop longtemps
+        'ABSOLUTE_TIMEOUT': '⏰'         # Timeout absolu
+    }
+    
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("🎯 BOT SCALPING PROFESSIONNEL")
@@ -38,8 +68,24 @@ class ScalpingBotGUI:
         self.last_scan_stats = {}
         self.last_opportunities = []
         
+        # Logs : tampon circulaire vidé par lot à intervalle fixe (jamais un after() par ligne)
+        self.log_max_lines = int(self.config_manager.get('LOG_MAX_LINES', 100))
+        self.log_flush_ms = int(self.config_manager.get('LOG_FLUSH_MS', 100))
+        self.log_buffer = LogBuffer(self.log_max_lines)
+        
+        # Zones d'affichage redessinées au plus une fois par image (callbacks du moteur regroupés)
+        self.ui_scheduler = UIScheduler(self.root.after, int(self.config_manager.get('UI_FRAME_MS', 50)))
+        
         self.setup_gui()
         self.load_config_to_gui()
+        self.root.after(self.log_flush_ms, self._drain_log_buffer)
+        
+        self.ui_scheduler.register('balance', self._render_balance)
+        self.ui_scheduler.register('positions', self._render_positions)
+        self.ui_scheduler.register('history', self._render_history)
+        self.ui_scheduler.register('scan', self._render_scan)
+        self.ui_scheduler.register('connection', self._render_connection)
+        self.ui_scheduler.start()
         
         # Auto-start si configuré
         if self.config_manager.get('AUTO_START_BOT', False):
@@ -176,18 +222,18 @@ class ScalpingBotGUI:
         tk.Label(left_frame, text="📊 HISTORIQUE TRADES FERMÉS", font=('Arial', 10, 'bold'), 
                 fg='white', bg='#2d2d2d').pack(pady=(20, 5))
         
-        self.trades_history_text = tk.Text(
-            left_frame,
-            height=15, width=50,
-            bg='#1a1a1a', fg='#cccccc',
-            insertbackground='white',
-            font=('Courier', 9)
-        )
-        self.trades_history_text.pack(fill='both', expand=True, padx=10, pady=5)
+        # Tableau virtualisé : seules les lignes visibles existent dans le widget
+        self.history_store = TradeStore(max_rows=int(self.config_manager.get('TRADE_HISTORY_MAX_ROWS', 5000)))
+        self.trades_history_table = VirtualTable(left_frame, self.HISTORY_COLUMNS, self.history_store,
+                                                 visible_rows=15, empty_text="🔄 Aucun trade fermé pour le moment...",
+                                                 bg='#2d2d2d')
+        self.trades_history_table.tag_configure('profit', foreground='#00cc55')
+        self.trades_history_table.tag_configure('loss', foreground='#ff3366')
+        self.trades_history_table.pack(fill='both', expand=True, padx=10, pady=5)
         
         # Initialiser l'historique
         self.closed_trades = []  # Liste des trades fermés
-        self.trades_history_text.insert(1.0, "🔄 Aucun trade fermé pour le moment...\n")
+        self.trades_history_table.refresh()
         
         # Colonne droite - Dashboard de Trading Professionnel
         right_frame = tk.Frame(main_frame, bg='#1a1a1a', relief='raised', bd=2)
@@ -343,43 +389,14 @@ class ScalpingBotGUI:
                                            relief='groove', bd=2)
         positions_main_frame.pack(fill='both', expand=True, padx=10, pady=5)
         
-        # Zone de texte pour positions avec style amélioré
-        positions_canvas_frame = tk.Frame(positions_main_frame, bg='#2d2d2d')
-        positions_canvas_frame.pack(fill='both', expand=True, padx=5, pady=5)
-        
-        self.positions_text = tk.Text(
-            positions_canvas_frame,
-            height=8, width=50,
-            bg='#1a1a1a', fg='#cccccc',
-            insertbackground='white',
-            font=('Courier', 9),
-            relief='sunken', bd=2,
-            wrap=tk.WORD
-        )
-        
-        # Scrollbar pour positions
-        positions_scrollbar = tk.Scrollbar(positions_canvas_frame, command=self.positions_text.yview)
-        self.positions_text.config(yscrollcommand=positions_scrollbar.set)
-        
-        self.positions_text.pack(side='left', fill='both', expand=True)
-        positions_scrollbar.pack(side='right', fill='y')
-        
-        # Message initial
-        self.positions_text.insert(1.0, "🚀 Démarrez le bot pour voir les positions\n\n")
-        self.positions_text.config(state='disabled')
-        
-        # Positions
-        tk.Label(right_frame, text="📈 POSITIONS OUVERTES", font=('Arial', 10, 'bold'), 
-                fg='white', bg='#2d2d2d').pack(pady=(20, 5))
-        
-        self.positions_text = scrolledtext.ScrolledText(
-            right_frame,
-            height=20, width=50,
-            bg='#1a1a1a', fg='white',
-            insertbackground='white',
-            font=('Courier', 9)
-        )
-        self.positions_text.pack(fill='both', expand=True, padx=10, pady=5)
+        # Tableau des positions ouvertes (clé : order_id), retrait direct par clé à la fermeture
+        self.positions_store = TradeStore()
+        self.positions_table = VirtualTable(positions_main_frame, self.POSITION_COLUMNS, self.positions_store,
+                                            visible_rows=8, empty_text="🚀 Démarrez le bot pour voir les positions",
+                                            bg='#2d2d2d')
+        self.positions_table.tag_configure('open', foreground='#00aa44')
+        self.positions_table.pack(fill='both', expand=True, padx=5, pady=5)
+        self.positions_table.refresh()
         
         # Logs en bas
         log_frame = tk.Frame(self.trading_frame, bg='#2d2d2d', relief='raised', bd=2)
@@ -794,19 +811,9 @@ class ScalpingBotGUI:
                 positions_count = len(self.bot.open_positions) if self.bot.open_positions else 0
                 self.bot.log(f"🔄 RESET SIMULATION: Fermeture de {positions_count} positions ouvertes")
                 
-                # Utiliser les valeurs du config.txt (conversion en nombres)
-                self.bot.simulated_balance = float(initial_balance)
-                self.bot.balance = float(initial_balance)
-                
-                # SUPPRIMER TOUS LES TRADES EN COURS
-                self.bot.open_positions = []
-                self.bot.total_trades = 0
-                self.bot.winning_trades = 0
-                self.bot.total_pnl = 0.0
-                self.bot.total_fees = 0.0  # NOUVEAU: Remettre les frais à zéro
-                
-                # Nettoyer l'historique des trades fermés
-                self.bot.closed_trades = []
+                # Balance du config.txt, positions, compteurs, frais et historique remis à zéro
+                # en une transaction (les threads du moteur ne voient jamais un état à moitié reset)
+                self.bot.reset_simulation_account(float(initial_balance))
                 
                 # ARRÊTER la surveillance des positions (important !)
                 if hasattr(self.bot, 'position_monitor_active'):
@@ -815,16 +822,6 @@ class ScalpingBotGUI:
                 # Sauvegarder immédiatement le reset
                 self.bot.save_portfolio_state()
                 
-                # Nettoyer l'affichage des positions
-                self.positions_text.delete(1.0, tk.END)
-                self.positions_text.insert(1.0, "🔄 SIMULATION RÉINITIALISÉE\n\n✅ Toutes les positions ouvertes supprimées\n✅ Balance remise à {:.2f}€\n\n".format(float(initial_balance)))
-                
-                # Nettoyer l'historique des trades
-                self.trades_history_text.config(state='normal')
-                self.trades_history_text.delete(1.0, tk.END)
-                self.trades_history_text.insert(1.0, "🔄 Historique réinitialisé - Aucun trade fermé\n")
-                self.trades_history_text.config(state='disabled')
-                
                 # FORCER LE RAFRAÎCHISSEMENT COMPLET DE L'INTERFACE
                 self.refresh_all_displays()
                 
@@ -870,7 +867,7 @@ class ScalpingBotGUI:
                 messagebox.showinfo("Info", "Aucune position à vendre")
                 return
             
-            positions_to_close = [p for p in self.bot.open_positions if p['status'] == 'open']
+            positions_to_close = [p for p in self.bot.position_book.snapshot() if p['status'] == 'open']
             
             if not positions_to_close:
                 messagebox.showinfo("Info", "Aucune position ouverte à vendre")
@@ -878,11 +875,17 @@ class ScalpingBotGUI:
                 
             messagebox.showinfo("Vente en cours", f"Vente de {len(positions_to_close)} positions en cours...\n\nVeuillez patienter.")
             
-            # Simuler vente des positions (à remplacer par vraie logique d'API)
+            # Même clôture que la surveillance (carnet de positions, ordre de vente, PnL)
             for position in positions_to_close:
-                self.bot._close_position(position['symbol'], "Vente manuelle utilisateur")
-                
-            messagebox.showinfo("Succès", f"{len(positions_to_close)} positions vendues avec succès !")
+                price = self.bot._get_current_price(position['symbol']) or position['price']
+                self.bot._close_position_with_reason(position, price, 'MANUAL')
+            
+            closed = sum(1 for position in positions_to_close if position['status'] == 'closed')
+            if closed < len(positions_to_close):
+                messagebox.showwarning("Vente partielle", f"{closed}/{len(positions_to_close)} positions vendues.\n\n"
+                                       "Les positions restantes sont toujours surveillées.")
+            else:
+                messagebox.showinfo("Succès", f"{closed} positions vendues avec succès !")
             
         except Exception as e:
             messagebox.showerror("Erreur", f"Erreur lors de la vente des positions:\n{e}")
@@ -912,7 +915,7 @@ class ScalpingBotGUI:
             with open('bot_state.json', 'w') as f:
                 json.dump(state, f, indent=2)
                 
-            self.log_text.insert(tk.END, f"💾 État sauvegardé: {len(self.bot.open_positions)} positions\n")
+            self._append_log(f"💾 État sauvegardé: {len(self.bot.open_positions)} positions")
             
         except Exception as e:
             print(f"❌ Erreur sauvegarde état: {e}")
@@ -932,17 +935,20 @@ class ScalpingBotGUI:
             with open('bot_state.json', 'r') as f:
                 state = json.load(f)
             
-            # Restaurer l'état
-            self.bot.simulated_balance = state.get('simulated_balance', 1000.0)
-            self.bot.balance = state.get('balance', 1000.0)
-            self.bot.total_trades = state.get('total_trades', 0)
-            self.bot.winning_trades = state.get('winning_trades', 0)
-            self.bot.total_pnl = state.get('total_pnl', 0.0)
-            
-            # Restaurer positions
-            for pos_data in state.get('open_positions', []):
-                pos_data['timestamp'] = datetime.fromisoformat(pos_data['timestamp'])
-                self.bot.open_positions.append(pos_data)
+            # Restaurer l'état (transaction : le moteur tourne déjà)
+            with self.bot.position_book.transaction():
+                self.bot.simulated_balance = state.get('simulated_balance', 1000.0)
+                self.bot.balance = state.get('balance', 1000.0)
+                self.bot.total_trades = state.get('total_trades', 0)
+                self.bot.winning_trades = state.get('winning_trades', 0)
+                self.bot.total_pnl = state.get('total_pnl', 0.0)
+                
+                # Restaurer positions
+                for pos_data in state.get('open_positions', []):
+                    pos_data['timestamp'] = datetime.fromisoformat(pos_data['timestamp'])
+                    self.bot.position_book.add(pos_data)
+                self.bot.rebuild_portfolio()
+            self._reload_positions_table()
             
             # Notifier balance
             for callback in self.bot.callbacks.get('balance_update', []):
@@ -951,7 +957,7 @@ class ScalpingBotGUI:
                 except Exception:
                     pass
             
-            self.log_text.insert(tk.END, f"📂 État chargé: {len(self.bot.open_positions)} positions\n")
+            self._append_log(f"📂 État chargé: {len(self.bot.open_positions)} positions")
             
         except Exception as e:
             print(f"❌ Erreur chargement état: {e}")
@@ -970,644 +976,357 @@ class ScalpingBotGUI:
         self.websocket_label.config(text="🔴 WEBSOCKET DÉCONNECTÉ", fg='#ff4444')
     
     def on_balance_update(self, balance, open_positions_count):
-        """Callback pour mettre à jour la balance et stats - Thread-safe"""
-        def update_gui():
-            try:
-                # CORRECTION: Logique simplifiée et correcte
-                
-                # 1. BALANCE DISPONIBLE = Cash libre pour trading
-                available_balance = balance
-                
-                # 2. VALEUR DES POSITIONS OUVERTES (prix d'achat, pas prix actuel)
-                positions_value = 0
-                if hasattr(self.bot, 'open_positions') and self.bot.open_positions:
-                    for position in self.bot.open_positions:
-                        if position.get('status') == 'open':
-                            positions_value += position.get('value_usdt', 0)
-                
-                # 3. VALEUR TOTALE = Balance disponible + Positions ouvertes
-                total_portfolio_value = available_balance + positions_value
-                
-                # 4. P&L TOTAL = Somme des P&L réalisés + P&L des positions ouvertes
-                
-                # P&L réalisé des trades fermés
-                realized_pnl = 0.0
-                if hasattr(self.bot, 'closed_trades') and self.bot.closed_trades:
-                    for trade in self.bot.closed_trades:
-                        realized_pnl += trade.get('net_pnl', 0.0)
-                
-                # P&L non-réalisé des positions ouvertes
-                unrealized_pnl = 0.0
-                if hasattr(self.bot, 'open_positions') and self.bot.open_positions:
-                    for position in self.bot.open_positions:
-                        if position['status'] == 'open':
-                            entry_price = position['price']
-                            current_price = position.get('current_price', entry_price)
-                            quantity = position['quantity']
-                            unrealized_pnl += (current_price - entry_price) * quantity
-                
-                total_pnl = realized_pnl + unrealized_pnl
-                
-                # Calcul du pourcentage basé sur la balance initiale
-                initial_balance = self.bot.config_manager.get('INITIAL_BALANCE', 1000.0)
-                if isinstance(initial_balance, str):
-                    initial_balance = float(initial_balance)
-                
-                pnl_percent = (total_pnl / initial_balance) * 100 if initial_balance > 0 else 0
-                
-                # Mettre à jour les labels
-                self.balance_label.config(text=f"{available_balance:.2f} USDT")
-                self.total_value_label.config(text=f"{total_portfolio_value:.2f} USDT")
-                self.positions_count_label.config(text=f"{open_positions_count}")
-                
-                # P&L avec couleur correcte
-                pnl_color = '#00ff88' if total_pnl >= 0 else '#ff4444'
-                self.pnl_label.config(
-                    text=f"{total_pnl:+.2f} USDT ({pnl_percent:+.1f}%)",
-                    fg=pnl_color
-                )
-                
-                # NOUVEAU: Frais totaux
-                total_fees = getattr(self.bot, 'total_fees', 0.0)
-                self.fees_label.config(text=f"-{total_fees:.2f} USDT")
-                
-                # Debug pour comprendre le calcul
-                print(f"💰 DEBUG PORTFOLIO:")
-                print(f"   Balance disponible: {available_balance:.2f} USDT")
-                print(f"   Valeur positions: {positions_value:.2f} USDT")
-                print(f"   Valeur totale: {total_portfolio_value:.2f} USDT")
-                print(f"   Balance initiale: {initial_balance:.2f} USDT")
-                print(f"   P&L total: {total_pnl:+.2f} USDT ({pnl_percent:+.1f}%)")
-                print(f"   Frais totaux: -{total_fees:.2f} USDT")
-                
-                # Statistiques de trading
-                if hasattr(self.bot, 'total_trades'):
-                    self.trades_count_label.config(text=f"{self.bot.total_trades}")
-                    
-                    if self.bot.total_trades > 0:
-                        win_rate = (self.bot.winning_trades / self.bot.total_trades) * 100
-                        winrate_color = '#00ff88' if win_rate >= 60 else '#ff8800' if win_rate >= 40 else '#ff4444'
-                        self.winrate_label.config(text=f"{win_rate:.1f}%", fg=winrate_color)
-                
-                # Mode de trading
-                mode = "RÉEL" if not self.bot.simulation_mode else "SIMULATION"
-                mode_color = '#ff4444' if mode == "RÉEL" else '#88aaff'
-                self.mode_label.config(text=mode, fg=mode_color)
-                
-            except Exception as e:
-                print(f"❌ Erreur mise à jour balance GUI: {e}")
-        
-        # Exécuter dans le thread principal
-        self.root.after(0, update_gui)
+        """Callback pour mettre à jour la balance et stats - Thread-safe (redessiné à la prochaine image)"""
+        self.ui_scheduler.mark('balance', balance=balance, open_positions_count=open_positions_count)
+    
+    def _render_balance(self, state):
+        """Zone balance : dernier état connu uniquement"""
+        balance = state['balance']
+        open_positions_count = state['open_positions_count']
+        try:
+            # Agrégats tenus à jour par le moteur : aucune boucle sur positions ni historique
+            portfolio = self.bot.get_portfolio_snapshot()
+            
+            # 1. BALANCE DISPONIBLE = Cash libre pour trading
+            available_balance = balance
+            
+            # 2. VALEUR DES POSITIONS OUVERTES (prix d'achat, pas prix actuel)
+            positions_value = portfolio['invested']
+            
+            # 3. VALEUR TOTALE = Balance disponible + Positions ouvertes
+            total_portfolio_value = available_balance + positions_value
+            
+            # 4. P&L TOTAL = P&L réalisé des trades fermés + P&L latent des positions ouvertes
+            realized_pnl = portfolio['realized_pnl']
+            unrealized_pnl = portfolio['unrealized_pnl']
+            total_pnl = realized_pnl + unrealized_pnl
+            
+            # Calcul du pourcentage basé sur la balance initiale
+            initial_balance = self.bot.config_manager.get('INITIAL_BALANCE', 1000.0)
+            if isinstance(initial_balance, str):
+                initial_balance = float(initial_balance)
+            
+            pnl_percent = (total_pnl / initial_balance) * 100 if initial_balance > 0 else 0
+            
+            # Mettre à jour les labels
+            self.balance_label.config(text=f"{available_balance:.2f} USDT")
+            self.total_value_label.config(text=f"{total_portfolio_value:.2f} USDT")
+            self.positions_count_label.config(text=f"{open_positions_count}")
+            
+            # P&L avec couleur correcte
+            pnl_color = '#00ff88' if total_pnl >= 0 else '#ff4444'
+            self.pnl_label.config(
+                text=f"{total_pnl:+.2f} USDT ({pnl_percent:+.1f}%)",
+                fg=pnl_color
+            )
+            
+            # NOUVEAU: Frais totaux
+            self.fees_label.config(text=f"-{portfolio['fees']:.2f} USDT")
+            
+            # Statistiques de trading
+            self.trades_count_label.config(text=f"{portfolio['closed_trades']}")
+            if portfolio['closed_trades'] > 0:
+                win_rate = portfolio['win_rate']
+                winrate_color = '#00ff88' if win_rate >= 60 else '#ff8800' if win_rate >= 40 else '#ff4444'
+                self.winrate_label.config(text=f"{win_rate:.1f}%", fg=winrate_color)
+            
+            # Mode de trading
+            mode = "RÉEL" if not self.bot.simulation_mode else "SIMULATION"
+            mode_color = '#ff4444' if mode == "RÉEL" else '#88aaff'
+            self.mode_label.config(text=mode, fg=mode_color)
+            
+        except Exception as e:
+            print(f"❌ Erreur mise à jour balance GUI: {e}")
+    
+    def _render_positions(self, events):
+        """Zone positions : événements de la dernière image, dans l'ordre d'arrivée"""
+        for kind, payload in events:
+            if kind == 'trade':
+                self._show_trade(payload)
+            elif kind == 'closed':
+                self._show_position_closed(payload)
+            elif kind == 'update':
+                self._show_position_update(*payload)
+        self.positions_table.refresh()
+    
+    def _render_history(self, trades):
+        """Zone historique : trades fermés de la dernière image"""
+        for trade_data in trades:
+            self.add_closed_trade_to_history(trade_data)
+        self.trades_history_table.refresh()
+    
+    @staticmethod
+    def _format_price(price) -> str:
+        """Formatage adaptatif du prix (PEPE, etc.)"""
+        if not price:
+            return "N/A"
+        if price > 1:
+            return f"${price:.4f}"
+        elif price > 0.01:
+            return f"${price:.6f}"
+        elif price > 0.0001:
+            return f"${price:.8f}"
+        return f"${price:.10f}"
+    
+    def _add_position_row(self, position, key=None):
+        """Ligne du tableau des positions ouvertes (remplace la ligne de même clé)"""
+        timestamp = position.get('timestamp')
+        price = position.get('price', position.get('entry_price', 0))
+        stop_loss = position.get('stop_loss')
+        take_profit = position.get('take_profit')
+        self.positions_store.add({
+            'time': timestamp.isoformat() if hasattr(timestamp, 'isoformat') else str(timestamp or ''),
+            'time_text': timestamp.strftime('%H:%M:%S') if hasattr(timestamp, 'strftime') else str(timestamp or '')[11:19],
+            'symbol': position['symbol'],
+            'price': price,
+            'price_text': self._format_price(price),
+            'quantity': position.get('quantity', position.get('size', 0)),
+            'quantity_text': f"{position.get('quantity', position.get('size', 0)):.8f}",
+            'stop_loss': stop_loss,
+            'stop_loss_text': self._format_price(stop_loss),
+            'take_profit': take_profit,
+            'take_profit_text': self._format_price(take_profit),
+            'value': position.get('value_usdt', 0),
+            'value_text': f"{position.get('value_usdt', 0):.2f}€",
+            'momentum': position.get('change_24h', 0),
+            'momentum_text': f"{position.get('change_24h', 0):+.2f}%",
+            'tag': 'open'
+        }, key=key or position.get('order_id') or position['symbol'])
+    
+    def _reload_positions_table(self):
+        """Reconstruit le tableau depuis les positions ouvertes du bot (chargement, reset)"""
+        self.positions_store.clear()
+        if self.bot:
+            for position in self.bot.open_positions:
+                if position.get('status') == 'open':
+                    self._add_position_row(position)
+        self.positions_table.refresh()
     
     def on_position_closed(self, position):
         """Callback pour afficher les positions fermées - Thread-safe"""
-        def update_gui():
-            try:
-                symbol = position['symbol']
-                entry_price = position['price']
-                exit_price = position['exit_price']
-                pnl_usdt = position['pnl_usdt']
-                pnl_percent = position['pnl_percent']
-                timestamp = position['exit_timestamp'].strftime('%H:%M:%S')
-                
-                # Formatage prix
-                if entry_price > 1:
-                    entry_str = f"${entry_price:.4f}"
-                    exit_str = f"${exit_price:.4f}"
-                elif entry_price > 0.01:
-                    entry_str = f"${entry_price:.6f}"
-                    exit_str = f"${exit_price:.6f}"
-                else:
-                    entry_str = f"${entry_price:.10f}"
-                    exit_str = f"${exit_price:.10f}"
-                
-                # Couleur selon profit/perte
-                if pnl_usdt > 0:
-                    color = '#00aa44'
-                    emoji = '💰'
-                else:
-                    color = '#aa4400'
-                    emoji = '📉'
-                
-                # Afficher la fermeture
-                close_text = f"""[{timestamp}] {emoji} POSITION FERMÉE: {symbol}
-   📈 Entrée: {entry_str} → 📊 Sortie: {exit_str}
-   💵 P&L: ${pnl_usdt:+.2f} ({pnl_percent:+.2f}%)
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-"""
-                
-                # Ajouter en haut de la zone positions
-                current_text = self.positions_text.get(1.0, tk.END)
-                self.positions_text.delete(1.0, tk.END)
-                self.positions_text.insert(1.0, close_text)
-                self.positions_text.insert(tk.END, current_text)
-                
-                # Log aussi
-                self.log_text.insert(tk.END, f"[{timestamp}] 💰 FERMÉ: {symbol} P&L: ${pnl_usdt:+.2f}\n")
-                self.log_text.see(tk.END)
-                
-            except Exception as e:
-                print(f"❌ Erreur affichage fermeture GUI: {e}")
-        
-        # Exécuter dans le thread principal
-        self.root.after(0, update_gui)
+        self.ui_scheduler.push('positions', ('closed', position))
+    
+    def _show_position_closed(self, position):
+        """Retire la position fermée du tableau et journalise le résultat"""
+        try:
+            symbol = position['symbol']
+            pnl_usdt = position['pnl_usdt']
+            pnl_percent = position['pnl_percent']
+            timestamp = position['exit_timestamp'].strftime('%H:%M:%S')
+            emoji = '💰' if pnl_usdt > 0 else '📉'
+            
+            self.remove_closed_position_from_gui(position.get('order_id') or symbol)
+            self._append_log(f"[{timestamp}] {emoji} FERMÉ: {symbol} P&L: ${pnl_usdt:+.2f} ({pnl_percent:+.2f}%)")
+            
+        except Exception as e:
+            print(f"❌ Erreur affichage fermeture GUI: {e}")
     
     def on_trade_executed(self, trade_data):
         """Callback pour afficher les trades exécutés dans le GUI - Thread-safe"""
-        def update_gui():
-            try:
-                symbol = trade_data['symbol']
-                signal = trade_data['side']
-                operation = trade_data['operation']  # ACHAT ou VENTE
-                status = trade_data.get('status', 'open')
-                price = trade_data['price']
-                quantity = trade_data['quantity']
-                value_usdt = trade_data['value_usdt']
-                timestamp = trade_data['timestamp'].strftime('%H:%M:%S')
-                order_id = trade_data['order_id']
-                
-                # Formatage adaptatif du prix pour PEPE, etc.
-                if price > 1:
-                    price_str = f"${price:.4f}"
-                elif price > 0.01:
-                    price_str = f"${price:.6f}"
-                elif price > 0.0001:
-                    price_str = f"${price:.8f}"
-                else:
-                    price_str = f"${price:.10f}"
-                
-                if status == 'closed':
-                    # === POSITION FERMÉE (VENTE) ===
-                    exit_price = trade_data.get('exit_price', price)
-                    net_pnl = trade_data.get('net_pnl', 0)
-                    pnl_percent = trade_data.get('pnl_percent', 0)
-                    
-                    # Formatage prix de sortie
-                    if exit_price > 1:
-                        exit_price_str = f"${exit_price:.4f}"
-                    elif exit_price > 0.01:
-                        exit_price_str = f"${exit_price:.6f}"
-                    elif exit_price > 0.0001:
-                        exit_price_str = f"${exit_price:.8f}"
-                    else:
-                        exit_price_str = f"${exit_price:.10f}"
-                    
-                    # Couleur selon P&L
-                    if net_pnl > 0:
-                        color = '#00aa44'
-                        arrow = '✅'
-                        pnl_color = '#00aa44'
-                    else:
-                        color = '#ff4444'
-                        arrow = '❌'
-                        pnl_color = '#ff4444'
-                    
-                    # Affichage vente + P&L
-                    trade_text = f"""[{timestamp}] 💰 VENTE TERMINÉE: {symbol}
-   {arrow} Entrée: {price_str} → Sortie: {exit_price_str}
-   💸 P&L: {net_pnl:+.2f}€ ({pnl_percent:+.2f}%)
-   🔄 Position fermée et effacée
-
-"""
-                    
-                    # Ajouter à l'historique des trades fermés
-                    self.add_closed_trade_to_history(trade_data)
-                    
-                    # Retirer cette position de l'affichage des positions ouvertes
-                    self.remove_closed_position_from_gui(symbol)
-                    
-                else:
-                    # === POSITION OUVERTE (ACHAT) ===
-                    stop_loss = trade_data['stop_loss']
-                    take_profit = trade_data.get('take_profit')  # NOUVEAU: Take Profit
-                    change_24h = trade_data.get('change_24h', 0)
-                    system_type = trade_data.get('system_type', 'LEGACY')
-                    
-                    # Formatage Stop Loss
-                    if stop_loss > 1:
-                        sl_str = f"${stop_loss:.4f}"
-                    elif stop_loss > 0.01:
-                        sl_str = f"${stop_loss:.6f}"
-                    elif stop_loss > 0.0001:
-                        sl_str = f"${stop_loss:.8f}"
-                    else:
-                        sl_str = f"${stop_loss:.10f}"
-                    
-                    # Formatage Take Profit (si disponible)
-                    tp_str = ""
-                    if take_profit:
-                        if take_profit > 1:
-                            tp_str = f"${take_profit:.4f}"
-                        elif take_profit > 0.01:
-                            tp_str = f"${take_profit:.6f}"
-                        elif take_profit > 0.0001:
-                            tp_str = f"${take_profit:.8f}"
-                        else:
-                            tp_str = f"${take_profit:.10f}"
-                    
-                    # Affichage simplifié : Toujours BUY maintenant
-                    color = '#00aa44'  # Vert pour BUY
-                    arrow = '📈'       # Flèche montante
-                    
-                    # Récupérer les infos du Take Profit dynamique
-                    dynamic_tp_percent = trade_data.get('dynamic_tp_percent', 1.5)
-                    
-                    # Déterminer le niveau de potentiel pour l'affichage
-                    if dynamic_tp_percent >= 3.0:
-                        potential_level = "ÉLEVÉ 🔥"
-                        potential_color = "#ff6600"
-                    elif dynamic_tp_percent >= 2.0:
-                        potential_level = "MOYEN 📈"
-                        potential_color = "#ffaa00"
-                    else:
-                        potential_level = "STABLE 📊"
-                        potential_color = "#00aaff"
-                    
-                    # Affichage selon le système
-                    if system_type == 'SIMPLE_STOP_TAKE_PROFIT' and tp_str:
-                        # NOUVEAU système avec Take Profit Dynamique
-                        trade_text = f"""[{timestamp}] 🎮 POSITION OUVERTE: {symbol}
-   {arrow} BUY {operation} | Potentiel: {potential_level} ({dynamic_tp_percent:.1f}%)
-   💰 Prix: {price_str} | Quantité: {quantity:.8f}
-   🛑 Stop Loss: {sl_str} | 🎯 Take Profit: {tp_str}
-   💸 Valeur: {value_usdt:.2f}€ | Momentum: {change_24h:+.2f}%
-
-"""
-                    else:
-                        # Ancien système : Afficher seulement Stop Loss (BUY uniquement)
-                        trade_text = f"""[{timestamp}] 🎮 POSITION OUVERTE: {symbol}
-   {arrow} BUY {operation} | Momentum: {change_24h:+.2f}%
-   💰 Prix: {price_str} | Quantité: {quantity:.8f}
-   🎯 Stop Loss: {sl_str}
-   💸 Valeur: {value_usdt:.2f}€ | ID: {order_id}
-
-"""
+        if trade_data.get('status', 'open') == 'closed':
+            self.ui_scheduler.push('history', trade_data)
+        self.ui_scheduler.push('positions', ('trade', trade_data))
+    
+    def _show_trade(self, trade_data):
+        """Trade exécuté : ligne ajoutée (achat) ou retirée (vente) du tableau des positions"""
+        try:
+            symbol = trade_data['symbol']
+            timestamp = trade_data['timestamp'].strftime('%H:%M:%S')
+            price_str = self._format_price(trade_data['price'])
+            
+            if trade_data.get('status', 'open') == 'closed':
+                # === POSITION FERMÉE (VENTE) ===
+                net_pnl = trade_data.get('net_pnl', 0)
+                pnl_percent = trade_data.get('pnl_percent', 0)
+                arrow = '✅' if net_pnl > 0 else '❌'
+                exit_price_str = self._format_price(trade_data.get('exit_price', trade_data['price']))
                 
-                # Ajouter le texte dans la zone positions
-                self.positions_text.config(state='normal')
-                self.positions_text.insert(tk.END, trade_text)
-                self.positions_text.tag_add("trade_line", "end-2l", "end-1l")
-                self.positions_text.tag_config("trade_line", foreground=color)
-                self.positions_text.see(tk.END)
-                self.positions_text.config(state='disabled')
+                # L'historique des trades fermés est redessiné par sa propre zone (_render_history)
+                self.remove_closed_position_from_gui(trade_data.get('order_id') or symbol)
+                self._append_log(f"[{timestamp}] 💰 VENTE TERMINÉE: {symbol} {arrow} {price_str} → {exit_price_str} "
+                                 f"P&L: {net_pnl:+.2f}€ ({pnl_percent:+.2f}%)")
+            else:
+                # === POSITION OUVERTE (ACHAT) ===
+                self._add_position_row(trade_data)
+                tp_percent = trade_data.get('dynamic_tp_percent')
+                tp_info = f" | TP {tp_percent:.1f}%" if tp_percent else ""
+                self._append_log(f"[{timestamp}] 🎮 POSITION OUVERTE: {symbol} @ {price_str}"
+                                 f" | {trade_data['value_usdt']:.2f}€{tp_info}")
                 
-            except Exception as e:
-                print(f"❌ Erreur affichage trade GUI: {e}")
-        
-        # Exécuter dans le thread principal
-        self.root.after(0, update_gui)
+        except Exception as e:
+            print(f"❌ Erreur affichage trade GUI: {e}")
     
     def refresh_all_displays(self):
         """Rafraîchit complètement tous les affichages après un reset"""
         try:
-            # Nettoyer complètement l'affichage des positions
-            self.positions_text.config(state='normal')
-            self.positions_text.delete(1.0, tk.END)
-            
-            # Si aucune position ouverte, afficher message de reset
-            if not self.bot or not hasattr(self.bot, 'open_positions') or not self.bot.open_positions:
-                self.positions_text.insert(1.0, "🔄 SIMULATION RÉINITIALISÉE\n\n✅ Aucune position ouverte\n✅ Balance remise à zéro\n\n")
-            else:
-                # S'il reste des positions (ne devrait pas arriver après reset), les afficher
-                for position in self.bot.open_positions:
-                    if position.get('status') == 'open':
-                        # Réafficher la position
-                        pass
-                        
-            self.positions_text.config(state='disabled')
+            self._reload_positions_table()
             
             # Nettoyer aussi l'historique
-            self.trades_history_text.config(state='normal') 
-            self.trades_history_text.delete(1.0, tk.END)
-            self.trades_history_text.insert(1.0, "🔄 Historique réinitialisé - Aucun trade fermé\n")
-            self.trades_history_text.config(state='disabled')
+            self.closed_trades = []
+            self.history_store.clear()
+            self.trades_history_table.refresh()
             
             print("✅ Affichages rafraîchis après reset")
             
         except Exception as e:
             print(f"❌ Erreur rafraîchissement affichages: {e}")
     
-    def remove_closed_position_from_gui(self, symbol):
-        """Efface les positions fermées du GUI"""
+    def remove_closed_position_from_gui(self, key):
+        """Efface une position fermée du tableau (clé : order_id, ou symbole pour l'ancien système)"""
         try:
-            # Nettoyer l'affichage des positions ouvertes
-            self.positions_text.config(state='normal')
-            
-            # Récupérer tout le texte
-            current_text = self.positions_text.get(1.0, tk.END)
-            lines = current_text.split('\n')
-            
-            # Filtrer les lignes - Supprimer TOUT le bloc de la position fermée
-            filtered_lines = []
-            skip_until_empty_line = False
-            
-            for line in lines:
-                # Si on trouve une ligne avec ce symbole ET "TRADE OUVERT", commencer à skip
-                if symbol in line and 'TRADE OUVERT' in line:
-                    skip_until_empty_line = True
-                    print(f"🗑️ Suppression position fermée: {symbol}")
-                    continue
-                
-                # Si on est en mode skip, ignorer les lignes jusqu'à une ligne vide
-                if skip_until_empty_line:
-                    if line.strip() == '':  # Ligne vide = fin du bloc
-                        skip_until_empty_line = False
-                    continue
-                
-                # Garder toutes les autres lignes
-                filtered_lines.append(line)
-            
-            # Réafficher le texte filtré
-            self.positions_text.delete(1.0, tk.END)
-            self.positions_text.insert(1.0, '\n'.join(filtered_lines))
-            
-            self.positions_text.config(state='disabled')
-            print(f"✅ Position {symbol} supprimée de l'affichage")
-            
+            if self.positions_store.remove(key):
+                print(f"✅ Position {key} supprimée de l'affichage")
         except Exception as e:
             print(f"❌ Erreur suppression position fermée: {e}")
     
     def on_exchange_status(self, status, details, testnet):
         """Callback pour le statut de connexion exchange - Thread-safe"""
-        def update_gui():
-            if status == 'connected':
-                self.exchange_label.config(
-                    text=f"📡 Binance: 🟢 CONNECTÉ ({details})",
-                    fg='#00aa44'
-                )
-            elif status == 'auth_error':
-                self.exchange_label.config(
-                    text="📡 Binance: 🔴 ERREUR AUTH",
-                    fg='#ff4444'
-                )
-            elif status == 'network_error':
-                self.exchange_label.config(
-                    text="📡 Binance: 🔴 ERREUR RÉSEAU",
-                    fg='#ffaa00'
-                )
-            else:
-                self.exchange_label.config(
-                    text="📡 Binance: 🔴 DÉCONNECTÉ",
-                    fg='#ff4444'
-                )
-        
-        # Exécuter dans le thread principal
-        self.root.after(0, update_gui)
+        self.ui_scheduler.mark('connection', exchange=(status, details))
+    
+    def _show_exchange_status(self, status, details):
+        """Label de connexion Binance"""
+        if status == 'connected':
+            self.exchange_label.config(
+                text=f"📡 Binance: 🟢 CONNECTÉ ({details})" if details else "📡 Binance: 🟢 CONNECTÉ",
+                fg='#00aa44'
+            )
+        elif status == 'auth_error':
+            self.exchange_label.config(
+                text="📡 Binance: 🔴 ERREUR AUTH",
+                fg='#ff4444'
+            )
+        elif status == 'network_error':
+            self.exchange_label.config(
+                text="📡 Binance: 🔴 ERREUR RÉSEAU",
+                fg='#ffaa00'
+            )
+        else:
+            self.exchange_label.config(
+                text="📡 Binance: 🔴 DÉCONNECTÉ",
+                fg='#ff4444'
+            )
     
     def on_log_message(self, message):
         """Callback pour les messages de log - Thread-safe"""
-        def update_gui():
-            self.log_text.insert(tk.END, f"[{datetime.now().strftime('%H:%M:%S')}] {message}\n")
-            self.log_text.see(tk.END)
-            
-            # Limiter les logs
-            lines = self.log_text.get(1.0, tk.END).split('\n')
-            if len(lines) > 100:
-                self.log_text.delete(1.0, f"{len(lines)-100}.0")
-        
-        # Exécuter dans le thread principal
-        self.root.after(0, update_gui)
+        self._append_log(f"[{datetime.now().strftime('%H:%M:%S')}] {message}")
+    
+    def _append_log(self, line: str):
+        """Empile une ligne de log (depuis n'importe quel thread)"""
+        self.log_buffer.append(line)
+    
+    def _drain_log_buffer(self):
+        """Timer du thread principal : insère les lignes en attente en un seul lot et coupe par index de ligne"""
+        try:
+            text, excess = self.log_buffer.drain()
+            if text:
+                self.log_text.insert(tk.END, text)
+                # Limiter les logs sans relire le widget
+                if excess:
+                    self.log_text.delete('1.0', f"{excess + 1}.0")
+                self.log_text.see(tk.END)
+        except Exception as e:
+            print(f"❌ Erreur affichage logs: {e}")
+        self.root.after(self.log_flush_ms, self._drain_log_buffer)
     
     def on_scan_update(self, scan_stats, opportunities):
         """Callback pour mise à jour scan avec tous les détails - Thread-safe"""
-        def update_gui():
-            self.last_scan_stats = scan_stats
-            self.last_opportunities = opportunities
-            
-            # Mettre à jour les compteurs détaillés comme l'ancien
-            if hasattr(scan_stats, 'get'):
-                total = scan_stats.get('total_tickers', 0)
-                accepted = scan_stats.get('accepted_count', scan_stats.get('usdt_count', 0))
-                filtered = scan_stats.get('filtered_count', 0)
-                selected = scan_stats.get('opportunities_found', scan_stats.get('selected_count', 0))
-                scan_time = scan_stats.get('scan_time', 0)
-                
-                self.scan_total_label.config(text=f"Total Binance: {total}")
-                self.scan_usdt_label.config(text=f"Paires acceptées: {accepted}")
-                self.scan_filtered_label.config(text=f"Après filtres: {filtered}")
-                self.scan_selected_label.config(text=f"Sélectionnées: {selected}")
-                self.last_scan_label.config(text=f"Dernier scan: {datetime.now().strftime('%H:%M:%S')} ({scan_time:.1f}s)")
-            
-            # Configuration des paires
-            quote_currencies = self.config_manager.get('QUOTE_CURRENCIES', 'USDT BUSD BTC ETH BNB')
-            
-            # Critères de scan
-            min_volume = self.config_manager.get('MIN_VOLUME_24H', 2000000) / 1_000_000
-            min_pump = self.config_manager.get('MIN_PUMP_3MIN', 0.5)
-            rsi_min = self.config_manager.get('RSI_MIN_SCALPING', 40)
-            rsi_max = self.config_manager.get('RSI_MAX_SCALPING', 80)
-            self.scan_criteria_label.config(text=f"Volume ≥{min_volume:.1f}M, Pump ≥{min_pump}%, RSI {rsi_min}-{rsi_max}")
-            
-            # Plus d'affichage des cryptos sélectionnées (remplacé par historique)
-            pass
+        self.ui_scheduler.mark('scan', scan_stats=scan_stats, opportunities=opportunities)
+    
+    def _render_scan(self, state):
+        """Zone statistiques de scan : dernier scan uniquement"""
+        scan_stats = state['scan_stats']
+        opportunities = state['opportunities']
+        self.last_scan_stats = scan_stats
+        self.last_opportunities = opportunities
+        
+        # Mettre à jour les compteurs détaillés comme l'ancien
+        if hasattr(scan_stats, 'get'):
+            total = scan_stats.get('total_tickers', 0)
+            accepted = scan_stats.get('accepted_count', scan_stats.get('usdt_count', 0))
+            filtered = scan_stats.get('filtered_count', 0)
+            selected = scan_stats.get('opportunities_found', scan_stats.get('selected_count', 0))
+            scan_time = scan_stats.get('scan_time', 0)
+            
+            self.scan_total_label.config(text=f"Total Binance: {total}")
+            self.scan_usdt_label.config(text=f"Paires acceptées: {accepted}")
+            self.scan_filtered_label.config(text=f"Après filtres: {filtered}")
+            self.scan_selected_label.config(text=f"Sélectionnées: {selected}")
+            self.last_scan_label.config(text=f"Dernier scan: {datetime.now().strftime('%H:%M:%S')} ({scan_time:.1f}s)")
+        
+        # Configuration des paires
+        quote_currencies = self.config_manager.get('QUOTE_CURRENCIES', 'USDT BUSD BTC ETH BNB')
         
-        # Exécuter dans le thread principal
-        self.root.after(0, update_gui)
+        # Critères de scan
+        min_volume = self.config_manager.get('MIN_VOLUME_24H', 2000000) / 1_000_000
+        min_pump = self.config_manager.get('MIN_PUMP_3MIN', 0.5)
+        rsi_min = self.config_manager.get('RSI_MIN_SCALPING', 40)
+        rsi_max = self.config_manager.get('RSI_MAX_SCALPING', 80)
+        self.scan_criteria_label.config(text=f"Volume ≥{min_volume:.1f}M, Pump ≥{min_pump}%, RSI {rsi_min}-{rsi_max}")
+        
+        # Plus d'affichage des cryptos sélectionnées (remplacé par historique)
+        pass
     
     def add_closed_trade_to_history(self, trade_data):
-        """Ajoute un trade fermé à l'historique avec affichage détaillé sur 2 lignes"""
+        """Ajoute un trade fermé en tête de l'historique (ligne du tableau virtualisé)"""
         try:
-            # Extraction des données de base
-            symbol = trade_data['symbol']
-            entry_price = trade_data['price']
-            exit_price = trade_data.get('exit_price', entry_price)
-            net_pnl = trade_data.get('net_pnl', 0)
-            pnl_percent = trade_data.get('pnl_percent', 0)
-            total_fees = trade_data.get('total_fees', 0)
-            
-            # Gestion des timestamps (string ou datetime)
-            timestamp = trade_data.get('timestamp', '')
-            if isinstance(timestamp, str):
-                try:
-                    from datetime import datetime
-                    timestamp_dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                    timestamp_str = timestamp_dt.strftime('%d/%m %H:%M:%S')
-                except:
-                    timestamp_str = timestamp[:16] if len(timestamp) > 16 else timestamp
-            else:
-                timestamp_str = timestamp.strftime('%d/%m %H:%M:%S') if timestamp else "N/A"
-            
-            # Calcul de la durée
-            duration_str = "N/A"
-            try:
-                entry_time = trade_data.get('entry_time', trade_data.get('timestamp'))
-                exit_time = trade_data.get('exit_time', trade_data.get('closed_at'))
-                if entry_time and exit_time:
-                    if isinstance(entry_time, str):
-                        entry_dt = datetime.fromisoformat(entry_time.replace('Z', '+00:00'))
-                    else:
-                        entry_dt = entry_time
-                    if isinstance(exit_time, str):
-                        exit_dt = datetime.fromisoformat(exit_time.replace('Z', '+00:00'))
-                    else:
-                        exit_dt = exit_time
-                    duration = exit_dt - entry_dt
-                    minutes = int(duration.total_seconds() // 60)
-                    seconds = int(duration.total_seconds() % 60)
-                    duration_str = f"{minutes}m{seconds:02d}s"
-            except Exception as e:
-                duration_str = "N/A"
-            
-            # Ajouter à la liste
             self.closed_trades.append(trade_data)
-            
-            # Formatage des prix avec précision adaptative
-            if entry_price > 1:
-                entry_str = f"${entry_price:.4f}"
-                exit_str = f"${exit_price:.4f}"
-            elif entry_price > 0.01:
-                entry_str = f"${entry_price:.6f}"
-                exit_str = f"${exit_price:.6f}"
-            elif entry_price > 0.0001:
-                entry_str = f"${entry_price:.8f}"
-                exit_str = f"${exit_price:.8f}"
-            else:
-                entry_str = f"${entry_price:.10f}"
-                exit_str = f"${exit_price:.10f}"
-            
-            # Couleurs et icônes selon P&L
-            if net_pnl > 0:
-                main_color = '#00cc55'  # Vert vif pour les gains
-                pnl_icon = '💚'
-                perf_icon = '📈'
-                tag_name = "profit"
-            else:
-                main_color = '#ff3366'  # Rouge vif pour les pertes
-                pnl_icon = '💔'
-                perf_icon = '📉'
-                tag_name = "loss"
-            
-            # Données supplémentaires avec valeurs par défaut
-            exit_reason = trade_data.get('exit_reason', 'N/A')
-            momentum = trade_data.get('change_24h', 0)
-            initial_tp = trade_data.get('take_profit', 0)
-            dynamic_tp_percent = trade_data.get('dynamic_tp_percent', 0)
-            
-            # Formatage du momentum avec couleur
-            if momentum > 0:
-                momentum_str = f"+{momentum:.1f}%"
-                momentum_icon = "🚀"
-            elif momentum < 0:
-                momentum_str = f"{momentum:.1f}%"
-                momentum_icon = "📊"
-            else:
-                momentum_str = "0.0%"
-                momentum_icon = "➖"
-            
-            # Formatage de la raison de fermeture avec emoji
-            reason_icons = {
-                'TAKE_PROFIT': '🎯',
-                'TAKE_PROFIT_INTELLIGENT': '🎯',
-                'TP_MOMENTUM_DECLINE': '📉',      # TP dépassé + momentum devient négatif
-                'TP_TRAILING_STOP': '📉',        # Trailing stop après TP (baisse depuis plus haut)
-                'TP_TIME_LIMIT': '⏰',           # Trop longtemps au TP sans momentum
-                'STOP_LOSS': '🛑',
-                'MOMENTUM_DECLINE': '📊',
-                'TIMEOUT': '⏱️',
-                'MANUAL': '👤',
-                'TRAILING_STOP': '📈',
-                'IMMEDIATE_EXIT': '🚨',           # Chute significative immédiate
-                'RAPID_EXIT': '⚡',              # Chute rapide dans les premières minutes
-                'EARLY_PROFIT_EXIT': '💰',       # Vente anticipée sur profit + momentum faible
-                'STRONG_PROFIT_EXIT': '🎉',      # Vente sur profit excellent
-                'TRAILING_STOP_PROFIT': '📉',    # Trailing stop sur profit
-                'STAGNATION_TIMEOUT': '💤',      # Position stagnante
-                'NEGATIVE_TIMEOUT': '⬇️',        # Position négative trop longtemps
-                'ABSOLUTE_TIMEOUT': '⏰'         # Timeout absolu
-            }
-            reason_icon = reason_icons.get(exit_reason, '❓')
-            
-            # LIGNE 1: Informations principales
-            line1 = f"[{timestamp_str}] {pnl_icon} {symbol:<10} {entry_str} → {exit_str} {perf_icon} {net_pnl:+.2f}€ ({pnl_percent:+.1f}%) ⏱️{duration_str}\n"
-            
-            # LIGNE 2: Détails techniques (avec indentation pour clarté)
-            tp_info = f"TP: {initial_tp:.4f}" if initial_tp > 0 else "TP: N/A"
-            if dynamic_tp_percent > 0:
-                tp_info += f"→{dynamic_tp_percent:.1f}%"
-            
-            line2 = f"    └─ {reason_icon} {exit_reason} • {momentum_icon} Momentum: {momentum_str} • 💰 Frais: {total_fees:.2f}€ • {tp_info}\n"
-            
-            # Combinaison des deux lignes
-            trade_lines = line1 + line2
-            
-            # Insertion dans l'interface
-            self.trades_history_text.config(state='normal')
-            current_text = self.trades_history_text.get(1.0, tk.END)
-            self.trades_history_text.delete(1.0, tk.END)
-            
-            # Si c'est le premier trade, supprimer le message d'attente
-            if "Aucun trade fermé" in current_text:
-                current_text = ""
-            
-            # Insérer les nouvelles lignes au début
-            self.trades_history_text.insert(1.0, trade_lines)
-            self.trades_history_text.insert(tk.END, current_text)
-            
-            # COLORATION AVANCÉE: Colorier les deux lignes avec nuances
-            
-            # Ligne 1 - Couleur principale pour P&L
-            line1_start = "1.0"
-            line1_end = "1.0 lineend"
-            unique_tag_line1 = f"{tag_name}_main_{len(self.closed_trades)}"
-            self.trades_history_text.tag_add(unique_tag_line1, line1_start, line1_end)
-            self.trades_history_text.tag_config(unique_tag_line1, foreground=main_color, font=("Consolas", 9, "bold"))
-            
-            # Ligne 2 - Couleur plus claire pour les détails
-            line2_start = "2.0"
-            line2_end = "2.0 lineend"
-            detail_color = '#009944' if net_pnl > 0 else '#cc2244'
-            unique_tag_line2 = f"{tag_name}_detail_{len(self.closed_trades)}"
-            self.trades_history_text.tag_add(unique_tag_line2, line2_start, line2_end)
-            self.trades_history_text.tag_config(unique_tag_line2, foreground=detail_color, font=("Consolas", 8))
-            
-            # Configuration des tags génériques
-            self.trades_history_text.tag_config("profit", foreground='#00cc55', font=("Consolas", 9, "bold"))
-            self.trades_history_text.tag_config("loss", foreground='#ff3366', font=("Consolas", 9, "bold"))
-            
-            # Limiter à 25 trades max (50 lignes) pour performance
-            lines = self.trades_history_text.get(1.0, tk.END).split('\n')
-            if len(lines) > 50:  # 25 trades * 2 lignes
-                truncated = '\n'.join(lines[:50])
-                self.trades_history_text.delete(1.0, tk.END)
-                self.trades_history_text.insert(1.0, truncated)
-                
-                # Réappliquer les couleurs après troncature
-                self._reapply_trade_colors()
-            
-            self.trades_history_text.config(state='disabled')
-            
-            print(f"✅ Trade ajouté à l'historique: {symbol} P&L: {net_pnl:+.2f}€")
+            self.history_store.add(self._history_row(trade_data))
             
         except Exception as e:
-            print(f"❌ Erreur ajout trade historique détaillé: {e}")
-            import traceback
-            traceback.print_exc()
+            print(f"❌ Erreur ajout trade historique: {e}")
     
-    def _reapply_trade_colors(self):
-        """Réapplique les couleurs à toutes les lignes de trades"""
-        try:
-            lines = self.trades_history_text.get(1.0, tk.END).split('\n')
-            for i, line in enumerate(lines):
-                if line.strip() and not "Aucun trade fermé" in line:
-                    line_start = f"{i+1}.0"
-                    line_end = f"{i+1}.0 lineend"
-                    
-                    # Déterminer la couleur selon le contenu
-                    if "✅" in line:
-                        color = '#00aa44'  # Vert pour profit
-                    elif "❌" in line:
-                        color = '#ff4444'  # Rouge pour perte
-                    else:
-                        continue
-                    
-                    # Appliquer la couleur
-                    tag_name = f"line_{i}"
-                    self.trades_history_text.tag_add(tag_name, line_start, line_end)
-                    self.trades_history_text.tag_config(tag_name, foreground=color)
-                    
-        except Exception as e:
-            print(f"❌ Erreur réapplication couleurs: {e}")
+    @staticmethod
+    def _parse_time(value):
+        """datetime depuis un datetime ou une chaîne ISO, None sinon"""
+        if isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value.replace('Z', '+00:00'))
+            except ValueError:
+                return None
+        return value
+    
+    def _history_row(self, trade_data):
+        """Valeurs brutes (tri) et textes affichés d'un trade fermé"""
+        entry_price = trade_data['price']
+        exit_price = trade_data.get('exit_price', entry_price)
+        net_pnl = trade_data.get('net_pnl', 0)
+        pnl_percent = trade_data.get('pnl_percent', 0)
+        total_fees = trade_data.get('total_fees', 0)
+        exit_reason = trade_data.get('exit_reason', 'N/A')
+        
+        # Horodatage de sortie (string ou datetime)
+        exit_dt = self._parse_time(trade_data.get('exit_time', trade_data.get('closed_at')))
+        timestamp_dt = exit_dt or self._parse_time(trade_data.get('timestamp'))
+        
+        # Calcul de la durée
+        duration = None
+        entry_dt = self._parse_time(trade_data.get('entry_time', trade_data.get('timestamp')))
+        if entry_dt and exit_dt:
+            try:
+                duration = (exit_dt - entry_dt).total_seconds()
+            except TypeError:
+                duration = None
+        
+        return {
+            'time': timestamp_dt.isoformat() if timestamp_dt else '',
+            'time_text': timestamp_dt.strftime('%d/%m %H:%M:%S') if timestamp_dt else "N/A",
+            'symbol': trade_data['symbol'],
+            'entry': entry_price,
+            'entry_text': self._format_price(entry_price),
+            'exit': exit_price,
+            'exit_text': self._format_price(exit_price),
+            'pnl': net_pnl,
+            'pnl_text': f"{'💚' if net_pnl > 0 else '💔'} {net_pnl:+.2f}€",
+            'pnl_percent': pnl_percent,
+            'pnl_percent_text': f"{pnl_percent:+.1f}%",
+            'duration': duration,
+            'duration_text': f"{int(duration // 60)}m{int(duration % 60):02d}s" if duration is not None else "N/A",
+            'reason': exit_reason,
+            'reason_text': f"{self.REASON_ICONS.get(exit_reason, '❓')} {exit_reason}",
+            'fees': total_fees,
+            'fees_text': f"{total_fees:.2f}€",
+            'tag': 'profit' if net_pnl > 0 else 'loss'
+        }
     
     def update_performance(self, balance: float, pnl: float, trades_count: int, win_rate: float, positions_count: int):
         """Met à jour les statistiques de performance comme l'ancien GUI"""
@@ -1622,46 +1341,37 @@ class ScalpingBotGUI:
     
     def update_connection_status(self, websocket_connected: bool, exchange_connected: bool):
         """Met à jour le statut des connexions - Thread-safe"""
-        def update_gui():
+        self.ui_scheduler.mark('connection', websocket=websocket_connected,
+                               exchange=('connected' if exchange_connected else 'disconnected', None))
+    
+    def _render_connection(self, state):
+        """Zone connexions : WebSocket et Binance"""
+        if 'websocket' in state:
+            websocket_connected = state['websocket']
             ws_text = "🟢 CONNECTÉ" if websocket_connected else "🔴 DÉCONNECTÉ"
             ws_color = '#00ff88' if websocket_connected else '#ff4444'
             self.websocket_label.config(text=f"⚡ WebSocket: {ws_text}", fg=ws_color)
-            
-            ex_text = "🟢 CONNECTÉ" if exchange_connected else "🔴 DÉCONNECTÉ"
-            ex_color = '#00ff88' if exchange_connected else '#ff4444'
-            self.exchange_label.config(text=f"📡 Binance: {ex_text}", fg=ex_color)
         
-        # Exécuter dans le thread principal
-        self.root.after(0, update_gui)
+        if 'exchange' in state:
+            self._show_exchange_status(*state['exchange'])
     
     def on_position_update(self, action, symbol, position_data):
         """Callback pour mise à jour positions - Thread-safe"""
-        def update_gui():
-            timestamp = datetime.now().strftime('%H:%M:%S')
-            
-            if action == 'open':
-                direction = position_data.get('direction', 'N/A')
-                price = position_data.get('entry_price', 0)
-                # Formatage adaptatif du prix
-                if price > 1:
-                    price_str = f"${price:.4f}"
-                elif price > 0.01:
-                    price_str = f"${price:.6f}" 
-                elif price > 0.0001:
-                    price_str = f"${price:.8f}"
-                else:
-                    price_str = f"${price:.10f}"
-                    
-                self.positions_text.insert(tk.END, f"[{timestamp}] 🟢 OUVERT: {symbol} {direction.upper()} @ {price_str}\n")
-            elif action == 'close':
-                pnl = position_data.get('pnl', 0)
-                color = "🟢" if pnl > 0 else "🔴"
-                self.positions_text.insert(tk.END, f"[{timestamp}] {color} FERMÉ: {symbol} - P&L: {pnl:+.2f} USDT\n")
-            
-            self.positions_text.see(tk.END)
-        
-        # Exécuter dans le thread principal
-        self.root.after(0, update_gui)
+        self.ui_scheduler.push('positions', ('update', (action, symbol, position_data)))
+    
+    def _show_position_update(self, action, symbol, position_data):
+        """Ancien système : ligne ajoutée ou retirée du tableau des positions (clé : symbole)"""
+        timestamp = datetime.now().strftime('%H:%M:%S')
+        
+        if action == 'open':
+            self._add_position_row({**position_data, 'symbol': symbol, 'timestamp': datetime.now()}, key=symbol)
+            price_str = self._format_price(position_data.get('entry_price', 0))
+            self._append_log(f"[{timestamp}] 🟢 OUVERT: {symbol} {position_data.get('direction', 'N/A').upper()} @ {price_str}")
+        elif action == 'close':
+            self.remove_closed_position_from_gui(symbol)
+            pnl = position_data.get('pnl', 0)
+            color = "🟢" if pnl > 0 else "🔴"
+            self._append_log(f"[{timestamp}] {color} FERMÉ: {symbol} - P&L: {pnl:+.2f} USDT")
     
     def create_config_tab(self):
         """SUPPRIMÉ - Configuration redondante"""
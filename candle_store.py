@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stockage de Bougies Multi-Timeframe
+Ingestion des klines 1m (WebSocket ou backfill REST) et agrégation incrémentale
+en 3m, 5m, 15m, 1h à la demande
+"""
+
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+ONE_MINUTE_MS = 60_000
+
+TIMEFRAME_MINUTES = {
+    '1m': 1,
+    '3m': 3,
+    '5m': 5,
+    '15m': 15,
+    '30m': 30,
+    '1h': 60,
+    '4h': 240
+}
+
+
+def timeframe_to_ms(timeframe: str) -> int:
+    """Durée d'un timeframe en millisecondes ('5m' -> 300000)"""
+    if timeframe not in TIMEFRAME_MINUTES:
+        raise ValueError(f"Timeframe non supporté: {timeframe}")
+    return TIMEFRAME_MINUTES[timeframe] * ONE_MINUTE_MS
+
+
+class _OHLCVArrays:
+    """Colonnes OHLCV compactes (array) avec index absolu stable malgré la purge"""
+
+    def __init__(self):
+        self.ts = array('q')
+        self.open = array('d')
+        self.high = array('d')
+        self.low = array('d')
+        self.close = array('d')
+        self.volume = array('d')
+        self.offset = 0  # Index absolu de la première bougie conservée
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    @property
+    def end(self) -> int:
+        """Index absolu après la dernière bougie"""
+        return self.offset + len(self.ts)
+
+    def append(self, ts: int, o: float, h: float, l: float, c: float, v: float):
+        self.ts.append(ts)
+        self.open.append(o)
+        self.high.append(h)
+        self.low.append(l)
+        self.close.append(c)
+        self.volume.append(v)
+
+    def set_last(self, o: float, h: float, l: float, c: float, v: float):
+        self.open[-1] = o
+        self.high[-1] = h
+        self.low[-1] = l
+        self.close[-1] = c
+        self.volume[-1] = v
+
+    def row(self, i: int) -> List:
+        return [self.ts[i], self.open[i], self.high[i], self.low[i], self.close[i], self.volume[i]]
+
+    def trim(self, max_len: int):
+        """Purge les plus anciennes bougies par blocs (coût amorti)"""
+        excess = len(self.ts) - max_len
+        if excess <= 0 or excess < max(1, max_len // 4):
+            return
+        for column in (self.ts, self.open, self.high, self.low, self.close, self.volume):
+            del column[:excess]
+        self.offset += excess
+
+
+class _Aggregate:
+    """Barres agrégées d'un timeframe + curseur sur les bougies 1m déjà intégrées"""
+
+    def __init__(self, timeframe_ms: int):
+        self.timeframe_ms = timeframe_ms
+        self.bars = _OHLCVArrays()
+        self.cursor = 0  # Index absolu de la prochaine bougie 1m fermée à intégrer
+
+    def fold(self, ts: int, o: float, h: float, l: float, c: float, v: float):
+        bucket = ts - ts % self.timeframe_ms
+        bars = self.bars
+        if len(bars) and bars.ts[-1] == bucket:
+            bars.set_last(bars.open[-1], max(bars.high[-1], h), min(bars.low[-1], l),
+                          c, bars.volume[-1] + v)
+        else:
+            bars.append(bucket, o, h, l, c, v)
+
+
+class SymbolCandles:
+    """Historique 1m d'un symbole et ses agrégats"""
+
+    def __init__(self, max_candles: int):
+        self.max_candles = max_candles
+        self.base = _OHLCVArrays()
+        self.last_closed = True
+        self.aggregates = {}  # timeframe -> _Aggregate
+        self.last_update = 0.0
+
+    def ingest(self, ts: int, o: float, h: float, l: float, c: float, v: float, is_closed: bool) -> bool:
+        """Ajoute ou met à jour une bougie 1m, retourne False si elle est trop ancienne"""
+        base = self.base
+        if len(base) and ts < base.ts[-1]:
+            return False
+
+        if len(base) and ts == base.ts[-1]:
+            base.set_last(o, h, l, c, v)
+            # Bougie déjà intégrée dans un agrégat : reconstruction au prochain accès
+            if any(aggregate.cursor >= base.end for aggregate in self.aggregates.values()):
+                self.aggregates.clear()
+        else:
+            base.append(ts, o, h, l, c, v)
+        self.last_closed = is_closed
+        self.last_update = time.time()
+        base.trim(self.max_candles)
+        return True
+
+    def _closed_end(self) -> int:
+        """Index absolu après la dernière bougie 1m fermée"""
+        return self.base.end if self.last_closed else self.base.end - 1
+
+    def bars(self, timeframe: str, limit: int) -> List[List]:
+        """Dernières barres du timeframe, la barre en cours incluse"""
+        base = self.base
+        if not len(base):
+            return []
+
+        if timeframe == '1m':
+            start = max(0, len(base) - limit)
+            return [base.row(i) for i in range(start, len(base))]
+
+        aggregate = self.aggregates.get(timeframe)
+        if aggregate is None:
+            aggregate = _Aggregate(timeframe_to_ms(timeframe))
+            aggregate.cursor = base.offset
+            self.aggregates[timeframe] = aggregate
+
+        # Intégration incrémentale des seules nouvelles bougies 1m fermées
+        closed_end = self._closed_end()
+        cursor = max(aggregate.cursor, base.offset)
+        for absolute in range(cursor, closed_end):
+            i = absolute - base.offset
+            aggregate.fold(base.ts[i], base.open[i], base.high[i], base.low[i], base.close[i], base.volume[i])
+        aggregate.cursor = max(cursor, closed_end)
+        aggregate.bars.trim(max(1, self.max_candles // TIMEFRAME_MINUTES[timeframe]) + 1)
+
+        agg_bars = aggregate.bars
+        start = max(0, len(agg_bars) - limit)
+        rows = [agg_bars.row(i) for i in range(start, len(agg_bars))]
+
+        # Bougie 1m en cours : fusion provisoire sans modifier l'agrégat
+        if not self.last_closed:
+            ts, o, h, l, c, v = base.row(len(base) - 1)
+            bucket = ts - ts % aggregate.timeframe_ms
+            if rows and rows[-1][0] == bucket:
+                last = rows[-1]
+                rows[-1] = [bucket, last[1], max(last[2], h), min(last[3], l), c, last[5] + v]
+            else:
+                rows.append([bucket, o, h, l, c, v])
+                rows = rows[-limit:]
+        return rows
+
+
+class CandleStore:
+    """Stockage des bougies 1m par symbole, dérivation multi-timeframe à la demande"""
+
+    def __init__(self, max_candles: int = 1500):
+        self.max_candles = max_candles
+        self.symbols = {}  # symbol -> SymbolCandles
+        self.lock = threading.Lock()
+
+    def _get_symbol(self, symbol: str) -> SymbolCandles:
+        candles = self.symbols.get(symbol)
+        if candles is None:
+            candles = SymbolCandles(self.max_candles)
+            self.symbols[symbol] = candles
+        return candles
+
+    def ingest_kline(self, symbol: str, kline: Dict) -> bool:
+        """Ingestion d'une kline 1m WebSocket (payload 'k' Binance)"""
+        with self.lock:
+            return self._get_symbol(symbol).ingest(
+                int(kline['t']), float(kline['o']), float(kline['h']), float(kline['l']),
+                float(kline['c']), float(kline['v']), bool(kline['x'])
+            )
+
+    def ingest_ohlcv(self, symbol: str, rows: Sequence[Sequence], now_ms: Optional[int] = None) -> int:
+        """Backfill depuis fetch_ohlcv(symbol, '1m') - retourne le nombre de bougies intégrées"""
+        now_ms = now_ms or int(time.time() * 1000)
+        count = 0
+        with self.lock:
+            candles = self._get_symbol(symbol)
+            for ts, o, h, l, c, v in rows:
+                is_closed = int(ts) + ONE_MINUTE_MS <= now_ms
+                if candles.ingest(int(ts), float(o), float(h), float(l), float(c), float(v), is_closed):
+                    count += 1
+        return count
+
+    def get_ohlcv(self, symbol: str, timeframe: str = '1m', limit: int = 100) -> List[List]:
+        """Barres au format ccxt [[ts, open, high, low, close, volume], ...]"""
+        with self.lock:
+            candles = self.symbols.get(symbol)
+            if candles is None:
+                return []
+            return candles.bars(timeframe, limit)
+
+    def get_dataframe(self, symbol: str, timeframe: str = '1m', limit: int = 100):
+        """Barres en DataFrame pandas (graphiques, analyses)"""
+        import pandas as pd
+
+        rows = self.get_ohlcv(symbol, timeframe, limit)
+        df = pd.DataFrame(rows, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        if not df.empty:
+            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        return df
+
+    def has_history(self, symbol: str, timeframe: str, limit: int, max_age_seconds: float = 120) -> bool:
+        """True si le stockage couvre `limit` barres récentes du timeframe"""
+        candles = self.symbols.get(symbol)
+        if candles is None or time.time() - candles.last_update > max_age_seconds:
+            return False
+        return len(candles.base) >= limit * TIMEFRAME_MINUTES.get(timeframe, 1)
+
+    def last_timestamp(self, symbol: str) -> Optional[int]:
+        """Horodatage de la dernière bougie 1m connue"""
+        candles = self.symbols.get(symbol)
+        if candles is None or not len(candles.base):
+            return None
+        return candles.base.ts[-1]
+
+    def drop(self, symbol: str):
+        """Oublie un symbole"""
+        with self.lock:
+            self.symbols.pop(symbol, None)
+
+    def retain(self, symbols: Sequence[str]):
+        """Ne garde que les symboles fournis"""
+        keep = set(symbols)
+        with self.lock:
+            for symbol in [s for s in self.symbols if s not in keep]:
+                del self.symbols[symbol]
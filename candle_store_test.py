@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tests du stockage de bougies multi-timeframe
+Agrégation 1m -> 5m/15m/1h, bougie en cours, backfill REST puis klines WebSocket
+"""
+
+import unittest
+
+from candle_store import ONE_MINUTE_MS, CandleStore
+
+T0 = 1_699_999_200_000  # Début d'heure exact
+
+
+def row(minute, close, volume=1.0):
+    """Bougie 1m [ts, o, h, l, c, v] : open = close - 1, mèches de ±0.5"""
+    return [T0 + minute * ONE_MINUTE_MS, close - 1, close + 0.5, close - 1.5, close, volume]
+
+
+def kline(minute, close, closed=True, volume=1.0):
+    """Payload 'k' Binance équivalent à row()"""
+    ts, o, h, l, c, v = row(minute, close, volume)
+    return {'t': ts, 'o': str(o), 'h': str(h), 'l': str(l), 'c': str(c), 'v': str(v), 'x': closed}
+
+
+class TestCandleStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = CandleStore(max_candles=500)
+
+    def test_bucket_rollover(self):
+        for minute in range(61):
+            self.store.ingest_kline('BTC/USDT', kline(minute, 100 + minute))
+
+        five = self.store.get_ohlcv('BTC/USDT', '5m', limit=100)
+        self.assertEqual(len(five), 13)
+        self.assertEqual(five[0], [T0, 99.0, 104.5, 98.5, 104.0, 5.0])
+        self.assertEqual(five[1][0], T0 + 5 * ONE_MINUTE_MS)
+        self.assertEqual(five[-1], [T0 + 60 * ONE_MINUTE_MS, 159.0, 160.5, 158.5, 160.0, 1.0])
+
+        fifteen = self.store.get_ohlcv('BTC/USDT', '15m', limit=100)
+        self.assertEqual([bar[0] for bar in fifteen], [T0 + m * ONE_MINUTE_MS for m in (0, 15, 30, 45, 60)])
+        self.assertEqual(fifteen[1][1:], [114.0, 129.5, 113.5, 129.0, 15.0])
+
+        hour = self.store.get_ohlcv('BTC/USDT', '1h', limit=100)
+        self.assertEqual(len(hour), 2)
+        self.assertEqual(hour[0], [T0, 99.0, 159.5, 98.5, 159.0, 60.0])
+        self.assertEqual(hour[1][0], T0 + 3_600_000)
+
+        # Nouvelle bougie : seul l'agrégat concerné avance
+        self.store.ingest_kline('BTC/USDT', kline(61, 161))
+        hour = self.store.get_ohlcv('BTC/USDT', '1h', limit=1)
+        self.assertEqual(hour, [[T0 + 3_600_000, 159.0, 161.5, 158.5, 161.0, 2.0]])
+
+    def test_update_in_progress_candle(self):
+        for minute in range(4):
+            self.store.ingest_kline('ETH/USDT', kline(minute, 10 + minute))
+        self.store.ingest_kline('ETH/USDT', kline(4, 20, closed=False))
+
+        five = self.store.get_ohlcv('ETH/USDT', '5m', limit=10)
+        self.assertEqual(five, [[T0, 9.0, 20.5, 8.5, 20.0, 5.0]])
+
+        # Le tick suivant remplace la bougie en cours au lieu de s'additionner
+        self.store.ingest_kline('ETH/USDT', kline(4, 12, closed=False, volume=3.0))
+        five = self.store.get_ohlcv('ETH/USDT', '5m', limit=10)
+        self.assertEqual(five, [[T0, 9.0, 13.5, 8.5, 12.0, 7.0]])
+
+        # Clôture puis minute suivante : la barre 5m est figée, une nouvelle commence
+        self.store.ingest_kline('ETH/USDT', kline(4, 12, closed=True, volume=3.0))
+        self.store.ingest_kline('ETH/USDT', kline(5, 14, closed=False))
+        five = self.store.get_ohlcv('ETH/USDT', '5m', limit=10)
+        self.assertEqual(five[0], [T0, 9.0, 13.5, 8.5, 12.0, 7.0])
+        self.assertEqual(five[1], [T0 + 5 * ONE_MINUTE_MS, 13.0, 14.5, 12.5, 14.0, 1.0])
+
+        # Trop ancienne : ignorée
+        self.assertFalse(self.store.ingest_kline('ETH/USDT', kline(2, 99)))
+
+    def test_backfill_then_live_kline(self):
+        rows = [row(minute, 50 + minute) for minute in range(10)]
+        now_ms = T0 + 9 * ONE_MINUTE_MS + 30_000  # La 10e bougie est encore ouverte
+        self.assertEqual(self.store.ingest_ohlcv('SOL/USDT', rows, now_ms=now_ms), 10)
+        self.assertEqual(self.store.get_ohlcv('SOL/USDT', '5m', limit=10)[-1],
+                         [T0 + 5 * ONE_MINUTE_MS, 54.0, 59.5, 53.5, 59.0, 5.0])
+
+        # Le WebSocket reprend la bougie ouverte puis continue
+        self.store.ingest_kline('SOL/USDT', kline(9, 70, closed=True, volume=2.0))
+        self.store.ingest_kline('SOL/USDT', kline(10, 71))
+
+        one = self.store.get_ohlcv('SOL/USDT', '1m', limit=100)
+        self.assertEqual(len(one), 11)
+        self.assertEqual(one[9][4], 70.0)
+        five = self.store.get_ohlcv('SOL/USDT', '5m', limit=10)
+        self.assertEqual(five[1], [T0 + 5 * ONE_MINUTE_MS, 54.0, 70.5, 53.5, 70.0, 6.0])
+        self.assertEqual(five[2], [T0 + 10 * ONE_MINUTE_MS, 70.0, 71.5, 69.5, 71.0, 1.0])
+        self.assertEqual(self.store.last_timestamp('SOL/USDT'), T0 + 10 * ONE_MINUTE_MS)
+
+    def test_dataframe_export(self):
+        for minute in range(15):
+            self.store.ingest_kline('BNB/USDT', kline(minute, 300 + minute))
+
+        df = self.store.get_dataframe('BNB/USDT', '5m', limit=2)
+        self.assertEqual(list(df.columns), ['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        self.assertEqual(len(df), 2)
+        self.assertEqual(df['timestamp'].iloc[0].value // 1_000_000, T0 + 5 * ONE_MINUTE_MS)
+        self.assertEqual(df['close'].tolist(), [309.0, 314.0])
+
+        self.assertTrue(self.store.get_dataframe('UNKNOWN/USDT').empty)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,31 +3,42 @@
 """
 Widgets de Graphiques Temps Réel
 Graphiques intégrés pour l'interface GUI
+matplotlib et pandas ne sont chargés qu'à la création du premier graphique
 """
 
 import tkinter as tk
 from tkinter import ttk
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-from matplotlib.animation import FuncAnimation
-import pandas as pd
 import numpy as np
 import time
 import threading
 import random
 from datetime import datetime, timedelta
 from collections import deque
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 class MiniChart:
-    """Mini graphique intégré pour une crypto"""
+    """Mini graphique intégré pour une crypto
+    
+    Les ticks ne font qu'empiler le prix ; le timer partagé du panel appelle render(),
+    qui ne redessine que la ligne sur un fond mis en cache (blitting). Le dessin complet
+    (axes, cadre, fond) n'a lieu qu'au premier affichage, au redimensionnement ou quand
+    le prix sort de l'échelle verticale.
+    """
     
     def __init__(self, parent, symbol: str, config=None):
         self.parent = parent
         self.symbol = symbol
         self.config = config or {}
         
+        # Rendu : données modifiées depuis la dernière image, fond mis en cache
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.background = None
+        self.render_stats = {'blits': 0, 'full_draws': 0}
+        
         # Dimensions depuis config.txt uniquement
         self.width = self.config.get('chart_width') or 200
         self.height = self.config.get('chart_height') or 120
@@ -121,6 +132,8 @@ class MiniChart:
     
     def _setup_chart(self):
         """Configure le graphique matplotlib"""
+        from matplotlib.figure import Figure
+        
         # Créer la figure
         self.fig = Figure(
             figsize=(self.width/100, self.height/100),
@@ -143,34 +156,63 @@ class MiniChart:
         self.ax.set_yticks([])
         
         # Ligne de prix - épaisseur depuis config.txt uniquement
+        # (animated : exclue du fond mis en cache, redessinée seule à chaque image)
         line_width = self.config.get('chart_line_width') or 1.5
-        self.price_line, = self.ax.plot([], [], color=self.colors['line_color'], linewidth=line_width)
+        self.price_line, = self.ax.plot([], [], color=self.colors['line_color'], linewidth=line_width,
+                                        animated=True)
         
-        # Canvas tkinter
-        self.canvas = FigureCanvasTkAgg(self.fig, self.chart_frame)
+        # Abscisse fixe sur toute la profondeur d'historique : la ligne avance sans changer les axes
+        self.ax.set_xlim(0, max(self.price_history.maxlen - 1, 1))
+        
+        self.canvas = self._create_canvas()
+        self.canvas.mpl_connect('draw_event', self._on_draw)
         self.canvas.draw()
-        self.canvas.get_tk_widget().pack()
     
-    def update_price(self, price: float, volume_24h: float, change_24h: float):
-        """Met à jour le prix et les données"""
-        self.current_price = price
-        self.volume_24h = volume_24h
-        self.change_24h = change_24h
-        
-        # Ajouter aux historiques
-        now = datetime.now()
-        self.price_history.append(price)
-        self.time_history.append(now)
+    def _create_canvas(self):
+        """Canvas tkinter de la figure"""
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
         
-        # Mettre à jour l'affichage
-        self._update_labels()
-        self._update_chart()
+        canvas = FigureCanvasTkAgg(self.fig, self.chart_frame)
+        canvas.get_tk_widget().pack()
+        return canvas
+    
+    def _on_draw(self, event):
+        """Après un dessin complet : nouveau fond en cache, puis la ligne par-dessus"""
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.price_line)
+    
+    def update_price(self, price: float, volume_24h: float, change_24h: float):
+        """Met à jour le prix et les données (n'importe quel thread, rendu à la prochaine image)"""
+        with self.lock:
+            self.current_price = price
+            self.volume_24h = volume_24h
+            self.change_24h = change_24h
+            
+            # Ajouter aux historiques
+            now = datetime.now()
+            self.price_history.append(price)
+            self.time_history.append(now)
+            self.dirty = True
     
     def update_signal(self, signal: str, score: float):
-        """Met à jour le signal de trading"""
-        self.signal = signal
-        self.signal_score = score
+        """Met à jour le signal de trading (rendu à la prochaine image)"""
+        with self.lock:
+            self.signal = signal
+            self.signal_score = score
+            self.dirty = True
+    
+    def render(self) -> bool:
+        """Image du timer partagé : redessine si les données ont changé, retourne True dans ce cas"""
+        with self.lock:
+            if not self.dirty:
+                return False
+            self.dirty = False
+            prices = list(self.price_history)
+        
+        self._update_labels()
         self._update_signal_display()
+        self._update_chart(prices)
+        return True
     
     def _update_labels(self):
         """Met à jour les labels textuels"""
@@ -203,39 +245,46 @@ class MiniChart:
         color = signal_colors.get(self.signal, 'gray')
         self.signal_label.config(text=self.signal, fg=color)
     
-    def _update_chart(self):
-        """Met à jour le graphique"""
-        if len(self.price_history) < 2:
+    def _price_limits(self, prices: List[float]):
+        """Échelle verticale cible - marges depuis config.txt uniquement"""
+        chart_margin = self.config.get('chart_margin_percent') or 0.1
+        min_price = min(prices)
+        max_price = max(prices)
+        price_range = max_price - min_price
+        if price_range > 0:
+            return min_price - price_range * chart_margin, max_price + price_range * chart_margin
+        # Prix stable - marges depuis config.txt uniquement
+        stable_margin_low = self.config.get('chart_stable_margin_low') or 0.999
+        stable_margin_high = self.config.get('chart_stable_margin_high') or 1.001
+        return min_price * stable_margin_low, max_price * stable_margin_high
+    
+    def _needs_rescale(self, prices: List[float]) -> bool:
+        """Échelle à refaire si un prix en sort ou si la courbe n'occupe plus qu'un quart de la hauteur"""
+        low, high = self.ax.get_ylim()
+        min_price, max_price = min(prices), max(prices)
+        if min_price < low or max_price > high:
+            return True
+        return high - low > 0 and (max_price - min_price) < (high - low) * 0.25
+    
+    def _update_chart(self, prices: List[float]):
+        """Met à jour le graphique : blit de la ligne seule, dessin complet si l'échelle change"""
+        if len(prices) < 2:
             return
         
         try:
-            # Préparer les données
-            prices = list(self.price_history)
-            x_data = range(len(prices))
-            
-            # Mettre à jour la ligne
-            self.price_line.set_data(x_data, prices)
-            
-            # Ajuster les limites - marges depuis config.txt uniquement
-            chart_margin = self.config.get('chart_margin_percent') or 0.1
-            if prices:
-                min_price = min(prices)
-                max_price = max(prices)
-                price_range = max_price - min_price
-                
-                if price_range > 0:
-                    self.ax.set_ylim(min_price - price_range * chart_margin, 
-                                   max_price + price_range * chart_margin)
-                else:
-                    # Prix stable - marges depuis config.txt uniquement
-                    stable_margin_low = self.config.get('chart_stable_margin_low') or 0.999
-                    stable_margin_high = self.config.get('chart_stable_margin_high') or 1.001
-                    self.ax.set_ylim(min_price * stable_margin_low, max_price * stable_margin_high)
-                
-                self.ax.set_xlim(0, len(prices) - 1)
+            # Ligne alignée à droite sur l'abscisse fixe
+            start = self.price_history.maxlen - len(prices)
+            self.price_line.set_data(range(start, start + len(prices)), prices)
             
-            # Redessiner
-            self.canvas.draw()
+            if self.background is None or self._needs_rescale(prices):
+                self.ax.set_ylim(*self._price_limits(prices))
+                self.canvas.draw()  # _on_draw recapture le fond et dessine la ligne
+                self.render_stats['full_draws'] += 1
+            else:
+                self.canvas.restore_region(self.background)
+                self.ax.draw_artist(self.price_line)
+                self.canvas.blit(self.ax.bbox)
+                self.render_stats['blits'] += 1
             
         except Exception as e:
             print(f"Erreur mise à jour graphique {self.symbol}: {e}")
@@ -250,8 +299,15 @@ class CryptoChartsPanel:
         self.max_charts = self.config.get('max_charts') or 6
         self.charts = {}  # symbol -> MiniChart
         
+        # Timer unique pour tous les graphiques (CHART_UPDATE_SECONDS)
+        update_seconds = self.config.get('CHART_UPDATE_SECONDS') or self.config.get('chart_update_seconds') or 1
+        self.frame_ms = max(int(float(update_seconds) * 1000), 50)
+        self.timer_id = None
+        self.frames = 0
+        
         # Créer le panel principal
         self._create_panel()
+        self.start_animation()
     
     def _create_panel(self):
         """Crée le panel principal"""
@@ -275,6 +331,35 @@ class CryptoChartsPanel:
         self.charts_frame = tk.Frame(self.main_frame, bg=bg_color)
         self.charts_frame.pack(fill='both', expand=True)
     
+    def start_animation(self):
+        """Démarre le timer partagé (une image toutes les CHART_UPDATE_SECONDS)"""
+        if self.timer_id is None:
+            self.timer_id = self.main_frame.after(self.frame_ms, self._on_frame)
+    
+    def stop_animation(self):
+        if self.timer_id is not None:
+            self.main_frame.after_cancel(self.timer_id)
+            self.timer_id = None
+    
+    def _on_frame(self):
+        """Image : seuls les graphiques dont les données ont changé sont redessinés"""
+        self.frames += 1
+        try:
+            for chart in list(self.charts.values()):
+                try:
+                    chart.render()
+                except Exception as e:
+                    # Un graphique en erreur ne bloque ni les autres ni le timer
+                    print(f"❌ Erreur rendu graphique {chart.symbol}: {e}")
+        finally:
+            self.timer_id = self.main_frame.after(self.frame_ms, self._on_frame)
+    
+    def get_render_stats(self) -> Dict:
+        """Images du timer, blits et dessins complets cumulés sur les graphiques actifs"""
+        blits = sum(chart.render_stats['blits'] for chart in self.charts.values())
+        full_draws = sum(chart.render_stats['full_draws'] for chart in self.charts.values())
+        return {'frames': self.frames, 'charts': len(self.charts), 'blits': blits, 'full_draws': full_draws}
+    
     def add_chart(self, symbol: str) -> bool:
         """Ajoute un graphique pour un symbole"""
         if symbol in self.charts:
@@ -338,8 +423,103 @@ class CryptoChartsPanel:
         """Retourne la liste des symboles avec graphiques actifs"""
         return list(self.charts.keys())
 
+class OHLCSeries:
+    """Bougies OHLCV en tableaux numpy complétés par ajout (temps en jours matplotlib)"""
+    
+    FIELDS = ('time', 'open', 'high', 'low', 'close', 'volume')
+    
+    def __init__(self, capacity: int = 1024):
+        self.data = np.zeros((len(self.FIELDS), capacity))
+        self.size = 0
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def column(self, name: str) -> np.ndarray:
+        return self.data[self.FIELDS.index(name), :self.size]
+    
+    def clear(self):
+        self.size = 0
+    
+    def _append(self, rows: np.ndarray):
+        needed = self.size + rows.shape[1]
+        if needed > self.data.shape[1]:
+            grown = np.zeros((len(self.FIELDS), max(needed, self.data.shape[1] * 2)))
+            grown[:, :self.size] = self.data[:, :self.size]
+            self.data = grown
+        self.data[:, self.size:needed] = rows
+        self.size = needed
+    
+    def merge(self, rows: np.ndarray) -> str:
+        """Intègre des bougies (tableau 6 x n trié par temps)
+        
+        Retourne 'append' (nouvelles bougies seulement), 'update' (bougie en cours modifiée),
+        'reset' (série rechargée : autre historique, ou plus ancien que le nôtre) ou 'none'.
+        """
+        if rows.shape[1] == 0:
+            return 'none'
+        times = rows[0]
+        if self.size == 0 or times[0] < self.data[0, 0] or times[-1] < self.data[0, self.size - 1]:
+            self.size = 0
+            self._append(rows)
+            return 'reset'
+        
+        last_time = self.data[0, self.size - 1]
+        result = 'none'
+        current = np.nonzero(times == last_time)[0]
+        if len(current) and not np.array_equal(self.data[:, self.size - 1], rows[:, current[-1]]):
+            self.data[:, self.size - 1] = rows[:, current[-1]]
+            result = 'update'
+        newer = times > last_time
+        if newer.any():
+            self._append(rows[:, newer])
+            result = 'append'
+        return result
+    
+    def downsample(self, max_points: int):
+        """Bougies regroupées pour tenir en `max_points` (ouverture, plus haut, plus bas, clôture, volume cumulé)
+        
+        Retourne (temps, open, high, low, close, volume, largeur d'une bougie en jours).
+        """
+        times, opens, highs, lows, closes, volumes = (self.data[i, :self.size] for i in range(len(self.FIELDS)))
+        spacing = float(np.median(np.diff(times))) if self.size > 1 else 1 / 1440
+        factor = max(1, int(np.ceil(self.size / max(max_points, 1))))
+        if factor == 1:
+            return times, opens, highs, lows, closes, volumes, spacing * 0.7
+        
+        starts = np.arange(0, self.size, factor)
+        ends = np.minimum(starts + factor - 1, self.size - 1)
+        return (times[starts], opens[starts], np.maximum.reduceat(highs, starts),
+                np.minimum.reduceat(lows, starts), closes[ends], np.add.reduceat(volumes, starts),
+                spacing * factor * 0.7)
+
+
+def dataframe_to_rows(price_df: 'pd.DataFrame') -> np.ndarray:
+    """DataFrame OHLCV (timestamp en datetime ou en ms) -> tableau 6 x n en jours matplotlib"""
+    import matplotlib.dates as mdates
+    import pandas as pd
+    
+    timestamps = price_df['timestamp']
+    if pd.api.types.is_numeric_dtype(timestamps):
+        timestamps = pd.to_datetime(timestamps, unit='ms')
+    times = mdates.date2num(pd.DatetimeIndex(timestamps).to_numpy())
+    return np.vstack([
+        np.asarray(times, dtype=float),
+        price_df['open'].to_numpy(dtype=float),
+        price_df['high'].to_numpy(dtype=float),
+        price_df['low'].to_numpy(dtype=float),
+        price_df['close'].to_numpy(dtype=float),
+        price_df['volume'].to_numpy(dtype=float)
+    ])
+
+
 class LargeChart:
-    """Graphique principal détaillé (optionnel)"""
+    """Graphique principal détaillé (optionnel)
+    
+    Bougies OHLC et volumes dessinés par des collections créées une seule fois :
+    chaque mise à jour n'ajoute que les nouvelles bougies à la série, puis remplace
+    les sommets des collections, réduites à la largeur en pixels de l'axe.
+    """
     
     def __init__(self, parent, config=None):
         self.parent = parent
@@ -350,15 +530,15 @@ class LargeChart:
         self.height = self.config.get('large_chart_height') or 300
         
         # Données
-        self.price_data = []
-        self.volume_data = []
-        self.time_data = []
+        self.symbol = None
+        self.series = OHLCSeries()
         
         # Couleurs depuis config.txt uniquement
         self.colors = {
             'background': self.config.get('large_chart_bg_color') or '#2d2d2d',
             'plot_bg': self.config.get('large_chart_plot_bg_color') or '#1a1a1a',
             'price_line_color': self.config.get('large_chart_price_line_color') or '#00ff88',
+            'down_color': self.config.get('large_chart_down_color') or '#ff4444',
             'volume_color': self.config.get('large_chart_volume_color') or '#666666',
             'text_color': self.config.get('large_chart_text_color') or 'white'
         }
@@ -383,7 +563,12 @@ class LargeChart:
         self.title_label.pack(pady=5)
     
     def _setup_chart(self):
-        """Configure le graphique principal"""
+        """Configure le graphique principal (artistes créés une seule fois)"""
+        import matplotlib.dates as mdates
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.collections import LineCollection, PolyCollection
+        from matplotlib.figure import Figure
+        
         # Figure matplotlib
         self.fig = Figure(
             figsize=(self.width/100, self.height/100),
@@ -391,54 +576,93 @@ class LargeChart:
             facecolor=self.colors['background']
         )
         
-        # Sous-graphiques
+        # Sous-graphiques (abscisse partagée)
         self.ax_price = self.fig.add_subplot(211, facecolor=self.colors['plot_bg'])  # Prix
-        self.ax_volume = self.fig.add_subplot(212, facecolor=self.colors['plot_bg'])  # Volume
+        self.ax_volume = self.fig.add_subplot(212, facecolor=self.colors['plot_bg'], sharex=self.ax_price)  # Volume
         
         # Style
         for ax in [self.ax_price, self.ax_volume]:
             ax.tick_params(colors='gray', labelsize=8)
             for spine in ax.spines.values():
                 spine.set_color('gray')
+        self.ax_price.xaxis_date()
+        self.ax_volume.xaxis.set_major_formatter(mdates.DateFormatter('%d/%m %H:%M'))
+        self.price_title = self.ax_price.set_title("Prix", color=self.colors['text_color'], fontsize=10)
+        self.ax_volume.set_title("Volume", color=self.colors['text_color'], fontsize=10)
+        
+        # Mèches, corps des bougies et barres de volume - transparence depuis config.txt uniquement
+        volume_alpha = self.config.get('large_chart_volume_alpha') or 0.7
+        wick_width = (self.config.get('large_chart_price_line_width') or 2) / 2
+        self.wicks = LineCollection([], linewidths=wick_width)
+        self.bodies = PolyCollection([], linewidths=0)
+        self.volume_bars = PolyCollection([], linewidths=0, facecolors=self.colors['volume_color'], alpha=volume_alpha)
+        self.ax_price.add_collection(self.wicks)
+        self.ax_price.add_collection(self.bodies)
+        self.ax_volume.add_collection(self.volume_bars)
+        
+        # Espacement calculé une fois (pas à chaque mise à jour)
+        self.fig.tight_layout()
         
         # Canvas
         self.canvas = FigureCanvasTkAgg(self.fig, self.frame)
         self.canvas.draw()
         self.canvas.get_tk_widget().pack(fill='both', expand=True)
     
-    def update_data(self, symbol: str, price_df: pd.DataFrame):
-        """Met à jour les données du graphique principal"""
+    def _max_candles(self) -> int:
+        """Bougies affichables : 2 pixels minimum par bougie"""
+        return max(int(self.ax_price.bbox.width // 2), 10)
+    
+    def update_data(self, symbol: str, price_df: 'pd.DataFrame'):
+        """Met à jour les données du graphique principal (seules les nouvelles bougies sont ajoutées)"""
         if price_df.empty:
             return
         
         try:
-            # Préparer les données
-            times = price_df['timestamp']
-            prices = price_df['close']
-            volumes = price_df['volume']
+            if symbol != self.symbol:
+                self.symbol = symbol
+                self.series.clear()
+                self.price_title.set_text(f"{symbol} - Prix")
+            
+            if self.series.merge(dataframe_to_rows(price_df)) == 'none':
+                return
             
-            # Graphique des prix - épaisseur depuis config.txt uniquement
-            price_line_width = self.config.get('large_chart_price_line_width') or 2
-            self.ax_price.clear()
-            self.ax_price.plot(times, prices, color=self.colors['price_line_color'], linewidth=price_line_width)
-            self.ax_price.set_title(f"{symbol} - Prix", color=self.colors['text_color'], fontsize=10)
-            self.ax_price.tick_params(colors='gray', labelsize=8)
+            times, opens, highs, lows, closes, volumes, width = self.series.downsample(self._max_candles())
+            half = width / 2
+            rising = closes >= opens
+            colors = np.where(rising, self.colors['price_line_color'], self.colors['down_color'])
             
-            # Graphique des volumes - transparence depuis config.txt uniquement
-            volume_alpha = self.config.get('large_chart_volume_alpha') or 0.7
-            self.ax_volume.clear()
-            self.ax_volume.bar(times, volumes, color=self.colors['volume_color'], alpha=volume_alpha)
-            self.ax_volume.set_title("Volume", color=self.colors['text_color'], fontsize=10)
-            self.ax_volume.tick_params(colors='gray', labelsize=8)
+            # Mèches : segments plus bas -> plus haut
+            self.wicks.set_segments(np.stack([np.column_stack([times, lows]),
+                                              np.column_stack([times, highs])], axis=1))
+            self.wicks.set_color(colors)
             
-            # Ajuster l'espacement
-            self.fig.tight_layout()
+            # Corps : rectangles ouverture -> clôture
+            bottoms = np.minimum(opens, closes)
+            tops = np.maximum(opens, closes)
+            self.bodies.set_verts(self._rectangles(times - half, times + half, bottoms, tops))
+            self.bodies.set_facecolor(colors)
             
-            # Redessiner
-            self.canvas.draw()
+            # Volumes
+            self.volume_bars.set_verts(self._rectangles(times - half, times + half, np.zeros_like(volumes), volumes))
+            
+            # Limites des axes
+            self.ax_price.set_xlim(times[0] - width, times[-1] + width)
+            low, high = lows.min(), highs.max()
+            margin = (high - low) * 0.05 or high * 0.001
+            self.ax_price.set_ylim(low - margin, high + margin)
+            self.ax_volume.set_ylim(0, volumes.max() * 1.1 or 1)
+            
+            # Redessiner (regroupé par tkinter)
+            self.canvas.draw_idle()
             
         except Exception as e:
             print(f"Erreur mise à jour graphique principal: {e}")
+    
+    @staticmethod
+    def _rectangles(left, right, bottom, top) -> np.ndarray:
+        """Sommets (n, 4, 2) de rectangles alignés sur les axes"""
+        return np.stack([np.column_stack([left, bottom]), np.column_stack([left, top]),
+                         np.column_stack([right, top]), np.column_stack([right, bottom])], axis=1)
 
 # Test des widgets
 if __name__ == "__main__":
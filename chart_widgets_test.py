@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Tests des graphiques
+Série OHLC du graphique principal, rendu des mini-graphiques sur canvas Agg (sans écran)
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from chart_widgets import CryptoChartsPanel, MiniChart, OHLCSeries, dataframe_to_rows
+
+
+def make_df(count, start_ms=1_700_000_000_000):
+    closes = 100 + np.arange(count, dtype=float)
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(start_ms + np.arange(count) * 60_000, unit='ms'),
+        'open': closes - 0.5,
+        'high': closes + 1,
+        'low': closes - 1,
+        'close': closes,
+        'volume': np.ones(count)
+    })
+
+
+class TestOHLCSeries(unittest.TestCase):
+
+    def test_merge_appends_only_new_candles(self):
+        series = OHLCSeries(capacity=4)
+        df = make_df(10)
+        self.assertEqual(series.merge(dataframe_to_rows(df.iloc[:6])), 'reset')
+        self.assertEqual(series.merge(dataframe_to_rows(df)), 'append')
+        self.assertEqual(len(series), 10)
+        np.testing.assert_array_equal(series.column('close'), df['close'].to_numpy())
+        self.assertEqual(series.merge(dataframe_to_rows(df)), 'none')
+
+    def test_merge_updates_current_candle(self):
+        series = OHLCSeries()
+        df = make_df(5)
+        series.merge(dataframe_to_rows(df))
+        df.loc[4, ['close', 'high']] = [110.0, 111.0]
+
+        self.assertEqual(series.merge(dataframe_to_rows(df.tail(2))), 'update')
+        self.assertEqual(len(series), 5)
+        self.assertEqual(series.column('close')[-1], 110.0)
+        self.assertEqual(series.column('high')[-1], 111.0)
+
+    def test_merge_resets_on_older_history(self):
+        series = OHLCSeries()
+        df = make_df(10)
+        series.merge(dataframe_to_rows(df.iloc[5:]))
+
+        self.assertEqual(series.merge(dataframe_to_rows(df)), 'reset')
+        self.assertEqual(len(series), 10)
+
+    def test_millisecond_timestamps(self):
+        df = make_df(3)
+        df_ms = df.assign(timestamp=df['timestamp'].astype('datetime64[ms]').astype('int64'))
+        np.testing.assert_allclose(dataframe_to_rows(df_ms), dataframe_to_rows(df))
+
+    def test_downsample_aggregates_buckets(self):
+        series = OHLCSeries()
+        df = make_df(10)
+        series.merge(dataframe_to_rows(df))
+        times, opens, highs, lows, closes, volumes, width = series.downsample(4)
+
+        # 10 bougies, 4 points max -> paquets de 3
+        self.assertEqual(len(times), 4)
+        np.testing.assert_array_equal(opens, df['open'].to_numpy()[[0, 3, 6, 9]])
+        np.testing.assert_array_equal(closes, df['close'].to_numpy()[[2, 5, 8, 9]])
+        np.testing.assert_array_equal(highs, df['high'].to_numpy()[[2, 5, 8, 9]])
+        np.testing.assert_array_equal(lows, df['low'].to_numpy()[[0, 3, 6, 9]])
+        np.testing.assert_array_equal(volumes, [3, 3, 3, 1])
+        self.assertAlmostEqual(width, 3 * 0.7 / 1440)
+
+    def test_downsample_keeps_short_series(self):
+        series = OHLCSeries()
+        series.merge(dataframe_to_rows(make_df(5)))
+        self.assertEqual(len(series.downsample(100)[0]), 5)
+
+
+
+class FakeLabel:
+    def config(self, **options):
+        self.options = options
+
+
+class AggMiniChart(MiniChart):
+    """MiniChart sur canvas Agg : mêmes dessins, blit sans effet, dessins complets comptés"""
+
+    def _create_widget(self):
+        self.price_label = FakeLabel()
+        self.change_label = FakeLabel()
+        self.signal_label = FakeLabel()
+
+    def _create_canvas(self):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        canvas = FigureCanvasAgg(self.fig)
+        self.canvas_draws = 0
+        draw = canvas.draw
+
+        def counted_draw():
+            self.canvas_draws += 1
+            draw()
+
+        canvas.draw = counted_draw
+        return canvas
+
+
+class FakeFrame:
+    """main_frame.after simulé"""
+
+    def __init__(self):
+        self.timers = []
+
+    def after(self, ms, callback):
+        self.timers.append(callback)
+        return len(self.timers)
+
+    def after_cancel(self, timer_id):
+        pass
+
+
+class AggChartsPanel(CryptoChartsPanel):
+    def _create_panel(self):
+        self.main_frame = FakeFrame()
+
+
+class BrokenChart:
+    symbol = 'BROKEN/USDT'
+
+    def render(self):
+        raise RuntimeError("canvas détruit")
+
+
+class TestMiniChart(unittest.TestCase):
+
+    def setUp(self):
+        self.chart = AggMiniChart(None, 'BTC/USDT', {'chart_history_length': 20})
+        self.setup_draws = self.chart.canvas_draws
+
+    def test_dirty_flag(self):
+        self.assertFalse(self.chart.dirty)
+        self.assertFalse(self.chart.render())
+
+        self.chart.update_price(100.0, 1e6, 1.5)
+        self.assertTrue(self.chart.dirty)
+        self.assertTrue(self.chart.render())
+        self.assertFalse(self.chart.dirty)
+        self.assertFalse(self.chart.render())
+        self.assertEqual(self.chart.price_label.options['text'], '$100.00')
+
+        self.chart.update_signal('BUY', 80)
+        self.assertTrue(self.chart.render())
+        self.assertEqual(self.chart.signal_label.options['text'], 'BUY')
+
+    def test_blit_unless_rescale(self):
+        self.assertIsNotNone(self.chart.background)  # Fond capturé au premier dessin
+
+        self.chart.update_price(100.0, 0, 0)
+        self.chart.update_price(101.0, 0, 0)
+        self.chart.render()
+        # Échelle initiale (0, 1) : dessin complet puis nouveau fond
+        self.assertEqual(self.chart.render_stats, {'blits': 0, 'full_draws': 1})
+        self.assertEqual(self.chart.canvas_draws, self.setup_draws + 1)
+
+        self.chart.update_price(100.5, 0, 0)
+        self.chart.render()
+        self.assertEqual(self.chart.render_stats, {'blits': 1, 'full_draws': 1})
+        self.assertEqual(self.chart.canvas_draws, self.setup_draws + 1)
+
+        # Prix hors échelle : axes refaits
+        self.chart.update_price(150.0, 0, 0)
+        self.chart.render()
+        self.assertEqual(self.chart.render_stats, {'blits': 1, 'full_draws': 2})
+        low, high = self.chart.ax.get_ylim()
+        self.assertLess(low, 100.0)
+        self.assertGreater(high, 150.0)
+
+
+class TestChartsPanel(unittest.TestCase):
+
+    def setUp(self):
+        self.panel = AggChartsPanel(None, {'CHART_UPDATE_SECONDS': 1})
+        self.charts = [AggMiniChart(None, symbol, {}) for symbol in ('A/USDT', 'B/USDT')]
+        self.panel.charts = {chart.symbol: chart for chart in self.charts}
+
+    def test_only_changed_charts_render(self):
+        for price in (1.0, 2.0):
+            self.charts[0].update_price(price, 0, 0)
+        self.panel._on_frame()
+        self.panel._on_frame()
+
+        stats = self.panel.get_render_stats()
+        self.assertEqual(stats['frames'], 2)
+        self.assertEqual(stats['full_draws'], 1)
+        self.assertEqual(self.charts[1].render_stats, {'blits': 0, 'full_draws': 0})
+
+    def test_failing_chart_keeps_timer_alive(self):
+        self.panel.charts = {'BROKEN/USDT': BrokenChart(), **self.panel.charts}
+        for price in (1.0, 2.0):
+            self.charts[1].update_price(price, 0, 0)
+        timers = len(self.panel.main_frame.timers)
+
+        self.panel._on_frame()
+        self.assertEqual(len(self.panel.main_frame.timers), timers + 1)
+        self.assertEqual(self.charts[1].render_stats['full_draws'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
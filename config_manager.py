@@ -1,17 +1,3 @@
-from dotenv import load_dotenv
-import os
-load_dotenv()
-API_KEY = os.getenv('API_KEY')
-API_SECRET = os.getenv('API_SECRET')
-import os
-load_dotenv()
-api_key = API_KEY
-api_secret = API_SECRET
-if not api_key or not api_secret:
-    raise Exception("❌ CLÉS API BINANCE MANQUANTES : le fichier .env doit contenir API_KEY et API_SECRET dans le dossier du bot.")
-
-load_dotenv()
-
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
@@ -21,9 +7,28 @@ Synchronisation bidirectionnelle GUI ↔ config.txt
 
 import os
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from datetime import datetime
 
+MISSING_KEYS_MESSAGE = ("❌ CLÉS API BINANCE MANQUANTES : le fichier .env doit contenir API_KEY et API_SECRET "
+                        "dans le dossier du bot.")
+
+_api_credentials = None
+
+
+def load_api_credentials() -> Tuple[str, str]:
+    """Clés API (API_KEY, API_SECRET) depuis l'environnement et .env, lu une seule fois par processus"""
+    global _api_credentials
+    if _api_credentials is None:
+        try:
+            from dotenv import load_dotenv
+            load_dotenv()
+        except ImportError:
+            pass  # python-dotenv absent : variables d'environnement uniquement
+        _api_credentials = (os.getenv('API_KEY') or '', os.getenv('API_SECRET') or '')
+    return _api_credentials
+
+
 class ConfigManager:
     """Gestionnaire de configuration - LECTURE config.txt UNIQUEMENT"""
     
@@ -116,10 +121,33 @@ class ConfigManager:
                 'filter_suffixes', 'PAIR_SUFFIXES', 'PAIR_SUFFIX_MODE'
             ],
             "ANALYSE CHANDELLES": [
-                'candle_body_ratio_min', 'candle_upper_wick_max'
+                'candle_body_ratio_min', 'candle_upper_wick_max', 'DEEP_SCAN_ENABLED'
+            ],
+            "CACHE OHLCV": [
+                'OHLCV_CACHE_MAX_SYMBOLS', 'OHLCV_CACHE_MAX_CANDLES', 'OHLCV_CACHE_PERSIST'
+            ],
+            "CARNET D'ORDRES": [
+                'ORDER_BOOK_STREAMS_ENABLED'
+            ],
+            "JOURNALISATION": [
+                'LOG_LEVEL', 'LOG_FILE', 'LOG_MAX_BYTES', 'LOG_BACKUP_COUNT', 'LOG_SAMPLE_SECONDS',
+                'LOG_MAX_LINES', 'LOG_FLUSH_MS', 'UI_FRAME_MS', 'TRADE_HISTORY_MAX_ROWS'
+            ],
+            "LIMITES REST": [
+                'REST_WEIGHT_LIMIT_PER_MINUTE', 'REST_ORDER_RESERVE_PERCENT', 'TICKER_CACHE_TTL_MS', 'FALLBACK_STALE_SECONDS',
+                'MARKETS_CACHE_TTL_HOURS', 'STARTUP_HEALTH_CHECK'
+            ],
+            "EXÉCUTION RÉELLE": [
+                'ORDER_MAX_RETRIES', 'ORDER_RECONCILE_TIMEOUT',
+                'OCO_EXIT_ORDERS_ENABLED', 'OCO_STOP_LIMIT_OFFSET_PERCENT', 'OCO_AMEND_MIN_PERCENT', 'OCO_POLL_SECONDS',
+                'USER_DATA_STREAM_ENABLED', 'USER_DATA_STREAM_KEEPALIVE_MINUTES'
+            ],
+            "MODE DÉMON": [
+                'DAEMON_HOST', 'DAEMON_PORT', 'DAEMON_SOCKET', 'DAEMON_TOKEN'
             ],
             "SLIPPAGE": [
-                'ENABLE_SLIPPAGE_TRACKING', 'MAX_ACCEPTABLE_SLIPPAGE'
+                'ENABLE_SLIPPAGE_TRACKING', 'MAX_ACCEPTABLE_SLIPPAGE',
+                'SIM_USE_BOOK_TICKER', 'SIM_FILL_LATENCY_MS', 'SIM_FILL_QUEUE_PENALTY_PERCENT'
             ],
             "OBJECTIFS": [
                 'DAILY_TARGET_PERCENT', 'MAX_TRADES_PER_DAY', 'MIN_SUCCESS_RATE'
@@ -215,10 +243,11 @@ class ConfigManager:
     
     def get_exchange_config(self) -> Dict[str, Any]:
         """Configuration Exchange"""
+        api_key, api_secret = load_api_credentials()
         return {
             'name': self.get('EXCHANGE_NAME'),
-            'api_key': API_KEY,
-            'secret': API_SECRET,
+            'api_key': api_key,
+            'secret': api_secret,
             'testnet': self.get('TESTNET_MODE')
         }
     
@@ -269,7 +298,12 @@ class ConfigManager:
             # FILTRES DE QUALITÉ - UNIQUEMENT config.txt
             'MAX_SPREAD_PERCENT': self.get('spread_max') or self.get('MAX_SPREAD_PERCENT'),
             'MIN_ORDER_BOOK_DEPTH': self.get('orderbook_depth_min') or self.get('MIN_ORDER_BOOK_DEPTH'),
-            'MIN_REQUIRED_SIGNALS': self.get('signals_required') or self.get('MIN_REQUIRED_SIGNALS')
+            'MIN_REQUIRED_SIGNALS': self.get('signals_required') or self.get('MIN_REQUIRED_SIGNALS'),
+            
+            # ANALYSE CHANDELLES + SCAN APPROFONDI VECTORISÉ
+            'candle_body_ratio_min': self.get('candle_body_ratio_min'),
+            'candle_upper_wick_max': self.get('candle_upper_wick_max'),
+            'DEEP_SCAN_ENABLED': self.get('DEEP_SCAN_ENABLED', False)
         }
     
     def get_signal_config(self) -> Dict[str, Any]:
@@ -314,9 +348,10 @@ class ConfigManager:
         errors = []
         
         # Validation Exchange
-        if not API_KEY:
+        api_key, api_secret = load_api_credentials()
+        if not api_key:
             errors.append("Clé API manquante")
-        if not API_SECRET:
+        if not api_secret:
             errors.append("Clé secrète manquante")
         
         # Validation Trading
@@ -326,6 +361,12 @@ class ConfigManager:
         
         return errors
     
+    def require_api_credentials(self):
+        """Vérification des clés au démarrage en mode réel (la simulation s'en passe)"""
+        api_key, api_secret = load_api_credentials()
+        if not api_key or not api_secret:
+            raise Exception(MISSING_KEYS_MESSAGE)
+    
     def is_valid(self) -> bool:
         """Vérifie si la configuration est valide"""
         return len(self.validate_config()) == 0
@@ -1,20 +1,3 @@
-import asyncio
-from dotenv import load_dotenv
-import os
-load_dotenv()
-API_KEY = os.getenv('API_KEY')
-API_SECRET = os.getenv('API_SECRET')
-import os
-from dotenv import load_dotenv
-import os
-load_dotenv()
-api_key = API_KEY
-api_secret = API_SECRET
-if not api_key or not api_secret:
-    raise Exception("❌ CLÉS API BINANCE MANQUANTES : le fichier .env doit contenir API_KEY et API_SECRET dans le dossier du bot.")
-
-load_dotenv()
-
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
@@ -22,23 +5,38 @@ Moteur de Trading Principal - Temps Réel
 Architecture modulaire sans données en dur
 """
 
-import ccxt
-import pandas as pd
-import numpy as np
 import time
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional, Callable
+from typing import TYPE_CHECKING, Dict, List, Tuple, Optional, Callable
 import threading
 
-from websocket_realtime import BinanceWebSocketManager
+from websocket_realtime import BinanceWebSocketManager, UserDataStreamManager
 from scalping_scanner import ScalpingScanner
+from streaming_indicators import StreamingIndicatorBank
+from ohlcv_cache import OHLCVCache
+from order_book import OrderBookManager
+from fill_model import TopOfBookFillModel, OrderBookFillSimulator
+from order_router import OrderRouter, CcxtExchangeAdapter, STATUS_FILLED, STATUS_OPEN, STATUS_PARTIAL
+from rate_limiter import WeightRateLimiter, RateLimitedExchange
+from ticker_cache import TickerCache
+from exchange_bootstrap import get_exchange, refresh_markets
+from market_index import MarketIndex
+from log_pipeline import Sampler, add_sink, get_logger, setup_logging, shutdown_logging
+from portfolio_ledger import PortfolioLedger
+from position_book import PositionBook
+
+if TYPE_CHECKING:
+    import pandas as pd  # Chargé à la demande (scanner, chandelles) : import du moteur rapide
 
 class TechnicalIndicators:
-    """Calculateurs d'indicateurs techniques optimisés"""
+    """Calculateurs d'indicateurs techniques sur séries complètes (pandas)
+    
+    Pour le temps réel, utiliser StreamingIndicatorBank (mise à jour O(1))
+    """
     
     @staticmethod
-    def rsi(data: pd.Series, period: int = 14) -> pd.Series:
+    def rsi(data: 'pd.Series', period: int = 14) -> 'pd.Series':
         """Calcule le RSI"""
         delta = data.diff()
         gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
@@ -47,7 +45,7 @@ class TechnicalIndicators:
         return 100 - (100 / (1 + rs))
     
     @staticmethod
-    def macd(data: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict:
+    def macd(data: 'pd.Series', fast: int = 12, slow: int = 26, signal: int = 9) -> Dict:
         """Calcule le MACD"""
         exp1 = data.ewm(span=fast).mean()
         exp2 = data.ewm(span=slow).mean()
@@ -62,7 +60,7 @@ class TechnicalIndicators:
         }
     
     @staticmethod
-    def ema(data: pd.Series, period: int) -> pd.Series:
+    def ema(data: 'pd.Series', period: int) -> 'pd.Series':
         """Calcule la moyenne mobile exponentielle"""
         return data.ewm(span=period).mean()
 
@@ -135,9 +133,32 @@ class SignalGenerator:
         self.ema_fast = ema_config.get('fast', 9)
         self.ema_medium = ema_config.get('medium', 21)
         self.ema_slow = ema_config.get('slow', 50)
+        
+        # Indicateurs streaming par symbole/timeframe (mise à jour O(1))
+        self.streaming_indicators = StreamingIndicatorBank(
+            rsi_period=self.rsi_period or 14,
+            ema_fast=self.ema_fast or 9,
+            ema_slow=self.ema_slow or 21,
+            macd_fast=self.macd_fast or 12,
+            macd_slow=self.macd_slow or 26,
+            macd_signal=self.macd_signal or 9
+        )
+    
+    def on_kline(self, symbol: str, timeframe: str, kline: Dict) -> Dict:
+        """Met à jour les indicateurs streaming avec une bougie (fermée ou en cours)"""
+        return self.streaming_indicators.update(
+            symbol, timeframe, kline['close'], is_closed=kline.get('is_closed', True)
+        )
+    
+    def get_indicators(self, symbol: str, timeframe: str) -> Optional[Dict]:
+        """Valeurs streaming courantes, None si pas encore chauffées"""
+        snapshot = self.streaming_indicators.snapshot(symbol, timeframe)
+        if not snapshot or not snapshot['is_ready']:
+            return None
+        return snapshot
     
     def analyze_symbol(self, symbol: str, current_price: float, 
-                      kline_df: pd.DataFrame, volume_24h: float, change_24h: float) -> Dict:
+                      kline_df: 'pd.DataFrame', volume_24h: float, change_24h: float) -> Dict:
         """Analyse SIMPLIFIÉE pour cryptos pré-sélectionnées - utilise le score du scan"""
         
         # Si la crypto est dans la watchlist, elle a DÉJÀ passé tous les filtres du scan
@@ -199,12 +220,15 @@ class SignalGenerator:
         
         reason = f"Signal {signal} - Crypto pré-sélectionnée - Facteurs: {', '.join(confidence_factors)}"
         
+        # Indicateurs streaming 1m (seul timeframe alimenté par les klines) si chauffés, sinon valeurs neutres
+        indicators = self.get_indicators(symbol, '1m')
+        
         return {
             'signal': signal,
             'score': score,
             'confidence': confidence,
-            'rsi': 50,  # Valeurs neutres car pas utilisées
-            'macd': 0.1 if change_24h > 0 else -0.1,
+            'rsi': indicators['rsi'] if indicators else 50,
+            'macd': indicators['macd']['macd'] if indicators else (0.1 if change_24h > 0 else -0.1),
             'price': current_price,
             'change_24h': change_24h,
             'confidence_factors': confidence_factors,
@@ -268,6 +292,10 @@ class CryptoTradingBot:
         
         # Variables de trading simulé
         self.simulation_mode = config_manager.get('SIMULATION_MODE', True)
+        
+        # Clés API vérifiées une seule fois, au démarrage, et seulement en mode réel
+        if not self.simulation_mode:
+            config_manager.require_api_credentials()
         self.initial_balance = config_manager.get('INITIAL_BALANCE', 2000.0)
         self.simulated_balance = self.initial_balance  # Balance de départ optimisée
         self.balance = self.initial_balance  # Balance actuelle
@@ -279,8 +307,9 @@ class CryptoTradingBot:
         self.max_cryptos = config_manager.get('MAX_CRYPTOS', 20)
         self.scan_interval_minutes = config_manager.get('SCAN_INTERVAL_MINUTES', 1)
         
-        # CORRECTION: Initialiser open_positions
-        self.open_positions = []
+        # Positions partagées entre scan, surveillance, WebSocket, sauvegarde et GUI
+        self.position_book = PositionBook()
+        self.save_lock = threading.Lock()
         
         # Système de sécurité à 3 couches
         self.trailing_stop_enabled = config_manager.get('TRAILING_STOP_ENABLED', True)
@@ -299,6 +328,9 @@ class CryptoTradingBot:
         self.closed_trades = []
         self.last_save_time = datetime.now()
         
+        # Agrégats du portefeuille tenus à jour à chaque événement (lecture O(1))
+        self.portfolio = PortfolioLedger()
+        
         # Callbacks
         self.callbacks = {
             'log_message': [],
@@ -312,6 +344,29 @@ class CryptoTradingBot:
             'price_update': []
         }
         
+        # Journalisation asynchrone : file d'attente, écrivain de fond et fichier tournant
+        setup_logging(
+            log_file=config_manager.get('LOG_FILE', 'bot.log'),
+            level=config_manager.get('LOG_LEVEL', 'INFO'),
+            max_bytes=config_manager.get('LOG_MAX_BYTES', 5_000_000),
+            backup_count=config_manager.get('LOG_BACKUP_COUNT', 5)
+        )
+        self.logger = get_logger('engine')
+        self.log_sampler = Sampler(config_manager.get('LOG_SAMPLE_SECONDS', 5))
+        add_sink(self._dispatch_log_record)
+        
+        # Limiteur REST partagé (poids Binance), conservé si l'exchange est recréé
+        self.rate_limiter = WeightRateLimiter(
+            max_weight_per_minute=config_manager.get('REST_WEIGHT_LIMIT_PER_MINUTE', 6000),
+            order_reserve_percent=config_manager.get('REST_ORDER_RESERVE_PERCENT', 20)
+        )
+        
+        # Tickers REST partagés entre moniteurs et fallback (un appel par symbole en vol)
+        self.ticker_cache = TickerCache(ttl_seconds=config_manager.get('TICKER_CACHE_TTL_MS', 1000) / 1000)
+        
+        # Index des marchés (construit avec l'exchange, partagé scanner / routeur / WebSocket)
+        self.market_index = None
+        
         # Initialiser l'exchange avec les vraies clés
         self.exchange = None  # Initialiser d'abord
         if not self._initialize_exchange():
@@ -327,6 +382,36 @@ class CryptoTradingBot:
         self.signal_generator = SignalGenerator(self.signal_config)
         self.websocket_manager = None
         
+        # Cache OHLCV REST (téléchargement incrémental, persistance optionnelle)
+        self.ohlcv_cache = OHLCVCache(
+            self.exchange,
+            max_symbols=config_manager.get('OHLCV_CACHE_MAX_SYMBOLS', 200),
+            max_candles=config_manager.get('OHLCV_CACHE_MAX_CANDLES', 100000),
+            persist_file='ohlcv_cache.json' if config_manager.get('OHLCV_CACHE_PERSIST', False) else None
+        )
+        
+        # Exécution simulée au meilleur bid/ask (@bookTicker) avec latence et file d'attente
+        self.fill_model = None
+        if config_manager.get('SIM_USE_BOOK_TICKER', True):
+            self.fill_model = TopOfBookFillModel(
+                latency_ms=config_manager.get('SIM_FILL_LATENCY_MS', 150),
+                queue_penalty_percent=config_manager.get('SIM_FILL_QUEUE_PENALTY_PERCENT', 0.05)
+            )
+        
+        # Carnets L2 locaux (snapshot REST + flux différentiels) des symboles surveillés
+        self.order_books = None
+        if config_manager.get('ORDER_BOOK_STREAMS_ENABLED', False):
+            self.order_books = OrderBookManager(self.exchange)
+        
+        # Simulateur d'exécution : parcours du carnet L2, sinon meilleur bid/ask
+        self.fill_simulator = OrderBookFillSimulator(self.order_books, self.fill_model)
+        
+        # Routeur d'ordres réels (créé à la première utilisation)
+        self.order_router = None
+        
+        # Flux utilisateur (exécutions et soldes poussés, mode réel uniquement)
+        self.user_stream = None
+        
         # État du bot
         self.is_running = False
         self.simulation_mode = self.trading_config['simulation_mode']
@@ -359,48 +444,132 @@ class CryptoTradingBot:
             except Exception:
                 pass
     
+    def _connect_exchange(self, force_new: bool = False):
+        """Instance ccxt partagée avec les options de config (connexion initiale et réinitialisation)"""
+        return get_exchange(
+            self.exchange_config.get('api_key', '').strip(),
+            self.exchange_config.get('secret', '').strip(),
+            self.exchange_config.get('testnet', False),
+            timeout_ms=self.exchange_config.get('REST_TIMEOUT', 15) * 1000,
+            rate_limit_ms=60000 / self.exchange_config.get('MAX_REST_REQUESTS_PER_MINUTE', 1200),
+            markets_ttl_seconds=self.config_manager.get('MARKETS_CACHE_TTL_HOURS', 24) * 3600,
+            force_new=force_new
+        )
+    
     def _initialize_exchange(self):
-        """Initialise la connexion exchange avec UNIQUEMENT les clés privées"""
+        """Initialise la connexion exchange avec UNIQUEMENT les clés privées
+
+        Démarrage rapide : instance ccxt partagée et marchés en cache disque.
+        Les diagnostics complets sont dans run_health_check().
+        """
+        import ccxt  # Déjà chargé par exchange_bootstrap à la première connexion
+        
         try:
             # Récupérer les clés API depuis la config
+            api_key = self.exchange_config.get('api_key', '').strip()
             secret = self.exchange_config.get('secret', '').strip()
             testnet = self.exchange_config.get('testnet', False)
             
+            if not api_key or not secret:
+                if not self.simulation_mode:
+                    self.log("❌ CLÉS API PRIVÉES MANQUANTES")
+                    self.log("   Ajoutez vos clés dans l'onglet Configuration")
+                    self.log("   API Key: MANQUANTE")
+                    self.log("   Secret: MANQUANTE")
+                    return False
+                self.log("ℹ️ Simulation sans clés API : données de marché publiques uniquement")
+            
+            # Connexion déjà établie dans __init__ : start() ne refait que la notification
+            if self.exchange is None:
+                start_time = time.time()
+                exchange, source = self._connect_exchange()
+                self.exchange = RateLimitedExchange(exchange, self.rate_limiter)
+                self._build_market_index()
+                
+                sources = {'memory': 'connexion réutilisée', 'disk': 'marchés en cache', 'network': 'marchés téléchargés'}
+                self.log(f"🔗 Exchange prêt en {time.time() - start_time:.2f}s ({len(exchange.markets)} marchés, "
+                         f"{sources[source]}) - Mode: {'TESTNET' if testnet else 'PRODUCTION'}")
+                
+                # Diagnostics complets seulement sur demande
+                if self.config_manager.get('STARTUP_HEALTH_CHECK', False):
+                    threading.Thread(target=self.run_health_check, daemon=True, name="ExchangeHealthCheck").start()
+            
+            # Notifier le GUI du succès de connexion
+            for callback in self.callbacks.get('exchange_status', []):
+                try:
+                    callback('connected', f"{len(self.exchange.markets)} marchés", testnet)
+                except Exception:
+                    pass
+            
+            return True
+            
+        except ccxt.AuthenticationError as e:
+            self.log("❌ ERREUR D'AUTHENTIFICATION AVEC VOS CLÉS")
+            self.log(f"   Détails: {e}")
+            self.log("   Vérifiez vos clés API dans l'onglet Configuration")
+            self.log("   Assurez-vous que les clés sont correctes et actives")
+            
+            # Notifier le GUI de l'erreur
+            for callback in self.callbacks.get('exchange_status', []):
+                try:
+                    callback('auth_error', str(e), testnet)
+                except Exception:
+                    pass
+            return False
+        except ccxt.NetworkError as e:
+            self.log("❌ ERREUR RÉSEAU AVEC VOS CLÉS")
+            self.log(f"   Détails: {e}")
+            self.log("   Vérifiez votre connexion internet")
+            
+            # Notifier le GUI de l'erreur réseau
+            for callback in self.callbacks.get('exchange_status', []):
+                try:
+                    callback('network_error', str(e), testnet)
+                except Exception:
+                    pass
+            return False
+        except Exception as e:
+            self.log("❌ ERREUR INATTENDUE AVEC VOS CLÉS PRIVÉES")
+            self.log(f"   Détails: {e}")
+            
+            # Notifier le GUI de l'erreur
+            for callback in self.callbacks.get('exchange_status', []):
+                try:
+                    callback('error', str(e), testnet)
+                except Exception:
+                    pass
+            return False
+    
+    def _build_market_index(self):
+        """Métadonnées de marché précalculées une fois depuis les marchés chargés"""
+        suffixes = self.scan_config.get('filter_suffixes', self.scan_config.get('PAIR_SUFFIXES', 'USDT,BTC,ETH'))
+        if not isinstance(suffixes, list):
+            suffixes = suffixes.split(',')
+        self.market_index = MarketIndex(self.exchange.markets, suffixes,
+                                        self.scan_config.get('PAIR_SUFFIX_MODE', 'INCLUDE'))
+    
+    def run_health_check(self) -> bool:
+        """Diagnostic complet de la connexion Binance (marchés, solde, tickers, permissions)"""
+        if self.exchange is None and not self._initialize_exchange():
+            return False
+        testnet = self.exchange_config.get('testnet', False)
+        try:
             self.log("🔐 TEST DE CONNEXION BINANCE AVEC VOS CLÉS PRIVÉES")
             self.log("="*60)
             
-            if not api_key or not secret:
-                self.log("❌ CLÉS API PRIVÉES MANQUANTES")
-                self.log("   Ajoutez vos clés dans l'onglet Configuration")
-                self.log("   API Key: MANQUANTE")
-                self.log("   Secret: MANQUANTE")
-                return False
-            
             # Masquer les clés pour la sécurité
-            secret_masked = API_SECRET[:8] + '...' + API_SECRET[-4:] if API_SECRET and len(API_SECRET) > 12 else '***'
-            
             self.log(f"🔑 Clés API détectées:")
-            api_key_masked = API_KEY[:8] + '...' + API_KEY[-4:] if API_KEY and len(API_KEY) > 12 else '***'
+            api_key = self.exchange_config.get('api_key', '')
+            secret = self.exchange_config.get('secret', '')
+            api_key_masked = api_key[:8] + '...' + api_key[-4:] if len(api_key) > 12 else '***'
             self.log(f"   API Key: {api_key_masked}")
-            secret_masked = API_SECRET[:8] + '...' + API_SECRET[-4:] if API_SECRET and len(API_SECRET) > 12 else '***'
+            secret_masked = secret[:8] + '...' + secret[-4:] if len(secret) > 12 else '***'
             self.log(f"   Secret: {secret_masked}")
             self.log(f"   Mode: {'TESTNET' if testnet else 'PRODUCTION'}")
             
-            # Créer l'exchange avec vos clés privées pour TOUTES les requêtes
-            import ccxt
-            self.log("🔗 Création de la connexion exchange...")
-            self.exchange = ccxt.binance({
-                'apiKey': api_key,
-                'secret': secret,
-                'sandbox': testnet,
-                'enableRateLimit': True,
-                'timeout': self.exchange_config.get('REST_TIMEOUT', 15) * 1000,
-                'rateLimit': 60000 / self.exchange_config.get('MAX_REST_REQUESTS_PER_MINUTE', 1200)
-            })
-            
-            # Test 1: Chargement des marchés avec VOS clés privées
+            # Test 1: Rechargement des marchés (met aussi à jour le cache disque)
             self.log("📊 Test 1: Chargement des marchés avec vos clés privées...")
-            markets = self.exchange.load_markets()
+            markets = refresh_markets(self.exchange.wrapped, testnet)
             self.log(f"   ✅ {len(markets)} marchés chargés via vos clés privées")
             
             # Test 2: Récupération du solde avec VOS clés privées
@@ -446,48 +615,11 @@ class CryptoTradingBot:
             
             self.log("🎉 CONNEXION BINANCE RÉUSSIE AVEC VOS CLÉS PRIVÉES !")
             self.log("✅ Toutes les requêtes utilisent vos clés privées")
-            self.log("✅ Le bot peut maintenant fonctionner correctement")
             self.log("="*60)
-            
-            # Notifier le GUI du succès de connexion
-            for callback in self.callbacks.get('exchange_status', []):
-                try:
-                    callback('connected', f"{len(markets)} marchés", testnet)
-                except Exception:
-                    pass
-            
             return True
             
-        except ccxt.AuthenticationError as e:
-            self.log("❌ ERREUR D'AUTHENTIFICATION AVEC VOS CLÉS")
-            self.log(f"   Détails: {e}")
-            self.log("   Vérifiez vos clés API dans l'onglet Configuration")
-            self.log("   Assurez-vous que les clés sont correctes et actives")
-            
-            # Notifier le GUI de l'erreur
-            for callback in self.callbacks.get('exchange_status', []):
-                try:
-                    callback('auth_error', str(e), testnet)
-                except Exception:
-                    pass
-            return False
-        except ccxt.NetworkError as e:
-            self.log("❌ ERREUR RÉSEAU AVEC VOS CLÉS")
-            self.log(f"   Détails: {e}")
-            self.log("   Vérifiez votre connexion internet")
-            
-            # Notifier le GUI de l'erreur réseau
-            for callback in self.callbacks.get('exchange_status', []):
-                try:
-                    callback('network_error', str(e), testnet)
-                except Exception:
-                    pass
-            return False
         except Exception as e:
-            self.log("❌ ERREUR INATTENDUE AVEC VOS CLÉS PRIVÉES")
-            self.log(f"   Détails: {e}")
-            
-            # Notifier le GUI de l'erreur
+            self.log(f"❌ Diagnostic connexion échoué: {e}")
             for callback in self.callbacks.get('exchange_status', []):
                 try:
                     callback('error', str(e), testnet)
@@ -500,11 +632,28 @@ class CryptoTradingBot:
         if event_type in self.callbacks:
             self.callbacks[event_type].append(callback)
     
-    def log(self, message: str):
-        """Log avec notifications aux callbacks"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        log_msg = f"[{timestamp}] {message}"
-        print(log_msg)
+    def log(self, message: str, level: int = logging.INFO, **fields):
+        """Log avec notifications aux callbacks (mis en file, écrit et notifié par l'écrivain de fond)"""
+        self.logger.log(level, message, extra={'fields': fields, 'owner': id(self)})
+    
+    def _trace(self, message: str, level: int = logging.DEBUG, sample_key: Optional[str] = None, **fields):
+        """Trace console/fichier sans notification GUI, échantillonnée par `sample_key` (lignes par tick)"""
+        if not self.logger.isEnabledFor(level):
+            return
+        if sample_key is not None:
+            suppressed = self.log_sampler.should_log(sample_key)
+            if suppressed is None:
+                return
+            if suppressed:
+                fields['suppressed'] = suppressed
+        self.logger.log(level, message, extra={'fields': fields})
+    
+    def _dispatch_log_record(self, record: logging.LogRecord):
+        """Écrivain de fond : transmet les logs de ce bot aux callbacks"""
+        if getattr(record, 'owner', None) != id(self):
+            return
+        timestamp = datetime.fromtimestamp(record.created).strftime("%H:%M:%S")
+        log_msg = f"[{timestamp}] {record.getMessage()}"
         
         # Notifier les callbacks
         for callback in self.callbacks['log_message']:
@@ -556,7 +705,10 @@ class CryptoTradingBot:
                     
                     # Créer le scanner SCALPING PROFESSIONNEL
                     from scalping_scanner import ScalpingScanner
-                    scanner = ScalpingScanner(self.exchange, self.scan_config)
+                    candle_store = self.websocket_manager.candle_store if self.websocket_manager else None
+                    self.ohlcv_cache.exchange = self.exchange
+                    scanner = ScalpingScanner(self.exchange, self.scan_config, candle_store, self.ohlcv_cache,
+                                              self.order_books, self.market_index)
                     
                     # Effectuer le scan SCALPING avec timeout
                     scan_start_time = time.time()
@@ -630,7 +782,8 @@ class CryptoTradingBot:
                                 signal = 'SELL'
                             
                             if signal in ['BUY', 'SELL']:
-                                print(f"🎯 {symbol}: Signal {signal} généré (Pump: {pump_3min:+.2f}%)")
+                                self._trace(f"🎯 {symbol}: Signal {signal} généré (Pump: {pump_3min:+.2f}%)",
+                                            logging.INFO, symbol=symbol, signal=signal)
                                 
                                 # SIMULATION de trading avec vraies données du scan
                                 if self.simulation_mode:
@@ -690,14 +843,9 @@ class CryptoTradingBot:
                         
                         # Réinitialiser le scanner et l'exchange
                         try:
-                            import ccxt
-                            self.exchange = ccxt.binance({
-                                'apiKey': self.exchange_config['api_key'],
-                                'secret': self.exchange_config['secret'],
-                                'sandbox': self.exchange_config['testnet'],
-                                'enableRateLimit': True,
-                            })
-                            self.exchange.load_markets()
+                            exchange, _ = self._connect_exchange(force_new=True)
+                            self.exchange = RateLimitedExchange(exchange, self.rate_limiter)
+                            self._build_market_index()
                             self.log("🔄 Exchange réinitialisé avec succès")
                             consecutive_failures = 0
                         except Exception as ex:
@@ -717,6 +865,15 @@ class CryptoTradingBot:
                 if hasattr(self, '_last_activity_log'):
                     if time.time() - self._last_activity_log > 300:  # Toutes les 5 minutes
                         self.log("🔄 Scan continu actif - Recherche permanente de cryptos...")
+                        rate = self.get_rate_limit_stats()
+                        self.log(f"⚖️ Poids REST: {rate['used_weight']}/{rate['weight_limit']} "
+                                 f"({rate['usage_percent']:.0f}%) - {rate['throttled']} requêtes retardées")
+                        tickers = self.get_ticker_cache_stats()
+                        self.log(f"🎯 Cache ticker: {tickers['hits']} hits, {tickers['coalesced']} regroupés, "
+                                 f"{tickers['misses']} appels REST ({tickers['hit_rate']:.0f}% partagés)")
+                        portfolio = self.get_portfolio_snapshot()
+                        self.log(f"💼 Portefeuille: {portfolio['total_value']:.2f} USDT - P&L {portfolio['total_pnl']:+.2f} "
+                                 f"(latent {portfolio['unrealized_pnl']:+.2f}) - {portfolio['open_positions']} positions")
                         self._last_activity_log = time.time()
                 else:
                     self._last_activity_log = time.time()
@@ -764,7 +921,12 @@ class CryptoTradingBot:
         
         try:
             testnet = self.exchange_config.get('testnet', False)
-            self.websocket_manager = BinanceWebSocketManager(testnet=testnet)
+            if self.order_books is not None:
+                self.order_books.exchange = self.exchange
+            # @bookTicker seulement si le modèle d'exécution top-of-book le consomme
+            self.websocket_manager = BinanceWebSocketManager(testnet=testnet, order_books=self.order_books,
+                                                             book_ticker=self.fill_model is not None,
+                                                             market_index=self.market_index)
             
             # Callbacks WebSocket avec gestion d'erreurs robuste
             def on_price_update(data):
@@ -807,32 +969,38 @@ class CryptoTradingBot:
                         threading.Thread(target=check_reconnection, daemon=True).start()
                     
                     elif status == 'connected':
+                        # Le fallback s'arrête de lui-même pour chaque symbole dont les ticks reviennent
                         self.log("✅ WebSocket reconnecté avec succès")
-                        self._stop_price_fallback_system()  # Arrêter le fallback
                         
                 except Exception as e:
                     self.log(f"❌ Erreur traitement connection_status: {e}")
             
+            def on_kline_update(data):
+                try:
+                    self.signal_generator.on_kline(data['symbol'], data.get('interval', '1m'), data['kline'])
+                except Exception as e:
+                    self.log(f"❌ Erreur indicateurs streaming: {e}")
+            
             self.websocket_manager.add_callback('price_update', on_price_update)
+            self.websocket_manager.add_callback('kline_update', on_kline_update)
             self.websocket_manager.add_callback('connection_status', on_connection_status)
+            if self.fill_model is not None:
+                self.websocket_manager.add_callback('book_ticker', self.fill_model.record)
             
             # Démarrer les streams
             self.websocket_manager.start_price_streams(self.watchlist)
             
+            # Backfill REST des bougies 1m (tous les timeframes en dérivent)
+            threading.Thread(target=self._backfill_candles, args=[list(self.watchlist)],
+                             daemon=True, name="CandleBackfill").start()
+            
             self.log("⚡ WebSockets temps réel activés avec système de fallback")
             
             # Programmer une vérification périodique de santé
             self._start_websocket_health_monitor()
             
-            # Démarrer le système de fallback IMMÉDIATEMENT en parallèle
-            import threading
-            def immediate_fallback():
-                time.sleep(2)  # Attendre juste 2 secondes
-                if self.is_running:
-                    self.log("🔄 Activation fallback préventif - WebSocket peut prendre du temps")
-                    self._start_price_fallback_system()
-            
-            threading.Thread(target=immediate_fallback, daemon=True).start()
+            # Fallback au repos tant que les ticks arrivent (vérifie la fraîcheur par symbole)
+            self._start_price_fallback_system()
             
         except Exception as e:
             self.log(f"❌ Erreur WebSockets: {e}")
@@ -851,8 +1019,28 @@ class CryptoTradingBot:
             
             threading.Thread(target=retry_setup, daemon=True).start()
     
+    def _backfill_candles(self, symbols: List[str], limit: int = 500):
+        """Charge l'historique 1m via REST dans le stockage de bougies et amorce les indicateurs"""
+        if not self.exchange or not self.websocket_manager:
+            return
+        
+        candle_store = self.websocket_manager.candle_store
+        for symbol in symbols:
+            if not self.is_running:
+                return
+            try:
+                rows = self.exchange.fetch_ohlcv(symbol, '1m', limit=limit)
+                candle_store.ingest_ohlcv(symbol, rows)
+                
+                # Amorcer les indicateurs streaming sur les bougies fermées
+                closes = [row[4] for row in rows[:-1]]
+                self.signal_generator.streaming_indicators.seed(symbol, '1m', closes)
+            except Exception as e:
+                self.log(f"❌ Erreur backfill bougies {symbol}: {e}")
+    
     def _start_price_fallback_system(self):
-        """Démarre un système de fallback qui simule des données de prix pour continuer le trading"""
+        """Démarre le fallback REST : un fetch_tickers groupé par cycle pour les seuls symboles
+        dont le flux WebSocket est figé, abandonné symbole par symbole dès le retour des ticks"""
         if hasattr(self, '_fallback_running') and self._fallback_running:
             return  # Déjà en cours
         
@@ -860,6 +1048,7 @@ class CryptoTradingBot:
         self.log("🔄 Démarrage système de fallback pour données de prix")
         
         def fallback_price_generator():
+            fallback_symbols = set()
             while self.is_running and self._fallback_running:
                 # Reload configuration for real-time changes
                 try:
@@ -868,50 +1057,60 @@ class CryptoTradingBot:
                 except Exception:
                     pass
                 try:
-                    for symbol in self.watchlist:
-                        if not self.is_running or not self._fallback_running:
-                            break
-                        
-                        # Utiliser l'exchange pour obtenir les prix actuels
-                        if self.exchange:
-                            try:
-                                ticker = self.exchange.fetch_ticker(symbol)
-                                
-                                # Créer des données compatibles WebSocket
-                                fallback_data = {
-                                    'symbol': symbol,
-                                    'price': ticker['last'],
-                                    'volume_24h': ticker.get('quoteVolume', 0),
-                                    'change_24h': ticker.get('percentage', 0),
-                                    'timestamp': datetime.now()
-                                }
-                                
-                                # Traiter comme des données temps réel
-                                self._process_realtime_data(symbol, fallback_data)
-                                
-                                # Notifier les callbacks GUI
-                                for callback in self.callbacks['price_update']:
-                                    try:
-                                        callback(symbol, fallback_data)
-                                    except Exception:
-                                        pass
-                                
-                            except Exception as e:
-                                self.log(f"❌ Erreur récupération ticker {symbol}: {e}")
+                    stale_seconds = self.config_manager.get('FALLBACK_STALE_SECONDS', 10)
+                    symbols = list(self.watchlist)
+                    if self.websocket_manager:
+                        stale = self.websocket_manager.get_stale_symbols(symbols, stale_seconds)
+                    else:
+                        stale = symbols
+                    
+                    resumed = fallback_symbols - set(stale)
+                    if resumed:
+                        self.log(f"✅ Ticks WebSocket revenus, fallback arrêté: {', '.join(sorted(resumed))}")
+                    added = set(stale) - fallback_symbols
+                    if added:
+                        self.log(f"🔄 Flux figé, fallback REST: {', '.join(sorted(added))}")
+                    fallback_symbols = set(stale)
+                    
+                    # Un seul appel REST pour tous les symboles figés
+                    if stale and self.exchange:
+                        tickers = self.exchange.fetch_tickers(stale)
+                        for symbol in stale:
+                            ticker = tickers.get(symbol)
+                            if not ticker or not ticker.get('last'):
+                                continue
+                            self.ticker_cache.put(symbol, ticker)
+                            
+                            # Créer des données compatibles WebSocket
+                            fallback_data = {
+                                'symbol': symbol,
+                                'price': ticker['last'],
+                                'current_price': ticker['last'],
+                                'volume_24h': ticker.get('quoteVolume', 0),
+                                'change_24h': ticker.get('percentage', 0),
+                                'timestamp': datetime.now()
+                            }
+                            
+                            # Traiter comme des données temps réel
+                            self._process_realtime_data(symbol, fallback_data)
+                            
+                            # Notifier les callbacks GUI
+                            for callback in self.callbacks['price_update']:
+                                try:
+                                    callback(symbol, fallback_data)
+                                except Exception:
+                                    pass
                     
-                    # Attendre 5 secondes avant la prochaine mise à jour
-                    import time
+                    # Attendre 5 secondes avant la prochaine vérification
                     time.sleep(5)
                     
                 except Exception as e:
                     self.log(f"❌ Erreur système fallback: {e}")
-                    import time
                     time.sleep(10)
         
-        import threading
         fallback_thread = threading.Thread(target=fallback_price_generator, daemon=True, name="PriceFallbackSystem")
         fallback_thread.start()
-        self.log("✅ Système de fallback prix activé - Trading peut continuer")
+        self.log("✅ Système de fallback prix activé (symboles sans ticks WebSocket uniquement)")
     
     def _calculate_slippage(self, symbol: str, expected_price: float, executed_price: float) -> float:
         """Calcule le slippage réel d'un trade"""
@@ -921,8 +1120,9 @@ class CryptoTradingBot:
         slippage_percent = ((executed_price - expected_price) / expected_price) * 100
         return slippage_percent
     
-    def _log_slippage(self, symbol: str, trade_type: str, expected_price: float, executed_price: float):
-        """Log le slippage d'un trade"""
+    def _log_slippage(self, symbol: str, trade_type: str, expected_price: float, executed_price: float,
+                      fill_source: str = 'last_price', partial: bool = False):
+        """Log le slippage d'un trade (prix de référence vs exécution modélisée)"""
         if not self.enable_slippage_tracking:
             return
         
@@ -935,6 +1135,8 @@ class CryptoTradingBot:
             'expected_price': expected_price,
             'executed_price': executed_price,
             'slippage_percent': slippage,
+            'fill_source': fill_source,
+            'partial_fill': partial,
             'timestamp': datetime.now()
         }
         
@@ -968,6 +1170,41 @@ class CryptoTradingBot:
             "recent_trades": self.slippage_history[-10:]  # 10 derniers trades
         }
     
+    @property
+    def open_positions(self) -> List[Dict]:
+        """Instantané des positions (ouvertes et fermées) : itérable pendant que les autres threads ajoutent"""
+        return self.position_book.snapshot()
+    
+    @open_positions.setter
+    def open_positions(self, positions: List[Dict]):
+        self.position_book.replace(positions)
+    
+    def reset_simulation_account(self, balance: float):
+        """Reset de la simulation en une transaction : balance, positions, compteurs et historique"""
+        with self.position_book.transaction():
+            self.simulated_balance = balance
+            self.balance = balance
+            self.open_positions = []
+            self.total_trades = 0
+            self.winning_trades = 0
+            self.total_pnl = 0.0
+            self.total_fees = 0.0
+            self.closed_trades = []
+            self.rebuild_portfolio()
+    
+    def rebuild_portfolio(self):
+        """Recalcule les agrégats du portefeuille (chargement, reset) ; ensuite tout est incrémental"""
+        self.portfolio.rebuild(self.open_positions, self.total_pnl, self.total_fees,
+                               self.winning_trades, self.total_trades)
+    
+    def get_portfolio_snapshot(self) -> Dict:
+        """Totaux du portefeuille en O(1) : cash, investi, P&L réalisé/latent, frais, trades gagnants"""
+        return self.portfolio.snapshot(cash=self.balance)
+    
+    def get_rate_limit_stats(self) -> Dict:
+        """Poids REST consommé et attentes imposées par le limiteur partagé"""
+        return self.rate_limiter.get_metrics()
+    
     def load_portfolio_state(self):
         """Charge l'état du portefeuille depuis le fichier JSON"""
         try:
@@ -989,7 +1226,7 @@ class CryptoTradingBot:
                 
                 # Restaurer les positions ouvertes
                 saved_positions = data.get('open_positions', [])
-                self.open_positions = []
+                positions = []
                 
                 for pos in saved_positions:
                     # Convertir les timestamps en datetime
@@ -999,8 +1236,17 @@ class CryptoTradingBot:
                         pos['entry_time'] = datetime.fromisoformat(pos['entry_time'])
                     if 'last_significant_move' in pos:
                         pos['last_significant_move'] = datetime.fromisoformat(pos['last_significant_move'])
+                    # Clôture interrompue par l'arrêt : la position est de nouveau surveillée
+                    pos.pop('closing', None)
                     
-                    self.open_positions.append(pos)
+                    positions.append(pos)
+                self.open_positions = positions
+                
+                # Anciens fichiers : compteurs de trades jamais tenus, repris de l'historique
+                if self.total_trades < len(self.closed_trades):
+                    self.total_trades = len(self.closed_trades)
+                    self.winning_trades = sum(1 for trade in self.closed_trades if trade.get('net_pnl', 0) > 0)
+                self.rebuild_portfolio()
                 
                 last_updated = data.get('last_updated', 'Unknown')
                 self.log(f"📂 Portefeuille restauré depuis {last_updated}")
@@ -1047,45 +1293,48 @@ class CryptoTradingBot:
                 else:
                     return obj
             
-            # Préparer les positions pour la sauvegarde
-            positions_to_save = []
-            for pos in self.open_positions:
-                pos_copy = pos.copy()
-                # Conversion récursive de tous les datetime
-                pos_copy = convert_datetime_to_string(pos_copy)
-                positions_to_save.append(pos_copy)
-            
-            # Préparer les trades fermés pour la sauvegarde
-            closed_trades_to_save = []
-            for trade in self.closed_trades[-100:]:  # Garder les 100 derniers trades
-                trade_copy = trade.copy()
-                # Conversion récursive de tous les datetime
-                trade_copy = convert_datetime_to_string(trade_copy)
-                closed_trades_to_save.append(trade_copy)
-            
-            # Données à sauvegarder
-            portfolio_data = {
-                'balance': self.balance,
-                'simulated_balance': self.simulated_balance,
-                'open_positions': positions_to_save,
-                'closed_trades': closed_trades_to_save,
-                'total_pnl': self.total_pnl,
-                'total_trades': self.total_trades,
-                'winning_trades': self.winning_trades,
-                'total_fees': self.total_fees,  # NOUVEAU: Sauvegarder frais totaux
-                'last_updated': datetime.now().isoformat(),
-                'initial_balance': self.initial_balance,
-                'position_size_usdt': self.position_size_usdt
-            }
-            
-            # Sauvegarde atomique (fichier temporaire puis renommage)
-            temp_file = self.portfolio_file + '.tmp'
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(portfolio_data, f, indent=2, ensure_ascii=False)
-            
-            # Renommer le fichier temporaire
+            # État cohérent : aucune ouverture ni clôture ne modifie le compte pendant la copie
+            with self.position_book.transaction():
+                # Préparer les positions pour la sauvegarde
+                positions_to_save = []
+                for pos in self.open_positions:
+                    pos_copy = pos.copy()
+                    # Conversion récursive de tous les datetime
+                    pos_copy = convert_datetime_to_string(pos_copy)
+                    positions_to_save.append(pos_copy)
+                
+                # Préparer les trades fermés pour la sauvegarde
+                closed_trades_to_save = []
+                for trade in self.closed_trades[-100:]:  # Garder les 100 derniers trades
+                    trade_copy = trade.copy()
+                    # Conversion récursive de tous les datetime
+                    trade_copy = convert_datetime_to_string(trade_copy)
+                    closed_trades_to_save.append(trade_copy)
+                
+                # Données à sauvegarder
+                portfolio_data = {
+                    'balance': self.balance,
+                    'simulated_balance': self.simulated_balance,
+                    'open_positions': positions_to_save,
+                    'closed_trades': closed_trades_to_save,
+                    'total_pnl': self.total_pnl,
+                    'total_trades': self.total_trades,
+                    'winning_trades': self.winning_trades,
+                    'total_fees': self.total_fees,  # NOUVEAU: Sauvegarder frais totaux
+                    'last_updated': datetime.now().isoformat(),
+                    'initial_balance': self.initial_balance,
+                    'position_size_usdt': self.position_size_usdt
+                }
+            
+            # Sauvegarde atomique (fichier temporaire puis renommage), un seul écrivain à la fois
             import os
-            os.replace(temp_file, self.portfolio_file)
+            with self.save_lock:
+                temp_file = self.portfolio_file + '.tmp'
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(portfolio_data, f, indent=2, ensure_ascii=False)
+                
+                # Renommer le fichier temporaire
+                os.replace(temp_file, self.portfolio_file)
             
             self.last_save_time = datetime.now()
             
@@ -1106,6 +1355,7 @@ class CryptoTradingBot:
                 time.sleep(30)
                 if self.is_running:
                     self.save_portfolio_state()
+                    self.ohlcv_cache.save()
                     
             except Exception as e:
                 self.log(f"❌ Erreur sauvegarde automatique: {e}")
@@ -1212,10 +1462,16 @@ class CryptoTradingBot:
             
             while position['status'] == 'open' and self.is_running:
                 try:
+                    # Sortie déjà exécutée par l'OCO exchange ?
+                    if self._check_exit_orders(position):
+                        return
+                    
                     current_price = self._get_current_price(symbol)
                     if current_price is None:
                         time.sleep(2)
                         continue
+                    position['current_price'] = current_price
+                    self.portfolio.mark_price(symbol, current_price)
                     
                     # Ajouter prix à l'historique
                     price_history.append({
@@ -1256,8 +1512,8 @@ class CryptoTradingBot:
                         self._close_position_with_reason(position, current_price, "RAPID_EXIT")
                         return
                     
-                    # PRIORITÉ 3: STOP LOSS traditionnel
-                    if current_price <= stop_loss:
+                    # PRIORITÉ 3: STOP LOSS traditionnel (délégué à l'exchange si OCO active)
+                    if current_price <= stop_loss and not self._has_exit_orders(position):
                         self.log(f"🛑 {symbol}: STOP LOSS déclenché à {current_price:.6f} (-{abs(price_change_percent):.2f}%)")
                         self._close_position_with_reason(position, current_price, "STOP_LOSS")
                         return
@@ -1315,6 +1571,10 @@ class CryptoTradingBot:
                                 # Mettre à jour le plus haut
                                 if price_change_percent > highest_profit:
                                     highest_profit = price_change_percent
+                            
+                            # Stop de l'OCO remonté au niveau du trailing
+                            self._amend_exit_orders(
+                                position, stop_loss=entry_price * (1 + (highest_profit - trailing_stop_distance) / 100))
                         
                         # Déclencher trailing stop
                         if trailing_activated and price_change_percent < (highest_profit - trailing_stop_distance):
@@ -1359,6 +1619,8 @@ class CryptoTradingBot:
                                 if new_extended_tp > extended_tp:
                                     extended_tp = new_extended_tp
                                     self.log(f"🚀 {symbol}: TP ÉTENDU à {extended_tp:.6f} (momentum: +{momentum_percent:.2f}%)")
+                                    self._amend_exit_orders(
+                                        position, take_profit=extended_tp * (1 + max_tp_extension / 100))
                                 
                                 # CONTINUER À SURVEILLER - Ne pas vendre tant que momentum fort
                                 self.log(f"🔍 {symbol}: Momentum très fort - Surveillance continue...")
@@ -1472,11 +1734,19 @@ class CryptoTradingBot:
         except Exception as e:
             self.log(f"❌ Erreur critique surveillance {symbol}: {e}")
     
+    def _fetch_ticker(self, symbol: str) -> Dict:
+        """fetch_ticker regroupé : les appels simultanés sur un symbole partagent une lecture"""
+        return self.ticker_cache.get(symbol, self.exchange.fetch_ticker)
+    
+    def get_ticker_cache_stats(self) -> Dict:
+        """Compteurs hits/misses/regroupements du cache ticker"""
+        return self.ticker_cache.get_stats()
+    
     def _get_current_price(self, symbol: str) -> Optional[float]:
         """Obtient le prix actuel d'un symbole"""
         try:
             if self.exchange:
-                ticker = self.exchange.fetch_ticker(symbol)
+                ticker = self._fetch_ticker(symbol)
                 return ticker.get('last', 0)
             return None
         except Exception:
@@ -1484,12 +1754,10 @@ class CryptoTradingBot:
     
     def _close_position_with_reason(self, position: Dict, exit_price: float, reason: str):
         """Ferme une position avec une raison spécifique"""
+        # Une seule clôture par position (surveillance, OCO, scan et GUI en parallèle)
+        if not self.position_book.begin_close(position):
+            return
         try:
-            # Calculer le slippage si activé
-            if self.enable_slippage_tracking:
-                expected_price = position['price']
-                self._log_slippage(position['symbol'], "SELL", expected_price, exit_price)
-            
             # Fermer la position
             position['exit_reason'] = reason
             position['exit_price'] = exit_price
@@ -1518,6 +1786,17 @@ class CryptoTradingBot:
                 
         except Exception as e:
             self.log(f"❌ Erreur fermeture position {position['symbol']}: {e}")
+        finally:
+            if position['status'] == 'open' and position.get('closing'):
+                self._recover_failed_close(position)
+    
+    def _recover_failed_close(self, position: Dict):
+        """Clôture interrompue (exception, ordre en échec) : la position redevient ouverte et surveillée"""
+        for field in ('exit_reason', 'exit_time', 'exit_price'):
+            position.pop(field, None)
+        self.position_book.abort_close(position)
+        self.log(f"⚠️ {position['symbol']}: Clôture échouée - position de nouveau surveillée")
+        threading.Thread(target=self._monitor_position_simple, args=[position], daemon=True).start()
     
     def _stop_price_fallback_system(self):
         """Arrête le système de fallback quand WebSocket est reconnecté"""
@@ -1581,10 +1860,16 @@ class CryptoTradingBot:
             change_24h = data.get('change_24h', 0)
             
             if not current_price or current_price <= 0:
-                print(f"⚠️ {symbol}: Prix invalide ({current_price}) - ANALYSE IGNORÉE")
+                self._trace(f"⚠️ {symbol}: Prix invalide ({current_price}) - ANALYSE IGNORÉE",
+                            logging.WARNING, sample_key=f"invalid:{symbol}", symbol=symbol)
                 return
             
-            print(f"📊 {symbol}: Prix=${current_price:.10f}, Vol={volume_24h/1000000:.1f}M, Change={change_24h:+.2f}%")
+            # P&L latent des positions ouvertes sur ce symbole (différence, pas de recalcul)
+            self.portfolio.mark_price(symbol, current_price)
+            
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self._trace(f"📊 {symbol}: Prix=${current_price:.10f}, Vol={volume_24h/1000000:.1f}M, Change={change_24h:+.2f}%",
+                            sample_key=f"tick:{symbol}", symbol=symbol)
             
             # GÉNÉRER SIGNAL DE TRADING basé sur momentum
             signal = 'HOLD'
@@ -1608,7 +1893,8 @@ class CryptoTradingBot:
             
             # NOUVELLE LOGIQUE : ENTRER UNIQUEMENT SUR SIGNAL BUY
             if signal == 'BUY':
-                print(f"✅ {symbol}: Signal BUY généré (Change: {change_24h:+.2f}%) - ENTRÉE EN POSITION")
+                self._trace(f"✅ {symbol}: Signal BUY généré (Change: {change_24h:+.2f}%) - ENTRÉE EN POSITION",
+                            logging.INFO, symbol=symbol, signal='BUY')
                 
                 # SIMULATION de trading avec vraies données
                 if self.simulation_mode:
@@ -1628,11 +1914,12 @@ class CryptoTradingBot:
                         'confidence': 0.7
                     })
             elif signal == 'SELL':
-                print(f"ℹ️ {symbol}: Signal SELL détecté (Change: {change_24h:+.2f}%) - IGNORÉ (on ne trade que les BUY)")
+                self._trace(f"ℹ️ {symbol}: Signal SELL détecté (Change: {change_24h:+.2f}%) - IGNORÉ (on ne trade que les BUY)",
+                            sample_key=f"sell:{symbol}", symbol=symbol)
                 return  # Ignorer les signaux SELL
                     
         except Exception as e:
-            print(f"❌ Erreur traitement {symbol}: {e}")
+            self._trace(f"❌ Erreur traitement {symbol}: {e}", logging.ERROR, symbol=symbol)
             return
     
     def _calculate_dynamic_take_profit(self, symbol: str, signal_data: Dict) -> float:
@@ -1734,6 +2021,11 @@ class CryptoTradingBot:
             return self.config_manager.get('take_profit_percent', 1.5)
     
     def _execute_simulated_trade(self, symbol: str, signal_data: Dict):
+        """Exécute un trade simulé sous le verrou du symbole (vérification de position et ouverture atomiques)"""
+        with self.position_book.symbol_lock(symbol):
+            self._open_simulated_position(symbol, signal_data)
+    
+    def _open_simulated_position(self, symbol: str, signal_data: Dict):
         """Exécute un trade simulé avec affichage dans le GUI + gestion positions"""
         try:
             signal = signal_data['signal']
@@ -1801,6 +2093,27 @@ class CryptoTradingBot:
                 trading_fees = taker_fee or 0.00075  # 0.075% (= maker_fee)
                 order_type = "TAKER"
             
+            # Taille de position (depuis config.txt UNIQUEMENT)
+            max_position_per_crypto = self.config_manager.get('order_size') or self.config_manager.get('POSITION_SIZE_USDT')
+            
+            # Exécution réaliste : TAKER en parcourant le carnet L2 (ou à l'ask), MAKER au bid
+            fill_source = 'last_price'
+            partial_fill = False
+            filled_amount = None
+            if use_maker_strategy:
+                quote = self.fill_model.get_quote(symbol) if self.fill_model is not None else None
+                if quote:
+                    entry_price = quote['bid']
+                    fill_source = 'book_ticker'
+            else:
+                fill = self.fill_simulator.simulate(symbol, 'buy', quote_amount=max_position_per_crypto)
+                if fill:
+                    entry_price = fill['price']
+                    fill_source = fill['source']
+                    partial_fill = fill['partial']
+                    filled_amount = fill.get('filled_amount')
+            self._log_slippage(symbol, "BUY", current_price, entry_price, fill_source, partial_fill)
+            
             # Calculs stop loss seulement (take profit supprimé - système 3 couches utilisé)
             # NOUVEAU SYSTÈME SIMPLIFIÉ : STOP LOSS + TAKE PROFIT FIXE
             stop_loss_buy_multiplier = self.config_manager.get('STOP_LOSS_BUY_MULTIPLIER')
@@ -1820,9 +2133,6 @@ class CryptoTradingBot:
             stop_loss = entry_price * (stop_loss_buy_multiplier or 0.995)    # -0.5% (plus bas)
             take_profit = entry_price * (1 + (dynamic_tp_percent / 100))     # TP dynamique (plus haut)
             
-            # Calculer la taille de position selon la stratégie OPTIMISÉE (depuis config.txt UNIQUEMENT)
-            max_position_per_crypto = self.config_manager.get('order_size') or self.config_manager.get('POSITION_SIZE_USDT')
-            
             # Vérifier qu'on a assez de capital
             if self.simulation_mode:
                 available_balance = self.simulated_balance
@@ -1836,22 +2146,20 @@ class CryptoTradingBot:
             
             # === CALCUL AVEC FRAIS INCLUS ===
             position_size_usdt = max_position_per_crypto  # 100€ par trade
+            if partial_fill and filled_amount:
+                # Carnet trop mince : la position se limite à la profondeur réellement exécutée
+                position_size_usdt = min(filled_amount * entry_price, max_position_per_crypto)
+                self.log(f"⚠️ {symbol}: Carnet local insuffisant pour {max_position_per_crypto} USDT - "
+                         f"exécution partielle simulée ({position_size_usdt:.2f} USDT)")
             entry_fees = position_size_usdt * trading_fees  # Frais d'entrée
             net_position_size = position_size_usdt - entry_fees  # Capital réel investi
             quantity = net_position_size / entry_price  # Quantité ajustée aux frais
             
-            # NOUVEAU: Ajouter les frais d'entrée au total
-            self.total_fees += entry_fees
-            
             # Calculer stop loss avec prix maker
             # (déjà calculé plus haut avec entry_price)
             
-            # Vérifier si on a déjà une position ouverte pour ce symbole
-            existing_position = None
-            for pos in self.open_positions:
-                if pos['symbol'] == symbol and pos['status'] == 'open':
-                    existing_position = pos
-                    break
+            # Vérifier si on a déjà une position ouverte pour ce symbole (verrou du symbole tenu)
+            existing_position = self.position_book.find_open(symbol)
             
             # SCALPING: Si position existante, VENDRE automatiquement SEULEMENT si profitable
             if existing_position:
@@ -1859,11 +2167,13 @@ class CryptoTradingBot:
                 price_change_percent = ((current_price - existing_position['price']) / existing_position['price']) * 100
                 
                 if price_change_percent >= profit_threshold:
-                    print(f"🔄 SCALPING {symbol}: Position profitable (+{price_change_percent:.2f}%) - VENTE AUTOMATIQUE")
+                    self._trace(f"🔄 SCALPING {symbol}: Position profitable (+{price_change_percent:.2f}%) - VENTE AUTOMATIQUE",
+                                logging.INFO, symbol=symbol, position_id=existing_position.get('order_id'))
                     self._close_position_with_reason(existing_position, current_price, "AUTO_SCALPING_PROFIT")
                     return
                 else:
-                    print(f"⏸️ SCALPING {symbol}: Position non-profitable ({price_change_percent:+.2f}%) - ATTENTE mouvement")
+                    self._trace(f"⏸️ SCALPING {symbol}: Position non-profitable ({price_change_percent:+.2f}%) - ATTENTE mouvement",
+                                sample_key=f"hold:{symbol}", symbol=symbol, position_id=existing_position.get('order_id'))
                     return  # Ne pas créer nouvelle position, attendre
             
             # Créer l'ordre simulé avec SYSTÈME SIMPLIFIÉ : Stop Loss + Take Profit Dynamique
@@ -1885,6 +2195,8 @@ class CryptoTradingBot:
                 'net_invested': net_position_size,
                 'trading_fees': trading_fees,
                 'order_type': order_type,
+                'fill_source': fill_source,
+                'partial_fill': partial_fill,
                 'status': 'open',
                 'entry_momentum': current_price,  # Pour surveillance intelligente
                 'change_24h': change_24h,  # Pour affichage du momentum
@@ -1893,39 +2205,33 @@ class CryptoTradingBot:
                 'order_id': f"sim_{symbol.replace('/', '')}_{int(time.time())}"
             }
             
-            # Ajouter à la liste des positions ouvertes
-            self.open_positions.append(trade_data)
+            # Ajouter à la liste des positions ouvertes, frais et balance en une transaction
+            with self.position_book.transaction():
+                self.position_book.add(trade_data)
+                self.portfolio.open_position(trade_data)
+                
+                # NOUVEAU: Ajouter les frais d'entrée au total
+                self.total_fees += entry_fees
+                self.portfolio.add_fees(entry_fees)
+                
+                # Mettre à jour la balance selon le mode  
+                if self.simulation_mode:
+                    # CORRECTION: Déduire seulement le capital RÉELLEMENT investi (après frais)
+                    self.simulated_balance -= net_position_size  # 49.95€ au lieu de 50€
+                    self.balance = self.simulated_balance
             
             # NOUVEAU: Sauvegarder immédiatement après nouveau trade
             self.save_portfolio_state()
             
-            # Mettre à jour la balance selon le mode  
-            if self.simulation_mode:
-                # CORRECTION: Déduire seulement le capital RÉELLEMENT investi (après frais)
-                self.simulated_balance -= net_position_size  # 49.95€ au lieu de 50€
-                self.balance = self.simulated_balance
-            
-            # Affichage détaillé avec nouvelle logique
-            print(f"🎮 TRADE SIMULÉ: {symbol}")
-            print(f"   Signal: {signal} ({operation})")
-            print(f"   Prix marché: ${current_price:.10f}")
-            
-            if use_maker_strategy:
-                print(f"   Prix MAKER: ${entry_price:.10f} ({'+' if entry_price > current_price else ''}{((entry_price/current_price-1)*100):+.3f}%)")
-                print(f"   Stratégie: MAKER (frais maker < taker)")
-            else:
-                print(f"   Prix TAKER: ${entry_price:.10f} (prix marché direct)")
-                print(f"   Stratégie: TAKER (frais maker = taker avec BNB)")
-            
-            print(f"   Quantité: {quantity:.8f}")
-            print(f"   Valeur brute: ${position_size_usdt:.2f}")
-            print(f"   Frais entrée: ${entry_fees:.3f} {fee_currency} ({trading_fees*100:.3f}% {order_type})")
-            print(f"   Capital investi: ${net_position_size:.2f}")
-            print(f"   VIP Level: {vip_level} | BNB: {'✅' if use_bnb_discount else '❌'} | Type: {order_type}")
-            print(f"   Stop Loss: ${stop_loss:.10f}")
-            print(f"   Take Profit: ${take_profit:.10f}")
-            print(f"   Balance: ${self.simulated_balance:.2f}")
-            print(f"   🎯 NOUVEAU SYSTÈME: Stop Loss + Take Profit + Surveillance intelligente")
+            # Trace structurée du trade (détail complet dans les champs)
+            strategy = 'MAKER' if use_maker_strategy else 'TAKER'
+            self._trace(f"🎮 TRADE SIMULÉ: {symbol} {signal} {strategy} @ ${entry_price:.10f} "
+                        f"(marché ${current_price:.10f}) - Balance: ${self.simulated_balance:.2f}",
+                        logging.INFO, symbol=symbol, position_id=trade_data['order_id'], operation=operation,
+                        quantity=f"{quantity:.8f}", gross=f"{position_size_usdt:.2f}",
+                        entry_fees=f"{entry_fees:.3f} {fee_currency}", fee_rate=f"{trading_fees*100:.3f}%",
+                        invested=f"{net_position_size:.2f}", vip=vip_level, bnb=use_bnb_discount,
+                        stop_loss=f"{stop_loss:.10f}", take_profit=f"{take_profit:.10f}", fill_source=fill_source)
             
             # DÉMARRER LE NOUVEAU SYSTÈME DE SURVEILLANCE SIMPLIFIÉ
             threading.Thread(target=self._monitor_position_simple, args=[trade_data], daemon=True).start()
@@ -1945,7 +2251,326 @@ class CryptoTradingBot:
                     pass
                     
         except Exception as e:
-            print(f"❌ Erreur trade simulé {symbol}: {e}")
+            self._trace(f"❌ Erreur trade simulé {symbol}: {e}", logging.ERROR, symbol=symbol)
+    
+    def _get_order_router(self) -> Optional[OrderRouter]:
+        """Routeur d'ordres réels (boucle asyncio dédiée), None sans exchange"""
+        if self.exchange is None:
+            return None
+        if self.order_router is None:
+            self.order_router = OrderRouter(
+                CcxtExchangeAdapter(self.exchange, self.market_index),
+                max_retries=self.config_manager.get('ORDER_MAX_RETRIES', 3),
+                reconcile_timeout=self.config_manager.get('ORDER_RECONCILE_TIMEOUT', 10)
+            )
+            self.order_router.add_listener(self._on_order_update)
+            self.order_router.start()
+        return self.order_router
+    
+    def _execute_real_trade(self, symbol: str, signal_data: Dict):
+        """Exécute un trade RÉEL sous le verrou du symbole (un seul achat par symbole, les autres continuent)"""
+        with self.position_book.symbol_lock(symbol):
+            self._open_real_position(symbol, signal_data)
+    
+    def _open_real_position(self, symbol: str, signal_data: Dict):
+        """Exécute un trade RÉEL via le routeur d'ordres + même gestion de position que le simulé"""
+        try:
+            router = self._get_order_router()
+            if router is None:
+                self.log(f"❌ {symbol}: Exchange non connecté - TRADE RÉEL ANNULÉ")
+                return
+            
+            # Un seul ordre en vol et une seule position par symbole
+            if router.is_busy(symbol) or self.position_book.find_open(symbol) is not None:
+                return
+            
+            current_price = signal_data['current_price']
+            change_24h = signal_data.get('change_24h', 0)
+            position_size_usdt = self.config_manager.get('order_size') or self.config_manager.get('POSITION_SIZE_USDT')
+            
+            if self.balance < position_size_usdt:
+                self.log(f"⚠️ {symbol}: Balance insuffisante ({self.balance:.2f} < {position_size_usdt}) - TRADE RÉEL ANNULÉ")
+                return
+            
+            # Filtres de l'exchange vérifiés localement (pas d'aller-retour pour un refus certain)
+            amount = position_size_usdt / current_price
+            if self.market_index is not None:
+                rejection = self.market_index.check_order(symbol, amount, current_price)
+                if rejection:
+                    self.log(f"⚠️ {symbol}: Ordre non conforme ({rejection}) - TRADE RÉEL ANNULÉ")
+                    return
+            
+            # Ordre au marché : quantité depuis le dernier prix, exécution réelle réconciliée
+            order = router.place_order_sync(symbol, 'buy', amount,
+                                            timeout=self.config_manager.get('ORDER_RECONCILE_TIMEOUT', 10) * 3)
+            if order['status'] not in (STATUS_FILLED, STATUS_PARTIAL) or not order['filled']:
+                self.log(f"❌ {symbol}: Ordre d'achat {order['status']} - {order.get('error') or 'non exécuté'}")
+                return
+            
+            entry_price = order['average'] or current_price
+            quantity = order['filled']
+            cost = order['cost'] or entry_price * quantity
+            # Frais prélevés en crypto (sans BNB) : seule la quantité nette est revendable
+            fee = order.get('fee') or {}
+            base_currency = self.market_index.base_of(symbol) if self.market_index else symbol.split('/')[0]
+            if fee.get('currency') == base_currency and fee.get('cost'):
+                quantity -= float(fee['cost'])
+            # Frais réellement facturés par l'exchange, taux configuré s'ils sont absents
+            default_trading_fees = self.config_manager.get('DEFAULT_TRADING_FEES') or 0.001
+            entry_fees = self._order_fee_quote(symbol, order, entry_price, cost * default_trading_fees)
+            trading_fees = entry_fees / cost if cost else default_trading_fees
+            self._log_slippage(symbol, "BUY", current_price, entry_price, 'exchange', order['status'] == STATUS_PARTIAL)
+            
+            # STOP LOSS et TAKE PROFIT sur le prix réellement exécuté
+            dynamic_tp_percent = self._calculate_dynamic_take_profit(symbol, signal_data)
+            stop_loss = entry_price * (self.config_manager.get('STOP_LOSS_BUY_MULTIPLIER') or 0.995)
+            take_profit = entry_price * (1 + (dynamic_tp_percent / 100))
+            
+            trade_data = {
+                'symbol': symbol,
+                'side': 'BUY',
+                'operation': 'ACHAT',
+                'direction': 'LONG',
+                'quantity': quantity,
+                'price': entry_price,
+                'entry_price': entry_price,
+                'stop_loss': stop_loss,
+                'take_profit': take_profit,
+                'dynamic_tp_percent': dynamic_tp_percent,
+                'timestamp': datetime.now(),
+                'entry_time': datetime.now(),
+                'value_usdt': cost + entry_fees,
+                'net_invested': cost,
+                'entry_fees': entry_fees,
+                'trading_fees': trading_fees,
+                'order_type': 'TAKER',
+                'fill_source': 'exchange',
+                'partial_fill': order['status'] == STATUS_PARTIAL,
+                'status': 'open',
+                'entry_momentum': current_price,
+                'change_24h': change_24h,
+                'last_check': datetime.now(),
+                'system_type': 'SIMPLE_STOP_TAKE_PROFIT',
+                'order_id': order['client_order_id'],
+                'exchange_order_id': order['exchange_order_id'],
+                'real_order': True
+            }
+            
+            with self.position_book.transaction():
+                self.position_book.add(trade_data)
+                self.portfolio.open_position(trade_data)
+                self.total_fees += entry_fees
+                self.portfolio.add_fees(entry_fees)
+                # Frais en crypto (déjà retirés de la quantité) ou en BNB : aucun USDT en plus
+                quote_fees = entry_fees if fee.get('currency') == symbol.split('/')[-1] else 0.0
+                self._apply_real_balance_change(-(cost + quote_fees))
+            
+            # Sorties côté exchange : plus d'exposition liée à la boucle de surveillance
+            if self.config_manager.get('OCO_EXIT_ORDERS_ENABLED', True):
+                self._place_exit_orders(trade_data)
+            self.save_portfolio_state()
+            
+            self.log(f"💰 TRADE RÉEL: {symbol} - {quantity:.8f} @ ${entry_price:.10f} "
+                     f"(ordre {order['client_order_id']}, {order['attempts']} tentative(s))")
+            
+            threading.Thread(target=self._monitor_position_simple, args=[trade_data], daemon=True).start()
+            
+            for callback in self.callbacks.get('trade_executed', []):
+                try:
+                    callback(trade_data)
+                except Exception:
+                    pass
+            for callback in self.callbacks.get('balance_update', []):
+                try:
+                    callback(self.balance, len(self.open_positions))
+                except Exception:
+                    pass
+                    
+        except Exception as e:
+            self.log(f"❌ Erreur trade réel {symbol}: {e}")
+    
+    def _order_fee_quote(self, symbol: str, order: Dict, price: float, fallback: float) -> float:
+        """Frais d'un ordre exécuté (champ 'fee' ccxt) convertis en devise de cotation"""
+        fee = order.get('fee') or {}
+        if fee.get('cost') is None:
+            return fallback
+        cost = float(fee['cost'])
+        quote_currency = symbol.split('/')[1] if '/' in symbol else 'USDT'
+        base_currency = self.market_index.base_of(symbol) if self.market_index else symbol.split('/')[0]
+        currency = fee.get('currency')
+        if currency in (None, quote_currency):
+            return cost
+        if currency == base_currency:
+            return cost * price
+        # Frais en BNB : valorisés au dernier prix connu
+        conversion_price = self._get_current_price(f"{currency}/{quote_currency}")
+        return cost * conversion_price if conversion_price else fallback
+    
+    def _split_sold_part(self, position: Dict, sold_quantity: float) -> Dict:
+        """Vente partielle : détache la part vendue, la position garde le reliquat au pro rata"""
+        ratio = sold_quantity / position['quantity']
+        with self.position_book.transaction():
+            sold_part = dict(position)
+            sold_part['quantity'] = sold_quantity
+            sold_part['order_id'] = f"{position['order_id']}_partial_{int(time.time() * 1000)}"
+            for field in ('value_usdt', 'net_invested', 'entry_fees'):
+                if field in position:
+                    sold_part[field] = position[field] * ratio
+                    position[field] -= sold_part[field]
+            position['quantity'] -= sold_quantity
+            self.portfolio.resize_position(position)
+        return sold_part
+    
+    def _resume_remaining_position(self, position: Dict):
+        """Reliquat d'une vente partielle : rouvert, protégé par une nouvelle OCO et surveillé"""
+        for field in ('exit_reason', 'exit_time', 'exit_price', 'exit_oco'):
+            position.pop(field, None)
+        self.position_book.abort_close(position)
+        self.log(f"⚠️ {position['symbol']}: Vente partielle - reliquat de {position['quantity']:.8f} conservé")
+        if self.config_manager.get('OCO_EXIT_ORDERS_ENABLED', True):
+            self._place_exit_orders(position)
+        self.save_portfolio_state()
+        threading.Thread(target=self._monitor_position_simple, args=[position], daemon=True).start()
+    
+    def _sell_real_position(self, position: Dict) -> Optional[Dict]:
+        """Vend au marché la quantité d'une position réelle, None si rien n'est exécuté"""
+        router = self._get_order_router()
+        if router is None:
+            return None
+        
+        # Libérer la quantité bloquée par l'OCO (ou constater son exécution)
+        quantity = position['quantity']
+        oco = position.get('exit_oco')
+        if oco is not None:
+            oco = router.submit(router.cancel_exit_oco(oco), timeout=30)
+            if oco['status'] == STATUS_FILLED:
+                return {'status': STATUS_FILLED, 'filled': oco['filled'], 'average': oco['average']}
+            quantity -= oco['filled'] or 0.0
+        
+        timeout = self.config_manager.get('ORDER_RECONCILE_TIMEOUT', 10) * 3
+        order = router.place_order_sync(position['symbol'], 'sell', quantity, timeout=timeout)
+        if order['status'] not in (STATUS_FILLED, STATUS_PARTIAL) or not order['filled']:
+            self.log(f"❌ {position['symbol']}: Ordre de vente {order['status']} - {order.get('error') or 'non exécuté'}")
+            return None
+        
+        if oco is not None and oco['filled']:
+            # Jambe OCO partiellement exécutée + vente du reliquat : prix moyen combiné
+            filled = oco['filled'] + order['filled']
+            average = (oco['filled'] * oco['average'] + order['filled'] * order['average']) / filled
+            return {**order, 'filled': filled, 'average': average}
+        return order
+    
+    def _place_exit_orders(self, position: Dict):
+        """Place l'OCO de sortie (take profit + stop loss) d'une position réelle"""
+        try:
+            router = self._get_order_router()
+            if router is None:
+                return
+            
+            take_profit = position['take_profit']
+            if self.config_manager.get('INTELLIGENT_MOMENTUM_TRACKING', True):
+                # Jambe limite au plafond d'extension : la surveillance intelligente garde la main au TP
+                take_profit *= 1 + self.config_manager.get('MAX_TP_EXTENSION_PERCENT', 2.0) / 100
+            stop_price = position['stop_loss']
+            stop_limit_offset = self.config_manager.get('OCO_STOP_LIMIT_OFFSET_PERCENT', 0.1)
+            
+            oco = router.submit(router.place_exit_oco(position['symbol'], position['quantity'], take_profit,
+                                                      stop_price, stop_price * (1 - stop_limit_offset / 100)),
+                                timeout=30)
+            if oco['status'] == STATUS_OPEN:
+                position['exit_oco'] = oco
+                self.log(f"🛡️ {position['symbol']}: OCO exchange placée - TP {take_profit:.6f} / SL {stop_price:.6f}")
+            else:
+                self.log(f"⚠️ {position['symbol']}: OCO non placée ({oco['status']}: {oco.get('error')}) - sorties côté client")
+        except Exception as e:
+            self.log(f"❌ Erreur placement OCO {position['symbol']}: {e}")
+    
+    def _has_exit_orders(self, position: Dict) -> bool:
+        """True si une OCO exchange protège la position"""
+        oco = position.get('exit_oco')
+        return oco is not None and oco['status'] == STATUS_OPEN
+    
+    def _amend_exit_orders(self, position: Dict, take_profit: Optional[float] = None,
+                           stop_loss: Optional[float] = None):
+        """Remonte les niveaux de l'OCO (extension TP, trailing stop)"""
+        if not self._has_exit_orders(position):
+            return
+        oco = position['exit_oco']
+        min_change = self.config_manager.get('OCO_AMEND_MIN_PERCENT', 0.05) / 100
+        
+        # Seulement vers le haut et au-delà d'un écart minimal (limite le nombre d'ordres)
+        if take_profit is not None and take_profit <= oco['take_profit'] * (1 + min_change):
+            take_profit = None
+        if stop_loss is not None and stop_loss <= oco['stop_price'] * (1 + min_change):
+            stop_loss = None
+        if take_profit is None and stop_loss is None:
+            return
+        
+        try:
+            router = self._get_order_router()
+            stop_limit_price = None
+            if stop_loss is not None:
+                stop_limit_price = stop_loss * (1 - self.config_manager.get('OCO_STOP_LIMIT_OFFSET_PERCENT', 0.1) / 100)
+            new_oco = router.submit(router.amend_exit_oco(oco, take_profit, stop_loss, stop_limit_price), timeout=30)
+            
+            if new_oco is oco:
+                # Exécutée pendant le remplacement
+                if oco['status'] == STATUS_FILLED:
+                    self._finalize_exchange_exit(position)
+                return
+            position['exit_oco'] = new_oco
+            if stop_loss is not None:
+                position['stop_loss'] = stop_loss
+            if new_oco['status'] != STATUS_OPEN:
+                self.log(f"⚠️ {position['symbol']}: OCO non replacée ({new_oco['status']}) - sorties côté client")
+            else:
+                self.log(f"🔧 {position['symbol']}: OCO ajustée - TP {new_oco['take_profit']:.6f} / SL {new_oco['stop_price']:.6f}")
+        except Exception as e:
+            self.log(f"❌ Erreur ajustement OCO {position['symbol']}: {e}")
+    
+    def _check_exit_orders(self, position: Dict) -> bool:
+        """Réconciliation de l'OCO par interrogation (repli du flux utilisateur), True si la position est sortie"""
+        oco = position.get('exit_oco')
+        if oco is None:
+            return False
+        if oco['status'] == STATUS_OPEN:
+            poll_seconds = self.config_manager.get('OCO_POLL_SECONDS', 5)
+            if self.user_stream is not None and self.user_stream.is_connected():
+                # Les exécutions arrivent par le flux utilisateur : interrogation de sécurité seulement
+                poll_seconds = max(poll_seconds, 60)
+            if time.time() - position.get('last_oco_poll', 0) >= poll_seconds:
+                position['last_oco_poll'] = time.time()
+                try:
+                    router = self._get_order_router()
+                    router.submit(router.refresh_exit_oco(oco), timeout=30)
+                except Exception as e:
+                    self.log(f"⚠️ Réconciliation OCO {position['symbol']} impossible: {e}")
+        if oco['status'] == STATUS_FILLED:
+            self._finalize_exchange_exit(position)
+            return True
+        return False
+    
+    def _on_order_update(self, record: Dict):
+        """Listener du routeur (boucle asyncio) : sortie exécutée par l'exchange"""
+        if record['status'] != STATUS_FILLED or self.order_router is None:
+            return
+        oco = self.order_router.oco_legs.get(record['client_order_id'])
+        if oco is None:
+            return
+        for position in self.open_positions:
+            if position.get('exit_oco') is oco and position['status'] == 'open':
+                # Hors de la boucle asyncio : la fermeture peut appeler le routeur
+                threading.Thread(target=self._finalize_exchange_exit, args=[position], daemon=True).start()
+    
+    def _finalize_exchange_exit(self, position: Dict):
+        """Clôture comptable d'une position sortie par son OCO"""
+        if position['status'] != 'open' or position.get('closing'):
+            return
+        oco = position['exit_oco']
+        position['exchange_exit'] = {'status': STATUS_FILLED, 'filled': oco['filled'], 'average': oco['average']}
+        reason = 'TAKE_PROFIT' if oco['filled_leg'] == 'take_profit' else 'STOP_LOSS'
+        self.log(f"🏦 {position['symbol']}: Sortie exécutée par l'exchange ({reason}) @ {oco['average']:.6f}")
+        self._close_position_with_reason(position, oco['average'], reason)
     
     def _close_position_scalping(self, position: Dict, exit_price: float):
         """Ferme une position scalping avec calcul P&L incluant les frais"""
@@ -1969,7 +2594,8 @@ class CryptoTradingBot:
             # === STRATÉGIE DE SORTIE COHÉRENTE ===
             # Utiliser la même logique que l'entrée
             use_maker_strategy = position.get('use_maker_strategy', False)
-            order_type = position.get('order_type', 'TAKER')
+            exit_fees = None  # Frais réels connus pour un ordre exchange
+            remaining_position = None  # Reliquat d'une vente partielle
             
             if use_maker_strategy:
                 # Stratégie maker : décaler le prix
@@ -1985,15 +2611,48 @@ class CryptoTradingBot:
                 # Stratégie taker : prix marché direct (VIP 0 + BNB)
                 actual_exit_price = exit_price  # Prix marché
                 exit_order_type = "TAKER"
+                
+                # Simulation : vente en parcourant le carnet L2 (ou au bid), pas au dernier prix
+                if self.simulation_mode:
+                    fill = self.fill_simulator.simulate(position['symbol'], 'sell', quantity=quantity)
+                    if fill:
+                        actual_exit_price = fill['price']
+                        self._log_slippage(position['symbol'], "SELL", exit_price, actual_exit_price,
+                                           fill['source'], fill['partial'])
+                    else:
+                        self._log_slippage(position['symbol'], "SELL", exit_price, actual_exit_price)
+                elif position.get('real_order'):
+                    # Réel : sortie déjà exécutée par l'OCO, sinon vente au marché via le routeur
+                    order = position.get('exchange_exit') or self._sell_real_position(position)
+                    if order is None:
+                        # Vente non exécutée : la position reste ouverte et surveillée
+                        self.position_book.abort_close(position)
+                        threading.Thread(target=self._monitor_position_simple, args=[position], daemon=True).start()
+                        return
+                    actual_exit_price = order['average'] or exit_price
+                    quantity = order['filled']
+                    self._log_slippage(position['symbol'], "SELL", exit_price, actual_exit_price, 'exchange',
+                                       order['status'] == STATUS_PARTIAL)
+                    
+                    # Vente partielle : seule la part vendue est clôturée si le reliquat reste négociable
+                    remaining = position['quantity'] - quantity
+                    if remaining > position['quantity'] * 1e-9 and not (
+                            self.market_index and self.market_index.check_order(position['symbol'], remaining,
+                                                                                actual_exit_price)):
+                        remaining_position = position
+                        position = self._split_sold_part(position, quantity)
+                        position_value = position['value_usdt']
+                        entry_fees = position.get('entry_fees', position_value * trading_fees)
+                    
+                    exit_fees = self._order_fee_quote(position['symbol'], order, actual_exit_price,
+                                                      quantity * actual_exit_price * trading_fees)
             
             # Calculer valeur brute de sortie
             gross_exit_value = quantity * actual_exit_price
             
-            # Calculer frais de sortie (même taux que l'entrée)
-            exit_fees = gross_exit_value * trading_fees
-            
-            # NOUVEAU: Ajouter les frais de sortie au total
-            self.total_fees += exit_fees
+            # Calculer frais de sortie (même taux que l'entrée, ou frais réels de l'exchange)
+            if exit_fees is None:
+                exit_fees = gross_exit_value * trading_fees
             
             # Valeur nette après frais de sortie
             net_exit_value = gross_exit_value - exit_fees
@@ -2007,64 +2666,64 @@ class CryptoTradingBot:
             # On récupère ce qu'on a réellement investi + les gains/pertes
             total_return = net_invested + net_pnl  # 49.95€ + P&L au lieu de 50€ + P&L
             
-            # Mettre à jour la balance selon le mode
-            if self.simulation_mode:
-                self.simulated_balance += total_return
-                self.balance = self.simulated_balance
-            
-            # Marquer la position comme fermée
-            position['status'] = 'closed'
-            position['exit_price'] = actual_exit_price
-            position['exit_fees'] = exit_fees
-            position['net_pnl'] = net_pnl
-            position['pnl_percent'] = pnl_percent
-            position['total_fees'] = entry_fees + exit_fees
-            
-            # Ajouter à l'historique des trades fermés
-            closed_trade = position.copy()
-            # Convertir les datetime en string AVANT d'ajouter à l'historique
-            if 'timestamp' in closed_trade and hasattr(closed_trade['timestamp'], 'isoformat'):
-                closed_trade['timestamp'] = closed_trade['timestamp'].isoformat()
-            if 'entry_time' in closed_trade and hasattr(closed_trade['entry_time'], 'isoformat'):
-                closed_trade['entry_time'] = closed_trade['entry_time'].isoformat()
-            if 'last_significant_move' in closed_trade and hasattr(closed_trade['last_significant_move'], 'isoformat'):
-                closed_trade['last_significant_move'] = closed_trade['last_significant_move'].isoformat()
-            if 'exit_timestamp' in closed_trade and hasattr(closed_trade['exit_timestamp'], 'isoformat'):
-                closed_trade['exit_timestamp'] = closed_trade['exit_timestamp'].isoformat()
-            
-            closed_trade['closed_at'] = datetime.now().isoformat()
-            self.closed_trades.append(closed_trade)
-            
-            # MISE À JOUR du P&L total
-            self.total_pnl += net_pnl
+            # Compte mis à jour en une transaction : frais, balance, historique et totaux
+            with self.position_book.transaction():
+                # NOUVEAU: Ajouter les frais de sortie au total
+                self.total_fees += exit_fees
+                self.portfolio.add_fees(exit_fees)
+                
+                # Mettre à jour la balance selon le mode
+                if self.simulation_mode:
+                    self.simulated_balance += total_return
+                    self.balance = self.simulated_balance
+                else:
+                    self._apply_real_balance_change(total_return)
+            
+                # Marquer la position comme fermée
+                position['status'] = 'closed'
+                position['exit_price'] = actual_exit_price
+                position['exit_fees'] = exit_fees
+                position['net_pnl'] = net_pnl
+                position['pnl_percent'] = pnl_percent
+                position['total_fees'] = entry_fees + exit_fees
+            
+                # Ajouter à l'historique des trades fermés
+                closed_trade = position.copy()
+                # Convertir les datetime en string AVANT d'ajouter à l'historique
+                if 'timestamp' in closed_trade and hasattr(closed_trade['timestamp'], 'isoformat'):
+                    closed_trade['timestamp'] = closed_trade['timestamp'].isoformat()
+                if 'entry_time' in closed_trade and hasattr(closed_trade['entry_time'], 'isoformat'):
+                    closed_trade['entry_time'] = closed_trade['entry_time'].isoformat()
+                if 'last_significant_move' in closed_trade and hasattr(closed_trade['last_significant_move'], 'isoformat'):
+                    closed_trade['last_significant_move'] = closed_trade['last_significant_move'].isoformat()
+                if 'exit_timestamp' in closed_trade and hasattr(closed_trade['exit_timestamp'], 'isoformat'):
+                    closed_trade['exit_timestamp'] = closed_trade['exit_timestamp'].isoformat()
+            
+                closed_trade['closed_at'] = datetime.now().isoformat()
+                self.closed_trades.append(closed_trade)
+            
+                # MISE À JOUR du P&L total
+                self.total_pnl += net_pnl
+                self.total_trades += 1
+                if net_pnl > 0:
+                    self.winning_trades += 1
+                self.portfolio.close_position(position, net_pnl)
             
             # NOUVEAU: Sauvegarder immédiatement après fermeture
-            self.save_portfolio_state()
-            
-            # Affichage détaillé du calcul P&L
-            print(f"💰 VENTE SCALPING: {position['symbol']}")
-            print(f"   === CALCUL P&L DÉTAILLÉ ===")
-            print(f"   Prix entrée: ${entry_price:.10f} ({order_type})")
-            print(f"   Prix marché sortie: ${exit_price:.10f}")
-            
-            if use_maker_strategy:
-                print(f"   Prix MAKER sortie: ${actual_exit_price:.10f} ({'+' if actual_exit_price > exit_price else ''}{((actual_exit_price/exit_price-1)*100):+.3f}%)")
-                print(f"   Stratégie: MAKER (frais avantageux)")
+            if remaining_position is not None:
+                self._resume_remaining_position(remaining_position)
             else:
-                print(f"   Prix TAKER sortie: ${actual_exit_price:.10f} (prix marché)")
-                print(f"   Stratégie: TAKER (frais identiques avec BNB)")
-            
-            print(f"   --- CALCUL DÉTAILLÉ ---")
-            print(f"   Capital investi: ${net_invested:.2f}")
-            print(f"   Valeur brute sortie: ${gross_exit_value:.2f}")
-            print(f"   Frais entrée: ${entry_fees:.3f} BNB")
-            print(f"   Frais sortie: ${exit_fees:.3f} BNB")
-            print(f"   Total frais: ${entry_fees + exit_fees:.3f} BNB")
-            print(f"   --- RÉSULTAT ---")
-            print(f"   GAIN BRUT: ${gross_exit_value - (net_invested + entry_fees):.2f}")
-            print(f"   MOINS FRAIS: ${exit_fees:.3f} BNB")
-            print(f"   GAIN NET: ${net_pnl:+.2f} ({pnl_percent:+.2f}%)")
-            print(f"   Balance: ${self.balance:.2f}")
+                self.save_portfolio_state()
+            
+            # Trace structurée du calcul P&L
+            self._trace(f"💰 VENTE SCALPING: {position['symbol']} @ ${actual_exit_price:.10f} "
+                        f"GAIN NET: ${net_pnl:+.2f} ({pnl_percent:+.2f}%) - Balance: ${self.balance:.2f}",
+                        logging.INFO, symbol=position['symbol'], position_id=position.get('order_id'),
+                        reason=position.get('exit_reason'), entry_price=f"{entry_price:.10f}",
+                        market_exit=f"{exit_price:.10f}", strategy='MAKER' if use_maker_strategy else 'TAKER',
+                        invested=f"{net_invested:.2f}", gross_exit=f"{gross_exit_value:.2f}",
+                        entry_fees=f"{entry_fees:.3f}", exit_fees=f"{exit_fees:.3f}",
+                        gross_pnl=f"{gross_exit_value - (net_invested + entry_fees):.2f}")
             
             # Notifier callbacks trade fermé (VENTE)
             for callback in self.callbacks.get('trade_executed', []):
@@ -2084,12 +2743,13 @@ class CryptoTradingBot:
             # Notifier balance
             for callback in self.callbacks.get('balance_update', []):
                 try:
-                    callback(self.balance, len([p for p in self.open_positions if p['status'] == 'open']))
+                    callback(self.balance, self.position_book.open_count())
                 except Exception:
                     pass
                     
         except Exception as e:
-            print(f"❌ Erreur fermeture position: {e}")
+            self._trace(f"❌ Erreur fermeture position: {e}", logging.ERROR,
+                        symbol=position.get('symbol'), position_id=position.get('order_id'))
     
     def _auto_close_scalping_position(self, position: Dict):
         """Ferme automatiquement une position après délai (scalping) avec VRAI prix"""
@@ -2100,26 +2760,27 @@ class CryptoTradingBot:
             try:
                 if hasattr(self, 'exchange') and self.exchange:
                     # Récupérer le VRAI prix current de Binance
-                    ticker = self.exchange.fetch_ticker(symbol)
+                    ticker = self._fetch_ticker(symbol)
                     current_price = ticker['last']  # Prix réel actuel
                     
-                    print(f"⏰ AUTO-VENTE SCALPING: {symbol} après 30s")
-                    print(f"   Prix entrée: ${position['price']:.6f}")
-                    print(f"   Prix sortie RÉEL: ${current_price:.6f}")
-                    print(f"   Différence: {((current_price/position['price']-1)*100):+.3f}%")
+                    self._trace(f"⏰ AUTO-VENTE SCALPING: {symbol} après 30s - "
+                                f"${position['price']:.6f} → ${current_price:.6f} "
+                                f"({((current_price/position['price']-1)*100):+.3f}%)",
+                                logging.INFO, symbol=symbol, position_id=position.get('order_id'))
                     
                 else:
                     # Fallback: utiliser données WebSocket si disponibles
                     current_price = position['price'] * 1.001  # Variation minime réaliste
-                    print(f"⚠️ Utilisation prix fallback pour {symbol}")
+                    self._trace(f"⚠️ Utilisation prix fallback pour {symbol}", logging.WARNING, symbol=symbol)
                     
             except Exception as e:
-                print(f"❌ Erreur récupération prix réel {symbol}: {e}")
+                self._trace(f"❌ Erreur récupération prix réel {symbol}: {e}", logging.ERROR, symbol=symbol)
                 # Fallback: petite variation aléatoire réaliste
                 import random
                 variation = random.uniform(-0.005, 0.005)  # ±0.5% aléatoire
                 current_price = position['price'] * (1 + variation)
-                print(f"⚠️ Utilisation prix aléatoire pour {symbol}: {variation*100:+.2f}%")
+                self._trace(f"⚠️ Utilisation prix aléatoire pour {symbol}: {variation*100:+.2f}%",
+                            logging.WARNING, symbol=symbol)
             
             self._close_position_with_reason(position, current_price, "AUTO_CLOSE_RANDOM_PRICE")
     def _process_trading_signal(self, symbol: str, signal_data: Dict):
@@ -2279,15 +2940,19 @@ class CryptoTradingBot:
             self.log(f"❌ Erreur fermeture position {symbol}: {e}")
     
     def _place_real_order(self, symbol: str, direction: str, amount: float):
-        """Place un ordre réel sur l'exchange"""
+        """Place un ordre réel sur l'exchange (routeur : relances idempotentes + réconciliation)"""
         try:
-            if not self.exchange:
+            router = self._get_order_router()
+            if router is None:
                 return None
             
             side = 'buy' if direction == 'long' else 'sell'
-            order = self.exchange.create_market_order(symbol, side, amount)
+            order = router.place_order_sync(symbol, side, amount)
+            if order['status'] not in (STATUS_FILLED, STATUS_PARTIAL):
+                self.log(f"❌ Ordre réel {symbol} {order['status']}: {order.get('error')}")
+                return None
             
-            return order
+            return {**order, 'id': order['exchange_order_id'] or order['client_order_id']}
             
         except Exception as e:
             self.log(f"❌ Erreur ordre réel {symbol}: {e}")
@@ -2296,11 +2961,14 @@ class CryptoTradingBot:
     def _place_real_close_order(self, symbol: str, position: Dict):
         """Place un ordre de fermeture réel"""
         try:
-            if not self.exchange:
+            router = self._get_order_router()
+            if router is None:
                 return
             
             side = 'sell' if position['direction'] == 'long' else 'buy'
-            self.exchange.create_market_order(symbol, side, position['size'])
+            order = router.place_order_sync(symbol, side, position['size'])
+            if order['status'] not in (STATUS_FILLED, STATUS_PARTIAL):
+                self.log(f"❌ Fermeture réelle {symbol} {order['status']}: {order.get('error')}")
             
         except Exception as e:
             self.log(f"❌ Erreur fermeture réelle {symbol}: {e}")
@@ -2316,7 +2984,11 @@ class CryptoTradingBot:
             return (entry_price - current_price) * size
     
     def get_balance(self) -> float:
-        """Récupère le solde USDT via vos clés privées"""
+        """Récupère le solde USDT (cache du flux utilisateur, sinon REST via vos clés privées)"""
+        if self.user_stream is not None:
+            cached = self.user_stream.get_balance('USDT')
+            if cached is not None:
+                return cached
         try:
             balance = self.exchange.fetch_balance()
             return balance.get('USDT', {}).get('free', 0.0)
@@ -2324,6 +2996,51 @@ class CryptoTradingBot:
             self.log(f"❌ Erreur récupération balance via clés privées: {e}")
             return 0.0
     
+    def _start_user_stream(self):
+        """Flux listenKey : executionReport vers le routeur, outboundAccountPosition vers le solde"""
+        if self.user_stream is not None or not self.config_manager.get('USER_DATA_STREAM_ENABLED', True):
+            return
+        try:
+            self.user_stream = UserDataStreamManager(
+                self.exchange,
+                testnet=self.exchange_config.get('testnet', False),
+                keepalive_minutes=self.config_manager.get('USER_DATA_STREAM_KEEPALIVE_MINUTES', 30)
+            )
+            # Snapshot REST unique, ensuite le flux tient le cache à jour
+            self.user_stream.seed_balances(self.exchange.fetch_balance())
+            router = self._get_order_router()
+            if router is not None:
+                self.user_stream.add_callback('execution_report', router.on_execution_report)
+            self.user_stream.add_callback('account_update', self._on_account_update)
+            self.user_stream.start()
+            self.log("📡 Flux utilisateur démarré (ordres et soldes en temps réel)")
+        except Exception as e:
+            self.log(f"⚠️ Flux utilisateur indisponible, solde via REST: {e}")
+            self.user_stream = None
+    
+    def _apply_real_balance_change(self, delta: float):
+        """Balance réelle après un ordre : le flux utilisateur fait foi s'il est connecté
+        (le solde poussé inclut déjà l'ordre, qu'il arrive avant ou après son résultat),
+        sinon estimation locale jusqu'au prochain solde de l'exchange"""
+        if self.user_stream is not None and self.user_stream.is_connected():
+            pushed = self.user_stream.get_balance('USDT')
+            if pushed is not None:
+                self.balance = pushed
+            return
+        self.balance += delta
+    
+    def _on_account_update(self, balances: Dict):
+        """Callback outboundAccountPosition : solde réel mis à jour sans interrogation"""
+        if self.simulation_mode or 'USDT' not in balances:
+            return
+        with self.position_book.transaction():
+            self.balance = balances['USDT']['free']
+        for callback in self.callbacks.get('balance_update', []):
+            try:
+                callback(self.balance, len(self.open_positions))
+            except Exception:
+                pass
+    
     def get_positions_summary(self) -> Dict:
         """Retourne un résumé des positions"""
         if not self.positions:
@@ -2348,6 +3065,14 @@ class CryptoTradingBot:
             self.log("⚠️ Passage en mode réel nécessite une confirmation")
             return False
         
+        # Vers le mode réel : les clés deviennent obligatoires
+        if self.simulation_mode:
+            try:
+                self.config_manager.require_api_credentials()
+            except Exception as e:
+                self.log(str(e))
+                return False
+        
         self.simulation_mode = not self.simulation_mode
         mode_str = "SIMULATION" if self.simulation_mode else "RÉEL"
         self.log(f"🔄 Mode basculé vers: {mode_str}")
@@ -2384,7 +3109,8 @@ class CryptoTradingBot:
             self.balance = self.simulated_balance
             self.log(f"💰 Solde SIMULÉ: {self.balance:.2f} USDT")
         else:
-            # Mode réel - récupérer vraie balance
+            # Mode réel - flux utilisateur puis vraie balance
+            self._start_user_stream()
             self.balance = self.get_balance()
             self.log(f"💰 Solde RÉEL: {self.balance:.2f} USDT")
         
@@ -2422,11 +3148,26 @@ class CryptoTradingBot:
         if self.websocket_manager:
             self.websocket_manager.stop_all_streams()
         
+        # Arrêter le flux utilisateur puis le routeur d'ordres
+        if self.user_stream is not None:
+            self.user_stream.stop()
+            self.user_stream = None
+        if self.order_router is not None:
+            self.order_router.stop()
+            self.order_router = None
+        
+        # Conserver l'historique OHLCV pour le prochain démarrage
+        try:
+            self.ohlcv_cache.save()
+        except Exception as e:
+            self.log(f"⚠️ Erreur sauvegarde cache OHLCV: {e}")
+        
         self.is_running = False
         self.log("✅ Bot arrêté")
 
 # Test du moteur
 if __name__ == "__main__":
+    import sys
     from config_manager import ConfigManager
     
     print("🧪 Test du moteur de trading")
@@ -2437,6 +3178,10 @@ if __name__ == "__main__":
     # Créer le bot
     bot = CryptoTradingBot(config)
     
+    # Diagnostic complet de la connexion uniquement
+    if '--health-check' in sys.argv:
+        sys.exit(0 if bot.run_health_check() else 1)
+    
     # Démarrer
     bot.start()
     
@@ -2452,4 +3197,5 @@ if __name__ == "__main__":
         print("\n⏹️ Arrêt demandé")
     finally:
         bot.stop()
-        print("✅ Test terminé")
\ No newline at end of file
+        print("✅ Test terminé")
+        shutdown_logging()
\ No newline at end of file
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Tests du moteur de trading
+Dimensionnement des positions selon l'exécution (simulée ou réelle) et balance du compte
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from config_manager import ConfigManager
+from log_pipeline import shutdown_logging
+from order_router import STATUS_FILLED, STATUS_PARTIAL
+from websocket_realtime import UserDataStreamManager
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+class ThinBookSimulator:
+    """Carnet mince : seule une partie de l'ordre trouve preneur"""
+
+    def __init__(self, price, filled_amount):
+        self.price = price
+        self.filled_amount = filled_amount
+
+    def simulate(self, symbol, side, quantity=None, quote_amount=None):
+        return {'price': self.price, 'touch_price': self.price, 'slippage_percent': 0.0,
+                'filled_amount': self.filled_amount, 'partial': True, 'levels_used': 3,
+                'source': 'order_book'}
+
+
+class NoBookSimulator:
+    """Aucune donnée de marché locale : exécution au prix de référence"""
+
+    def simulate(self, symbol, side, quantity=None, quote_amount=None):
+        return None
+
+
+class FakeRouter:
+    """Routeur d'ordres réel simulé : chaque ordre reçoit la réponse préparée"""
+
+    def __init__(self, order):
+        self.order = order
+        self.placed = []
+
+    def is_busy(self, symbol):
+        return False
+
+    def place_order_sync(self, symbol, side, amount, timeout=None):
+        self.placed.append((symbol, side, amount))
+        return dict(self.order)
+
+
+class EngineTestCase(unittest.TestCase):
+    """Bot instancié dans un dossier temporaire (config, portefeuille et logs isolés)"""
+
+    def setUp(self):
+        self.previous_dir = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        shutil.copy(os.path.join(ROOT, 'config.txt'), self.directory)
+        os.chdir(self.directory)
+
+        from crypto_bot_engine import CryptoTradingBot
+        self.config = ConfigManager('config.txt')
+        self.config.config.update({'SIMULATION_MODE': True, 'USE_BNB_DISCOUNT': True,
+                                   'BINANCE_VIP_LEVEL': 0, 'order_size': 100})
+        self.bot = CryptoTradingBot(self.config)
+        self.bot.reset_simulation_account(1000.0)
+
+    def tearDown(self):
+        shutdown_logging()
+        os.chdir(self.previous_dir)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def signal(self, price):
+        return {'signal': 'BUY', 'current_price': price, 'change_24h': 2.0, 'confidence': 0.8}
+
+
+class TestSimulatedFills(EngineTestCase):
+
+    def test_full_fill_uses_order_size(self):
+        self.bot.fill_simulator = NoBookSimulator()
+        self.bot._execute_simulated_trade('FULL/USDT', self.signal(2.0))
+
+        position = self.bot.position_book.find_open('FULL/USDT')
+        self.assertEqual(position['value_usdt'], 100)
+        self.assertAlmostEqual(self.bot.simulated_balance, 1000.0 - position['net_invested'])
+
+    def test_thin_book_yields_smaller_position(self):
+        # 20 unités disponibles à 2.0 : 40 USDT exécutés sur les 100 demandés
+        self.bot.fill_simulator = ThinBookSimulator(2.0, 20.0)
+        self.bot._execute_simulated_trade('THIN/USDT', self.signal(2.0))
+
+        position = self.bot.position_book.find_open('THIN/USDT')
+        self.assertTrue(position['partial_fill'])
+        self.assertAlmostEqual(position['value_usdt'], 40.0)
+        fees = 40.0 * position['trading_fees']
+        self.assertAlmostEqual(position['net_invested'], 40.0 - fees)
+        self.assertAlmostEqual(position['quantity'], (40.0 - fees) / 2.0)
+        self.assertLessEqual(position['quantity'], 20.0)
+        self.assertAlmostEqual(self.bot.simulated_balance, 1000.0 - (40.0 - fees))
+        self.assertAlmostEqual(self.bot.total_fees, fees)
+
+
+class TestExchangeConnection(EngineTestCase):
+
+    def test_reset_uses_same_options_as_startup(self):
+        import crypto_bot_engine
+
+        calls = []
+        original = crypto_bot_engine.get_exchange
+        crypto_bot_engine.get_exchange = lambda *args, **kwargs: calls.append((args, kwargs)) or (None, 'network')
+        try:
+            self.bot._connect_exchange()
+            self.bot._connect_exchange(force_new=True)
+        finally:
+            crypto_bot_engine.get_exchange = original
+
+        (first_args, first), (reset_args, reset) = calls
+        self.assertEqual(first_args, reset_args)
+        self.assertTrue(reset.pop('force_new'))
+        self.assertFalse(first.pop('force_new'))
+        self.assertEqual(first, reset)
+        self.assertEqual(set(reset), {'timeout_ms', 'rate_limit_ms', 'markets_ttl_seconds'})
+
+
+class RealModeTestCase(EngineTestCase):
+    """Bot en mode réel, ordres servis par FakeRouter"""
+
+    def setUp(self):
+        super().setUp()
+        self.bot.simulation_mode = False
+        self.bot.balance = 1000.0
+        self.exit_orders = []
+        self.bot._place_exit_orders = self.exit_orders.append
+
+    def open_real(self, fee):
+        router = FakeRouter({'status': STATUS_FILLED, 'filled': 10.0, 'average': 10.0, 'cost': 100.0,
+                             'fee': fee, 'client_order_id': 'buy-1', 'exchange_order_id': '1', 'attempts': 1})
+        self.bot._get_order_router = lambda: router
+        self.bot._execute_real_trade('FOO/USDT', self.signal(10.0))
+        return self.bot.position_book.find_open('FOO/USDT')
+
+
+class TestRealExecution(RealModeTestCase):
+
+    def test_entry_uses_exchange_fee(self):
+        position = self.open_real({'cost': 0.02, 'currency': 'FOO'})
+        self.assertAlmostEqual(position['quantity'], 9.98)
+        self.assertAlmostEqual(position['entry_fees'], 0.2)
+        self.assertAlmostEqual(position['trading_fees'], 0.002)
+        self.assertAlmostEqual(self.bot.total_fees, 0.2)
+
+    def test_partial_sell_keeps_remainder_open(self):
+        position = self.open_real({'cost': 0.1, 'currency': 'USDT'})
+        self.bot._sell_real_position = lambda p: {'status': STATUS_PARTIAL, 'filled': 6.0, 'average': 11.0,
+                                                  'fee': {'cost': 0.033, 'currency': 'USDT'}}
+        self.bot._close_position_with_reason(position, 11.0, 'TAKE_PROFIT')
+
+        remainder = self.bot.position_book.find_open('FOO/USDT')
+        self.assertIs(remainder, position)
+        self.assertAlmostEqual(remainder['quantity'], 4.0)
+        self.assertAlmostEqual(remainder['net_invested'], 40.0)
+        self.assertAlmostEqual(remainder['entry_fees'], 0.04)
+        self.assertNotIn('exit_reason', remainder)
+        self.assertIs(self.exit_orders[-1], remainder)
+
+        sold = self.bot.closed_trades[-1]
+        self.assertAlmostEqual(sold['quantity'], 6.0)
+        self.assertAlmostEqual(sold['exit_fees'], 0.033)
+        self.assertAlmostEqual(sold['net_pnl'], 6.0 * 11.0 - 0.033 - 60.0)
+        self.assertEqual(self.bot.portfolio.snapshot()['open_positions'], 1)
+        self.assertAlmostEqual(self.bot.portfolio.snapshot()['invested'], remainder['value_usdt'])
+
+        # Le reliquat se vend ensuite entièrement
+        self.bot._sell_real_position = lambda p: {'status': STATUS_FILLED, 'filled': 4.0, 'average': 12.0,
+                                                  'fee': {'cost': 0.048, 'currency': 'USDT'}}
+        self.bot._close_position_with_reason(remainder, 12.0, 'TAKE_PROFIT')
+        self.assertIsNone(self.bot.position_book.find_open('FOO/USDT'))
+        self.assertAlmostEqual(self.bot.closed_trades[-1]['exit_fees'], 0.048)
+        self.assertEqual(self.bot.portfolio.snapshot()['open_positions'], 0)
+
+    def test_failed_sell_leaves_position_closable(self):
+        position = self.open_real(None)
+        monitored = []
+        resumed = threading.Event()
+        self.bot._monitor_position_simple = lambda p: (monitored.append(p), resumed.set())
+
+        def sell_times_out(p):
+            raise TimeoutError("submit timeout")
+
+        self.bot._sell_real_position = sell_times_out
+        self.bot._close_position_with_reason(position, 11.0, 'STOP_LOSS')
+
+        self.assertEqual(position['status'], 'open')
+        self.assertFalse(position['closing'])
+        self.assertNotIn('exit_reason', position)
+        self.assertTrue(resumed.wait(5))
+        self.assertEqual(monitored, [position])
+
+        # L'OCO exécutée ensuite clôture bien la position
+        self.bot._sell_real_position = lambda p: {'status': STATUS_FILLED, 'filled': 10.0, 'average': 11.0,
+                                                  'fee': None}
+        self.bot._close_position_with_reason(position, 11.0, 'STOP_LOSS')
+        self.assertEqual(position['status'], 'closed')
+        self.assertIsNone(self.bot.position_book.find_open('FOO/USDT'))
+
+
+class TestStreamBalance(RealModeTestCase):
+    """Flux utilisateur connecté : le solde poussé fait foi, sans double comptage"""
+
+    def setUp(self):
+        super().setUp()
+        self.stream = UserDataStreamManager(exchange=None)
+        self.stream.connected = True
+        self.stream.add_callback('account_update', self.bot._on_account_update)
+        self.bot.user_stream = self.stream
+
+    def push_usdt(self, free):
+        self.stream._process_event({'e': 'outboundAccountPosition', 'E': 1,
+                                    'B': [{'a': 'USDT', 'f': str(free), 'l': '0'}]})
+
+    def test_push_before_order_result(self):
+        self.push_usdt(1000.0)
+        # Solde poussé juste après l'exécution, avant la réponse de l'ordre
+        router = FakeRouter({'status': STATUS_FILLED, 'filled': 10.0, 'average': 10.0, 'cost': 100.0,
+                             'fee': None, 'client_order_id': 'buy-1', 'exchange_order_id': '1', 'attempts': 1})
+        router.place_order_sync = lambda *args, **kwargs: (self.push_usdt(900.0), dict(router.order))[1]
+        self.bot._get_order_router = lambda: router
+        self.bot._execute_real_trade('FOO/USDT', self.signal(10.0))
+        self.assertAlmostEqual(self.bot.balance, 900.0)
+
+        position = self.bot.position_book.find_open('FOO/USDT')
+        self.push_usdt(1009.9)
+        self.bot._sell_real_position = lambda p: {'status': STATUS_FILLED, 'filled': 10.0, 'average': 11.0,
+                                                  'fee': {'cost': 0.11, 'currency': 'USDT'}}
+        self.bot._close_position_with_reason(position, 11.0, 'TAKE_PROFIT')
+        self.assertAlmostEqual(self.bot.balance, 1009.9)
+
+    def test_push_after_order_result(self):
+        self.push_usdt(1000.0)
+        self.open_real(None)
+        self.assertAlmostEqual(self.bot.balance, 1000.0)  # En attente du solde poussé
+        self.push_usdt(900.0)
+        self.assertAlmostEqual(self.bot.balance, 900.0)
+
+    def test_local_estimate_without_stream(self):
+        self.stream.connected = False
+        self.open_real({'cost': 0.1, 'currency': 'USDT'})
+        self.assertAlmostEqual(self.bot.balance, 1000.0 - 100.0 - 0.1)
+
+    def test_local_estimate_ignores_fees_not_paid_in_usdt(self):
+        self.stream.connected = False
+        for fee in ({'cost': 0.01, 'currency': 'FOO'}, {'cost': 0.0002, 'currency': 'BNB'}, None):
+            self.bot.balance = 1000.0
+            self.bot.open_positions = []
+            self.open_real(fee)
+            self.assertAlmostEqual(self.bot.balance, 900.0, msg=str(fee))
+
+
+if __name__ == '__main__':
+    unittest.main()
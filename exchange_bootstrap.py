@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Démarrage Rapide de l'Exchange - Instance ccxt partagée et marchés en cache disque
+Évite load_markets à chaque démarrage ; les diagnostics complets sont un contrôle explicite
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+MARKETS_CACHE_FILE = 'markets_cache.json'
+
+# Instances ccxt réutilisées d'un démarrage à l'autre : (api_key, testnet) -> exchange
+_instances = {}
+_lock = threading.Lock()
+
+
+def _load_cached_markets(exchange, cache_file: str, ttl_seconds: float, testnet: bool) -> bool:
+    """Injecte les marchés du cache disque s'ils sont récents et du même environnement"""
+    if not cache_file or not os.path.exists(cache_file):
+        return False
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('testnet') != testnet or time.time() - data.get('timestamp', 0) > ttl_seconds:
+            return False
+        exchange.set_markets(data['markets'], data.get('currencies'))
+        return True
+    except Exception as e:
+        logging.warning(f"Cache marchés illisible ({e}) - rechargement")
+        return False
+
+
+def _save_markets(exchange, cache_file: str, testnet: bool):
+    """Écriture atomique des marchés chargés"""
+    if not cache_file:
+        return
+    try:
+        tmp_file = cache_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'timestamp': time.time(),
+                'testnet': testnet,
+                'markets': exchange.markets,
+                'currencies': exchange.currencies
+            }, f)
+        os.replace(tmp_file, cache_file)
+    except Exception as e:
+        logging.warning(f"Sauvegarde cache marchés impossible: {e}")
+
+
+def get_exchange(api_key: str, secret: str, testnet: bool = False, timeout_ms: int = 15000,
+                 rate_limit_ms: float = 50, markets_ttl_seconds: float = 86400,
+                 cache_file: str = MARKETS_CACHE_FILE, force_new: bool = False) -> Tuple[object, str]:
+    """Instance ccxt Binance prête à l'emploi, marchés chargés
+
+    Retourne (exchange, source) où source vaut 'memory' (instance réutilisée),
+    'disk' (marchés du cache) ou 'network' (load_markets).
+    """
+    key = (api_key, testnet)
+    with _lock:
+        if not force_new and key in _instances:
+            return _instances[key], 'memory'
+
+        import ccxt
+        exchange = ccxt.binance({
+            'apiKey': api_key,
+            'secret': secret,
+            'sandbox': testnet,
+            'enableRateLimit': True,
+            'timeout': timeout_ms,
+            'rateLimit': rate_limit_ms
+        })
+
+        source = 'disk'
+        if not _load_cached_markets(exchange, cache_file, markets_ttl_seconds, testnet):
+            exchange.load_markets()
+            _save_markets(exchange, cache_file, testnet)
+            source = 'network'
+
+        _instances[key] = exchange
+        return exchange, source
+
+
+def refresh_markets(exchange, testnet: bool = False, cache_file: str = MARKETS_CACHE_FILE) -> Dict:
+    """Recharge les marchés depuis l'exchange et met à jour le cache disque"""
+    markets = exchange.load_markets(True)
+    _save_markets(exchange, cache_file, testnet)
+    return markets
+
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tests du démarrage rapide de l'exchange
+Marchés servis par le cache disque puis instance ccxt réutilisée
+"""
+
+import json
+import os
+import tempfile
+import time
+import unittest
+
+import exchange_bootstrap
+
+MARKET = {
+    'id': 'BTCUSDT', 'symbol': 'BTC/USDT', 'base': 'BTC', 'quote': 'USDT',
+    'baseId': 'BTC', 'quoteId': 'USDT', 'type': 'spot', 'spot': True, 'active': True,
+    'precision': {'amount': 0.00001, 'price': 0.01},
+    'limits': {'amount': {'min': 0.00001}, 'cost': {'min': 5}}
+}
+
+
+class TestExchangeBootstrap(unittest.TestCase):
+
+    def setUp(self):
+        exchange_bootstrap._instances.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self.directory.name, 'markets_cache.json')
+
+    def tearDown(self):
+        exchange_bootstrap._instances.clear()
+        self.directory.cleanup()
+
+    def _write_cache(self, age_seconds=0, testnet=False):
+        with open(self.cache_file, 'w', encoding='utf-8') as f:
+            json.dump({'timestamp': time.time() - age_seconds, 'testnet': testnet,
+                       'markets': {'BTC/USDT': MARKET}, 'currencies': {}}, f)
+
+    def test_markets_from_disk_then_memory(self):
+        self._write_cache()
+        exchange, source = exchange_bootstrap.get_exchange('key', 'secret', cache_file=self.cache_file)
+        self.assertEqual(source, 'disk')
+        self.assertEqual(exchange.market_id('BTC/USDT'), 'BTCUSDT')
+        again, source = exchange_bootstrap.get_exchange('key', 'secret', cache_file=self.cache_file)
+        self.assertIs(again, exchange)
+        self.assertEqual(source, 'memory')
+
+    def test_expired_or_other_environment_cache_is_ignored(self):
+        self._write_cache(age_seconds=7200)
+        self.assertFalse(exchange_bootstrap._load_cached_markets(None, self.cache_file, 3600, False))
+        self._write_cache(testnet=True)
+        self.assertFalse(exchange_bootstrap._load_cached_markets(None, self.cache_file, 3600, False))
+
+
+if __name__ == "__main__":
+    unittest.main()
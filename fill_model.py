@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modèle d'Exécution Simulée - Meilleur bid/ask (flux @bookTicker)
+Achats exécutés à l'ask, ventes au bid, avec latence et file d'attente configurables
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Dict, Optional
+
+
+class TopOfBookFillModel:
+    """Prix d'exécution simulés à partir de l'historique récent du meilleur bid/ask"""
+
+    def __init__(self, latency_ms: float = 150, queue_penalty_percent: float = 0.05,
+                 history_seconds: float = 5.0, max_quote_age_seconds: float = 10.0):
+        self.latency_ms = latency_ms
+        self.queue_penalty_percent = queue_penalty_percent
+        self.history_seconds = history_seconds
+        self.max_quote_age_seconds = max_quote_age_seconds
+        self.quotes = defaultdict(deque)  # symbol -> deque[(timestamp, bid, bid_qty, ask, ask_qty)]
+        self.lock = threading.Lock()
+
+    def record(self, data: Dict):
+        """Callback 'book_ticker' du WebSocket"""
+        now = data.get('time') or time.time()
+        with self.lock:
+            history = self.quotes[data['symbol']]
+            history.append((now, data['bid'], data['bid_qty'], data['ask'], data['ask_qty']))
+            while history and now - history[0][0] > self.history_seconds:
+                history.popleft()
+
+    def get_quote(self, symbol: str) -> Optional[Dict]:
+        """Dernier meilleur bid/ask, None s'il est absent ou trop ancien"""
+        history = self.quotes.get(symbol)
+        if not history:
+            return None
+        timestamp, bid, bid_qty, ask, ask_qty = history[-1]
+        if time.time() - timestamp > self.max_quote_age_seconds:
+            return None
+        return {'bid': bid, 'bid_qty': bid_qty, 'ask': ask, 'ask_qty': ask_qty, 'timestamp': timestamp}
+
+    def simulate_fill(self, symbol: str, side: str, quantity: float = None,
+                      quote_amount: float = None) -> Optional[Dict]:
+        """Prix d'exécution d'un ordre au marché
+
+        - buy à l'ask, sell au bid
+        - latence : pire cotation observée pendant la fenêtre de latence (sélection adverse)
+        - file d'attente : la part au-delà de la quantité affichée au meilleur prix
+          subit `queue_penalty_percent`
+        Retourne None sans cotation récente (l'appelant garde son prix de référence).
+        """
+        quote = self.get_quote(symbol)
+        if quote is None:
+            return None
+
+        with self.lock:
+            window_start = quote['timestamp'] - self.latency_ms / 1000
+            window = [q for q in self.quotes[symbol] if q[0] >= window_start]
+
+        if side == 'buy':
+            _, _, _, price, displayed = max(window, key=lambda q: q[3])
+            touch = quote['ask']
+        else:
+            _, price, displayed, _, _ = min(window, key=lambda q: q[1])
+            touch = quote['bid']
+
+        if quantity is None and quote_amount is not None:
+            quantity = quote_amount / price
+
+        queue_fraction = 0.0
+        if quantity and displayed > 0 and quantity > displayed:
+            queue_fraction = (quantity - displayed) / quantity
+        penalty = queue_fraction * self.queue_penalty_percent / 100
+        fill_price = price * (1 + penalty) if side == 'buy' else price * (1 - penalty)
+
+        return {
+            'price': fill_price,
+            'touch_price': touch,
+            'bid': quote['bid'],
+            'ask': quote['ask'],
+            'latency_ms': self.latency_ms,
+            'queue_fraction': queue_fraction,
+            'source': 'book_ticker'
+        }
+
+    def retain(self, symbols):
+        """Ne garde que l'historique des symboles fournis"""
+        keep = set(symbols)
+        with self.lock:
+            for symbol in [s for s in self.quotes if s not in keep]:
+                del self.quotes[symbol]
+
+
+class OrderBookFillSimulator:
+    """Exécution simulée en parcourant le carnet L2 local, repli sur le meilleur bid/ask"""
+
+    def __init__(self, order_books=None, top_of_book: Optional[TopOfBookFillModel] = None):
+        self.order_books = order_books
+        self.top_of_book = top_of_book
+
+    def simulate(self, symbol: str, side: str, quantity: float = None,
+                 quote_amount: float = None) -> Optional[Dict]:
+        """Prix moyen pondéré, slippage et exécution partielle d'un ordre au marché
+
+        Retourne None si aucune donnée de marché locale n'est disponible.
+        """
+        book = self.order_books.get_book(symbol) if self.order_books is not None else None
+        if book is not None:
+            touch = book.best_ask() if side == 'buy' else book.best_bid()
+            impact = book.estimate_market_impact(side, amount=quantity, quote_amount=quote_amount)
+            if impact['average_price']:
+                return {
+                    'price': impact['average_price'],
+                    'touch_price': touch,
+                    'slippage_percent': impact['slippage_percent'],
+                    'filled_amount': impact['filled_amount'],
+                    'partial': not impact['complete'],
+                    'levels_used': impact['levels_used'],
+                    'source': 'order_book'
+                }
+
+        if self.top_of_book is not None:
+            fill = self.top_of_book.simulate_fill(symbol, side, quantity=quantity, quote_amount=quote_amount)
+            if fill:
+                slippage = (fill['price'] - fill['touch_price']) / fill['touch_price'] * 100
+                fill.update({
+                    'slippage_percent': slippage if side == 'buy' else -slippage,
+                    'partial': False,
+                    'levels_used': 1
+                })
+                return fill
+        return None
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests du modèle d'exécution simulée au meilleur bid/ask
+"""
+
+import time
+import unittest
+
+from fill_model import TopOfBookFillModel, OrderBookFillSimulator
+from order_book import LocalOrderBook
+
+
+def quote(at, bid, ask, bid_qty=10.0, ask_qty=10.0):
+    return {'symbol': 'SOL/USDT', 'bid': bid, 'bid_qty': bid_qty, 'ask': ask, 'ask_qty': ask_qty, 'time': at}
+
+
+class TestTopOfBookFillModel(unittest.TestCase):
+
+    def test_buy_at_ask_sell_at_bid(self):
+        model = TopOfBookFillModel(latency_ms=0, queue_penalty_percent=0)
+        model.record(quote(time.time(), 99.0, 101.0))
+        self.assertEqual(model.simulate_fill('SOL/USDT', 'buy', quantity=1)['price'], 101.0)
+        self.assertEqual(model.simulate_fill('SOL/USDT', 'sell', quantity=1)['price'], 99.0)
+
+    def test_latency_uses_worst_recent_quote(self):
+        model = TopOfBookFillModel(latency_ms=500, queue_penalty_percent=0)
+        now = time.time()
+        model.record(quote(now - 2.0, 97.0, 103.0))  # Hors fenêtre de latence
+        model.record(quote(now - 0.3, 99.5, 101.5))
+        model.record(quote(now, 99.0, 101.0))
+        self.assertEqual(model.simulate_fill('SOL/USDT', 'buy', quantity=1)['price'], 101.5)
+        self.assertEqual(model.simulate_fill('SOL/USDT', 'sell', quantity=1)['price'], 99.0)
+
+    def test_queue_penalty_beyond_displayed_size(self):
+        model = TopOfBookFillModel(latency_ms=0, queue_penalty_percent=1.0)
+        model.record(quote(time.time(), 99.0, 100.0, ask_qty=1.0))
+        fill = model.simulate_fill('SOL/USDT', 'buy', quote_amount=400.0)
+        self.assertAlmostEqual(fill['queue_fraction'], 0.75)
+        self.assertAlmostEqual(fill['price'], 100.0 * 1.0075)
+
+    def test_no_quote_returns_none(self):
+        model = TopOfBookFillModel()
+        self.assertIsNone(model.simulate_fill('SOL/USDT', 'buy', quantity=1))
+        model.record(quote(time.time() - 60, 99.0, 101.0))
+        self.assertIsNone(model.simulate_fill('SOL/USDT', 'buy', quantity=1))
+
+
+class FakeOrderBooks:
+    def __init__(self, book):
+        self.book = book
+
+    def get_book(self, symbol):
+        return self.book
+
+
+class TestOrderBookFillSimulator(unittest.TestCase):
+
+    def setUp(self):
+        book = LocalOrderBook('SOL/USDT')
+        book.apply_snapshot({'nonce': 1, 'bids': [[99.0, 1.0], [98.0, 1.0]],
+                             'asks': [[101.0, 1.0], [102.0, 1.0]]})
+        self.simulator = OrderBookFillSimulator(FakeOrderBooks(book), TopOfBookFillModel())
+
+    def test_vwap_over_levels(self):
+        fill = self.simulator.simulate('SOL/USDT', 'buy', quote_amount=101.0 + 51.0)
+        self.assertEqual(fill['source'], 'order_book')
+        self.assertAlmostEqual(fill['price'], 152.0 / 1.5)
+        self.assertFalse(fill['partial'])
+        self.assertGreater(fill['slippage_percent'], 0)
+
+    def test_partial_fill_flag(self):
+        fill = self.simulator.simulate('SOL/USDT', 'sell', quantity=3.0)
+        self.assertTrue(fill['partial'])
+        self.assertAlmostEqual(fill['filled_amount'], 2.0)
+
+    def test_falls_back_to_top_of_book(self):
+        simulator = OrderBookFillSimulator(FakeOrderBooks(None), TopOfBookFillModel(latency_ms=0))
+        self.assertIsNone(simulator.simulate('SOL/USDT', 'buy', quantity=1))
+        simulator.top_of_book.record(quote(time.time(), 99.0, 101.0))
+        fill = simulator.simulate('SOL/USDT', 'buy', quantity=1)
+        self.assertEqual((fill['source'], fill['price']), ('book_ticker', 101.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests du temps d'import
+Les dépendances lourdes (pandas, ccxt, matplotlib, dotenv) ne se chargent qu'à l'usage
+"""
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+import config_manager
+from config_manager import ConfigManager, MISSING_KEYS_MESSAGE
+
+BOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Budget généreux (machine de CI lente) : avant découpage l'import du moteur prenait ~0,7 s
+IMPORT_BUDGET_SECONDS = float(os.getenv('IMPORT_BUDGET_SECONDS', '0.5'))
+
+HEAVY_MODULES = ('pandas', 'ccxt', 'matplotlib', 'tkinter', 'dotenv')
+
+
+def measure_import(module: str) -> dict:
+    """Import à froid dans un processus neuf, sans clés API dans l'environnement"""
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))\n"
+    )
+    env = {key: value for key, value in os.environ.items() if key not in ('API_KEY', 'API_SECRET')}
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=BOT_DIR, env=env)
+    if result.returncode != 0:
+        raise AssertionError(result.stderr)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestImportTime(unittest.TestCase):
+
+    def test_engine_import_is_light(self):
+        measure_import('crypto_bot_engine')  # Compile les .pyc : la mesure suivante est à chaud
+        result = measure_import('crypto_bot_engine')
+        self.assertEqual(result['loaded'], [])
+        self.assertLess(result['seconds'], IMPORT_BUDGET_SECONDS)
+
+    def test_chart_widgets_defers_matplotlib(self):
+        self.assertEqual(measure_import('chart_widgets')['loaded'], ['tkinter'])
+
+
+class TestApiCredentials(unittest.TestCase):
+
+    def setUp(self):
+        self.saved = config_manager._api_credentials
+        self.addCleanup(setattr, config_manager, '_api_credentials', self.saved)
+        self.config = ConfigManager.__new__(ConfigManager)
+        self.config.config = {}
+
+    def test_missing_keys_raise_only_on_demand(self):
+        config_manager._api_credentials = ('', '')
+        self.assertEqual(self.config.get_exchange_config()['api_key'], '')
+        with self.assertRaisesRegex(Exception, 'CLÉS API BINANCE MANQUANTES'):
+            self.config.require_api_credentials()
+        self.assertIn('API_KEY', MISSING_KEYS_MESSAGE)
+
+    def test_present_keys(self):
+        config_manager._api_credentials = ('key', 'secret')
+        self.config.require_api_credentials()
+        self.assertEqual(self.config.get_exchange_config()['secret'], 'secret')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Journalisation Asynchrone - File d'attente, niveaux et champs structurés
+Les threads du bot ne font qu'empiler l'enregistrement ; un écrivain de fond
+formate, écrit dans un fichier tournant et notifie l'interface
+"""
+
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+import weakref
+from typing import Callable, Optional
+
+LOGGER_NAME = 'scalping_bot'
+
+_listener = None
+_dispatch_handler = None
+_setup_lock = threading.Lock()
+
+
+class StructuredFormatter(logging.Formatter):
+    """Ligne texte suivie des champs structurés (symbol=BTC/USDT reason=STOP_LOSS ...)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            line += ' | ' + ' '.join(f"{key}={value}" for key, value in fields.items() if value is not None)
+        return line
+
+
+class DispatchHandler(logging.Handler):
+    """Relaie les enregistrements vers des fonctions abonnées (callbacks GUI), depuis l'écrivain de fond"""
+
+    def __init__(self):
+        super().__init__()
+        self.sinks = []  # WeakMethod ou fonction
+        self.sinks_lock = threading.Lock()
+
+    def add_sink(self, sink: Callable[[logging.LogRecord], None]):
+        try:
+            # Méthode liée : référence faible, un bot abandonné ne reste pas abonné
+            reference = weakref.WeakMethod(sink)
+        except TypeError:
+            reference = lambda: sink
+        with self.sinks_lock:
+            self.sinks.append(reference)
+
+    def emit(self, record: logging.LogRecord):
+        with self.sinks_lock:
+            sinks = [reference() for reference in self.sinks]
+        for sink in sinks:
+            if sink is None:
+                continue
+            try:
+                sink(record)
+            except Exception:
+                pass
+
+
+class Sampler:
+    """Échantillonnage des lignes répétitives (par tick) : au plus une par clé et par intervalle"""
+
+    def __init__(self, interval_seconds: float = 5.0):
+        self.interval_seconds = interval_seconds
+        self.last_emit = {}  # clé -> timestamp
+        self.suppressed = {}  # clé -> lignes écartées depuis la dernière émission
+
+    def should_log(self, key: str) -> Optional[int]:
+        """Nombre de lignes écartées depuis la dernière émission si la ligne doit partir, None sinon"""
+        now = time.time()
+        if now - self.last_emit.get(key, 0) < self.interval_seconds:
+            self.suppressed[key] = self.suppressed.get(key, 0) + 1
+            return None
+        self.last_emit[key] = now
+        return self.suppressed.pop(key, 0)
+
+
+def setup_logging(log_file: Optional[str] = 'bot.log', level: str = 'INFO', max_bytes: int = 5_000_000,
+                  backup_count: int = 5, console: bool = True) -> logging.Logger:
+    """Installe la file d'attente et l'écrivain de fond (une seule fois par processus)"""
+    global _listener, _dispatch_handler
+    logger = logging.getLogger(LOGGER_NAME)
+    with _setup_lock:
+        logger.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+        if _listener is not None:
+            return logger
+
+        formatter = StructuredFormatter('%(asctime)s %(levelname)-7s %(name)s - %(message)s')
+        handlers = []
+        if log_file:
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+        if console:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(StructuredFormatter('[%(asctime)s] %(message)s', '%H:%M:%S'))
+            handlers.append(console_handler)
+        _dispatch_handler = DispatchHandler()
+        _dispatch_handler.setLevel(logging.INFO)  # Pas de DEBUG dans l'interface
+        handlers.append(_dispatch_handler)
+
+        log_queue = queue.SimpleQueue()
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        logger.propagate = False
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+    return logger
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger enfant ('scalping_bot.engine', ...)"""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def add_sink(sink: Callable[[logging.LogRecord], None]):
+    """Abonne une fonction aux enregistrements, appelée depuis l'écrivain de fond"""
+    if _dispatch_handler is not None:
+        _dispatch_handler.add_sink(sink)
+
+
+def shutdown_logging():
+    """Vide la file et arrête l'écrivain de fond"""
+    global _listener, _dispatch_handler
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        logger = logging.getLogger(LOGGER_NAME)
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+        _dispatch_handler = None
+
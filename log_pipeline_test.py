@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests de la journalisation asynchrone
+Écriture en arrière-plan, champs structurés et échantillonnage
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import unittest
+
+from log_pipeline import Sampler, add_sink, get_logger, setup_logging, shutdown_logging
+
+
+class TestLogPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.directory.name, 'bot.log')
+        setup_logging(self.log_file, level='DEBUG', console=False)
+
+    def tearDown(self):
+        shutdown_logging()
+        self.directory.cleanup()
+
+    def test_records_written_by_background_thread(self):
+        received = []
+        done = threading.Event()
+
+        def sink(record):
+            received.append((threading.current_thread(), record))
+            done.set()
+
+        add_sink(sink)
+        get_logger('test').info("🎮 TRADE SIMULÉ", extra={'fields': {'symbol': 'BTC/USDT', 'reason': None}})
+        self.assertTrue(done.wait(2))
+        self.assertIsNot(received[0][0], threading.current_thread())
+        shutdown_logging()  # Vide la file
+        with open(self.log_file, encoding='utf-8') as f:
+            line = f.read()
+        self.assertIn("TRADE SIMULÉ | symbol=BTC/USDT", line)
+        self.assertNotIn("reason", line)
+
+    def test_sink_skips_debug(self):
+        received = []
+        add_sink(received.append)
+        logger = get_logger('test')
+        logger.debug("tick")
+        logger.warning("alerte")
+        shutdown_logging()
+        self.assertEqual([record.levelno for record in received], [logging.WARNING])
+
+
+class TestSampler(unittest.TestCase):
+
+    def test_one_line_per_interval_with_suppressed_count(self):
+        sampler = Sampler(interval_seconds=60)
+        self.assertEqual(sampler.should_log('tick:BTC/USDT'), 0)
+        self.assertIsNone(sampler.should_log('tick:BTC/USDT'))
+        self.assertIsNone(sampler.should_log('tick:BTC/USDT'))
+        self.assertEqual(sampler.should_log('tick:ETH/USDT'), 0)
+        sampler.last_emit['tick:BTC/USDT'] = 0
+        self.assertEqual(sampler.should_log('tick:BTC/USDT'), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Index des Marchés - Métadonnées précalculées une fois depuis load_markets()
+Base/quote, tick, pas de quantité, notionnel minimum, classe de volume et paire autorisée
+dans des tableaux compacts indexés par un identifiant entier de symbole
+"""
+
+import math
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Classes de volume du scanner (index des seuils de volume minimum)
+TIER_MAJOR = 0      # BTC, ETH
+TIER_ALTCOIN = 1    # Grandes capitalisations
+TIER_MICROCAP = 2   # Tout le reste
+
+MAJOR_BASES = {'BTC', 'ETH'}
+ALTCOIN_BASES = {'BNB', 'SOL', 'ADA', 'DOT', 'AVAX', 'LINK', 'UNI', 'MATIC'}
+
+# Devises de cotation connues, les plus longues d'abord (FDUSD avant USD...)
+KNOWN_QUOTES = ('FDUSD', 'USDT', 'USDC', 'TUSD', 'BUSD', 'EUR', 'TRY', 'BTC', 'ETH', 'BNB')
+
+
+def split_exchange_symbol(raw: str) -> str:
+    """'BTCUSDT' -> 'BTC/USDT' sans index (devises de cotation connues)"""
+    raw = raw.upper()
+    for quote in KNOWN_QUOTES:
+        if raw.endswith(quote) and len(raw) > len(quote):
+            return f"{raw[:-len(quote)]}/{quote}"
+    return raw
+
+
+class MarketIndex:
+    """Métadonnées de marché partagées par le scanner, le routeur d'ordres et le WebSocket"""
+
+    def __init__(self, markets: Dict[str, Dict], pair_suffixes: Iterable[str] = (),
+                 pair_suffix_mode: str = 'INCLUDE'):
+        self.symbols: List[str] = []        # id -> 'BTC/USDT'
+        self.ids: Dict[str, int] = {}       # 'BTC/USDT' -> id
+        self.exchange_ids: Dict[str, int] = {}  # 'BTCUSDT' -> id
+        self.bases: List[str] = []
+        self.quotes: List[str] = []
+
+        tick_sizes, step_sizes, min_notionals, min_amounts, tiers, active = [], [], [], [], [], []
+        for symbol, market in markets.items():
+            if not market.get('spot', True) or '/' not in symbol or ':' in symbol:
+                continue
+            symbol_id = len(self.symbols)
+            base = market.get('base') or symbol.split('/')[0]
+            quote = market.get('quote') or symbol.split('/')[1]
+            self.symbols.append(symbol)
+            self.ids[symbol] = symbol_id
+            self.exchange_ids[(market.get('id') or symbol.replace('/', '')).upper()] = symbol_id
+            self.bases.append(base)
+            self.quotes.append(quote)
+
+            precision = market.get('precision') or {}
+            limits = market.get('limits') or {}
+            tick_sizes.append(precision.get('price') or 0.0)
+            step_sizes.append(precision.get('amount') or 0.0)
+            min_notionals.append((limits.get('cost') or {}).get('min') or 0.0)
+            min_amounts.append((limits.get('amount') or {}).get('min') or 0.0)
+            tiers.append(TIER_MAJOR if base in MAJOR_BASES else
+                         TIER_ALTCOIN if base in ALTCOIN_BASES else TIER_MICROCAP)
+            active.append(market.get('active') is not False)
+
+        self.tick_size = np.array(tick_sizes, dtype=np.float64)
+        self.step_size = np.array(step_sizes, dtype=np.float64)
+        self.min_notional = np.array(min_notionals, dtype=np.float64)
+        self.min_amount = np.array(min_amounts, dtype=np.float64)
+        self.tier = np.array(tiers, dtype=np.int8)
+        self.active = np.array(active, dtype=bool)
+        self.allowed = np.zeros(len(self.symbols), dtype=bool)
+        self._pair_filter = None
+        self.configure_pairs(pair_suffixes, pair_suffix_mode)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.ids
+
+    def configure_pairs(self, pair_suffixes: Iterable[str], pair_suffix_mode: str = 'INCLUDE'):
+        """Recalcule le drapeau 'paire autorisée' (uniquement si le filtre a changé)"""
+        suffixes = tuple(sorted(suffix.strip() for suffix in pair_suffixes if suffix and suffix.strip()))
+        if (suffixes, pair_suffix_mode) == self._pair_filter:
+            return
+        self._pair_filter = (suffixes, pair_suffix_mode)
+        include = pair_suffix_mode == 'INCLUDE'
+        matches = np.array([quote in suffixes for quote in self.quotes], dtype=bool)
+        self.allowed = (matches if include else ~matches) & self.active
+
+    # ------------------------------------------------------------------
+    # Requêtes par symbole
+    # ------------------------------------------------------------------
+
+    def id_of(self, symbol: str) -> Optional[int]:
+        return self.ids.get(symbol)
+
+    def symbol_of(self, symbol_id: int) -> str:
+        return self.symbols[symbol_id]
+
+    def from_exchange_id(self, raw: str) -> Optional[str]:
+        """'BTCUSDT' (flux WebSocket) -> 'BTC/USDT', None si inconnu"""
+        symbol_id = self.exchange_ids.get(raw.upper())
+        return self.symbols[symbol_id] if symbol_id is not None else None
+
+    def stream_name(self, symbol: str) -> str:
+        """'BTC/USDT' -> 'btcusdt' (nom de flux Binance)"""
+        symbol_id = self.ids.get(symbol)
+        if symbol_id is None:
+            return symbol.replace('/', '').lower()
+        return self.bases[symbol_id].lower() + self.quotes[symbol_id].lower()
+
+    def base_of(self, symbol: str) -> str:
+        symbol_id = self.ids.get(symbol)
+        return self.bases[symbol_id] if symbol_id is not None else symbol.split('/')[0]
+
+    def tier_of(self, symbol: str) -> Optional[int]:
+        symbol_id = self.ids.get(symbol)
+        return int(self.tier[symbol_id]) if symbol_id is not None else None
+
+    def is_allowed(self, symbol: str) -> Optional[bool]:
+        """Paire autorisée par le filtre de suffixes, None si le symbole est inconnu"""
+        symbol_id = self.ids.get(symbol)
+        return bool(self.allowed[symbol_id]) if symbol_id is not None else None
+
+    def round_amount(self, symbol: str, amount: float) -> float:
+        """Quantité tronquée au pas de l'exchange"""
+        symbol_id = self.ids.get(symbol)
+        step = self.step_size[symbol_id] if symbol_id is not None else 0.0
+        if not step:
+            return amount
+        decimals = max(0, -int(math.floor(math.log10(step))))
+        return round(math.floor(amount / step + 1e-9) * step, decimals)
+
+    def check_order(self, symbol: str, amount: float, price: Optional[float] = None) -> Optional[str]:
+        """Motif de refus local (quantité ou notionnel sous le minimum), None si l'ordre est valide"""
+        symbol_id = self.ids.get(symbol)
+        if symbol_id is None:
+            return None
+        amount = self.round_amount(symbol, amount)
+        if amount <= 0 or amount < self.min_amount[symbol_id]:
+            return f"quantité {amount} < minimum {self.min_amount[symbol_id]}"
+        if price and amount * price < self.min_notional[symbol_id]:
+            return f"notionnel {amount * price:.4f} < minimum {self.min_notional[symbol_id]}"
+        return None
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests de l'index des marchés
+Classes de volume, paires autorisées, filtres de l'exchange et symboles WebSocket
+"""
+
+import unittest
+
+from market_index import TIER_ALTCOIN, TIER_MAJOR, TIER_MICROCAP, MarketIndex, split_exchange_symbol
+
+
+def market(symbol, step=0.001, tick=0.01, min_cost=5.0, min_amount=0.001, active=True, spot=True):
+    base, quote = symbol.split('/')
+    return {
+        'id': base + quote, 'symbol': symbol, 'base': base, 'quote': quote,
+        'spot': spot, 'active': active,
+        'precision': {'amount': step, 'price': tick},
+        'limits': {'amount': {'min': min_amount}, 'cost': {'min': min_cost}}
+    }
+
+
+MARKETS = {
+    'BTC/USDT': market('BTC/USDT', step=0.00001, min_amount=0.00001),
+    'SOL/FDUSD': market('SOL/FDUSD'),
+    'PEPE/USDT': market('PEPE/USDT', step=1, min_amount=1),
+    'ETH/BTC': market('ETH/BTC', min_cost=0.0001),
+    'OLD/USDT': market('OLD/USDT', active=False),
+    'BTC/USDT:USDT': market('BTC/USDT', spot=False),
+}
+
+
+class TestMarketIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = MarketIndex(MARKETS, ['USDT', 'FDUSD'])
+
+    def test_spot_only_with_integer_ids(self):
+        self.assertEqual(len(self.index), 5)
+        symbol_id = self.index.id_of('PEPE/USDT')
+        self.assertEqual(self.index.symbol_of(symbol_id), 'PEPE/USDT')
+        self.assertNotIn('BTC/USDT:USDT', self.index)
+
+    def test_tiers_and_allowed_pairs(self):
+        self.assertEqual(self.index.tier_of('BTC/USDT'), TIER_MAJOR)
+        self.assertEqual(self.index.tier_of('SOL/FDUSD'), TIER_ALTCOIN)
+        self.assertEqual(self.index.tier_of('PEPE/USDT'), TIER_MICROCAP)
+        self.assertTrue(self.index.is_allowed('SOL/FDUSD'))
+        self.assertFalse(self.index.is_allowed('ETH/BTC'))
+        self.assertFalse(self.index.is_allowed('OLD/USDT'))
+        self.assertIsNone(self.index.is_allowed('XYZ/USDT'))
+        self.index.configure_pairs(['BTC'], 'EXCLUDE')
+        self.assertFalse(self.index.is_allowed('ETH/BTC'))
+        self.assertTrue(self.index.is_allowed('BTC/USDT'))
+
+    def test_exchange_filters(self):
+        self.assertEqual(self.index.round_amount('BTC/USDT', 0.123456789), 0.12345)
+        self.assertEqual(self.index.round_amount('PEPE/USDT', 1234.9), 1234)
+        self.assertIsNotNone(self.index.check_order('BTC/USDT', 0.00001, 30000))  # 0.30 USDT < 5
+        self.assertIsNone(self.index.check_order('BTC/USDT', 0.001, 30000))
+        self.assertIsNotNone(self.index.check_order('PEPE/USDT', 0.5))
+
+    def test_websocket_symbol_mapping(self):
+        self.assertEqual(self.index.from_exchange_id('SOLFDUSD'), 'SOL/FDUSD')
+        self.assertEqual(self.index.stream_name('SOL/FDUSD'), 'solfdusd')
+        self.assertEqual(split_exchange_symbol('ethbtc'), 'ETH/BTC')
+        self.assertEqual(split_exchange_symbol('WIFFDUSD'), 'WIF/FDUSD')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache OHLCV REST - Téléchargement incrémental
+Seules les bougies plus récentes que la dernière connue sont récupérées,
+avec détection des trous, éviction LRU et persistance optionnelle sur disque
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from candle_store import timeframe_to_ms
+
+
+class _Series:
+    """Bougies en cache d'un couple (symbole, timeframe)"""
+
+    def __init__(self, rows: Optional[List[List]] = None):
+        self.rows = rows or []  # Format ccxt [[ts, o, h, l, c, v], ...] trié par ts
+        self.last_fetch = 0.0
+        self.holes = set()  # Trous confirmés côté exchange (maintenance), non recherchés à nouveau
+
+    def merge(self, new_rows: Sequence[Sequence]):
+        """Fusionne des bougies : la version la plus récente d'une bougie remplace l'ancienne"""
+        if not new_rows:
+            return
+        new_rows = [list(row) for row in new_rows]
+        first_ts = new_rows[0][0]
+        if not self.rows or first_ts > self.rows[-1][0]:
+            self.rows.extend(new_rows)
+        elif first_ts >= self.rows[0][0] and self._is_tail(first_ts):
+            # Cas courant : remplacement de la bougie en cours + ajout des suivantes
+            while self.rows and self.rows[-1][0] >= first_ts:
+                self.rows.pop()
+            self.rows.extend(new_rows)
+        else:
+            by_ts = {row[0]: row for row in self.rows}
+            by_ts.update((row[0], row) for row in new_rows)
+            self.rows = [by_ts[ts] for ts in sorted(by_ts)]
+
+    def _is_tail(self, first_ts: int) -> bool:
+        # Les nouvelles bougies ne recouvrent que la fin du cache
+        return len(self.rows) < 2 or first_ts > self.rows[-2][0]
+
+    def find_gap(self, timeframe_ms: int, limit: int) -> Optional[Tuple[int, int]]:
+        """Premier trou (début, nombre de bougies manquantes) dans les `limit` dernières bougies"""
+        tail = self.rows[-limit:]
+        for previous, current in zip(tail, tail[1:]):
+            missing = (current[0] - previous[0]) // timeframe_ms - 1
+            start = previous[0] + timeframe_ms
+            if missing > 0 and start not in self.holes:
+                return start, int(missing)
+        return None
+
+
+class OHLCVCache:
+    """Cache des klines REST par symbole et timeframe"""
+
+    def __init__(self, exchange=None, max_symbols: int = 200, max_candles: int = 100000,
+                 max_candles_per_series: int = 1000, min_refresh_seconds: float = 2.0,
+                 persist_file: Optional[str] = None):
+        self.exchange = exchange
+        self.max_symbols = max_symbols
+        self.max_candles = max_candles
+        self.max_candles_per_series = max_candles_per_series
+        self.min_refresh_seconds = min_refresh_seconds
+        self.persist_file = persist_file
+
+        self.series = OrderedDict()  # (symbol, timeframe) -> _Series, ordre LRU
+        self.total_candles = 0
+        self.lock = threading.RLock()
+        self.stats = {
+            'hits': 0,
+            'incremental_fetches': 0,
+            'full_fetches': 0,
+            'gap_fills': 0,
+            'candles_downloaded': 0,
+            'evictions': 0
+        }
+
+        if self.persist_file:
+            self.load()
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', limit: int = 100) -> List[List]:
+        """Équivalent de exchange.fetch_ohlcv(symbol, timeframe, limit=limit) via le cache"""
+        key = (symbol, timeframe)
+        timeframe_ms = timeframe_to_ms(timeframe)
+        now_ms = int(time.time() * 1000)
+
+        with self.lock:
+            series = self.series.get(key)
+            if series is not None and not series.rows:
+                series = None  # Série vide (jamais stockée, par sécurité) : comme absente
+            if series is not None:
+                self.series.move_to_end(key)
+                last_ts = series.rows[-1][0]
+                # Bougies manquantes depuis la dernière connue (elle-même rafraîchie)
+                missing = (now_ms - last_ts) // timeframe_ms + 1
+
+        if (series is None or missing > self.max_candles_per_series or
+                len(series.rows) + missing - 1 < limit):
+            # Pas d'historique exploitable (ou trop ancien pour survivre au trim) : téléchargement complet
+            rows = self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+            series = _Series()
+            series.merge(rows)
+            series.last_fetch = time.time()
+            with self.lock:
+                self.stats['full_fetches'] += 1
+                self.stats['candles_downloaded'] += len(rows)
+                if series.rows:
+                    self._store(key, series)
+            return [list(row) for row in series.rows[-limit:]]
+
+        if time.time() - series.last_fetch < self.min_refresh_seconds:
+            with self.lock:
+                self.stats['hits'] += 1
+                return [list(row) for row in series.rows[-limit:]]
+
+        # Série récente ou rechargée du disque : seules les bougies depuis la dernière connue
+        rows = self.exchange.fetch_ohlcv(symbol, timeframe, since=last_ts, limit=int(missing) + 1)
+
+        with self.lock:
+            self.stats['incremental_fetches'] += 1
+            self.stats['candles_downloaded'] += len(rows)
+            before = len(series.rows)
+            series.merge(rows)
+            series.last_fetch = time.time()
+            self._fill_gaps(symbol, timeframe, series, timeframe_ms, limit)
+            self._trim(series)
+            self.total_candles += len(series.rows) - before
+            self._evict()
+            return [list(row) for row in series.rows[-limit:]]
+
+    def _fill_gaps(self, symbol: str, timeframe: str, series: _Series, timeframe_ms: int, limit: int):
+        """Comble les trous de la fenêtre demandée (un seul essai par trou)"""
+        for _ in range(3):
+            gap = series.find_gap(timeframe_ms, limit)
+            if gap is None:
+                return
+            start, missing = gap
+            try:
+                rows = self.exchange.fetch_ohlcv(symbol, timeframe, since=start, limit=missing)
+            except Exception:
+                return
+            self.stats['gap_fills'] += 1
+            self.stats['candles_downloaded'] += len(rows)
+            if not rows or rows[0][0] != start:
+                # Trou réel côté exchange : ne plus le rechercher
+                series.holes.add(start)
+            series.merge([row for row in rows if row[0] < start + missing * timeframe_ms])
+
+    def _trim(self, series: _Series):
+        excess = len(series.rows) - self.max_candles_per_series
+        if excess > 0:
+            del series.rows[:excess]
+
+    def _store(self, key: Tuple[str, str], series: _Series):
+        self._trim(series)
+        previous = self.series.pop(key, None)
+        if previous is not None:
+            self.total_candles -= len(previous.rows)
+        self.series[key] = series
+        self.total_candles += len(series.rows)
+        self._evict()
+
+    def _evict(self):
+        """Éviction LRU au-delà du nombre de séries ou de bougies autorisé"""
+        while len(self.series) > 1 and (len(self.series) > self.max_symbols or
+                                        self.total_candles > self.max_candles):
+            _, series = self.series.popitem(last=False)
+            self.total_candles -= len(series.rows)
+            self.stats['evictions'] += 1
+
+    def retain(self, symbols: Sequence[str]):
+        """Oublie les symboles sortis de l'univers de scan"""
+        keep = set(symbols)
+        with self.lock:
+            for key in [k for k in self.series if k[0] not in keep]:
+                self.total_candles -= len(self.series.pop(key).rows)
+                self.stats['evictions'] += 1
+
+    def get_stats(self) -> Dict:
+        """Compteurs du cache (succès, téléchargements, évictions)"""
+        with self.lock:
+            return dict(self.stats, series=len(self.series), candles=self.total_candles)
+
+    def save(self):
+        """Sauvegarde atomique du cache sur disque (fichier temporaire puis renommage)"""
+        if not self.persist_file:
+            return
+        with self.lock:
+            data = {f"{symbol}|{timeframe}": series.rows
+                    for (symbol, timeframe), series in self.series.items()}
+        temp_file = self.persist_file + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(temp_file, self.persist_file)
+
+    def load(self):
+        """Recharge le cache sauvegardé (ignoré s'il est absent ou illisible)"""
+        if not self.persist_file or not os.path.exists(self.persist_file):
+            return
+        try:
+            with open(self.persist_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self.lock:
+            for key, rows in data.items():
+                symbol, _, timeframe = key.rpartition('|')
+                if symbol and rows:
+                    self._store((symbol, timeframe), _Series(rows))
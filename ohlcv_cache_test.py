@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Tests du cache OHLCV REST
+Téléchargement incrémental, comblement des trous et éviction LRU
+"""
+
+import os
+import tempfile
+import time
+import unittest
+
+from ohlcv_cache import OHLCVCache
+
+MINUTE = 60_000
+
+
+class FakeExchange:
+    """Exchange simulé : une bougie 1m par minute jusqu'à maintenant"""
+
+    def __init__(self, missing=()):
+        self.calls = []
+        self.missing = set(missing)
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=100):
+        self.calls.append((symbol, since, limit))
+        now = int(time.time() * 1000)
+        last = now - now % MINUTE
+        start = since
+        if start is None:
+            # Les `limit` dernières bougies existantes, trous exclus
+            start = last - (limit - 1) * MINUTE
+            start -= MINUTE * len([ts for ts in self.missing if start <= ts <= last])
+        rows = []
+        ts = start
+        while ts <= last and len(rows) < limit:
+            if ts not in self.missing:
+                rows.append([ts, 1.0, 2.0, 0.5, 1.5, 10.0])
+            ts += MINUTE
+        return rows
+
+
+class EmptyExchange(FakeExchange):
+    """Symbole sans bougies (nouvelle cotation, paire suspendue)"""
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=100):
+        self.calls.append((symbol, since, limit))
+        return []
+
+
+class TestOHLCVCache(unittest.TestCase):
+
+    def test_second_fetch_is_incremental(self):
+        exchange = FakeExchange()
+        cache = OHLCVCache(exchange, min_refresh_seconds=0)
+        first = cache.fetch_ohlcv('BTC/USDT', '1m', 50)
+        second = cache.fetch_ohlcv('BTC/USDT', '1m', 50)
+        self.assertEqual(len(first), 50)
+        self.assertEqual([row[0] for row in second][-1], first[-1][0])
+        # Deuxième appel : uniquement depuis la dernière bougie connue
+        self.assertEqual(exchange.calls[1][1], first[-1][0])
+        self.assertLessEqual(exchange.calls[1][2], 3)
+
+    def test_hit_within_refresh_interval(self):
+        exchange = FakeExchange()
+        cache = OHLCVCache(exchange, min_refresh_seconds=60)
+        cache.fetch_ohlcv('BTC/USDT', '1m', 20)
+        cache.fetch_ohlcv('BTC/USDT', '1m', 20)
+        self.assertEqual(len(exchange.calls), 1)
+        self.assertEqual(cache.get_stats()['hits'], 1)
+
+    def test_gap_is_filled(self):
+        exchange = FakeExchange()
+        cache = OHLCVCache(exchange, min_refresh_seconds=0)
+        rows = cache.fetch_ohlcv('ETH/USDT', '1m', 30)
+        hole = rows[10][0]
+        series = cache.series[('ETH/USDT', '1m')]
+        series.rows = [row for row in series.rows if row[0] != hole]
+        rows = cache.fetch_ohlcv('ETH/USDT', '1m', 20)
+        self.assertIn(hole, [row[0] for row in rows])
+        self.assertEqual(cache.get_stats()['gap_fills'], 1)
+
+    def test_exchange_hole_is_not_refetched(self):
+        now = int(time.time() * 1000)
+        hole = now - now % MINUTE - 5 * MINUTE
+        exchange = FakeExchange(missing=[hole])
+        cache = OHLCVCache(exchange, min_refresh_seconds=0)
+        cache.fetch_ohlcv('ETH/USDT', '1m', 30)
+        cache.fetch_ohlcv('ETH/USDT', '1m', 30)
+        cache.fetch_ohlcv('ETH/USDT', '1m', 30)
+        self.assertEqual(cache.get_stats()['gap_fills'], 1)
+
+    def test_empty_full_fetch_is_not_cached(self):
+        cache = OHLCVCache(EmptyExchange(), min_refresh_seconds=0)
+        self.assertEqual(cache.fetch_ohlcv('NEW/USDT', '1m', 20), [])
+        self.assertNotIn(('NEW/USDT', '1m'), cache.series)
+        self.assertEqual(cache.fetch_ohlcv('NEW/USDT', '1m', 20), [])
+
+        # Symbole coté entre-temps : l'appel suivant fonctionne
+        cache.exchange = FakeExchange()
+        self.assertEqual(len(cache.fetch_ohlcv('NEW/USDT', '1m', 20)), 20)
+
+    def test_lru_eviction_and_retain(self):
+        cache = OHLCVCache(FakeExchange(), max_symbols=2)
+        for symbol in ('A/USDT', 'B/USDT', 'C/USDT'):
+            cache.fetch_ohlcv(symbol, '1m', 10)
+        self.assertEqual([key[0] for key in cache.series], ['B/USDT', 'C/USDT'])
+        cache.retain(['C/USDT'])
+        self.assertEqual(cache.get_stats()['candles'], 10)
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'ohlcv_cache.json')
+            cache = OHLCVCache(FakeExchange(), persist_file=path)
+            cache.fetch_ohlcv('BTC/USDT', '1m', 20)
+            cache.save()
+            exchange = FakeExchange()
+            restored = OHLCVCache(exchange, persist_file=path, min_refresh_seconds=0)
+            rows = restored.fetch_ohlcv('BTC/USDT', '1m', 20)
+            self.assertEqual(len(rows), 20)
+            self.assertIsNotNone(exchange.calls[0][1])
+
+    def test_stale_persisted_series_is_gap_filled(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'ohlcv_cache.json')
+            cache = OHLCVCache(FakeExchange(), persist_file=path)
+            stored = cache.fetch_ohlcv('BTC/USDT', '1m', 60)
+            # Arrêt de 40 minutes : les 40 dernières bougies manquent
+            cache.series[('BTC/USDT', '1m')].rows = [list(row) for row in stored[:20]]
+            cache.save()
+
+            exchange = FakeExchange()
+            restored = OHLCVCache(exchange, persist_file=path, min_refresh_seconds=0)
+            rows = restored.fetch_ohlcv('BTC/USDT', '1m', 30)
+            self.assertEqual(len(rows), 30)
+            self.assertEqual(len(exchange.calls), 1)
+            self.assertEqual(exchange.calls[0][1], stored[19][0])
+            self.assertEqual(restored.get_stats()['full_fetches'], 0)
+            self.assertGreaterEqual(len(restored.series[('BTC/USDT', '1m')].rows), 60)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Carnet d'Ordres Local L2 - Snapshot REST + flux différentiels @depth@100ms
+Spread, profondeur et impact de marché instantanés sans appel REST
+"""
+
+import bisect
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+class LocalOrderBook:
+    """Carnet L2 d'un symbole maintenu selon la procédure Binance (lastUpdateId, U, u)"""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = {}  # prix -> quantité
+        self.asks = {}
+        self.bid_prices = []  # Prix triés croissants (meilleur bid en dernier)
+        self.ask_prices = []  # Prix triés croissants (meilleur ask en premier)
+        self.last_update_id = 0
+        self.synced = False
+        self.buffer = []  # Événements reçus avant le snapshot
+        self.last_update = 0.0
+        self.lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def _set_level(self, side: Dict, prices: List[float], price: float, quantity: float):
+        if quantity > 0:
+            if price not in side:
+                bisect.insort(prices, price)
+            side[price] = quantity
+        elif price in side:
+            del side[price]
+            index = bisect.bisect_left(prices, price)
+            if index < len(prices) and prices[index] == price:
+                del prices[index]
+
+    def _apply_levels(self, bids, asks):
+        for price, quantity in bids:
+            self._set_level(self.bids, self.bid_prices, float(price), float(quantity))
+        for price, quantity in asks:
+            self._set_level(self.asks, self.ask_prices, float(price), float(quantity))
+
+    def apply_snapshot(self, snapshot: Dict) -> bool:
+        """Charge un snapshot REST (ccxt fetch_order_book, 'nonce' = lastUpdateId)
+        puis rejoue les événements bufferisés. Retourne False si une resynchronisation est nécessaire."""
+        with self.lock:
+            self.bids, self.asks = {}, {}
+            self.bid_prices, self.ask_prices = [], []
+            self._apply_levels(snapshot.get('bids', []), snapshot.get('asks', []))
+            self.last_update_id = int(snapshot.get('nonce') or snapshot.get('lastUpdateId') or 0)
+            self.synced = True
+            self.last_update = time.time()
+
+            buffered, self.buffer = self.buffer, []
+            for event in buffered:
+                if int(event['u']) <= self.last_update_id:
+                    continue  # Déjà inclus dans le snapshot
+                if not self._apply_event(event):
+                    return False
+            return True
+
+    def apply_diff(self, event: Dict) -> bool:
+        """Applique un événement depthUpdate. Retourne False en cas de trou de séquence."""
+        with self.lock:
+            if not self.synced:
+                self.buffer.append(event)
+                return True
+            if int(event['u']) <= self.last_update_id:
+                return True
+            return self._apply_event(event)
+
+    def _apply_event(self, event: Dict) -> bool:
+        first_id, final_id = int(event['U']), int(event['u'])
+        # Le premier événement doit couvrir lastUpdateId + 1, les suivants s'enchaînent
+        if first_id > self.last_update_id + 1:
+            self.synced = False
+            return False
+        self._apply_levels(event.get('b', []), event.get('a', []))
+        self.last_update_id = final_id
+        self.last_update = time.time()
+        return True
+
+    def invalidate(self):
+        """Marque le carnet comme désynchronisé (nouveau snapshot requis)"""
+        with self.lock:
+            self.synced = False
+            self.buffer = []
+
+    # ------------------------------------------------------------------
+    # Requêtes
+    # ------------------------------------------------------------------
+
+    def best_bid(self) -> Optional[float]:
+        return self.bid_prices[-1] if self.bid_prices else None
+
+    def best_ask(self) -> Optional[float]:
+        return self.ask_prices[0] if self.ask_prices else None
+
+    def spread_percent(self) -> Optional[float]:
+        """Spread en % du prix moyen"""
+        with self.lock:
+            bid, ask = self.best_bid(), self.best_ask()
+            if not bid or not ask:
+                return None
+            return (ask - bid) / ((ask + bid) / 2) * 100
+
+    def top_levels(self, side: str, limit: int) -> List[List[float]]:
+        """Meilleurs niveaux [[prix, quantité], ...] d'un côté ('bids' ou 'asks')"""
+        with self.lock:
+            if side == 'bids':
+                prices = self.bid_prices[-limit:][::-1]
+                return [[price, self.bids[price]] for price in prices]
+            prices = self.ask_prices[:limit]
+            return [[price, self.asks[price]] for price in prices]
+
+    def depth_within(self, percent: float) -> Dict[str, float]:
+        """Liquidité (en devise de cotation) à moins de `percent`% du prix moyen"""
+        with self.lock:
+            bid, ask = self.best_bid(), self.best_ask()
+            if not bid or not ask:
+                return {'bids': 0.0, 'asks': 0.0, 'bid_levels': 0, 'ask_levels': 0}
+            mid = (bid + ask) / 2
+            low, high = mid * (1 - percent / 100), mid * (1 + percent / 100)
+
+            start = bisect.bisect_left(self.bid_prices, low)
+            bid_prices = self.bid_prices[start:]
+            end = bisect.bisect_right(self.ask_prices, high)
+            ask_prices = self.ask_prices[:end]
+            return {
+                'bids': sum(price * self.bids[price] for price in bid_prices),
+                'asks': sum(price * self.asks[price] for price in ask_prices),
+                'bid_levels': len(bid_prices),
+                'ask_levels': len(ask_prices)
+            }
+
+    def estimate_market_impact(self, side: str, amount: float = None, quote_amount: float = None) -> Dict:
+        """Impact estimé d'un ordre au marché en parcourant le carnet
+
+        side: 'buy' (consomme les asks) ou 'sell' (consomme les bids)
+        amount: quantité en devise de base, ou quote_amount en devise de cotation
+        """
+        levels = self.top_levels('asks' if side == 'buy' else 'bids', len(self.asks if side == 'buy' else self.bids))
+        if not levels:
+            return {'average_price': None, 'filled_amount': 0.0, 'filled_quote': 0.0,
+                    'slippage_percent': None, 'complete': False, 'levels_used': 0}
+
+        best_price = levels[0][0]
+        remaining_base = amount
+        remaining_quote = quote_amount
+        filled_amount = filled_quote = 0.0
+        levels_used = 0
+
+        for price, quantity in levels:
+            if remaining_base is not None:
+                take = min(quantity, remaining_base)
+                remaining_base -= take
+            else:
+                take = min(quantity, remaining_quote / price)
+                remaining_quote -= take * price
+            filled_amount += take
+            filled_quote += take * price
+            levels_used += 1
+            if (remaining_base is not None and remaining_base <= 1e-12) or \
+               (remaining_quote is not None and remaining_quote <= 1e-9):
+                break
+
+        average_price = filled_quote / filled_amount if filled_amount > 0 else None
+        slippage = None
+        if average_price:
+            slippage = (average_price - best_price) / best_price * 100
+            if side == 'sell':
+                slippage = -slippage
+        complete = ((remaining_base is not None and remaining_base <= 1e-12) or
+                    (remaining_quote is not None and remaining_quote <= 1e-9))
+        return {
+            'average_price': average_price,
+            'filled_amount': filled_amount,
+            'filled_quote': filled_quote,
+            'slippage_percent': slippage,
+            'complete': complete,
+            'levels_used': levels_used
+        }
+
+
+class OrderBookManager:
+    """Carnets locaux des symboles surveillés, alimentés par le WebSocket"""
+
+    def __init__(self, exchange=None, snapshot_limit: int = 1000, max_age_seconds: float = 10):
+        self.exchange = exchange
+        self.snapshot_limit = snapshot_limit
+        self.max_age_seconds = max_age_seconds
+        self.books = {}  # symbol -> LocalOrderBook
+        self.pending_snapshots = set()
+        self.lock = threading.Lock()
+        self.stats = {'snapshots': 0, 'resyncs': 0, 'events': 0}
+
+    def on_depth_event(self, symbol: str, event: Dict):
+        """Événement depthUpdate du WebSocket"""
+        with self.lock:
+            book = self.books.get(symbol)
+            if book is None:
+                book = LocalOrderBook(symbol)
+                self.books[symbol] = book
+        self.stats['events'] += 1
+
+        if not book.apply_diff(event):
+            # Trou de séquence : on repart d'un snapshot
+            self.stats['resyncs'] += 1
+            logging.warning(f"Carnet {symbol} désynchronisé - resynchronisation")
+            book.invalidate()
+            book.apply_diff(event)
+        if not book.synced:
+            self._request_snapshot(symbol)
+
+    def _request_snapshot(self, symbol: str):
+        with self.lock:
+            if symbol in self.pending_snapshots or self.exchange is None:
+                return
+            self.pending_snapshots.add(symbol)
+        threading.Thread(target=self._load_snapshot, args=[symbol], daemon=True).start()
+
+    def _load_snapshot(self, symbol: str):
+        try:
+            # Laisser quelques événements s'accumuler avant le snapshot
+            time.sleep(0.2)
+            snapshot = self.exchange.fetch_order_book(symbol, limit=self.snapshot_limit)
+            self.stats['snapshots'] += 1
+            book = self.books.get(symbol)
+            if book is not None and not book.apply_snapshot(snapshot):
+                self.stats['resyncs'] += 1
+                book.invalidate()
+        except Exception as e:
+            logging.error(f"Erreur snapshot carnet {symbol}: {e}")
+        finally:
+            with self.lock:
+                self.pending_snapshots.discard(symbol)
+
+    def get_book(self, symbol: str) -> Optional[LocalOrderBook]:
+        """Carnet synchronisé et récent, None sinon"""
+        book = self.books.get(symbol)
+        if book is None or not book.synced or time.time() - book.last_update > self.max_age_seconds:
+            return None
+        return book
+
+    def retain(self, symbols: List[str]):
+        """Ne garde que les carnets des symboles fournis"""
+        keep = set(symbols)
+        with self.lock:
+            for symbol in [s for s in self.books if s not in keep]:
+                del self.books[symbol]
+
+    def get_statistics(self) -> Dict:
+        return dict(self.stats, books=len(self.books),
+                    synced=sum(1 for book in self.books.values() if book.synced))
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests du carnet d'ordres local
+Séquencement snapshot + flux différentiels, requêtes spread/profondeur/impact
+"""
+
+import unittest
+
+from order_book import LocalOrderBook
+
+SNAPSHOT = {
+    'nonce': 100,
+    'bids': [[99.9, 1.0], [99.8, 2.0], [99.0, 5.0]],
+    'asks': [[100.1, 1.0], [100.2, 2.0], [101.0, 5.0]]
+}
+
+
+def depth_event(first_id, final_id, bids=(), asks=()):
+    return {'e': 'depthUpdate', 'U': first_id, 'u': final_id, 'b': list(bids), 'a': list(asks)}
+
+
+class TestLocalOrderBook(unittest.TestCase):
+
+    def test_buffered_events_replayed_after_snapshot(self):
+        book = LocalOrderBook('BTC/USDT')
+        book.apply_diff(depth_event(95, 99, bids=[['99.95', '9']]))  # Déjà dans le snapshot
+        book.apply_diff(depth_event(100, 102, asks=[['100.1', '0']]))
+        self.assertTrue(book.apply_snapshot(SNAPSHOT))
+        self.assertNotIn(99.95, book.bids)
+        self.assertEqual(book.best_ask(), 100.2)
+        self.assertEqual(book.last_update_id, 102)
+
+    def test_sequence_gap_requires_resync(self):
+        book = LocalOrderBook('BTC/USDT')
+        book.apply_snapshot(SNAPSHOT)
+        self.assertTrue(book.apply_diff(depth_event(101, 103, bids=[['99.95', '1']])))
+        self.assertFalse(book.apply_diff(depth_event(105, 106)))
+        self.assertFalse(book.synced)
+
+    def test_spread_and_depth(self):
+        book = LocalOrderBook('BTC/USDT')
+        book.apply_snapshot(SNAPSHOT)
+        self.assertAlmostEqual(book.spread_percent(), 0.2 / 100 * 100)
+        depth = book.depth_within(0.5)
+        self.assertEqual(depth['bid_levels'], 2)
+        self.assertAlmostEqual(depth['asks'], 100.1 * 1.0 + 100.2 * 2.0)
+        self.assertEqual(book.top_levels('bids', 2), [[99.9, 1.0], [99.8, 2.0]])
+
+    def test_market_impact_walks_levels(self):
+        book = LocalOrderBook('BTC/USDT')
+        book.apply_snapshot(SNAPSHOT)
+        impact = book.estimate_market_impact('buy', amount=2.0)
+        self.assertAlmostEqual(impact['average_price'], (100.1 + 100.2) / 2)
+        self.assertTrue(impact['complete'])
+        self.assertEqual(impact['levels_used'], 2)
+        partial = book.estimate_market_impact('sell', amount=10.0)
+        self.assertFalse(partial['complete'])
+        self.assertAlmostEqual(partial['filled_amount'], 8.0)
+        self.assertGreater(partial['slippage_percent'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
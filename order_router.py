@@ -0,0 +1,554 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Routeur d'Ordres Asynchrone - Exécution réelle
+Identifiants client, relances idempotentes, réconciliation des exécutions
+et verrou par symbole, derrière un adaptateur d'exchange interchangeable
+"""
+
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+# Statuts d'un ordre suivi par le routeur
+STATUS_PENDING = 'pending'
+STATUS_OPEN = 'open'
+STATUS_PARTIAL = 'partially_filled'
+STATUS_FILLED = 'filled'
+STATUS_CANCELED = 'canceled'
+STATUS_REJECTED = 'rejected'
+STATUS_FAILED = 'failed'
+
+TERMINAL_STATUSES = {STATUS_FILLED, STATUS_CANCELED, STATUS_REJECTED, STATUS_FAILED}
+
+
+class OrderError(Exception):
+    """Erreur d'ordre remontée par un adaptateur"""
+
+
+class RetryableOrderError(OrderError):
+    """Erreur réseau/timeout : l'ordre a peut-être atteint l'exchange"""
+
+
+class OrderRejectedError(OrderError):
+    """Refus définitif (fonds insuffisants, paramètres invalides...)"""
+
+
+class OrderNotFoundError(OrderError):
+    """Ordre inconnu de l'exchange"""
+
+
+class ExchangeAdapter(ABC):
+    """Interface minimale attendue par le routeur (coroutines)"""
+
+    @abstractmethod
+    async def create_order(self, symbol: str, side: str, order_type: str, amount: float,
+                           price: Optional[float] = None, client_order_id: Optional[str] = None,
+                           params: Optional[Dict] = None) -> Dict:
+        """Ordre au format ccxt, lève une OrderError typée en cas d'échec"""
+
+    @abstractmethod
+    async def fetch_order(self, symbol: str, client_order_id: str) -> Dict:
+        """Ordre par identifiant client, lève OrderNotFoundError s'il n'existe pas"""
+
+    @abstractmethod
+    async def cancel_order(self, symbol: str, client_order_id: str) -> Dict:
+        """Annule un ordre par identifiant client"""
+
+    @abstractmethod
+    async def create_oco(self, symbol: str, side: str, amount: float, price: float, stop_price: float,
+                         stop_limit_price: float, list_client_id: str, limit_client_id: str,
+                         stop_client_id: str) -> List[Dict]:
+        """OCO (limite take profit + stop-limit), retourne les deux jambes au format ccxt"""
+
+    @abstractmethod
+    async def cancel_order_list(self, symbol: str, list_client_id: str) -> List[Dict]:
+        """Annule une OCO, retourne l'état final des jambes"""
+
+
+class CcxtExchangeAdapter(ExchangeAdapter):
+    """Adaptateur ccxt synchrone (Binance), appels exécutés hors de la boucle asyncio"""
+
+    def __init__(self, exchange, market_index=None):
+        self.exchange = exchange
+        self.market_index = market_index  # Filtres de l'exchange (quantité et notionnel minimum)
+
+    @staticmethod
+    @contextmanager
+    def _order_errors():
+        """Exceptions ccxt -> OrderError du routeur (appels réseau et arrondis aux filtres)"""
+        import ccxt
+
+        try:
+            yield
+        except ccxt.OrderNotFound as e:
+            raise OrderNotFoundError(str(e)) from e
+        except (ccxt.InsufficientFunds, ccxt.InvalidOrder, ccxt.AuthenticationError,
+                ccxt.PermissionDenied, ccxt.BadSymbol) as e:
+            raise OrderRejectedError(str(e)) from e
+        except ccxt.NetworkError as e:  # RequestTimeout, ExchangeNotAvailable, DDoSProtection...
+            raise RetryableOrderError(str(e)) from e
+
+    async def _call(self, method, *args, **kwargs):
+        with self._order_errors():
+            return await asyncio.to_thread(method, *args, **kwargs)
+
+    async def create_order(self, symbol, side, order_type, amount, price=None, client_order_id=None, params=None):
+        params = dict(params or {})
+        if client_order_id:
+            params['newClientOrderId'] = client_order_id
+        if self.market_index is not None:
+            rejection = self.market_index.check_order(symbol, amount, price)
+            if rejection:
+                raise OrderRejectedError(f"{symbol}: {rejection}")
+        with self._order_errors():
+            amount = float(self.exchange.amount_to_precision(symbol, amount))
+            if price is not None:
+                price = float(self.exchange.price_to_precision(symbol, price))
+        return await self._call(self.exchange.create_order, symbol, order_type, side, amount, price, params)
+
+    async def fetch_order(self, symbol, client_order_id):
+        return await self._call(self.exchange.fetch_order, None, symbol,
+                                {'origClientOrderId': client_order_id})
+
+    async def cancel_order(self, symbol, client_order_id):
+        return await self._call(self.exchange.cancel_order, None, symbol,
+                                {'origClientOrderId': client_order_id})
+
+    @staticmethod
+    def _order_report(report: Dict) -> Dict:
+        """Rapport d'ordre brut Binance -> dictionnaire ccxt minimal"""
+        status = {'NEW': 'open', 'PARTIALLY_FILLED': 'open', 'FILLED': 'closed',
+                  'CANCELED': 'canceled', 'EXPIRED': 'expired', 'REJECTED': 'rejected'}
+        filled = float(report.get('executedQty') or 0)
+        cost = float(report.get('cummulativeQuoteQty') or 0)
+        return {
+            'id': str(report.get('orderId')),
+            'clientOrderId': report.get('clientOrderId'),
+            'status': status.get(report.get('status'), 'open'),
+            'filled': filled,
+            'cost': cost,
+            'average': cost / filled if filled else None
+        }
+
+    async def create_oco(self, symbol, side, amount, price, stop_price, stop_limit_price,
+                         list_client_id, limit_client_id, stop_client_id):
+        with self._order_errors():
+            request = {
+                'symbol': self.exchange.market_id(symbol),
+                'side': side.upper(),
+                'quantity': self.exchange.amount_to_precision(symbol, amount),
+                'price': self.exchange.price_to_precision(symbol, price),
+                'stopPrice': self.exchange.price_to_precision(symbol, stop_price),
+                'stopLimitPrice': self.exchange.price_to_precision(symbol, stop_limit_price),
+                'stopLimitTimeInForce': 'GTC',
+                'listClientOrderId': list_client_id,
+                'limitClientOrderId': limit_client_id,
+                'stopClientOrderId': stop_client_id
+            }
+        response = await self._call(self.exchange.privatePostOrderOco, request)
+        return [self._order_report(report) for report in response.get('orderReports', [])]
+
+    async def cancel_order_list(self, symbol, list_client_id):
+        request = {'symbol': self.exchange.market_id(symbol), 'listClientOrderId': list_client_id}
+        response = await self._call(self.exchange.privateDeleteOrderList, request)
+        return [self._order_report(report) for report in response.get('orderReports', [])]
+
+
+class OrderRouter:
+    """Envoi et suivi des ordres réels sur une boucle asyncio dédiée"""
+
+    def __init__(self, adapter: ExchangeAdapter, max_retries: int = 3, retry_delay: float = 0.5,
+                 reconcile_interval: float = 0.5, reconcile_timeout: float = 10.0,
+                 client_id_prefix: str = 'scb'):
+        self.adapter = adapter
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.reconcile_interval = reconcile_interval
+        self.reconcile_timeout = reconcile_timeout
+        self.client_id_prefix = client_id_prefix
+
+        self.orders = {}  # client_order_id -> enregistrement d'ordre
+        self.symbol_locks = {}  # symbol -> asyncio.Lock (ordres en vol sérialisés par symbole)
+        self.in_flight = set()
+        self.oco_legs = {}  # client_order_id d'une jambe -> OCO de sortie
+        self.listeners = []  # Appelés à chaque changement de statut d'un ordre
+        self._sequence = itertools.count(1)
+        self._session = format(int(time.time()), 'x')
+
+        self.loop = None
+        self.thread = None
+
+    # ------------------------------------------------------------------
+    # Boucle asyncio dédiée
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Démarre la boucle du routeur dans un thread"""
+        if self.loop is not None:
+            return
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True, name="OrderRouter")
+        self.thread.start()
+
+    def stop(self):
+        """Arrête la boucle du routeur"""
+        if self.loop is None:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        self.loop.close()
+        self.loop = None
+        self.thread = None
+
+    def submit(self, coroutine, timeout: Optional[float] = None):
+        """Exécute une coroutine du routeur depuis un thread classique et attend le résultat"""
+        if self.loop is None:
+            self.start()
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        return future.result(timeout)
+
+    def place_order_sync(self, symbol: str, side: str, amount: float, order_type: str = 'market',
+                         price: Optional[float] = None, client_order_id: Optional[str] = None,
+                         params: Optional[Dict] = None, timeout: Optional[float] = None) -> Dict:
+        """Version bloquante de place_order pour les threads du bot"""
+        return self.submit(self.place_order(symbol, side, amount, order_type, price, client_order_id, params),
+                           timeout)
+
+    # ------------------------------------------------------------------
+    # Ordres
+    # ------------------------------------------------------------------
+
+    def new_client_order_id(self) -> str:
+        """Identifiant client unique (≤ 36 caractères, format Binance)"""
+        return f"{self.client_id_prefix}-{self._session}-{next(self._sequence)}"
+
+    def _lock_for(self, symbol: str) -> asyncio.Lock:
+        lock = self.symbol_locks.get(symbol)
+        if lock is None:
+            lock = asyncio.Lock()
+            self.symbol_locks[symbol] = lock
+        return lock
+
+    def is_busy(self, symbol: str) -> bool:
+        """True si un ordre est en vol sur ce symbole"""
+        return symbol in self.in_flight
+
+    async def place_order(self, symbol: str, side: str, amount: float, order_type: str = 'market',
+                          price: Optional[float] = None, client_order_id: Optional[str] = None,
+                          params: Optional[Dict] = None) -> Dict:
+        """Envoie un ordre, relance sans doublon et attend son exécution
+
+        Un même client_order_id n'est jamais envoyé deux fois : après une erreur
+        ambiguë (timeout), l'ordre est d'abord recherché côté exchange.
+        """
+        async with self._lock_for(symbol):
+            existing = self.orders.get(client_order_id) if client_order_id else None
+            if existing is not None and existing['status'] != STATUS_FAILED:
+                return existing  # Idempotent : déjà envoyé
+
+            self.in_flight.add(symbol)
+            try:
+                record = self._new_record(symbol, side, order_type, amount, price, client_order_id)
+                await self._send(record, params)
+                if record['status'] not in TERMINAL_STATUSES:
+                    await self._reconcile(record)
+                return record
+            finally:
+                self.in_flight.discard(symbol)
+
+    def _new_record(self, symbol, side, order_type, amount, price, client_order_id) -> Dict:
+        record = {
+            'client_order_id': client_order_id or self.new_client_order_id(),
+            'exchange_order_id': None,
+            'symbol': symbol,
+            'side': side,
+            'type': order_type,
+            'amount': amount,
+            'price': price,
+            'status': STATUS_PENDING,
+            'filled': 0.0,
+            'remaining': amount,
+            'average': None,
+            'cost': 0.0,
+            'fee': None,
+            'attempts': 0,
+            'error': None,
+            'created_at': time.time(),
+            'updated_at': time.time()
+        }
+        self.orders[record['client_order_id']] = record
+        return record
+
+    async def _send(self, record: Dict, params: Optional[Dict]):
+        for attempt in range(self.max_retries + 1):
+            record['attempts'] = attempt + 1
+            try:
+                response = await self.adapter.create_order(
+                    record['symbol'], record['side'], record['type'], record['amount'],
+                    record['price'], record['client_order_id'], params
+                )
+                self._apply(record, response)
+                return
+            except OrderRejectedError as e:
+                record['status'] = STATUS_REJECTED
+                record['error'] = str(e)
+                logging.error(f"Ordre {record['client_order_id']} refusé: {e}")
+                return
+            except RetryableOrderError as e:
+                record['error'] = str(e)
+                logging.warning(f"Ordre {record['client_order_id']} ambigu (tentative {attempt + 1}): {e}")
+                # L'ordre a pu être accepté malgré l'erreur : vérifier avant de renvoyer
+                existing = await self._lookup(record)
+                if existing is not None:
+                    self._apply(record, existing)
+                    return
+                if attempt < self.max_retries:
+                    await asyncio.sleep(self.retry_delay * (2 ** attempt))
+
+        record['status'] = STATUS_FAILED
+        record['updated_at'] = time.time()
+
+    async def _lookup(self, record: Dict) -> Optional[Dict]:
+        try:
+            return await self.adapter.fetch_order(record['symbol'], record['client_order_id'])
+        except OrderNotFoundError:
+            return None
+        except OrderError as e:
+            logging.warning(f"Recherche ordre {record['client_order_id']} impossible: {e}")
+            return None
+
+    async def _reconcile(self, record: Dict):
+        """Interroge l'exchange jusqu'à l'exécution complète ou l'expiration du délai"""
+        deadline = time.time() + self.reconcile_timeout
+        while record['status'] not in TERMINAL_STATUSES and time.time() < deadline:
+            await asyncio.sleep(self.reconcile_interval)
+            if record['status'] in TERMINAL_STATUSES:
+                break  # Mis à jour entre-temps (flux utilisateur)
+            existing = await self._lookup(record)
+            if existing is not None:
+                self._apply(record, existing)
+
+    async def cancel_order(self, client_order_id: str) -> Optional[Dict]:
+        """Annule un ordre suivi puis réconcilie son état final"""
+        record = self.orders.get(client_order_id)
+        if record is None or record['status'] in TERMINAL_STATUSES:
+            return record
+        try:
+            self._apply(record, await self.adapter.cancel_order(record['symbol'], client_order_id))
+        except OrderNotFoundError:
+            existing = await self._lookup(record)
+            if existing is not None:
+                self._apply(record, existing)
+        return record
+
+    def _apply(self, record: Dict, order: Dict):
+        """Met à jour l'enregistrement depuis une réponse ccxt"""
+        previous_status = record['status']
+        record['exchange_order_id'] = order.get('id') or record['exchange_order_id']
+        filled = order.get('filled')
+        if filled is not None:
+            record['filled'] = float(filled)
+            record['remaining'] = max(0.0, float(record['amount']) - record['filled'])
+        if order.get('average'):
+            record['average'] = float(order['average'])
+        elif order.get('cost') and record['filled']:
+            record['average'] = float(order['cost']) / record['filled']
+        if order.get('cost') is not None:
+            record['cost'] = float(order['cost'])
+        if order.get('fee'):
+            record['fee'] = order['fee']
+
+        status = order.get('status')
+        if status == 'closed' or (record['filled'] and record['remaining'] <= 1e-12):
+            record['status'] = STATUS_FILLED
+        elif status in ('canceled', 'expired'):
+            record['status'] = STATUS_CANCELED
+        elif status == 'rejected':
+            record['status'] = STATUS_REJECTED
+        elif record['filled']:
+            record['status'] = STATUS_PARTIAL
+        else:
+            record['status'] = STATUS_OPEN
+        record['updated_at'] = time.time()
+
+        oco = self.oco_legs.get(record['client_order_id'])
+        if oco is not None:
+            self._update_oco(oco)
+        if record['status'] != previous_status:
+            self._notify(record)
+
+    def add_listener(self, callback: Callable[[Dict], None]):
+        """Abonnement aux changements de statut (exécutions, annulations)"""
+        self.listeners.append(callback)
+
+    def _notify(self, record: Dict):
+        for callback in self.listeners:
+            try:
+                callback(record)
+            except Exception as e:
+                logging.error(f"Erreur listener ordre {record['client_order_id']}: {e}")
+
+    # ------------------------------------------------------------------
+    # Flux utilisateur (executionReport)
+    # ------------------------------------------------------------------
+
+    def on_execution_report(self, report: Dict):
+        """executionReport Binance (flux utilisateur) - appelable depuis n'importe quel thread"""
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self._apply_execution_report, report)
+        else:
+            self._apply_execution_report(report)
+
+    def _apply_execution_report(self, report: Dict):
+        # Une annulation porte l'identifiant d'origine dans 'C'
+        client_order_id = report.get('C') or report.get('c')
+        record = self.orders.get(client_order_id)
+        if record is None:
+            return
+        status = {'NEW': 'open', 'PARTIALLY_FILLED': 'open', 'FILLED': 'closed',
+                  'CANCELED': 'canceled', 'EXPIRED': 'expired', 'REJECTED': 'rejected'}
+        filled = float(report.get('z') or 0)
+        cost = float(report.get('Z') or 0)
+        self._apply(record, {
+            'id': str(report.get('i')),
+            'status': status.get(report.get('X'), 'open'),
+            'filled': filled,
+            'cost': cost,
+            'average': cost / filled if filled else None
+        })
+
+    # ------------------------------------------------------------------
+    # OCO de sortie (take profit + stop loss côté exchange)
+    # ------------------------------------------------------------------
+
+    def _update_oco(self, oco: Dict):
+        """Statut de l'OCO déduit de ses deux jambes"""
+        legs = {name: self.orders.get(oco[f'{name}_client_id']) for name in ('limit', 'stop')}
+        for name, leg in legs.items():
+            if leg is not None and leg['status'] in (STATUS_FILLED, STATUS_PARTIAL):
+                oco['filled_leg'] = 'take_profit' if name == 'limit' else 'stop_loss'
+                oco['filled'] = leg['filled']
+                oco['average'] = leg['average']
+                if leg['status'] == STATUS_FILLED:
+                    oco['status'] = STATUS_FILLED
+                    return
+        if all(leg is not None and leg['status'] in (STATUS_CANCELED, STATUS_REJECTED) for leg in legs.values()):
+            oco['status'] = STATUS_CANCELED
+
+    async def place_exit_oco(self, symbol: str, amount: float, take_profit: float, stop_price: float,
+                             stop_limit_price: float, side: str = 'sell') -> Dict:
+        """Place l'OCO de sortie d'une position (jambe limite + jambe stop-limit)"""
+        async with self._lock_for(symbol):
+            return await self._place_oco(symbol, side, amount, take_profit, stop_price, stop_limit_price)
+
+    async def _place_oco(self, symbol, side, amount, take_profit, stop_price, stop_limit_price) -> Dict:
+        list_client_id = self.new_client_order_id()
+        oco = {
+            'list_client_id': list_client_id,
+            'limit_client_id': f"{list_client_id}-tp",
+            'stop_client_id': f"{list_client_id}-sl",
+            'symbol': symbol,
+            'side': side,
+            'amount': amount,
+            'take_profit': take_profit,
+            'stop_price': stop_price,
+            'stop_limit_price': stop_limit_price,
+            'status': STATUS_PENDING,
+            'filled_leg': None,
+            'filled': 0.0,
+            'average': None,
+            'error': None
+        }
+        for name, order_type, price in (('limit', 'limit_maker', take_profit),
+                                        ('stop', 'stop_loss_limit', stop_limit_price)):
+            record = self._new_record(symbol, side, order_type, amount, price, oco[f'{name}_client_id'])
+            self.oco_legs[record['client_order_id']] = oco
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                legs = await self.adapter.create_oco(symbol, side, amount, take_profit, stop_price, stop_limit_price,
+                                                     list_client_id, oco['limit_client_id'], oco['stop_client_id'])
+                oco['status'] = STATUS_OPEN
+                self._apply_legs(legs)
+                return oco
+            except OrderRejectedError as e:
+                oco['status'] = STATUS_REJECTED
+                oco['error'] = str(e)
+                logging.error(f"OCO {list_client_id} refusée: {e}")
+                return oco
+            except RetryableOrderError as e:
+                oco['error'] = str(e)
+                # La jambe limite existe-t-elle déjà ? (OCO acceptée malgré l'erreur)
+                existing = await self._lookup(self.orders[oco['limit_client_id']])
+                if existing is not None:
+                    oco['status'] = STATUS_OPEN
+                    self._apply(self.orders[oco['limit_client_id']], existing)
+                    return oco
+                if attempt < self.max_retries:
+                    await asyncio.sleep(self.retry_delay * (2 ** attempt))
+        oco['status'] = STATUS_FAILED
+        return oco
+
+    def _apply_legs(self, legs: List[Dict]):
+        for leg in legs:
+            record = self.orders.get(leg.get('clientOrderId'))
+            if record is not None:
+                self._apply(record, leg)
+
+    async def cancel_exit_oco(self, oco: Dict) -> Dict:
+        """Annule l'OCO (sortie client ou remplacement) puis réconcilie ses jambes"""
+        async with self._lock_for(oco['symbol']):
+            await self._cancel_oco(oco)
+            return oco
+
+    async def _cancel_oco(self, oco: Dict):
+        if oco['status'] in TERMINAL_STATUSES:
+            return
+        try:
+            self._apply_legs(await self.adapter.cancel_order_list(oco['symbol'], oco['list_client_id']))
+        except (OrderNotFoundError, OrderRejectedError):
+            # Déjà exécutée ou annulée : état réel depuis l'exchange
+            await self._refresh_oco(oco)
+        if oco['status'] == STATUS_OPEN:
+            oco['status'] = STATUS_CANCELED
+
+    async def _refresh_oco(self, oco: Dict):
+        for name in ('limit', 'stop'):
+            record = self.orders[oco[f'{name}_client_id']]
+            existing = await self._lookup(record)
+            if existing is not None:
+                self._apply(record, existing)
+
+    async def refresh_exit_oco(self, oco: Dict) -> Dict:
+        """Réconciliation par interrogation (repli si le flux utilisateur est absent)"""
+        if oco['status'] not in TERMINAL_STATUSES:
+            await self._refresh_oco(oco)
+        return oco
+
+    async def amend_exit_oco(self, oco: Dict, take_profit: Optional[float] = None,
+                             stop_price: Optional[float] = None,
+                             stop_limit_price: Optional[float] = None) -> Dict:
+        """Déplace les niveaux d'une OCO (annulation + remplacement, Binance ne modifie pas les OCO)
+
+        Retourne la nouvelle OCO, ou l'ancienne si elle a été exécutée entre-temps.
+        """
+        async with self._lock_for(oco['symbol']):
+            await self._cancel_oco(oco)
+            if oco['status'] != STATUS_CANCELED:
+                return oco
+            remaining = oco['amount'] - (oco['filled'] or 0.0)
+            return await self._place_oco(
+                oco['symbol'], oco['side'], remaining,
+                take_profit if take_profit is not None else oco['take_profit'],
+                stop_price if stop_price is not None else oco['stop_price'],
+                stop_limit_price if stop_limit_price is not None else oco['stop_limit_price']
+            )
+
+    def get_order(self, client_order_id: str) -> Optional[Dict]:
+        return self.orders.get(client_order_id)
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Tests du routeur d'ordres contre un exchange local simulé
+Relances idempotentes, réconciliation et verrou par symbole
+"""
+
+import asyncio
+import unittest
+
+from order_router import (OrderRouter, ExchangeAdapter, CcxtExchangeAdapter, RetryableOrderError, OrderRejectedError,
+                          OrderNotFoundError, STATUS_FILLED, STATUS_REJECTED, STATUS_FAILED,
+                          STATUS_OPEN, STATUS_CANCELED)
+
+
+class FakeExchange(ExchangeAdapter):
+    """Exchange en mémoire : les ordres au marché s'exécutent après `fill_after` consultations"""
+
+    def __init__(self, timeout_after_accept=0, timeout_before_accept=0, reject=False, fill_after=0):
+        self.orders = {}
+        self.create_calls = 0
+        self.timeout_after_accept = timeout_after_accept
+        self.timeout_before_accept = timeout_before_accept
+        self.reject = reject
+        self.fill_after = fill_after
+        self.active = 0
+        self.max_active = 0
+
+    def _view(self, order):
+        done = order['checks'] >= self.fill_after
+        return {
+            'id': order['id'],
+            'clientOrderId': order['client_order_id'],
+            'status': 'closed' if done else 'open',
+            'filled': order['amount'] if done else 0.0,
+            'average': 100.0 if done else None,
+            'cost': order['amount'] * 100.0 if done else 0.0
+        }
+
+    async def create_order(self, symbol, side, order_type, amount, price=None, client_order_id=None, params=None):
+        self.create_calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            if self.reject:
+                raise OrderRejectedError("Account has insufficient balance")
+            if self.timeout_before_accept:
+                self.timeout_before_accept -= 1
+                raise RetryableOrderError("Request timeout")
+            if client_order_id in self.orders:
+                raise OrderRejectedError("Duplicate order sent")
+            order = {'id': str(len(self.orders) + 1), 'client_order_id': client_order_id,
+                     'amount': amount, 'checks': 0}
+            self.orders[client_order_id] = order
+            if self.timeout_after_accept:
+                self.timeout_after_accept -= 1
+                raise RetryableOrderError("Request timeout")
+            return self._view(order)
+        finally:
+            self.active -= 1
+
+    async def fetch_order(self, symbol, client_order_id):
+        order = self.orders.get(client_order_id)
+        if order is None:
+            raise OrderNotFoundError("Order does not exist")
+        order['checks'] += 1
+        return self._view(order)
+
+    async def cancel_order(self, symbol, client_order_id):
+        raise OrderNotFoundError("Order does not exist")
+
+    async def create_oco(self, symbol, side, amount, price, stop_price, stop_limit_price,
+                         list_client_id, limit_client_id, stop_client_id):
+        self.create_calls += 1
+        legs = []
+        for client_order_id in (limit_client_id, stop_client_id):
+            # Jambes en attente : jamais exécutées par consultation
+            self.orders[client_order_id] = {'id': client_order_id, 'client_order_id': client_order_id,
+                                            'amount': amount, 'checks': -10 ** 6, 'list': list_client_id}
+            legs.append(self._view(self.orders[client_order_id]))
+        return legs
+
+    async def cancel_order_list(self, symbol, list_client_id):
+        legs = [o for o in self.orders.values() if o.get('list') == list_client_id]
+        if not legs or any(o.get('filled_by_report') for o in legs):
+            raise OrderRejectedError("Unknown order list")
+        return [{**self._view(o), 'status': 'canceled'} for o in legs]
+
+
+class PrecisionRejectingCcxt:
+    """Client ccxt dont l'arrondi aux filtres refuse la quantité"""
+
+    def __init__(self):
+        self.create_calls = 0
+
+    def amount_to_precision(self, symbol, amount):
+        import ccxt
+        raise ccxt.InvalidOrder(f"{symbol} amount of 0.0000001 must be greater than minimum amount precision")
+
+    def create_order(self, *args):
+        self.create_calls += 1
+
+
+def make_router(exchange):
+    return OrderRouter(exchange, max_retries=2, retry_delay=0, reconcile_interval=0, reconcile_timeout=1)
+
+
+class TestOrderRouter(unittest.TestCase):
+
+    def test_market_order_filled(self):
+        exchange = FakeExchange()
+        order = asyncio.run(make_router(exchange).place_order('BTC/USDT', 'buy', 0.5))
+        self.assertEqual(order['status'], STATUS_FILLED)
+        self.assertEqual(order['average'], 100.0)
+        self.assertEqual(exchange.create_calls, 1)
+
+    def test_timeout_after_accept_is_not_resent(self):
+        exchange = FakeExchange(timeout_after_accept=1)
+        order = asyncio.run(make_router(exchange).place_order('BTC/USDT', 'buy', 0.5))
+        self.assertEqual(order['status'], STATUS_FILLED)
+        self.assertEqual(len(exchange.orders), 1)
+        self.assertEqual(exchange.create_calls, 1)
+
+    def test_timeout_before_accept_is_retried(self):
+        exchange = FakeExchange(timeout_before_accept=2)
+        order = asyncio.run(make_router(exchange).place_order('BTC/USDT', 'buy', 0.5))
+        self.assertEqual(order['status'], STATUS_FILLED)
+        self.assertEqual(order['attempts'], 3)
+        self.assertEqual(len(exchange.orders), 1)
+
+    def test_retries_exhausted(self):
+        exchange = FakeExchange(timeout_before_accept=10)
+        order = asyncio.run(make_router(exchange).place_order('BTC/USDT', 'buy', 0.5))
+        self.assertEqual(order['status'], STATUS_FAILED)
+        self.assertEqual(exchange.create_calls, 3)
+
+    def test_rejection_is_final(self):
+        exchange = FakeExchange(reject=True)
+        order = asyncio.run(make_router(exchange).place_order('BTC/USDT', 'buy', 0.5))
+        self.assertEqual(order['status'], STATUS_REJECTED)
+        self.assertEqual(exchange.create_calls, 1)
+
+    def test_reconciles_until_filled(self):
+        exchange = FakeExchange(fill_after=3)
+        order = asyncio.run(make_router(exchange).place_order('BTC/USDT', 'buy', 0.5))
+        self.assertEqual(order['status'], STATUS_FILLED)
+        self.assertEqual(exchange.orders[order['client_order_id']]['checks'], 3)
+
+    def test_same_client_id_is_idempotent(self):
+        exchange = FakeExchange()
+        router = make_router(exchange)
+
+        async def scenario():
+            first = await router.place_order('BTC/USDT', 'buy', 0.5, client_order_id='scb-test-1')
+            second = await router.place_order('BTC/USDT', 'buy', 0.5, client_order_id='scb-test-1')
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        self.assertIs(first, second)
+        self.assertEqual(exchange.create_calls, 1)
+
+    def test_per_symbol_lock_serializes_orders(self):
+        exchange = FakeExchange()
+        router = make_router(exchange)
+
+        async def scenario():
+            await asyncio.gather(*[router.place_order('BTC/USDT', 'buy', 0.1) for _ in range(3)])
+
+        asyncio.run(scenario())
+        self.assertEqual(exchange.max_active, 1)
+        self.assertEqual(exchange.create_calls, 3)
+
+    def test_exit_oco_filled_by_execution_report(self):
+        exchange = FakeExchange()
+        router = make_router(exchange)
+        updates = []
+        router.add_listener(updates.append)
+
+        async def scenario():
+            oco = await router.place_exit_oco('BTC/USDT', 0.5, 110.0, 95.0, 94.9)
+            router.on_execution_report({'e': 'executionReport', 'c': oco['stop_client_id'], 'X': 'FILLED',
+                                        'i': 7, 'z': '0.5', 'Z': '47.5'})
+            return oco
+
+        oco = asyncio.run(scenario())
+        self.assertEqual(oco['status'], STATUS_FILLED)
+        self.assertEqual(oco['filled_leg'], 'stop_loss')
+        self.assertAlmostEqual(oco['average'], 95.0)
+        self.assertEqual(updates[-1]['client_order_id'], oco['stop_client_id'])
+
+    def test_amend_exit_oco_replaces_levels(self):
+        exchange = FakeExchange()
+        router = make_router(exchange)
+
+        async def scenario():
+            oco = await router.place_exit_oco('BTC/USDT', 0.5, 110.0, 95.0, 94.9)
+            new_oco = await router.amend_exit_oco(oco, stop_price=101.0, stop_limit_price=100.9)
+            return oco, new_oco
+
+        oco, new_oco = asyncio.run(scenario())
+        self.assertEqual(oco['status'], STATUS_CANCELED)
+        self.assertEqual(new_oco['status'], STATUS_OPEN)
+        self.assertEqual((new_oco['take_profit'], new_oco['stop_price']), (110.0, 101.0))
+        self.assertNotEqual(new_oco['list_client_id'], oco['list_client_id'])
+
+    def test_amend_after_fill_keeps_filled_oco(self):
+        exchange = FakeExchange()
+        router = make_router(exchange)
+
+        async def scenario():
+            oco = await router.place_exit_oco('BTC/USDT', 0.5, 110.0, 95.0, 94.9)
+            leg = exchange.orders[oco['limit_client_id']]
+            leg['checks'], leg['filled_by_report'] = 0, True  # Exécutée côté exchange
+            return oco, await router.amend_exit_oco(oco, take_profit=120.0)
+
+        oco, result = asyncio.run(scenario())
+        self.assertIs(result, oco)
+        self.assertEqual(oco['status'], STATUS_FILLED)
+        self.assertEqual(oco['filled_leg'], 'take_profit')
+
+    def test_incomplete_adapter_fails_at_creation(self):
+        class PartialAdapter(ExchangeAdapter):
+            async def create_order(self, symbol, side, order_type, amount, price=None,
+                                   client_order_id=None, params=None):
+                return {}
+
+        with self.assertRaises(TypeError):
+            PartialAdapter()
+
+    def test_precision_error_is_a_rejection(self):
+        client = PrecisionRejectingCcxt()
+        router = make_router(CcxtExchangeAdapter(client))
+        order = asyncio.run(router.place_order('BTC/USDT', 'sell', 1e-7))
+        self.assertEqual(order['status'], STATUS_REJECTED)
+        self.assertIn('precision', order['error'])
+        self.assertEqual(client.create_calls, 0)
+
+    def test_sync_wrapper_runs_on_router_loop(self):
+        router = make_router(FakeExchange())
+        try:
+            order = router.place_order_sync('ETH/USDT', 'sell', 1.0, timeout=5)
+            self.assertEqual(order['status'], STATUS_FILLED)
+        finally:
+            router.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agrégats de Portefeuille Incrémentaux - Totaux tenus à jour à chaque événement
+Notionnel investi, P&L réalisé, frais, trades gagnants et P&L latent par symbole
+mis à jour à l'ouverture, à la fermeture et à chaque tick ; lecture en O(1)
+"""
+
+import threading
+from typing import Dict, Iterable
+
+
+def _position_key(position: Dict):
+    return position.get('order_id') or id(position)
+
+
+class PortfolioLedger:
+    """Totaux courants du portefeuille, sans reparcourir positions ni historique"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.positions = {}  # clé -> [symbol, prix d'entrée, quantité, valeur, P&L latent]
+        self.by_symbol = {}  # symbol -> clés des positions ouvertes
+        self.unrealized_by_symbol = {}  # symbol -> P&L latent
+        self.invested = 0.0
+        self.unrealized_pnl = 0.0
+        self.realized_pnl = 0.0
+        self.fees = 0.0
+        self.winning_trades = 0
+        self.closed_count = 0
+
+    def rebuild(self, open_positions: Iterable[Dict], realized_pnl: float = 0.0, fees: float = 0.0,
+                winning_trades: int = 0, closed_count: int = 0):
+        """Recalcul complet (chargement du portefeuille, reset) ; ensuite tout est incrémental
+
+        Les compteurs réalisés viennent de l'état sauvegardé : l'historique persistant
+        est tronqué et ne permet pas de les recalculer.
+        """
+        with self.lock:
+            self.positions.clear()
+            self.by_symbol.clear()
+            self.unrealized_by_symbol.clear()
+            self.invested = 0.0
+            self.unrealized_pnl = 0.0
+            self.realized_pnl = realized_pnl
+            self.fees = fees
+            self.winning_trades = winning_trades
+            self.closed_count = closed_count
+        for position in open_positions:
+            if position.get('status') == 'open':
+                self.open_position(position)
+
+    def add_fees(self, amount: float):
+        with self.lock:
+            self.fees += amount
+
+    def open_position(self, position: Dict):
+        """Nouvelle position ouverte (valeur au prix d'achat)"""
+        symbol = position['symbol']
+        entry_price = position['price']
+        quantity = position['quantity']
+        value = position.get('value_usdt', 0.0)
+        unrealized = (position.get('current_price', entry_price) - entry_price) * quantity
+        key = _position_key(position)
+        with self.lock:
+            if key in self.positions:
+                return
+            self.positions[key] = [symbol, entry_price, quantity, value, unrealized]
+            self.by_symbol.setdefault(symbol, set()).add(key)
+            self.invested += value
+            self._add_unrealized(symbol, unrealized)
+
+    def resize_position(self, position: Dict):
+        """Position partiellement vendue : quantité et valeur ouvertes ramenées au reliquat"""
+        with self.lock:
+            entry = self.positions.get(_position_key(position))
+            if entry is None:
+                return
+            value = position.get('value_usdt', 0.0)
+            unrealized = entry[4] * position['quantity'] / entry[2] if entry[2] else 0.0
+            self.invested += value - entry[3]
+            self._add_unrealized(entry[0], unrealized - entry[4])
+            entry[2] = position['quantity']
+            entry[3] = value
+            entry[4] = unrealized
+
+    def mark_price(self, symbol: str, price: float):
+        """Tick : P&L latent des positions du symbole ajusté par différence"""
+        with self.lock:
+            keys = self.by_symbol.get(symbol)
+            if not keys or not price:
+                return
+            for key in keys:
+                entry = self.positions[key]
+                unrealized = (price - entry[1]) * entry[2]
+                self._add_unrealized(symbol, unrealized - entry[4])
+                entry[4] = unrealized
+
+    def close_position(self, position: Dict, net_pnl: float):
+        """Position fermée : retirée des totaux ouverts, P&L net ajouté au réalisé"""
+        with self.lock:
+            entry = self.positions.pop(_position_key(position), None)
+            if entry is not None:
+                symbol = entry[0]
+                self.invested -= entry[3]
+                self._add_unrealized(symbol, -entry[4])
+                keys = self.by_symbol.get(symbol)
+                keys.discard(_position_key(position))
+                if not keys:
+                    del self.by_symbol[symbol]
+                    self.unrealized_by_symbol.pop(symbol, None)
+            self._record_close(net_pnl)
+
+    def _record_close(self, net_pnl: float):
+        self.realized_pnl += net_pnl
+        self.closed_count += 1
+        if net_pnl > 0:
+            self.winning_trades += 1
+
+    def _add_unrealized(self, symbol: str, delta: float):
+        self.unrealized_pnl += delta
+        self.unrealized_by_symbol[symbol] = self.unrealized_by_symbol.get(symbol, 0.0) + delta
+
+    def snapshot(self, cash: float = 0.0) -> Dict:
+        """Vue instantanée des totaux (aucun parcours de positions ni d'historique)"""
+        with self.lock:
+            total_pnl = self.realized_pnl + self.unrealized_pnl
+            return {
+                'cash': cash,
+                'invested': self.invested,
+                'total_value': cash + self.invested,
+                'realized_pnl': self.realized_pnl,
+                'unrealized_pnl': self.unrealized_pnl,
+                'total_pnl': total_pnl,
+                'fees': self.fees,
+                'open_positions': len(self.positions),
+                'closed_trades': self.closed_count,
+                'winning_trades': self.winning_trades,
+                'win_rate': self.winning_trades / self.closed_count * 100 if self.closed_count else 0.0
+            }
+
+    def get_unrealized_by_symbol(self) -> Dict[str, float]:
+        with self.lock:
+            return dict(self.unrealized_by_symbol)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests des agrégats de portefeuille incrémentaux
+Comparaison avec un recalcul complet après ouvertures, ticks et fermetures
+"""
+
+import unittest
+
+from portfolio_ledger import PortfolioLedger
+
+
+def make_position(symbol, price, quantity, order_id):
+    return {'symbol': symbol, 'price': price, 'quantity': quantity, 'value_usdt': price * quantity,
+            'status': 'open', 'order_id': order_id}
+
+
+def recompute(positions, closed_pnls):
+    """Ancien calcul complet de on_balance_update"""
+    open_positions = [p for p in positions if p['status'] == 'open']
+    invested = sum(p['value_usdt'] for p in open_positions)
+    unrealized = sum((p.get('current_price', p['price']) - p['price']) * p['quantity'] for p in open_positions)
+    return invested, sum(closed_pnls), unrealized
+
+
+class TestPortfolioLedger(unittest.TestCase):
+
+    def setUp(self):
+        self.ledger = PortfolioLedger()
+
+    def test_matches_full_recomputation(self):
+        positions = [
+            make_position('BTC/USDT', 50000.0, 0.002, 'a'),
+            make_position('ETH/USDT', 3000.0, 0.05, 'b'),
+            make_position('ETH/USDT', 3100.0, 0.03, 'c'),
+        ]
+        for position in positions:
+            self.ledger.open_position(position)
+
+        for symbol, price in [('BTC/USDT', 50500.0), ('ETH/USDT', 2950.0), ('ETH/USDT', 3050.0)]:
+            for position in positions:
+                if position['symbol'] == symbol:
+                    position['current_price'] = price
+            self.ledger.mark_price(symbol, price)
+
+        positions[1]['status'] = 'closed'
+        self.ledger.close_position(positions[1], 2.4)
+        self.ledger.close_position({'order_id': 'ancien'}, -1.0)
+
+        invested, realized, unrealized = recompute(positions, [2.4, -1.0])
+        snapshot = self.ledger.snapshot(cash=900.0)
+        self.assertAlmostEqual(snapshot['invested'], invested)
+        self.assertAlmostEqual(snapshot['realized_pnl'], realized)
+        self.assertAlmostEqual(snapshot['unrealized_pnl'], unrealized)
+        self.assertAlmostEqual(snapshot['total_pnl'], realized + unrealized)
+        self.assertAlmostEqual(snapshot['total_value'], 900.0 + invested)
+        self.assertEqual(snapshot['open_positions'], 2)
+        self.assertEqual(snapshot['closed_trades'], 2)
+        self.assertEqual(snapshot['winning_trades'], 1)
+        self.assertEqual(snapshot['win_rate'], 50.0)
+
+    def test_unrealized_by_symbol_dropped_on_last_close(self):
+        position = make_position('SOL/USDT', 100.0, 1.0, 'sol')
+        self.ledger.open_position(position)
+        self.ledger.mark_price('SOL/USDT', 103.0)
+        self.assertAlmostEqual(self.ledger.get_unrealized_by_symbol()['SOL/USDT'], 3.0)
+
+        self.ledger.close_position(position, 2.8)
+        self.assertEqual(self.ledger.get_unrealized_by_symbol(), {})
+        self.assertAlmostEqual(self.ledger.snapshot()['unrealized_pnl'], 0.0)
+
+    def test_rebuild_restores_saved_counters(self):
+        open_position = make_position('BTC/USDT', 50000.0, 0.001, 'x')
+        open_position['current_price'] = 51000.0
+        closed_position = dict(make_position('ETH/USDT', 3000.0, 0.01, 'y'), status='closed')
+        self.ledger.open_position(make_position('DOGE/USDT', 0.1, 100.0, 'z'))
+
+        self.ledger.rebuild([open_position, closed_position], realized_pnl=12.5, fees=0.8,
+                            winning_trades=3, closed_count=5)
+
+        snapshot = self.ledger.snapshot()
+        self.assertEqual(snapshot['open_positions'], 1)
+        self.assertAlmostEqual(snapshot['invested'], 50.0)
+        self.assertAlmostEqual(snapshot['unrealized_pnl'], 1.0)
+        self.assertAlmostEqual(snapshot['realized_pnl'], 12.5)
+        self.assertAlmostEqual(snapshot['fees'], 0.8)
+        self.assertEqual(snapshot['win_rate'], 60.0)
+
+    def test_duplicate_open_is_ignored(self):
+        position = make_position('BTC/USDT', 50000.0, 0.001, 'dup')
+        self.ledger.open_position(position)
+        self.ledger.open_position(position)
+        self.assertAlmostEqual(self.ledger.snapshot()['invested'], 50.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Carnet de Positions Thread-Safe - Un verrou par symbole, un verrou de compte
+Scan, surveillance des positions, WebSocket, sauvegarde et interface partagent
+les positions ouvertes sans corrompre la liste ni la balance
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+
+class PositionBook:
+    """Positions du bot (dict partagés) protégées par des verrous à grain fin
+
+    - liste des positions : verrou court, les lectures reçoivent un instantané
+    - ouverture / fermeture : verrou du symbole (une seule position ouverte par
+      symbole, une seule clôture par position) ; deux symboles n'attendent pas
+    - balance, frais, P&L : `transaction()` rend les mises à jour du compte atomiques
+    """
+
+    def __init__(self, positions: Optional[Iterable[Dict]] = None):
+        self._lock = threading.Lock()
+        self._positions: List[Dict] = list(positions or [])
+        self._symbol_locks: Dict[str, threading.RLock] = {}
+        self._account_lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def symbol_lock(self, symbol: str) -> threading.RLock:
+        """Verrou réentrant du symbole (créé à la première demande)"""
+        with self._lock:
+            lock = self._symbol_locks.get(symbol)
+            if lock is None:
+                lock = self._symbol_locks[symbol] = threading.RLock()
+            return lock
+
+    @contextmanager
+    def transaction(self):
+        """Mise à jour atomique du compte (balance, frais, compteurs, historique)"""
+        with self._account_lock:
+            yield
+
+    def snapshot(self) -> List[Dict]:
+        """Copie de la liste : itérable sans verrou pendant que les autres threads ajoutent"""
+        with self._lock:
+            return list(self._positions)
+
+    def replace(self, positions: Iterable[Dict]):
+        """Remplace toutes les positions (chargement, reset)"""
+        positions = list(positions)
+        with self._lock:
+            self._positions = positions
+
+    def add(self, position: Dict):
+        with self._lock:
+            self._positions.append(position)
+
+    def find_open(self, symbol: str) -> Optional[Dict]:
+        for position in self.snapshot():
+            if position['symbol'] == symbol and position['status'] == 'open':
+                return position
+        return None
+
+    def open_count(self) -> int:
+        return sum(1 for position in self.snapshot() if position['status'] == 'open')
+
+    def begin_close(self, position: Dict) -> bool:
+        """Réserve la clôture : False si la position est déjà fermée ou en cours de fermeture"""
+        with self.symbol_lock(position['symbol']):
+            if position['status'] != 'open' or position.get('closing'):
+                return False
+            position['closing'] = True
+            return True
+
+    def abort_close(self, position: Dict):
+        """Clôture échouée (vente refusée) : la position redevient ouverte"""
+        with self.symbol_lock(position['symbol']):
+            position['status'] = 'open'
+            position['closing'] = False
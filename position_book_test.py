@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests du carnet de positions
+Verrous par symbole, clôture unique et transactions de compte sous concurrence
+"""
+
+import threading
+import unittest
+
+from position_book import PositionBook
+
+
+def make_position(symbol, status='open'):
+    return {'symbol': symbol, 'status': status}
+
+
+def run_threads(target, count, *args):
+    threads = [threading.Thread(target=target, args=(n,) + args) for n in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class TestPositionBook(unittest.TestCase):
+
+    def setUp(self):
+        self.book = PositionBook()
+
+    def test_one_open_position_per_symbol(self):
+        opened = []
+
+        def open_once(n):
+            symbol = f"S{n % 4}/USDT"
+            with self.book.symbol_lock(symbol):
+                if self.book.find_open(symbol) is None:
+                    self.book.add(make_position(symbol))
+                    opened.append(symbol)
+
+        run_threads(open_once, 40)
+        self.assertEqual(sorted(opened), [f"S{i}/USDT" for i in range(4)])
+        self.assertEqual(self.book.open_count(), 4)
+
+    def test_position_closed_once(self):
+        position = make_position('BTC/USDT')
+        self.book.add(position)
+        winners = []
+
+        run_threads(lambda n: winners.append(n) if self.book.begin_close(position) else None, 16)
+        self.assertEqual(len(winners), 1)
+
+        self.book.abort_close(position)
+        self.assertTrue(self.book.begin_close(position))
+        position['status'] = 'closed'
+        self.assertFalse(self.book.begin_close(position))
+
+    def test_transaction_keeps_account_consistent(self):
+        account = {'balance': 1000.0, 'fees': 0.0}
+
+        def trade(n):
+            for _ in range(500):
+                with self.book.transaction():
+                    account['balance'] -= 10.0
+                    account['fees'] += 0.01
+                    account['balance'] += 10.0
+
+        run_threads(trade, 8)
+        self.assertEqual(account['balance'], 1000.0)
+        self.assertAlmostEqual(account['fees'], 40.0)
+
+    def test_snapshot_is_stable_while_adding(self):
+        self.book.replace(make_position(f"S{i}/USDT") for i in range(100))
+        snapshot = self.book.snapshot()
+        self.book.add(make_position('NEW/USDT'))
+
+        self.assertEqual(len(snapshot), 100)
+        self.assertEqual(len(self.book), 101)
+        self.assertIs(self.book.find_open('NEW/USDT'), self.book.snapshot()[-1])
+
+    def test_open_count_ignores_closed(self):
+        self.book.replace([make_position('A/USDT'), make_position('B/USDT', 'closed')])
+        self.assertEqual(self.book.open_count(), 1)
+        self.assertIsNone(self.book.find_open('B/USDT'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Limiteur REST Partagé - Poids des endpoints Binance
+Seau à jetons pondéré commun au scanner, au fallback, aux moniteurs et aux ordres,
+priorité aux ordres et adaptation via l'en-tête X-MBX-USED-WEIGHT
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+PRIORITY_ORDER = 'order'
+PRIORITY_MARKET_DATA = 'market_data'
+
+
+def _ticker_weight(exchange, args, kwargs) -> int:
+    return 2
+
+
+def _tickers_weight(exchange, args, kwargs) -> int:
+    symbols = args[0] if args else kwargs.get('symbols')
+    if not symbols:
+        return 80
+    if len(symbols) <= 20:
+        return 2
+    return 40 if len(symbols) <= 100 else 80
+
+
+def _order_book_weight(exchange, args, kwargs) -> int:
+    limit = args[1] if len(args) > 1 else kwargs.get('limit')
+    limit = limit or 100
+    if limit <= 100:
+        return 5
+    if limit <= 500:
+        return 25
+    return 50 if limit <= 1000 else 250
+
+
+def _open_orders_weight(exchange, args, kwargs) -> int:
+    symbol = args[0] if args else kwargs.get('symbol')
+    return 6 if symbol else 80
+
+
+def _markets_weight(exchange, args, kwargs) -> int:
+    reload = args[0] if args else kwargs.get('reload', False)
+    # ccxt renvoie les marchés déjà chargés sans requête
+    return 0 if getattr(exchange, 'markets', None) and not reload else 20
+
+
+# Poids Binance Spot par méthode ccxt (entier ou fonction (exchange, args, kwargs) -> poids)
+ENDPOINT_WEIGHTS: Dict[str, object] = {
+    'fetch_ticker': _ticker_weight,
+    'fetch_tickers': _tickers_weight,
+    'fetch_ohlcv': 2,
+    'fetch_order_book': _order_book_weight,
+    'fetch_trades': 25,
+    'fetch_balance': 20,
+    'fetch_open_orders': _open_orders_weight,
+    'fetch_time': 1,
+    'load_markets': _markets_weight,
+    'create_order': 1,
+    'cancel_order': 1,
+    'fetch_order': 4,
+    'privatePostOrderOco': 1,
+    'privateDeleteOrderList': 1,
+    'publicPostUserDataStream': 2,
+    'publicPutUserDataStream': 2,
+    'publicDeleteUserDataStream': 2,
+}
+
+# Méthodes servies en priorité sur la part réservée du seau
+ORDER_METHODS = {
+    'create_order', 'cancel_order', 'fetch_order',
+    'privatePostOrderOco', 'privateDeleteOrderList'
+}
+
+
+class WeightRateLimiter:
+    """Seau à jetons en poids/minute, avec une réserve accessible aux seuls ordres"""
+
+    def __init__(self, max_weight_per_minute: int = 6000, order_reserve_percent: float = 20,
+                 safety_margin_percent: float = 10):
+        self.weight_limit = max_weight_per_minute
+        self.capacity = max_weight_per_minute * (1 - safety_margin_percent / 100)
+        self.refill_rate = self.capacity / 60  # poids par seconde
+        self.reserve = self.capacity * order_reserve_percent / 100
+        self.tokens = self.capacity
+        self.last_refill = time.time()
+        self.paused_until = 0.0
+        self.pending_orders = 0
+        self.condition = threading.Condition()
+
+        self.server_used_weight = None
+        self.server_weight_time = None
+        self.metrics = {
+            'requests': 0,
+            'order_requests': 0,
+            'weight_consumed': 0,
+            'throttled': 0,
+            'wait_seconds': 0.0,
+            'rate_limit_hits': 0
+        }
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_rate)
+        self.last_refill = now
+
+    def acquire(self, weight: float, priority: str = PRIORITY_MARKET_DATA) -> float:
+        """Bloque jusqu'à disponibilité du poids, retourne l'attente en secondes
+
+        Les données de marché ne descendent pas sous la réserve et cèdent la place
+        tant qu'un ordre attend.
+        """
+        is_order = priority == PRIORITY_ORDER
+        floor = 0.0 if is_order else self.reserve
+        weight = min(weight, self.capacity - floor)
+        start = time.time()
+
+        with self.condition:
+            if is_order:
+                self.pending_orders += 1
+            try:
+                while True:
+                    now = time.time()
+                    self._refill(now)
+                    if now < self.paused_until:
+                        delay = self.paused_until - now
+                    elif not is_order and self.pending_orders > 0:
+                        delay = 0.05
+                    elif self.tokens - weight >= floor:
+                        self.tokens -= weight
+                        break
+                    else:
+                        delay = (floor + weight - self.tokens) / self.refill_rate
+                    self.condition.wait(timeout=max(delay, 0.01))
+            finally:
+                if is_order:
+                    self.pending_orders -= 1
+                self.condition.notify_all()
+
+            waited = time.time() - start
+            self.metrics['requests'] += 1
+            self.metrics['weight_consumed'] += weight
+            if is_order:
+                self.metrics['order_requests'] += 1
+            if waited > 0.01:
+                self.metrics['throttled'] += 1
+                self.metrics['wait_seconds'] += waited
+        return waited
+
+    def update_from_headers(self, headers: Optional[Dict]):
+        """Aligne le seau sur le poids consommé annoncé par Binance (X-MBX-USED-WEIGHT-1M)"""
+        if not headers:
+            return
+        used = None
+        for key, value in headers.items():
+            name = key.lower()
+            if name == 'x-mbx-used-weight-1m' or (name == 'x-mbx-used-weight' and used is None):
+                try:
+                    used = int(value)
+                except (TypeError, ValueError):
+                    pass
+        if used is None:
+            return
+        with self.condition:
+            self.server_used_weight = used
+            self.server_weight_time = time.time()
+            self._refill(self.server_weight_time)
+            # Adaptation à la baisse seulement : d'autres clients peuvent partager l'IP
+            self.tokens = min(self.tokens, max(0.0, self.capacity - used))
+
+    def backoff(self, seconds: float):
+        """Suspend toutes les requêtes (HTTP 429/418, Retry-After)"""
+        with self.condition:
+            self.paused_until = max(self.paused_until, time.time() + seconds)
+            self.metrics['rate_limit_hits'] += 1
+            self.condition.notify_all()
+
+    def get_used_weight(self) -> float:
+        """Poids consommé sur la minute glissante (estimation locale ou valeur serveur récente)"""
+        with self.condition:
+            self._refill(time.time())
+            estimated = self.capacity - self.tokens
+            if self.server_used_weight is not None and time.time() - self.server_weight_time < 5:
+                return max(estimated, self.server_used_weight)
+            return estimated
+
+    def get_metrics(self) -> Dict:
+        used = self.get_used_weight()
+        return dict(self.metrics,
+                    used_weight=round(used),
+                    server_used_weight=self.server_used_weight,
+                    weight_limit=self.weight_limit,
+                    usage_percent=used / self.weight_limit * 100,
+                    paused=time.time() < self.paused_until)
+
+
+class RateLimitedExchange:
+    """Proxy d'une instance ccxt : chaque appel REST connu passe par le limiteur partagé"""
+
+    def __init__(self, exchange, limiter: WeightRateLimiter, default_backoff_seconds: float = 10):
+        self._exchange = exchange
+        self._limiter = limiter
+        self._default_backoff = default_backoff_seconds
+
+    @property
+    def wrapped(self):
+        return self._exchange
+
+    def __getattr__(self, name):
+        attribute = getattr(self._exchange, name)
+        if name not in ENDPOINT_WEIGHTS or not callable(attribute):
+            return attribute
+        return self._wrap(name, attribute)
+
+    def __setattr__(self, name, value):
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._exchange, name, value)
+
+    def _wrap(self, name: str, method: Callable) -> Callable:
+        weight = ENDPOINT_WEIGHTS[name]
+        priority = PRIORITY_ORDER if name in ORDER_METHODS else PRIORITY_MARKET_DATA
+
+        def call(*args, **kwargs):
+            cost = weight(self._exchange, args, kwargs) if callable(weight) else weight
+            if cost:
+                self._limiter.acquire(cost, priority)
+            try:
+                return method(*args, **kwargs)
+            except Exception as e:
+                if type(e).__name__ in ('RateLimitExceeded', 'DDoSProtection'):
+                    self._limiter.backoff(self._retry_after())
+                raise
+            finally:
+                self._limiter.update_from_headers(getattr(self._exchange, 'last_response_headers', None))
+
+        call.__name__ = name
+        return call
+
+    def _retry_after(self) -> float:
+        headers = getattr(self._exchange, 'last_response_headers', None) or {}
+        for key, value in headers.items():
+            if key.lower() == 'retry-after':
+                try:
+                    return float(value)
+                except (TypeError, ValueError):
+                    break
+        return self._default_backoff
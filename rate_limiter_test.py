@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests du limiteur REST partagé
+Poids des endpoints, réserve des ordres et adaptation aux en-têtes Binance
+"""
+
+import time
+import unittest
+
+from rate_limiter import PRIORITY_ORDER, RateLimitedExchange, WeightRateLimiter
+
+
+class FakeExchange:
+    """Exchange simulé renvoyant un poids consommé dans les en-têtes"""
+
+    def __init__(self):
+        self.markets = None
+        self.last_response_headers = {}
+
+    def fetch_tickers(self, symbols=None):
+        self.last_response_headers = {'X-MBX-USED-WEIGHT-1M': '3000'}
+        return {}
+
+    def amount_to_precision(self, symbol, amount):
+        return str(amount)
+
+
+class TestWeightRateLimiter(unittest.TestCase):
+
+    def test_market_data_keeps_order_reserve(self):
+        limiter = WeightRateLimiter(max_weight_per_minute=600, order_reserve_percent=50, safety_margin_percent=0)
+        limiter.acquire(300)
+        # Réserve atteinte : un ordre passe immédiatement, une donnée de marché attendrait
+        self.assertLess(limiter.acquire(1, PRIORITY_ORDER), 0.01)
+        self.assertLess(limiter.tokens - 1, limiter.reserve)
+
+    def test_headers_lower_available_weight(self):
+        limiter = WeightRateLimiter(max_weight_per_minute=6000, safety_margin_percent=0)
+        exchange = RateLimitedExchange(FakeExchange(), limiter)
+        exchange.fetch_tickers()
+        metrics = limiter.get_metrics()
+        self.assertEqual(metrics['server_used_weight'], 3000)
+        self.assertGreaterEqual(metrics['used_weight'], 3000)
+        self.assertEqual(metrics['weight_consumed'], 80)
+
+    def test_proxy_passes_helpers_through(self):
+        limiter = WeightRateLimiter()
+        exchange = RateLimitedExchange(FakeExchange(), limiter)
+        self.assertEqual(exchange.amount_to_precision('BTC/USDT', 1.5), '1.5')
+        self.assertEqual(limiter.metrics['requests'], 0)
+
+    def test_backoff_pauses_requests(self):
+        limiter = WeightRateLimiter()
+        limiter.backoff(0.2)
+        start = time.time()
+        limiter.acquire(1, PRIORITY_ORDER)
+        self.assertGreaterEqual(time.time() - start, 0.15)
+
+
+if __name__ == "__main__":
+    unittest.main()
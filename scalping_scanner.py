@@ -1,15 +1,3 @@
-from dotenv import load_dotenv
-import os
-load_dotenv()
-API_KEY = os.getenv('API_KEY')
-API_SECRET = os.getenv('API_SECRET')
-import os
-load_dotenv()
-api_key = API_KEY
-api_secret = API_SECRET
-if not api_key or not api_secret:
-    raise Exception("❌ CLÉS API BINANCE MANQUANTES : le fichier .env doit contenir API_KEY et API_SECRET dans le dossier du bot.")
-
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
@@ -47,24 +35,33 @@ def is_healthy_candle(ohlc, min_candle_body_ratio=None, max_upper_wick_ratio=Non
 
     return True
 
-import ccxt
-import pandas as pd
 import numpy as np
 import time
 from datetime import datetime
 from typing import Dict, List, Optional
 
+from streaming_indicators import StreamingEMA, StreamingRSI
+from batch_indicators import CandleMatrix, compute_scan_indicators, pump_percent_last
+from market_index import ALTCOIN_BASES, MAJOR_BASES, TIER_ALTCOIN, TIER_MAJOR, TIER_MICROCAP
+
 class ScalpingScanner:
     """Scanner scalping avec critères éprouvés"""
     
-    def __init__(self, exchange, config):
+    def __init__(self, exchange, config, candle_store=None, ohlcv_cache=None, order_books=None,
+                 market_index=None):
         self.exchange = exchange
+        self.market_index = market_index  # Métadonnées de marché précalculées (classe, paire autorisée)
+        self.candle_store = candle_store  # Bougies WebSocket agrégées (évite le REST)
+        self.ohlcv_cache = ohlcv_cache  # Cache REST incrémental (seules les nouvelles bougies)
+        self.order_books = order_books  # Carnets L2 locaux des symboles surveillés
         
         # CRITÈRES OPTIMISÉS DE SCALPING - depuis config.txt (conversion en nombres)
         self.min_volume_btc_eth = float(config.get('min_volume_btc_eth') or config.get('MIN_VOLUME_BTC_ETH', 50_000_000))
         self.min_volume_altcoins = float(config.get('min_volume_altcoins') or config.get('MIN_VOLUME_ALTCOINS', 8_000_000))
         self.min_volume_microcaps = float(config.get('min_volume_microcaps') or config.get('MIN_VOLUME_MICROCAPS', 1_000_000))
         self.volume_spike_threshold = float(config.get('VOLUME_SPIKE_THRESHOLD', 130))
+        # Volume minimum par classe (TIER_MAJOR, TIER_ALTCOIN, TIER_MICROCAP)
+        self.min_volumes = (self.min_volume_btc_eth, self.min_volume_altcoins, self.min_volume_microcaps)
         
         # Pump optimisé - depuis config.txt (conversion en nombres)
         self.min_pump_3min = float(config.get('pump_min_3min') or config.get('MIN_PUMP_3MIN', 0.8))
@@ -84,6 +81,13 @@ class ScalpingScanner:
         self.min_order_book_depth = int(config.get('orderbook_depth_min') or config.get('MIN_ORDER_BOOK_DEPTH', 50))
         self.min_required_signals = int(config.get('signals_required') or config.get('MIN_REQUIRED_SIGNALS', 2))
         
+        # ANALYSE CHANDELLES - depuis config.txt (conversion en nombres)
+        self.candle_body_ratio_min = float(config.get('candle_body_ratio_min') or 0.6)
+        self.candle_upper_wick_max = float(config.get('candle_upper_wick_max') or 0.3)
+        
+        # Scan approfondi vectorisé (klines REST) au lieu de l'estimation ticker
+        self.deep_scan_enabled = bool(config.get('DEEP_SCAN_ENABLED', False))
+        
         # FILTRAGE DES PAIRES PAR SUFFIXES - depuis config.txt
         pair_suffixes_raw = config.get('filter_suffixes', config.get('PAIR_SUFFIXES', 'USDT,BTC,ETH'))
         if isinstance(pair_suffixes_raw, list):
@@ -93,6 +97,8 @@ class ScalpingScanner:
         # Nettoyer les espaces
         self.pair_suffixes = [suffix.strip() for suffix in self.pair_suffixes if suffix.strip()]
         self.pair_suffix_mode = config.get('PAIR_SUFFIX_MODE', 'INCLUDE')
+        if self.market_index is not None:
+            self.market_index.configure_pairs(self.pair_suffixes, self.pair_suffix_mode)
         
         # Scanner pur - AUCUNE préférence, que les meilleurs critères
         print("🎯 Scanner SCALPING PROFESSIONNEL OPTIMISÉ initialisé")
@@ -122,7 +128,10 @@ class ScalpingScanner:
             # 2. Filtrer les paires selon les suffixes configurés
             filtered_pairs = {}
             for symbol, ticker in tickers.items():
-                if self._is_pair_allowed(symbol):
+                allowed = self.market_index.is_allowed(symbol) if self.market_index is not None else None
+                if allowed is None:
+                    allowed = self._is_pair_allowed(symbol)
+                if allowed:
                     filtered_pairs[symbol] = ticker
             
             print(f"🔍 {len(filtered_pairs)} paires conservées après filtrage des suffixes")
@@ -135,30 +144,29 @@ class ScalpingScanner:
                 if volume_24h <= 0:
                     continue
                 
-                # Déterminer le volume minimum selon la crypto
-                base_currency = symbol.split('/')[0]
-                if base_currency in ['BTC', 'ETH']:
-                    min_volume = self.min_volume_btc_eth
-                elif base_currency in ['BNB', 'ADA', 'SOL', 'DOT', 'LINK', 'UNI', 'MATIC']:
-                    min_volume = self.min_volume_altcoins
-                else:
-                    min_volume = self.min_volume_microcaps
-                
-                if volume_24h >= min_volume:
+                # Déterminer le volume minimum selon la classe de la crypto
+                if volume_24h >= self._min_volume_for(symbol):
                     volume_filtered[symbol] = ticker
             
             print(f"💰 {len(volume_filtered)} paires avec volume suffisant trouvées")
             
-            # 4. Analyse technique ULTRA-RAPIDE (éviter appels API individuels)
-            for symbol, ticker in volume_filtered.items():
-                try:
-                    opportunity = self._analyze_pair_ultra_fast(symbol, ticker)
-                    if opportunity:
-                        opportunities.append(opportunity)
-                        print(f"✅ OPPORTUNITÉ: {symbol} - Score: {opportunity['score']:.1f}")
-                        
-                except Exception as e:
-                    continue
+            # 4. Analyse technique : approfondie vectorisée ou ULTRA-RAPIDE
+            if self.deep_scan_enabled:
+                if self.ohlcv_cache:
+                    self.ohlcv_cache.retain(volume_filtered.keys())
+                opportunities = self._analyze_pairs_batch(volume_filtered)
+                for opportunity in opportunities:
+                    print(f"✅ OPPORTUNITÉ: {opportunity['symbol']} - Score: {opportunity['score']:.1f}")
+            else:
+                for symbol, ticker in volume_filtered.items():
+                    try:
+                        opportunity = self._analyze_pair_ultra_fast(symbol, ticker)
+                        if opportunity:
+                            opportunities.append(opportunity)
+                            print(f"✅ OPPORTUNITÉ: {symbol} - Score: {opportunity['score']:.1f}")
+                            
+                    except Exception as e:
+                        continue
             
             # 4. Trier par score
             opportunities.sort(key=lambda x: x['score'], reverse=True)
@@ -251,129 +259,127 @@ class ScalpingScanner:
     
     def _analyze_pair(self, symbol: str, ticker: Dict) -> Optional[Dict]:
         """Analyse une paire avec critères éprouvés"""
+        opportunities = self._analyze_pairs_batch({symbol: ticker})
+        return opportunities[0] if opportunities else None
+    
+    def _analyze_pairs_batch(self, tickers: Dict[str, Dict]) -> List[Dict]:
+        """Analyse approfondie de TOUS les candidats en une passe vectorisée"""
         try:
-            price = ticker.get('last', 0)
-            volume_24h = ticker.get('quoteVolume', 0)
-            base_currency = symbol.split('/')[0]
-            
             # 1. FILTRE VOLUME (critères éprouvés)
-            if base_currency in ['BTC', 'ETH']:
-                min_volume = self.min_volume_btc_eth
-            elif base_currency in ['BNB', 'SOL', 'ADA', 'DOT', 'AVAX']:
-                min_volume = self.min_volume_altcoins
-            else:
-                min_volume = self.min_volume_microcaps
-            
-            if volume_24h < min_volume:
-                return None
-            
-            # 2. DONNÉES OHLCV 3min
-            klines_3m = self.exchange.fetch_ohlcv(symbol, '3m', limit=20)
-            if len(klines_3m) < 5:
-                return None
-            
-            df_3m = pd.DataFrame(klines_3m, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            
-            # 3. CRITÈRE PUMP 3MIN (0.3% à 2.0%)
-            pump_3min = ((df_3m['close'].iloc[-1] - df_3m['close'].iloc[-2]) / df_3m['close'].iloc[-2]) * 100
-            
-            if pump_3min < self.min_pump_3min or pump_3min > self.max_pump_3min:
-                return None
-            
-            # 4. DONNÉES 1min pour indicateurs
-            klines_1m = self.exchange.fetch_ohlcv(symbol, '1m', limit=50)
-            if len(klines_1m) < 30:
-                return None
-            
-            df_1m = pd.DataFrame(klines_1m, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            
-            # 5. RSI (seuils 30/70)
-            rsi = self._calculate_rsi(df_1m['close']).iloc[-1]
-            if not (self.rsi_oversold <= rsi <= self.rsi_overbought):
-                return None
-            
-            # 6. EMA 9/21 (haussier)
-            ema9 = df_1m['close'].ewm(span=self.ema_fast).mean().iloc[-1]
-            ema21 = df_1m['close'].ewm(span=self.ema_slow).mean().iloc[-1]
-            
-            if ema9 <= ema21:
-                return None
-            
-            # 7. VOLUME SPIKE (>130% de la moyenne)
-            avg_volume = df_1m['volume'].tail(20).mean()
-            current_volume = df_1m['volume'].iloc[-1]
-            volume_ratio = (current_volume / avg_volume) * 100 if avg_volume > 0 else 0
-            
-            if volume_ratio < self.volume_spike_threshold:
-                return None
-            
-            # 8. FILTRES DE QUALITÉ AVANCÉS
-            # Vérifier le spread (pour éviter les microcaps illiquides)
-            if self._is_spread_too_high(symbol):
-                return None
-            
-            # Vérifier la profondeur du carnet d'ordres
-            if not self._check_order_book_depth(symbol):
-                return None
-            
-            # 9. SYSTÈME DE CONFIRMATION MULTI-SIGNAUX
-            signals_count = 0
-            
-            # Signal 1: Momentum (pump)
-            if self.min_pump_3min <= pump_3min <= self.max_pump_3min:
-                signals_count += 1
-            
-            # Signal 2: RSI sortant de zone
-            if self.rsi_oversold <= rsi <= self.rsi_overbought:
-                signals_count += 1
-            
-            # Signal 3: EMA croisement haussier
-            if ema9 > ema21:
-                signals_count += 1
-            
-            # Signal 4: Volume spike
-            if volume_ratio >= self.volume_spike_threshold:
-                signals_count += 1
-            
+            candidates = {}
+            for symbol, ticker in tickers.items():
+                if (ticker.get('quoteVolume') or 0) >= self._min_volume_for(symbol):
+                    candidates[symbol] = ticker
+            
+            if not candidates:
+                return []
+            
+            # 2. DONNÉES OHLCV 3min -> CRITÈRE PUMP 3MIN
+            klines_3m = {s: self._fetch_klines(s, '3m', 20) for s in candidates}
+            matrix_3m = CandleMatrix.from_klines(klines_3m, min_length=5)
+            if not len(matrix_3m):
+                return []
+            
+            pump_3min = pump_percent_last(matrix_3m.close)
+            pump_ok = (pump_3min >= self.min_pump_3min) & (pump_3min <= self.max_pump_3min)
+            pumps = {s: float(p) for s, p, ok in zip(matrix_3m.symbols, pump_3min, pump_ok) if ok}
+            if not pumps:
+                return []
+            
+            # 3. DONNÉES 1min pour indicateurs (matrice symboles × bougies)
+            klines_1m = {s: self._fetch_klines(s, '1m', 50) for s in pumps}
+            matrix_1m = CandleMatrix.from_klines(klines_1m, min_length=30)
+            if not len(matrix_1m):
+                return []
+            
+            indicators = compute_scan_indicators(
+                matrix_1m,
+                rsi_period=self.rsi_period,
+                ema_fast=self.ema_fast,
+                ema_slow=self.ema_slow,
+                volume_window=20,
+                min_candle_body_ratio=self.candle_body_ratio_min,
+                max_upper_wick_ratio=self.candle_upper_wick_max
+            )
+            rsi = indicators['rsi']
+            ema_fast = indicators['ema_fast']
+            ema_slow = indicators['ema_slow']
+            volume_ratio = indicators['volume_ratio']
+            
+            # 4. SYSTÈME DE CONFIRMATION MULTI-SIGNAUX (masques vectorisés)
+            # Signal 1 (pump) garanti par le filtre 3min ; RSI, EMA et volume comptés par ligne
+            rsi_ok = (rsi >= self.rsi_oversold) & (rsi <= self.rsi_overbought)
+            ema_ok = ema_fast > ema_slow
+            volume_ok = volume_ratio >= self.volume_spike_threshold
+            signals = 1 + rsi_ok.astype(int) + ema_ok.astype(int) + volume_ok.astype(int)
+            
+            opportunities = []
             # Respecter la configuration MIN_REQUIRED_SIGNALS
-            if signals_count < self.min_required_signals:
-                return None
-            
-            # 10. CALCUL SCORE AMÉLIORÉ
-            score = 0
-            score += min(pump_3min * 10, 30)  # Pump (max 30 points)
-            score += min((volume_ratio - 100) / 5, 20)  # Volume spike (max 20 points)
-            score += min((ema9 - ema21) / ema21 * 1000, 15)  # Force EMA (max 15 points)
-            score += 15  # RSI dans zone (15 points)
-            score += signals_count * 5  # Bonus signaux (max 20 points)
-            
-            return {
-                'symbol': symbol,
-                'score': min(score, 100),
-                'pump_3min': pump_3min,
-                'rsi': rsi,
-                'volume_ratio': volume_ratio,
-                'price': price,
-                'volume_24h': volume_24h,
-                'ema_bullish': ema9 > ema21,
-                'signals_count': signals_count,
-                'preferred_pair': False  # Plus de paires préférées
-            }
+            for i in np.flatnonzero(signals >= self.min_required_signals):
+                symbol = matrix_1m.symbols[i]
+                ticker = candidates[symbol]
+                pump = pumps[symbol]
+                ema9, ema21 = float(ema_fast[i]), float(ema_slow[i])
+                
+                # 5. FILTRES DE QUALITÉ AVANCÉS (seulement les survivants)
+                if self._is_spread_too_high(symbol):
+                    continue
+                if not self._check_order_book_depth(symbol):
+                    continue
+                
+                signals_count = int(signals[i])
+                
+                # 6. CALCUL SCORE AMÉLIORÉ
+                score = 0
+                score += min(pump * 10, 30)  # Pump (max 30 points)
+                score += min((volume_ratio[i] - 100) / 5, 20)  # Volume spike (max 20 points)
+                score += min((ema9 - ema21) / ema21 * 1000, 15)  # Force EMA (max 15 points)
+                if rsi_ok[i]:
+                    score += 15  # RSI dans zone (15 points)
+                score += signals_count * 5  # Bonus signaux (max 20 points)
+                
+                opportunities.append({
+                    'symbol': symbol,
+                    'score': min(float(score), 100),
+                    'pump_3min': pump,
+                    'rsi': float(rsi[i]),
+                    'volume_ratio': float(volume_ratio[i]),
+                    'price': ticker.get('last', 0),
+                    'volume_24h': ticker.get('quoteVolume', 0),
+                    'ema_bullish': bool(ema_ok[i]),
+                    'body_ratio': float(indicators['body_ratio'][i]),
+                    'upper_wick_ratio': float(indicators['upper_wick_ratio'][i]),
+                    'healthy_candle': bool(indicators['healthy_candle'][i]),
+                    'signals_count': signals_count,
+                    'preferred_pair': False,  # Plus de paires préférées
+                    'analysis_type': 'deep_batch'
+                })
+            
+            return opportunities
             
         except Exception as e:
-            return None
+            print(f"❌ Erreur analyse approfondie: {e}")
+            return []
     
-    def _calculate_rsi(self, prices: pd.Series, period: int = 14) -> pd.Series:
-        """Calcul RSI standard"""
-        delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        return 100 - (100 / (1 + rs))
+    def _fetch_klines(self, symbol: str, timeframe: str, limit: int) -> Optional[List]:
+        """Récupère les klines d'un symbole (None en cas d'erreur)"""
+        try:
+            if self.candle_store and self.candle_store.has_history(symbol, timeframe, limit):
+                return self.candle_store.get_ohlcv(symbol, timeframe, limit)
+            if self.ohlcv_cache:
+                return self.ohlcv_cache.fetch_ohlcv(symbol, timeframe, limit)
+            return self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+        except Exception:
+            return None
     
     def _is_spread_too_high(self, symbol: str) -> bool:
         """Vérifier si le spread est trop élevé (pour éviter les microcaps illiquides)"""
         try:
+            book = self.order_books.get_book(symbol) if self.order_books else None
+            if book is not None:
+                spread_percent = book.spread_percent()
+                return spread_percent is None or spread_percent > self.max_spread_percent
+            
             ticker = self.exchange.fetch_ticker(symbol)
             bid = ticker.get('bid', 0)
             ask = ticker.get('ask', 0)
@@ -392,7 +398,12 @@ class ScalpingScanner:
     def _check_order_book_depth(self, symbol: str) -> bool:
         """Vérifier la profondeur du carnet d'ordres"""
         try:
-            order_book = self.exchange.fetch_order_book(symbol, limit=50)
+            book = self.order_books.get_book(symbol) if self.order_books else None
+            if book is not None:
+                # Mêmes 50 meilleurs niveaux que le fetch REST
+                order_book = {'bids': book.top_levels('bids', 50), 'asks': book.top_levels('asks', 50)}
+            else:
+                order_book = self.exchange.fetch_order_book(symbol, limit=50)
             
             bids_count = len(order_book.get('bids', []))
             asks_count = len(order_book.get('asks', []))
@@ -403,6 +414,20 @@ class ScalpingScanner:
             
         except Exception:
             return False  # En cas d'erreur, considérer comme insuffisant
+    
+    def _min_volume_for(self, symbol: str) -> float:
+        """Volume 24h minimum selon la classe du symbole (index des marchés, sinon devise de base)"""
+        tier = self.market_index.tier_of(symbol) if self.market_index is not None else None
+        if tier is None:
+            base_currency = symbol.split('/')[0]
+            if base_currency in MAJOR_BASES:
+                tier = TIER_MAJOR
+            elif base_currency in ALTCOIN_BASES:
+                tier = TIER_ALTCOIN
+            else:
+                tier = TIER_MICROCAP
+        return self.min_volumes[tier]
+    
     def _is_pair_allowed(self, symbol: str) -> bool:
         """Vérifie si la paire est autorisée selon les suffixes configurés"""
         try:
@@ -427,38 +452,25 @@ class ScalpingScanner:
         except Exception:
             return False  # En cas d'erreur, considérer comme non autorisé
     
-    def _calculate_rsi(self, prices, period=14):
-        """Calcule le RSI sur les prix donnés"""
+    def _calculate_rsi(self, prices, period: Optional[int] = None) -> Optional[float]:
+        """Calcule le dernier RSI (Wilder) sur les prix donnés"""
         try:
+            period = period or self.rsi_period
             if len(prices) < period + 1:
                 return None
-                
-            # Calculer les variations
-            delta = prices.diff()
-            gain = delta.where(delta > 0, 0)
-            loss = -delta.where(delta < 0, 0)
-            
-            # Moyenne mobile des gains et pertes
-            avg_gain = gain.rolling(window=period).mean()
-            avg_loss = loss.rolling(window=period).mean()
-            
-            # RSI
-            rs = avg_gain / avg_loss
-            rsi = 100 - (100 / (1 + rs))
             
-            return rsi.iloc[-1]
+            return StreamingRSI(period).seed(prices)
             
         except Exception:
             return None
     
-    def _calculate_ema(self, prices, period):
-        """Calcule l'EMA sur les prix donnés"""
+    def _calculate_ema(self, prices, period) -> Optional[float]:
+        """Calcule la dernière EMA sur les prix donnés"""
         try:
             if len(prices) < period:
                 return None
                 
-            ema = prices.ewm(span=period).mean()
-            return ema.iloc[-1]
+            return StreamingEMA(period).seed(prices)
             
         except Exception:
             return None
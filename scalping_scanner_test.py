@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Tests du scan approfondi vectorisé
+Comptage des signaux par paire et respect de MIN_REQUIRED_SIGNALS
+"""
+
+import unittest
+
+from scalping_scanner import ScalpingScanner
+
+MINUTE = 60_000
+
+
+class FakeExchange:
+    """Pump 3min de +1%, puis en 1m une baisse en dents de scie (EMA baissière) et un pic de volume"""
+
+    def fetch_ohlcv(self, symbol, timeframe, limit=100):
+        if timeframe == '3m':
+            closes = [100.0] * (limit - 1) + [101.0]
+            volumes = [10.0] * limit
+        else:
+            closes = [100.0]
+            for i in range(1, limit):
+                closes.append(closes[-1] + (1.0 if i % 2 else -1.2))
+            volumes = [10.0] * (limit - 1) + [30.0]
+        return [[i * MINUTE, c, c + 0.1, c - 0.1, c, v] for i, (c, v) in enumerate(zip(closes, volumes))]
+
+    def fetch_ticker(self, symbol):
+        return {'bid': 99.99, 'ask': 100.0}
+
+    def fetch_order_book(self, symbol, limit=50):
+        return {'bids': [[99.99, 1.0]] * limit, 'asks': [[100.0, 1.0]] * limit}
+
+
+def make_scanner(required):
+    config = {'MIN_REQUIRED_SIGNALS': required, 'RSI_OVERSOLD': 25, 'RSI_OVERBOUGHT': 75}
+    return ScalpingScanner(FakeExchange(), config)
+
+
+class TestDeepScanSignals(unittest.TestCase):
+
+    tickers = {'FOO/USDT': {'quoteVolume': 1e9, 'last': 100.0}}
+
+    def test_missing_signal_is_counted_not_required(self):
+        opportunities = make_scanner(3)._analyze_pairs_batch(self.tickers)
+        self.assertEqual(len(opportunities), 1)
+        self.assertEqual(opportunities[0]['signals_count'], 3)  # Pump, RSI, volume
+        self.assertFalse(opportunities[0]['ema_bullish'])
+
+    def test_min_required_signals_filters(self):
+        self.assertEqual(make_scanner(4)._analyze_pairs_batch(self.tickers), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Indicateurs Techniques en Streaming - Mise à jour O(1)
+RSI (lissage de Wilder), EMA et MACD maintenus par symbole et timeframe
+"""
+
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+
+class StreamingEMA:
+    """EMA incrémentale, amorcée par la moyenne simple de la première période"""
+
+    def __init__(self, period: int):
+        self.period = max(1, int(period))
+        self.alpha = 2.0 / (self.period + 1)
+        self.count = 0
+        self._seed_sum = 0.0
+        self._value = None
+
+    @property
+    def is_ready(self) -> bool:
+        """True une fois la période de chauffe écoulée"""
+        return self.count >= self.period
+
+    @property
+    def value(self) -> Optional[float]:
+        """Valeur courante (moyenne provisoire pendant la chauffe)"""
+        return self._value
+
+    def update(self, price: float) -> Optional[float]:
+        """Intègre une bougie fermée"""
+        price = float(price)
+        self.count += 1
+        if self.count <= self.period:
+            self._seed_sum += price
+            self._value = self._seed_sum / self.count
+        else:
+            self._value += self.alpha * (price - self._value)
+        return self._value
+
+    def preview(self, price: float) -> Optional[float]:
+        """Valeur si la bougie en cours fermait à ce prix (sans modifier l'état)"""
+        price = float(price)
+        if self.count < self.period:
+            return (self._seed_sum + price) / (self.count + 1)
+        return self._value + self.alpha * (price - self._value)
+
+    def seed(self, prices: Iterable[float]) -> Optional[float]:
+        """Initialisation en masse depuis un historique de clôtures"""
+        for price in prices:
+            self.update(price)
+        return self._value
+
+
+class StreamingRSI:
+    """RSI de Wilder incrémental"""
+
+    def __init__(self, period: int = 14):
+        self.period = max(1, int(period))
+        self.count = 0  # Nombre de variations intégrées
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.last_close = None
+
+    @property
+    def is_ready(self) -> bool:
+        """True dès que `period` variations ont été observées"""
+        return self.count >= self.period
+
+    @property
+    def value(self) -> Optional[float]:
+        """RSI courant, None pendant la chauffe"""
+        if not self.is_ready:
+            return None
+        return self._rsi(self.avg_gain, self.avg_loss)
+
+    @staticmethod
+    def _rsi(avg_gain: float, avg_loss: float) -> float:
+        if avg_loss == 0:
+            return 100.0 if avg_gain > 0 else 50.0
+        rs = avg_gain / avg_loss
+        return 100.0 - (100.0 / (1.0 + rs))
+
+    def _next_averages(self, price: float) -> Tuple[float, float]:
+        delta = price - self.last_close
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        n = self.count + 1
+        if n <= self.period:
+            # Chauffe : moyenne simple des premières variations
+            return (self.avg_gain * self.count + gain) / n, (self.avg_loss * self.count + loss) / n
+        # Lissage de Wilder
+        p = self.period
+        return (self.avg_gain * (p - 1) + gain) / p, (self.avg_loss * (p - 1) + loss) / p
+
+    def update(self, price: float) -> Optional[float]:
+        """Intègre une bougie fermée"""
+        price = float(price)
+        if self.last_close is not None:
+            self.avg_gain, self.avg_loss = self._next_averages(price)
+            self.count += 1
+        self.last_close = price
+        return self.value
+
+    def preview(self, price: float) -> Optional[float]:
+        """RSI si la bougie en cours fermait à ce prix (sans modifier l'état)"""
+        if self.last_close is None or self.count + 1 < self.period:
+            return None
+        avg_gain, avg_loss = self._next_averages(float(price))
+        return self._rsi(avg_gain, avg_loss)
+
+    def seed(self, prices: Iterable[float]) -> Optional[float]:
+        """Initialisation en masse depuis un historique de clôtures"""
+        for price in prices:
+            self.update(price)
+        return self.value
+
+
+class StreamingMACD:
+    """MACD incrémental (EMA rapide - EMA lente, ligne de signal EMA)"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = StreamingEMA(fast)
+        self.slow = StreamingEMA(slow)
+        self.signal = StreamingEMA(signal)
+
+    @property
+    def is_ready(self) -> bool:
+        return self.signal.is_ready
+
+    @property
+    def value(self) -> Optional[Dict[str, float]]:
+        """Dernières valeurs {'macd', 'signal', 'histogram'}, None pendant la chauffe"""
+        if not self.slow.is_ready:
+            return None
+        macd_line = self.fast.value - self.slow.value
+        signal_line = self.signal.value if self.signal.value is not None else macd_line
+        return {
+            'macd': macd_line,
+            'signal': signal_line,
+            'histogram': macd_line - signal_line
+        }
+
+    def update(self, price: float) -> Optional[Dict[str, float]]:
+        """Intègre une bougie fermée"""
+        self.fast.update(price)
+        self.slow.update(price)
+        if self.slow.is_ready:
+            self.signal.update(self.fast.value - self.slow.value)
+        return self.value
+
+    def preview(self, price: float) -> Optional[Dict[str, float]]:
+        """MACD si la bougie en cours fermait à ce prix (sans modifier l'état)"""
+        if self.slow.count + 1 < self.slow.period:
+            return None
+        macd_line = self.fast.preview(price) - self.slow.preview(price)
+        signal_line = self.signal.preview(macd_line)
+        return {
+            'macd': macd_line,
+            'signal': signal_line,
+            'histogram': macd_line - signal_line
+        }
+
+    def seed(self, prices: Iterable[float]) -> Optional[Dict[str, float]]:
+        """Initialisation en masse depuis un historique de clôtures"""
+        for price in prices:
+            self.update(price)
+        return self.value
+
+
+class IndicatorSet:
+    """Jeu d'indicateurs streaming pour un couple (symbole, timeframe)"""
+
+    def __init__(self, rsi_period: int = 14, ema_fast: int = 9, ema_slow: int = 21,
+                 macd_fast: int = 12, macd_slow: int = 26, macd_signal: int = 9):
+        self.rsi = StreamingRSI(rsi_period)
+        self.ema_fast = StreamingEMA(ema_fast)
+        self.ema_slow = StreamingEMA(ema_slow)
+        self.macd = StreamingMACD(macd_fast, macd_slow, macd_signal)
+        self.last_price = None
+        self.candles = 0
+
+    @property
+    def is_ready(self) -> bool:
+        """True quand tous les indicateurs ont terminé leur chauffe"""
+        return (self.rsi.is_ready and self.ema_fast.is_ready and
+                self.ema_slow.is_ready and self.macd.is_ready)
+
+    def on_candle_close(self, close: float):
+        """Bougie fermée : fait avancer tous les indicateurs"""
+        self.rsi.update(close)
+        self.ema_fast.update(close)
+        self.ema_slow.update(close)
+        self.macd.update(close)
+        self.last_price = float(close)
+        self.candles += 1
+
+    def on_tick(self, price: float) -> Dict:
+        """Tick intra-bougie : valeurs provisoires sans modifier l'état"""
+        self.last_price = float(price)
+        return {
+            'rsi': self.rsi.preview(price),
+            'ema_fast': self.ema_fast.preview(price),
+            'ema_slow': self.ema_slow.preview(price),
+            'macd': self.macd.preview(price),
+            'is_ready': self.is_ready,
+            'provisional': True
+        }
+
+    def seed(self, closes: Iterable[float]):
+        """Initialisation en masse depuis un historique de clôtures"""
+        for close in closes:
+            self.on_candle_close(close)
+
+    def snapshot(self) -> Dict:
+        """Valeurs courantes sur bougies fermées"""
+        return {
+            'rsi': self.rsi.value,
+            'ema_fast': self.ema_fast.value,
+            'ema_slow': self.ema_slow.value,
+            'macd': self.macd.value,
+            'is_ready': self.is_ready,
+            'candles': self.candles,
+            'provisional': False
+        }
+
+
+class StreamingIndicatorBank:
+    """Registre des indicateurs streaming par (symbole, timeframe)"""
+
+    def __init__(self, rsi_period: int = 14, ema_fast: int = 9, ema_slow: int = 21,
+                 macd_fast: int = 12, macd_slow: int = 26, macd_signal: int = 9):
+        self.params = {
+            'rsi_period': rsi_period,
+            'ema_fast': ema_fast,
+            'ema_slow': ema_slow,
+            'macd_fast': macd_fast,
+            'macd_slow': macd_slow,
+            'macd_signal': macd_signal
+        }
+        self.sets = {}  # (symbol, timeframe) -> IndicatorSet
+        self.lock = threading.Lock()
+
+    def get(self, symbol: str, timeframe: str, create: bool = True) -> Optional[IndicatorSet]:
+        """Retourne le jeu d'indicateurs (créé à la demande)"""
+        key = (symbol, timeframe)
+        indicator_set = self.sets.get(key)
+        if indicator_set is None and create:
+            with self.lock:
+                indicator_set = self.sets.get(key)
+                if indicator_set is None:
+                    indicator_set = IndicatorSet(**self.params)
+                    self.sets[key] = indicator_set
+        return indicator_set
+
+    def seed(self, symbol: str, timeframe: str, closes: Iterable[float]) -> IndicatorSet:
+        """Réinitialise puis amorce un jeu d'indicateurs depuis l'historique"""
+        indicator_set = IndicatorSet(**self.params)
+        indicator_set.seed(closes)
+        with self.lock:
+            self.sets[(symbol, timeframe)] = indicator_set
+        return indicator_set
+
+    def update(self, symbol: str, timeframe: str, price: float, is_closed: bool = True) -> Dict:
+        """Met à jour sur bougie fermée ou sur tick et retourne les valeurs"""
+        indicator_set = self.get(symbol, timeframe)
+        if is_closed:
+            indicator_set.on_candle_close(price)
+            return indicator_set.snapshot()
+        return indicator_set.on_tick(price)
+
+    def snapshot(self, symbol: str, timeframe: str) -> Optional[Dict]:
+        """Valeurs courantes, None si le couple n'est pas suivi"""
+        indicator_set = self.get(symbol, timeframe, create=False)
+        return indicator_set.snapshot() if indicator_set else None
+
+    def drop(self, symbol: str):
+        """Oublie tous les timeframes d'un symbole"""
+        with self.lock:
+            for key in [k for k in self.sets if k[0] == symbol]:
+                del self.sets[key]
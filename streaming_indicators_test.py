@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests des indicateurs streaming (RSI Wilder, EMA, MACD)
+Comparaison avec un recalcul complet de référence
+"""
+
+import unittest
+
+from streaming_indicators import StreamingEMA, StreamingRSI, StreamingMACD, StreamingIndicatorBank
+
+PRICES = [100, 101.5, 100.8, 102.2, 103.0, 102.1, 101.7, 103.4, 104.9, 104.0,
+          105.2, 106.0, 105.1, 104.3, 106.8, 107.5, 106.9, 108.2, 109.0, 108.1,
+          107.4, 109.9, 110.5, 111.2, 110.0, 109.3, 111.8, 112.4, 113.0, 112.2]
+
+
+def reference_ema(prices, period):
+    """EMA de référence amorcée par SMA"""
+    ema = sum(prices[:period]) / period
+    alpha = 2 / (period + 1)
+    for price in prices[period:]:
+        ema += alpha * (price - ema)
+    return ema
+
+
+def reference_rsi(prices, period):
+    """RSI de Wilder de référence"""
+    deltas = [b - a for a, b in zip(prices, prices[1:])]
+    gains = [max(d, 0) for d in deltas]
+    losses = [max(-d, 0) for d in deltas]
+    avg_gain = sum(gains[:period]) / period
+    avg_loss = sum(losses[:period]) / period
+    for gain, loss in zip(gains[period:], losses[period:]):
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+    return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+class TestStreamingIndicators(unittest.TestCase):
+    """Les mises à jour incrémentales doivent égaler le recalcul complet"""
+
+    def test_ema_matches_reference(self):
+        ema = StreamingEMA(9)
+        for i, price in enumerate(PRICES, 1):
+            ema.update(price)
+            self.assertEqual(ema.is_ready, i >= 9)
+        self.assertAlmostEqual(ema.value, reference_ema(PRICES, 9))
+
+    def test_rsi_matches_reference_and_warmup(self):
+        rsi = StreamingRSI(14)
+        rsi.seed(PRICES[:14])
+        self.assertFalse(rsi.is_ready)
+        self.assertIsNone(rsi.value)
+        rsi.seed(PRICES[14:])
+        self.assertTrue(rsi.is_ready)
+        self.assertAlmostEqual(rsi.value, reference_rsi(PRICES, 14))
+
+    def test_preview_does_not_mutate(self):
+        rsi = StreamingRSI(14)
+        rsi.seed(PRICES[:-1])
+        before = rsi.value
+        preview = rsi.preview(PRICES[-1])
+        self.assertEqual(rsi.value, before)
+        self.assertAlmostEqual(preview, reference_rsi(PRICES, 14))
+
+    def test_macd_matches_reference(self):
+        macd = StreamingMACD(5, 10, 4)
+        macd.seed(PRICES)
+        macd_line = [reference_ema(PRICES[:n], 5) - reference_ema(PRICES[:n], 10)
+                     for n in range(10, len(PRICES) + 1)]
+        self.assertTrue(macd.is_ready)
+        self.assertAlmostEqual(macd.value['macd'], macd_line[-1])
+        self.assertAlmostEqual(macd.value['signal'], reference_ema(macd_line, 4))
+
+    def test_bank_keys_by_symbol_and_timeframe(self):
+        bank = StreamingIndicatorBank(rsi_period=14)
+        bank.seed('BTC/USDT', '1m', PRICES)
+        bank.update('BTC/USDT', '5m', PRICES[0])
+        self.assertAlmostEqual(bank.snapshot('BTC/USDT', '1m')['rsi'], reference_rsi(PRICES, 14))
+        self.assertFalse(bank.snapshot('BTC/USDT', '5m')['is_ready'])
+        self.assertIsNone(bank.snapshot('ETH/USDT', '1m'))
+        bank.drop('BTC/USDT')
+        self.assertIsNone(bank.snapshot('BTC/USDT', '1m'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache Ticker à Vol Unique - Regroupement des fetch_ticker identiques
+Un seul appel REST par symbole en vol, résultat partagé pendant un micro-TTL
+"""
+
+import threading
+import time
+from typing import Callable, Dict
+
+
+class _Flight:
+    """Requête en cours partagée par les appelants concurrents"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class TickerCache:
+    """Single-flight + micro-TTL devant fetch_ticker"""
+
+    def __init__(self, ttl_seconds: float = 1.0, wait_timeout: float = 30.0, max_entries: int = 500):
+        self.ttl_seconds = ttl_seconds
+        self.wait_timeout = wait_timeout
+        self.max_entries = max_entries
+        self.entries = {}  # symbol -> (timestamp, ticker)
+        self.in_flight = {}  # symbol -> _Flight
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'errors': 0}
+
+    def get(self, symbol: str, fetch: Callable[[str], Dict]) -> Dict:
+        """Ticker de `symbol` : cache récent, appel déjà en vol, ou nouvel appel à `fetch`
+
+        Les erreurs de l'appel partagé sont relevées chez tous les appelants.
+        """
+        with self.lock:
+            entry = self.entries.get(symbol)
+            if entry is not None and time.time() - entry[0] <= self.ttl_seconds:
+                self.stats['hits'] += 1
+                return entry[1]
+            flight = self.in_flight.get(symbol)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self.in_flight[symbol] = flight
+                self.stats['misses'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            if not flight.event.wait(self.wait_timeout):
+                raise TimeoutError(f"Ticker {symbol}: appel partagé sans réponse")
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fetch(symbol)
+            with self.lock:
+                self.entries[symbol] = (time.time(), flight.result)
+                if len(self.entries) > self.max_entries:
+                    self._prune()
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            self.stats['errors'] += 1
+            raise
+        finally:
+            with self.lock:
+                self.in_flight.pop(symbol, None)
+            flight.event.set()
+
+    def put(self, symbol: str, ticker: Dict):
+        """Enregistre un ticker obtenu autrement (fetch_tickers groupé)"""
+        with self.lock:
+            self.entries[symbol] = (time.time(), ticker)
+
+    def _prune(self):
+        now = time.time()
+        for symbol in [s for s, (timestamp, _) in self.entries.items() if now - timestamp > self.ttl_seconds]:
+            del self.entries[symbol]
+
+    def get_stats(self) -> Dict:
+        requests = self.stats['hits'] + self.stats['misses'] + self.stats['coalesced']
+        shared = self.stats['hits'] + self.stats['coalesced']
+        return dict(self.stats, requests=requests,
+                    hit_rate=shared / requests * 100 if requests else 0.0)
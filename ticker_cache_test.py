@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests du cache ticker à vol unique
+Regroupement des appels concurrents et micro-TTL
+"""
+
+import threading
+import time
+import unittest
+
+from ticker_cache import TickerCache
+
+
+class SlowTicker:
+    """fetch_ticker simulé, lent pour laisser les appels se chevaucher"""
+
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+
+    def __call__(self, symbol):
+        self.calls += 1
+        time.sleep(0.1)
+        if self.fail:
+            raise ConnectionError("timeout")
+        return {'symbol': symbol, 'last': 100.0 + self.calls}
+
+
+class TestTickerCache(unittest.TestCase):
+
+    def test_concurrent_calls_share_one_fetch(self):
+        cache = TickerCache(ttl_seconds=1.0)
+        fetch = SlowTicker()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get('BTC/USDT', fetch)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(fetch.calls, 1)
+        self.assertEqual({ticker['last'] for ticker in results}, {101.0})
+        self.assertEqual(cache.get_stats()['coalesced'] + cache.get_stats()['hits'], 4)
+
+    def test_ttl_expiry_triggers_new_fetch(self):
+        cache = TickerCache(ttl_seconds=0.05)
+        fetch = SlowTicker()
+        cache.get('ETH/USDT', fetch)
+        cache.get('ETH/USDT', fetch)
+        self.assertEqual(cache.get_stats()['hits'], 1)
+        time.sleep(0.1)
+        self.assertEqual(cache.get('ETH/USDT', fetch)['last'], 102.0)
+        self.assertEqual(cache.get_stats()['misses'], 2)
+
+    def test_error_is_shared_and_not_cached(self):
+        cache = TickerCache()
+        fetch = SlowTicker(fail=True)
+        errors = []
+
+        def call():
+            try:
+                cache.get('SOL/USDT', fetch)
+            except ConnectionError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(fetch.calls, 1)
+        self.assertNotIn('SOL/USDT', cache.entries)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tableau Virtualisé - Historique des trades et positions sans réécrire de widget Text
+Les lignes vivent dans un TradeStore ; le Treeview ne contient que les lignes visibles,
+réutilisées au défilement (des milliers de trades sans ralentir l'interface)
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+
+class TradeStore:
+    """Lignes du tableau (dict), plus récentes en tête, tri par colonne à la demande
+
+    Ajout en O(1) : les lignes sont stockées dans l'ordre d'arrivée et lues à l'envers.
+    Une colonne affiche `ligne[colonne + '_text']` si présent, sinon `ligne[colonne]` ;
+    le tri utilise toujours la valeur brute `ligne[colonne]`.
+    """
+
+    def __init__(self, max_rows: int = 5000):
+        self.max_rows = max_rows
+        self.rows: List[Dict] = []
+        self.keys: Dict[Hashable, Dict] = {}  # clé -> ligne (positions ouvertes)
+        self.sort_column: Optional[str] = None
+        self.sort_reverse = False
+        self._sorted: Optional[List[Dict]] = None
+        self.version = 0  # Incrémenté à chaque modification
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _changed(self):
+        self._sorted = None
+        self.version += 1
+
+    def add(self, row: Dict, key: Optional[Hashable] = None):
+        """Ajoute une ligne en tête (remplace la ligne de même clé)"""
+        if key is not None:
+            if key in self.keys:
+                self._remove_row(self.keys[key])
+            row['_key'] = key
+            self.keys[key] = row
+        self.rows.append(row)
+        # Troncature par paquets : pas de décalage de liste à chaque ajout
+        if len(self.rows) > self.max_rows + self.max_rows // 4:
+            for dropped in self.rows[:-self.max_rows]:
+                self.keys.pop(dropped.get('_key'), None)
+            del self.rows[:-self.max_rows]
+        self._changed()
+
+    def remove(self, key: Hashable) -> bool:
+        row = self.keys.pop(key, None)
+        if row is None:
+            return False
+        self._remove_row(row)
+        self._changed()
+        return True
+
+    def _remove_row(self, row: Dict):
+        # Par identité (deux trades peuvent avoir les mêmes valeurs), en partant des plus récents
+        for index in range(len(self.rows) - 1, -1, -1):
+            if self.rows[index] is row:
+                del self.rows[index]
+                return
+
+    def clear(self):
+        self.rows.clear()
+        self.keys.clear()
+        self._changed()
+
+    def sort_by(self, column: Optional[str], reverse: bool = False):
+        """Trie la vue par colonne (None : ordre d'arrivée, plus récent en tête)"""
+        self.sort_column = column
+        self.sort_reverse = reverse
+        self._changed()
+
+    def row_at(self, index: int) -> Dict:
+        """Ligne à la position `index` de la vue courante"""
+        if self.sort_column is None:
+            return self.rows[-1 - index]
+        if self._sorted is None:
+            column = self.sort_column
+            self._sorted = sorted(self.rows, reverse=self.sort_reverse,
+                                  key=lambda row: (row.get(column) is None, row.get(column)))
+        return self._sorted[index]
+
+    def cell_text(self, row: Dict, column: str) -> str:
+        value = row.get(f"{column}_text", row.get(column, ''))
+        return '' if value is None else str(value)
+
+
+class VirtualTable(tk.Frame):
+    """Treeview à lignes recyclées : seules les lignes visibles existent dans le widget"""
+
+    def __init__(self, parent, columns: Sequence[Tuple[str, str, int, str]], store: TradeStore,
+                 visible_rows: int = 15, empty_text: str = '', row_height: int = 20, **frame_options):
+        """columns : (clé, titre, largeur, alignement 'w'/'e'/'center')"""
+        super().__init__(parent, **frame_options)
+        self.columns = [column[0] for column in columns]
+        self.titles = {column[0]: column[1] for column in columns}
+        self.store = store
+        self.empty_text = empty_text
+        self.row_height = row_height
+        self.offset = 0
+        self.rendered_version = None
+
+        style = ttk.Style(self)
+        style.configure('Trades.Treeview', background='#1a1a1a', fieldbackground='#1a1a1a',
+                        foreground='#cccccc', rowheight=row_height, font=('Consolas', 9))
+        style.configure('Trades.Treeview.Heading', font=('Arial', 9, 'bold'))
+
+        self.tree = ttk.Treeview(self, columns=self.columns, show='headings', height=visible_rows,
+                                 selectmode='browse', style='Trades.Treeview')
+        for key, title, width, anchor in columns:
+            self.tree.heading(key, text=title, command=lambda column=key: self.toggle_sort(column))
+            self.tree.column(key, width=width, anchor=anchor, stretch=True)
+        self.scrollbar = tk.Scrollbar(self, orient='vertical', command=self._on_scrollbar)
+        self.tree.pack(side='left', fill='both', expand=True)
+        self.scrollbar.pack(side='right', fill='y')
+
+        self.items: List[str] = []
+        self._resize_pool(visible_rows)
+
+        self.tree.bind('<Configure>', self._on_configure)
+        self.tree.bind('<MouseWheel>', lambda event: self.scroll(-1 if event.delta > 0 else 1))
+        self.tree.bind('<Button-4>', lambda event: self.scroll(-1))
+        self.tree.bind('<Button-5>', lambda event: self.scroll(1))
+
+    def tag_configure(self, tag: str, **options):
+        self.tree.tag_configure(tag, **options)
+
+    def _resize_pool(self, count: int):
+        count = max(1, count)
+        while len(self.items) < count:
+            self.items.append(self.tree.insert('', 'end', values=()))
+        while len(self.items) > count:
+            self.tree.delete(self.items.pop())
+        self.rendered_version = None
+
+    def _on_configure(self, event):
+        rows = (event.height - self.row_height) // self.row_height  # Hauteur moins l'en-tête
+        if rows > 0 and rows != len(self.items):
+            self._resize_pool(rows)
+            self.refresh()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        total = len(self.store)
+        if action == 'moveto':
+            self.offset = int(float(value) * total)
+        elif action == 'scroll':
+            step = len(self.items) if unit == 'pages' else 1
+            self.offset += int(value) * step
+        self.rendered_version = None
+        self.refresh()
+
+    def scroll(self, lines: int):
+        self.offset += lines * 3
+        self.rendered_version = None
+        self.refresh()
+
+    def toggle_sort(self, column: str):
+        """Clic sur un en-tête : tri croissant, décroissant, puis retour à l'ordre d'arrivée"""
+        if self.store.sort_column != column:
+            self.store.sort_by(column, reverse=False)
+        elif not self.store.sort_reverse:
+            self.store.sort_by(column, reverse=True)
+        else:
+            self.store.sort_by(None)
+        for key in self.columns:
+            arrow = ''
+            if key == self.store.sort_column:
+                arrow = ' ▼' if self.store.sort_reverse else ' ▲'
+            self.tree.heading(key, text=self.titles[key] + arrow)
+        self.offset = 0
+        self.refresh()
+
+    def refresh(self):
+        """Redessine les lignes visibles (sans effet si rien n'a changé)"""
+        if self.rendered_version == self.store.version:
+            return
+        self.rendered_version = self.store.version
+
+        total = len(self.store)
+        visible = len(self.items)
+        self.offset = max(0, min(self.offset, total - visible))
+        for position, item in enumerate(self.items):
+            index = self.offset + position
+            if index < total:
+                row = self.store.row_at(index)
+                values = [self.store.cell_text(row, column) for column in self.columns]
+                self.tree.item(item, values=values, tags=(row.get('tag', ''),))
+            elif index == 0 and self.empty_text:
+                self.tree.item(item, values=[self.empty_text], tags=())
+            else:
+                self.tree.item(item, values=(), tags=())
+
+        if total > visible:
+            self.scrollbar.set(self.offset / total, (self.offset + visible) / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
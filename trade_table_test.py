@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests du magasin de lignes du tableau virtualisé
+Ordre plus récent en tête, tri par colonne, clés et troncature
+"""
+
+import unittest
+
+from trade_table import TradeStore
+
+
+class TestTradeStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = TradeStore(max_rows=100)
+
+    def view(self, column='symbol'):
+        return [self.store.row_at(i)[column] for i in range(len(self.store))]
+
+    def test_newest_row_first(self):
+        for symbol in ('BTC/USDT', 'ETH/USDT', 'SOL/USDT'):
+            self.store.add({'symbol': symbol})
+        self.assertEqual(self.view(), ['SOL/USDT', 'ETH/USDT', 'BTC/USDT'])
+
+    def test_sort_by_raw_value_and_back_to_arrival_order(self):
+        for symbol, pnl in (('A', 1.5), ('B', -2.0), ('C', None), ('D', 0.2)):
+            self.store.add({'symbol': symbol, 'pnl': pnl, 'pnl_text': f"{pnl}€"})
+
+        self.store.sort_by('pnl')
+        self.assertEqual(self.view(), ['B', 'D', 'A', 'C'])
+        self.store.sort_by('pnl', reverse=True)
+        self.assertEqual(self.view()[0], 'C')
+        self.store.sort_by(None)
+        self.assertEqual(self.view(), ['D', 'C', 'B', 'A'])
+
+        self.store.sort_by('pnl')
+        self.store.add({'symbol': 'E', 'pnl': -5.0})
+        self.assertEqual(self.view()[0], 'E')
+
+    def test_keyed_rows_replace_and_remove(self):
+        self.store.add({'symbol': 'BTC/USDT', 'price': 1.0}, key='order-1')
+        self.store.add({'symbol': 'ETH/USDT', 'price': 2.0}, key='order-2')
+        self.store.add({'symbol': 'BTC/USDT', 'price': 3.0}, key='order-1')
+
+        self.assertEqual(len(self.store), 2)
+        self.assertEqual(self.view('price'), [3.0, 2.0])
+        self.assertTrue(self.store.remove('order-2'))
+        self.assertFalse(self.store.remove('order-2'))
+        self.assertEqual(self.view('price'), [3.0])
+
+    def test_remove_by_identity_keeps_equal_rows(self):
+        self.store.add({'symbol': 'X'})
+        self.store.add({'symbol': 'X'}, key='k')
+        self.store.remove('k')
+        self.assertEqual(len(self.store), 1)
+
+    def test_truncation_keeps_newest_rows(self):
+        for i in range(1000):
+            self.store.add({'symbol': i}, key=i if i % 2 else None)
+
+        self.assertLessEqual(len(self.store), 125)
+        self.assertEqual(self.store.row_at(0)['symbol'], 999)
+        self.assertTrue(all(key >= 1000 - len(self.store) for key in self.store.keys))
+
+    def test_cell_text_prefers_formatted_value(self):
+        row = {'pnl': 1.234, 'pnl_text': '+1.23€', 'symbol': 'BTC/USDT', 'reason': None}
+        self.assertEqual(self.store.cell_text(row, 'pnl'), '+1.23€')
+        self.assertEqual(self.store.cell_text(row, 'symbol'), 'BTC/USDT')
+        self.assertEqual(self.store.cell_text(row, 'reason'), '')
+
+    def test_version_changes_on_every_mutation(self):
+        versions = {self.store.version}
+        self.store.add({'symbol': 'A'}, key='a')
+        versions.add(self.store.version)
+        self.store.sort_by('symbol')
+        versions.add(self.store.version)
+        self.store.remove('a')
+        versions.add(self.store.version)
+        self.store.clear()
+        versions.add(self.store.version)
+        self.assertEqual(len(versions), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Planificateur d'Affichage - Zones sales redessinées au plus une fois par image
+Les callbacks du moteur ne font que noter le dernier état (ou empiler un événement) ;
+un timer du thread principal redessine chaque zone marquée une seule fois
+"""
+
+import threading
+from collections import deque
+from typing import Callable, Dict, Tuple
+
+
+class UIScheduler:
+    """Regroupe les mises à jour de l'interface par zone (balance, positions, historique, scan, connexion)
+
+    Deux sortes de zones :
+    - état : `mark(zone, **champs)` fusionne les champs dans le dernier instantané,
+      le rendu reçoit ce dictionnaire (seule la dernière valeur compte)
+    - événements : `push(zone, événement)` empile, le rendu reçoit la liste
+      des événements arrivés depuis la dernière image, dans l'ordre
+    """
+
+    def __init__(self, schedule: Callable[[int, Callable], object], frame_ms: int = 50):
+        self.schedule = schedule  # root.after
+        self.frame_ms = frame_ms
+        self.renderers = {}  # zone -> fonction de rendu
+        self.snapshots = {}  # zone -> dernier état (dict)
+        self.events = {}  # zone -> événements en attente
+        self.dirty = set()
+        self.lock = threading.Lock()
+        self.running = False
+        self.stats = {'updates': 0, 'renders': 0, 'frames': 0, 'errors': 0}
+
+    def register(self, zone: str, render: Callable):
+        self.renderers[zone] = render
+
+    def mark(self, zone: str, **fields):
+        """Note le dernier état d'une zone (depuis n'importe quel thread)"""
+        with self.lock:
+            self.snapshots.setdefault(zone, {}).update(fields)
+            self.dirty.add(zone)
+            self.stats['updates'] += 1
+
+    def push(self, zone: str, event):
+        """Empile un événement pour une zone (depuis n'importe quel thread)"""
+        with self.lock:
+            self.events.setdefault(zone, []).append(event)
+            self.dirty.add(zone)
+            self.stats['updates'] += 1
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            self.schedule(self.frame_ms, self._frame)
+
+    def stop(self):
+        self.running = False
+
+    def _frame(self):
+        if not self.running:
+            return
+        try:
+            self.flush()
+        finally:
+            self.schedule(self.frame_ms, self._frame)
+
+    def flush(self) -> int:
+        """Redessine les zones marquées (thread principal), retourne le nombre de zones redessinées"""
+        with self.lock:
+            if not self.dirty:
+                return 0
+            zones, self.dirty = self.dirty, set()
+            pending = {zone: self.events.pop(zone) for zone in zones if zone in self.events}
+            snapshots = {zone: dict(self.snapshots[zone]) for zone in zones if zone in self.snapshots}
+            self.stats['frames'] += 1
+
+        rendered = 0
+        for zone, render in list(self.renderers.items()):  # Ordre d'enregistrement
+            if zone not in zones:
+                continue
+            try:
+                render(pending[zone] if zone in pending else snapshots.get(zone, {}))
+                rendered += 1
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"❌ Erreur rendu zone {zone}: {e}")
+        self.stats['renders'] += rendered
+        return rendered
+
+    def get_stats(self) -> Dict:
+        coalesced = self.stats['updates'] - self.stats['renders']
+        return dict(self.stats, coalesced=max(coalesced, 0))
+
+
+class LogBuffer:
+    """Lignes de log en attente d'affichage et compte des lignes du widget
+
+    Les messages sont découpés sur '\n' : une trace multi-lignes compte pour
+    autant de lignes qu'elle en occupe, le tampon et le widget restent bornés.
+    """
+
+    def __init__(self, max_lines: int):
+        self.max_lines = max_lines
+        self.pending = deque(maxlen=max_lines)  # append/popleft sûrs entre threads
+        self.displayed_lines = 0
+
+    def append(self, message: str):
+        """Empile un message (depuis n'importe quel thread)"""
+        self.pending.extend(message.split('\n'))
+
+    def drain(self) -> Tuple[str, int]:
+        """Lot à insérer en fin de widget et nombre de lignes à supprimer en tête (thread principal)"""
+        lines = []
+        while self.pending:
+            lines.append(self.pending.popleft())
+        if not lines:
+            return '', 0
+        self.displayed_lines += len(lines)
+        excess = max(0, self.displayed_lines - self.max_lines)
+        self.displayed_lines -= excess
+        return '\n'.join(lines) + '\n', excess
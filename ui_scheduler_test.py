@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Tests du planificateur d'affichage
+Zones d'état coalescées et zones d'événements vidées une fois par image
+"""
+
+import threading
+import unittest
+
+from ui_scheduler import LogBuffer, UIScheduler
+
+
+class FakeRoot:
+    """root.after simulé : les timers sont stockés et déclenchés à la main"""
+
+    def __init__(self):
+        self.timers = []
+
+    def after(self, ms, callback):
+        self.timers.append((ms, callback))
+
+    def tick(self):
+        timers, self.timers = self.timers, []
+        for _, callback in timers:
+            callback()
+
+
+class TestUIScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.root = FakeRoot()
+        self.scheduler = UIScheduler(self.root.after, frame_ms=50)
+        self.renders = []
+
+    def test_state_zone_renders_latest_snapshot_once(self):
+        self.scheduler.register('balance', lambda state: self.renders.append(state))
+        for i in range(100):
+            self.scheduler.mark('balance', balance=1000.0 + i, open_positions_count=i % 3)
+
+        self.assertEqual(self.scheduler.flush(), 1)
+        self.assertEqual(self.renders, [{'balance': 1099.0, 'open_positions_count': 0}])
+        self.assertEqual(self.scheduler.flush(), 0)
+
+    def test_state_fields_are_merged(self):
+        self.scheduler.register('connection', lambda state: self.renders.append(state))
+        self.scheduler.mark('connection', exchange=('connected', 'testnet'))
+        self.scheduler.mark('connection', websocket=True)
+        self.scheduler.flush()
+
+        self.assertEqual(self.renders, [{'exchange': ('connected', 'testnet'), 'websocket': True}])
+
+    def test_event_zone_receives_ordered_batch(self):
+        self.scheduler.register('positions', lambda events: self.renders.append(events))
+        for i in range(5):
+            self.scheduler.push('positions', ('trade', i))
+        self.scheduler.flush()
+        self.scheduler.push('positions', ('closed', 5))
+        self.scheduler.flush()
+
+        self.assertEqual(self.renders, [[('trade', i) for i in range(5)], [('closed', 5)]])
+
+    def test_frame_timer_reschedules_and_stops(self):
+        self.scheduler.register('scan', lambda state: self.renders.append(state))
+        self.scheduler.start()
+        self.scheduler.mark('scan', scan_stats={'total_tickers': 10})
+        self.root.tick()
+        self.root.tick()
+
+        self.assertEqual(len(self.renders), 1)
+        self.assertEqual(len(self.root.timers), 1)
+
+        self.scheduler.stop()
+        self.root.tick()
+        self.assertEqual(self.root.timers, [])
+
+    def test_render_error_does_not_block_other_zones(self):
+        def broken(state):
+            raise ValueError("widget détruit")
+
+        self.scheduler.register('balance', broken)
+        self.scheduler.register('scan', lambda state: self.renders.append(state))
+        self.scheduler.mark('balance', balance=1.0)
+        self.scheduler.mark('scan', scan_stats={})
+
+        self.assertEqual(self.scheduler.flush(), 1)
+        self.assertEqual(self.scheduler.get_stats()['errors'], 1)
+
+    def test_concurrent_updates_coalesce(self):
+        self.scheduler.register('balance', lambda state: self.renders.append(state))
+
+        def producer(offset):
+            for i in range(200):
+                self.scheduler.mark('balance', balance=offset + i)
+
+        threads = [threading.Thread(target=producer, args=(n * 1000,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.scheduler.flush()
+
+        stats = self.scheduler.get_stats()
+        self.assertEqual(len(self.renders), 1)
+        self.assertEqual(stats['updates'], 800)
+        self.assertEqual(stats['coalesced'], 799)
+
+
+
+class FakeLogWidget:
+    """Zone de texte simulée : insertion en fin, suppression des premières lignes"""
+
+    def __init__(self):
+        self.lines = []
+
+    def apply(self, text, excess):
+        self.lines.extend(text.split('\n')[:-1])
+        del self.lines[:excess]
+
+
+class TestLogBuffer(unittest.TestCase):
+
+    def test_multiline_messages_count_every_line(self):
+        buffer = LogBuffer(max_lines=5)
+        widget = FakeLogWidget()
+        buffer.append('a')
+        buffer.append('trace 1\ntrace 2\ntrace 3')
+        widget.apply(*buffer.drain())
+        self.assertEqual(widget.lines, ['a', 'trace 1', 'trace 2', 'trace 3'])
+        self.assertEqual(buffer.displayed_lines, 4)
+
+        buffer.append('b\nc')
+        text, excess = buffer.drain()
+        self.assertEqual(excess, 1)
+        widget.apply(text, excess)
+        self.assertEqual(widget.lines, ['trace 1', 'trace 2', 'trace 3', 'b', 'c'])
+        self.assertEqual(buffer.displayed_lines, 5)
+
+    def test_pending_lines_are_bounded(self):
+        buffer = LogBuffer(max_lines=3)
+        widget = FakeLogWidget()
+        for i in range(10):
+            buffer.append(f"ligne {i}\nsuite {i}")
+        text, excess = buffer.drain()
+        self.assertEqual(text, 'suite 8\nligne 9\nsuite 9\n')
+        self.assertEqual(excess, 0)
+        widget.apply(text, excess)
+
+        buffer.append('x')
+        widget.apply(*buffer.drain())
+        self.assertEqual(widget.lines, ['ligne 9', 'suite 9', 'x'])
+
+    def test_empty_drain(self):
+        self.assertEqual(LogBuffer(max_lines=3).drain(), ('', 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Tests du flux utilisateur (listenKey)
+Dispatch des exécutions et cache des soldes poussés
+"""
+
+import unittest
+
+from websocket_realtime import UserDataStreamManager
+
+
+class TestUserDataStream(unittest.TestCase):
+
+    def test_account_position_updates_cached_balance(self):
+        stream = UserDataStreamManager(exchange=None)
+        stream.seed_balances({'USDT': {'free': 100.0, 'used': 0.0, 'total': 100.0}, 'info': {}})
+        updates = []
+        stream.add_callback('account_update', updates.append)
+        stream._process_event({'e': 'outboundAccountPosition',
+                               'B': [{'a': 'USDT', 'f': '42.5', 'l': '10.0'}]})
+        self.assertEqual(stream.get_balance('USDT'), 42.5)
+        self.assertEqual(updates[-1]['USDT']['locked'], 10.0)
+        self.assertIsNone(stream.get_balance('BTC'))
+
+    def test_seed_does_not_override_streamed_balance(self):
+        stream = UserDataStreamManager(exchange=None)
+        stream._process_event({'e': 'outboundAccountPosition', 'B': [{'a': 'USDT', 'f': '5', 'l': '0'}]})
+        stream.seed_balances({'USDT': {'free': 100.0, 'used': 0.0}})
+        self.assertEqual(stream.get_balance('USDT'), 5.0)
+
+    def test_execution_report_dispatched(self):
+        stream = UserDataStreamManager(exchange=None)
+        reports = []
+        stream.add_callback('execution_report', reports.append)
+        stream._process_event({'e': 'executionReport', 'c': 'scb-1', 'X': 'FILLED'})
+        self.assertEqual(reports, [{'e': 'executionReport', 'c': 'scb-1', 'X': 'FILLED'}])
+
+    def test_restart_reuses_keepalive_thread(self):
+        stream = UserDataStreamManager(exchange=None)
+        stream._connect = lambda: None
+        stream.start()
+        keepalive = stream.keepalive_thread
+        stream.stop()
+        stream.start()
+        self.assertIs(stream.keepalive_thread, keepalive)
+        self.assertTrue(keepalive.is_alive())
+        stream.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,19 +1,3 @@
-from dotenv import load_dotenv
-import os
-load_dotenv()
-API_KEY = os.getenv('API_KEY')
-API_SECRET = os.getenv('API_SECRET')
-import os
-from dotenv import load_dotenv
-import os
-load_dotenv()
-api_key = API_KEY
-api_secret = API_SECRET
-if not api_key or not api_secret:
-    raise Exception("❌ CLÉS API BINANCE MANQUANTES : le fichier .env doit contenir API_KEY et API_SECRET dans le dossier du bot.")
-
-load_dotenv()
-
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
@@ -26,16 +10,24 @@ import threading
 import time
 import logging
 from datetime import datetime
-from typing import Dict, List, Callable, Optional
+from typing import TYPE_CHECKING, Dict, List, Callable, Optional
 import websocket
 from collections import defaultdict, deque
-import pandas as pd
+
+from candle_store import CandleStore
+from market_index import split_exchange_symbol
+
+if TYPE_CHECKING:
+    import pandas as pd  # Chargé à la première kline : import du module rapide
+
 
 class BinanceWebSocketManager:
     """Gestionnaire WebSocket optimisé pour Binance - Temps réel"""
     
-    def __init__(self, testnet: bool = False):
+    def __init__(self, testnet: bool = False, kline_interval: str = '1m', order_books=None,
+                 book_ticker: bool = True, market_index=None):
         self.testnet = testnet
+        self.market_index = market_index  # Correspondance BTCUSDT <-> BTC/USDT
         
         # URLs WebSocket
         if testnet:
@@ -63,6 +55,15 @@ class BinanceWebSocketManager:
         # Stockage données temps réel
         self.price_data = {}  # Prix instantanés
         self.kline_data = defaultdict(lambda: deque(maxlen=100))  # OHLCV
+        
+        # Un seul stream kline 1m sert tous les timeframes (agrégation à la demande)
+        self.kline_interval = kline_interval
+        self.candle_store = CandleStore()
+        
+        # Carnets L2 locaux (flux @depth@100ms), optionnels
+        self.order_books = order_books
+        self.book_ticker_enabled = book_ticker
+        self.book_ticker = {}  # Meilleur bid/ask (@bookTicker)
         self.volume_data = {}  # Volumes 24h
         self.change_data = {}  # Changements 24h
         
@@ -70,12 +71,15 @@ class BinanceWebSocketManager:
         self.callbacks = {
             'price_update': [],
             'kline_update': [],
+            'book_ticker': [],
             'volume_update': [],
             'connection_status': []
         }
         
         # Threads actifs
         self.threads = []
+        self.streams_started_at = None
+        self.stream_symbols = {}  # 'BTCUSDT' -> 'BTC/USDT' des flux abonnés
         
         # Statistiques
         self.stats = {
@@ -103,6 +107,7 @@ class BinanceWebSocketManager:
         self.current_symbols = symbols.copy()
         self.should_reconnect = True
         self.reconnect_attempts = 0
+        self.streams_started_at = datetime.now()
         
         self._start_connection()
     
@@ -112,14 +117,19 @@ class BinanceWebSocketManager:
             return
         
         try:
-            # Convertir symboles (BTC/USDT → btcusdt)
-            binance_symbols = [symbol.replace('/', '').lower() for symbol in self.current_symbols]
+            # Convertir symboles (BTC/USDT → btcusdt) et garder la correspondance inverse
+            binance_symbols = [self._stream_name(symbol) for symbol in self.current_symbols]
+            self.stream_symbols = {name.upper(): symbol for name, symbol in zip(binance_symbols, self.current_symbols)}
             
             # Créer l'URL du stream combiné
             streams = []
             for symbol in binance_symbols:
                 streams.append(f"{symbol}@ticker")
-                streams.append(f"{symbol}@kline_1h")  # Klines 1h par défaut
+                streams.append(f"{symbol}@kline_{self.kline_interval}")  # 3m/5m/15m/1h dérivés du 1m
+                if self.book_ticker_enabled:
+                    streams.append(f"{symbol}@bookTicker")
+                if self.order_books is not None:
+                    streams.append(f"{symbol}@depth@100ms")
             
             stream_url = self.base_url + "/".join(streams)
             
@@ -134,16 +144,22 @@ class BinanceWebSocketManager:
                     
                     data = json.loads(message)
                     
-                    if 'stream' in data:
-                        stream_name = data['stream']
-                        symbol_raw = stream_name.split('@')[0].upper()
-                        # Reconvertir format (BTCUSDT → BTC/USDT)
-                        symbol = f"{symbol_raw[:-4]}/{symbol_raw[-4:]}"
-                        
-                        if '@ticker' in stream_name:
-                            self._process_ticker_data(symbol, data['data'])
-                        elif '@kline' in stream_name:
-                            self._process_kline_data(symbol, data['data'])
+                    # Stream combiné {'stream', 'data'} ou payload brut (URL /ws/a/b)
+                    payload = data.get('data', data)
+                    symbol_raw = payload.get('s', '') or data.get('stream', '').split('@')[0]
+                    # Reconvertir format (BTCUSDT → BTC/USDT)
+                    symbol = self._symbol_from_raw(symbol_raw)
+                    
+                    event_type = payload.get('e')
+                    if event_type == '24hrTicker':
+                        self._process_ticker_data(symbol, payload)
+                    elif event_type == 'kline':
+                        self._process_kline_data(symbol, payload)
+                    elif event_type == 'depthUpdate' and self.order_books is not None:
+                        self.order_books.on_depth_event(symbol, payload)
+                    elif event_type is None and 'b' in payload and 'a' in payload:
+                        # @bookTicker : pas de champ 'e'
+                        self._process_book_ticker(symbol, payload)
                 
                 except Exception as e:
                     logging.error(f"Erreur traitement message WebSocket: {e}")
@@ -336,6 +352,8 @@ class BinanceWebSocketManager:
     
     def _process_kline_data(self, symbol: str, kline_data: Dict):
         """Traite les données kline (OHLCV)"""
+        import pandas as pd
+        
         try:
             kline = kline_data['k']
             
@@ -353,15 +371,41 @@ class BinanceWebSocketManager:
             if kline['x']:  # Seulement les bougies fermées
                 self.kline_data[symbol].append(ohlcv)
             
+            # Stockage compact 1m pour l'agrégation multi-timeframe
+            if kline.get('i', self.kline_interval) == '1m':
+                self.candle_store.ingest_kline(symbol, kline)
+            
             # Notifier les callbacks
             self._notify_callbacks('kline_update', {
                 'symbol': symbol,
+                'interval': kline.get('i', self.kline_interval),
                 'kline': ohlcv
             })
             
         except Exception as e:
             logging.error(f"Erreur traitement kline {symbol}: {e}")
     
+    def _process_book_ticker(self, symbol: str, book_data: Dict):
+        """Traite le meilleur bid/ask (@bookTicker)"""
+        try:
+            quote = {
+                'symbol': symbol,
+                'bid': float(book_data['b']),
+                'bid_qty': float(book_data['B']),
+                'ask': float(book_data['a']),
+                'ask_qty': float(book_data['A']),
+                'update_id': book_data.get('u'),
+                'time': time.time()
+            }
+            if quote['bid'] <= 0 or quote['ask'] <= 0:
+                return
+            
+            self.book_ticker[symbol] = quote
+            self._notify_callbacks('book_ticker', quote)
+            
+        except Exception as e:
+            logging.error(f"Erreur traitement bookTicker {symbol}: {e}")
+    
     def _notify_callbacks(self, event_type: str, data: any = None):
         """Notifie tous les callbacks d'un type d'événement"""
         for callback in self.callbacks.get(event_type, []):
@@ -375,6 +419,34 @@ class BinanceWebSocketManager:
         data = self.price_data.get(symbol)
         return data['price'] if data else None
     
+    def _stream_name(self, symbol: str) -> str:
+        if self.market_index is not None:
+            return self.market_index.stream_name(symbol)
+        return symbol.replace('/', '').lower()
+    
+    def _symbol_from_raw(self, symbol_raw: str) -> str:
+        """'BTCUSDT' → 'BTC/USDT' : symboles abonnés, index des marchés, puis devises connues"""
+        symbol_raw = symbol_raw.upper()
+        symbol = self.stream_symbols.get(symbol_raw)
+        if symbol is None and self.market_index is not None:
+            symbol = self.market_index.from_exchange_id(symbol_raw)
+        return symbol or split_exchange_symbol(symbol_raw)
+    
+    def get_stale_symbols(self, symbols: List[str], max_age_seconds: float) -> List[str]:
+        """Symboles sans tick WebSocket depuis plus de `max_age_seconds` (délai de grâce au démarrage)"""
+        now = datetime.now()
+        stale = []
+        for symbol in symbols:
+            data = self.price_data.get(symbol)
+            last_tick = data['timestamp'] if data else self.streams_started_at
+            if last_tick is None or (now - last_tick).total_seconds() > max_age_seconds:
+                stale.append(symbol)
+        return stale
+    
+    def get_best_bid_ask(self, symbol: str) -> Optional[Dict]:
+        """Récupère le meilleur bid/ask d'un symbole ({'bid', 'ask', 'bid_qty', 'ask_qty', ...})"""
+        return self.book_ticker.get(symbol)
+    
     def get_latest_volume(self, symbol: str) -> Optional[float]:
         """Récupère le dernier volume 24h d'un symbole"""
         data = self.volume_data.get(symbol)
@@ -389,16 +461,24 @@ class BinanceWebSocketManager:
         """Récupère toutes les données de prix"""
         result = {}
         for symbol in self.price_data.keys():
+            quote = self.book_ticker.get(symbol) or {}
             result[symbol] = {
                 'price': self.get_latest_price(symbol),
+                'bid': quote.get('bid'),
+                'ask': quote.get('ask'),
                 'volume_24h': self.get_latest_volume(symbol),
                 'change_24h': self.get_latest_change(symbol),
                 'timestamp': self.price_data[symbol]['timestamp']
             }
         return result
     
-    def get_kline_dataframe(self, symbol: str) -> pd.DataFrame:
-        """Convertit les klines en DataFrame pandas"""
+    def get_kline_dataframe(self, symbol: str, timeframe: Optional[str] = None, limit: int = 100) -> 'pd.DataFrame':
+        """Convertit les klines en DataFrame pandas (timeframe dérivé du 1m si fourni)"""
+        import pandas as pd
+        
+        if timeframe:
+            return self.candle_store.get_dataframe(symbol, timeframe, limit)
+        
         if symbol not in self.kline_data or not self.kline_data[symbol]:
             return pd.DataFrame()
         
@@ -406,6 +486,10 @@ class BinanceWebSocketManager:
         df = pd.DataFrame(klines)
         return df.sort_values('timestamp')
     
+    def get_ohlcv(self, symbol: str, timeframe: str = '1m', limit: int = 100) -> List[List]:
+        """Barres OHLCV d'un timeframe, agrégées depuis les klines 1m"""
+        return self.candle_store.get_ohlcv(symbol, timeframe, limit)
+    
     def get_connection_status(self) -> Dict[str, str]:
         """Retourne le statut des connexions"""
         return self.connection_status.copy()
@@ -448,6 +532,9 @@ class BinanceWebSocketManager:
     def restart_streams(self, symbols: List[str]):
         """Redémarre les streams avec de nouveaux symboles"""
         print("🔄 Redémarrage des WebSockets...")
+        self.candle_store.retain(symbols)
+        if self.order_books is not None:
+            self.order_books.retain(symbols)
         self.stop_all_streams()
         time.sleep(2)  # Attendre la fermeture complète
         self.start_price_streams(symbols)
@@ -499,6 +586,194 @@ class BinanceWebSocketManager:
         """Retourne la liste des symboles trackés"""
         return list(self.price_data.keys())
 
+
+class UserDataStreamManager:
+    """Flux utilisateur Binance (listenKey) : exécutions d'ordres et soldes en temps réel"""
+    
+    def __init__(self, exchange, testnet: bool = False, keepalive_minutes: int = 30):
+        self.exchange = exchange
+        self.base_url = "wss://testnet.binance.vision/ws/" if testnet else "wss://stream.binance.com:9443/ws/"
+        self.keepalive_minutes = keepalive_minutes
+        
+        self.listen_key = None
+        self.ws = None
+        self.should_reconnect = False
+        self.connected = False
+        self.reconnect_attempts = 0
+        self.max_reconnect_attempts = 10
+        self.reconnect_delay = 5  # secondes
+        self.lock = threading.Lock()
+        self.keepalive_thread = None  # Un seul keep-alive, même après stop() puis start()
+        
+        # Soldes poussés par outboundAccountPosition : asset -> {'free', 'locked'}
+        self.balances = {}
+        self.last_event = None
+        
+        self.callbacks = {
+            'execution_report': [],
+            'account_update': [],
+            'balance_update': [],
+            'connection_status': []
+        }
+    
+    def add_callback(self, event_type: str, callback: Callable):
+        """Ajoute un callback pour les événements du flux utilisateur"""
+        if event_type in self.callbacks:
+            self.callbacks[event_type].append(callback)
+    
+    def _notify_callbacks(self, event_type: str, data: any = None):
+        for callback in self.callbacks.get(event_type, []):
+            try:
+                callback(data)
+            except Exception as e:
+                logging.error(f"Erreur callback flux utilisateur {event_type}: {e}")
+    
+    def start(self):
+        """Obtient une listenKey puis ouvre le flux (keep-alive et reconnexion automatiques)"""
+        self.should_reconnect = True
+        self.reconnect_attempts = 0
+        self._connect()
+        with self.lock:
+            # Le keep-alive d'un démarrage précédent, encore en attente, reprend le service
+            if self.keepalive_thread is None or not self.keepalive_thread.is_alive():
+                self.keepalive_thread = threading.Thread(target=self._keepalive_loop, daemon=True,
+                                                         name="UserStreamKeepAlive")
+                self.keepalive_thread.start()
+    
+    def _connect(self):
+        try:
+            self.listen_key = self.exchange.publicPostUserDataStream()['listenKey']
+        except Exception as e:
+            logging.error(f"Erreur création listenKey: {e}")
+            self._schedule_reconnection()
+            return
+        
+        def on_message(ws, message):
+            try:
+                self._process_event(json.loads(message))
+            except Exception as e:
+                logging.error(f"Erreur traitement flux utilisateur: {e}")
+        
+        def on_open(ws):
+            self.connected = True
+            self.reconnect_attempts = 0
+            logging.info("✅ Flux utilisateur connecté")
+            self._notify_callbacks('connection_status', 'connected')
+        
+        def on_close(ws, close_status_code, close_msg):
+            self.connected = False
+            logging.warning(f"Flux utilisateur fermé: {close_status_code} - {close_msg}")
+            self._notify_callbacks('connection_status', 'closed')
+            if self.should_reconnect and ws is self.ws:
+                self._schedule_reconnection()
+        
+        def on_error(ws, error):
+            logging.error(f"Erreur flux utilisateur: {error}")
+        
+        self.ws = websocket.WebSocketApp(
+            self.base_url + self.listen_key,
+            on_message=on_message,
+            on_error=on_error,
+            on_close=on_close,
+            on_open=on_open
+        )
+        threading.Thread(target=self.ws.run_forever, daemon=True, name="UserDataStream").start()
+    
+    def _schedule_reconnection(self):
+        """Reconnexion avec une nouvelle listenKey (délai croissant)"""
+        if self.reconnect_attempts >= self.max_reconnect_attempts:
+            logging.error("❌ Flux utilisateur: nombre maximum de reconnexions atteint")
+            self.should_reconnect = False
+            return
+        
+        self.reconnect_attempts += 1
+        delay = min(self.reconnect_delay * self.reconnect_attempts, 60)
+        
+        def reconnect():
+            time.sleep(delay)
+            if self.should_reconnect:
+                self._connect()
+        
+        threading.Thread(target=reconnect, daemon=True).start()
+    
+    def _restart(self):
+        """Ferme la connexion courante et repart d'une nouvelle listenKey"""
+        old_ws, self.ws = self.ws, None
+        if old_ws is not None:
+            try:
+                old_ws.close()
+            except Exception:
+                pass
+        self._connect()
+    
+    def _keepalive_loop(self):
+        """Prolonge la listenKey (expiration Binance : 60 minutes)"""
+        while self.should_reconnect:
+            time.sleep(self.keepalive_minutes * 60)
+            if not self.should_reconnect or not self.listen_key:
+                continue
+            try:
+                self.exchange.publicPutUserDataStream({'listenKey': self.listen_key})
+            except Exception as e:
+                logging.warning(f"Keep-alive listenKey échoué ({e}) - reconnexion")
+                self._restart()
+    
+    def _process_event(self, event: Dict):
+        """Dispatch des événements du flux utilisateur"""
+        self.last_event = datetime.now()
+        event_type = event.get('e')
+        
+        if event_type == 'executionReport':
+            self._notify_callbacks('execution_report', event)
+        elif event_type == 'outboundAccountPosition':
+            with self.lock:
+                for balance in event.get('B', []):
+                    self.balances[balance['a']] = {'free': float(balance['f']), 'locked': float(balance['l'])}
+            self._notify_callbacks('account_update', self.get_balances())
+        elif event_type == 'balanceUpdate':
+            self._notify_callbacks('balance_update', event)
+        elif event_type == 'listenKeyExpired':
+            logging.warning("listenKey expirée - reconnexion")
+            self._restart()
+    
+    def seed_balances(self, balance: Dict):
+        """Initialise le cache depuis un fetch_balance ccxt (une seule fois au démarrage)"""
+        with self.lock:
+            for asset, amounts in balance.items():
+                if isinstance(amounts, dict) and 'free' in amounts:
+                    self.balances.setdefault(asset, {'free': float(amounts.get('free') or 0),
+                                                     'locked': float(amounts.get('used') or 0)})
+    
+    def get_balance(self, asset: str) -> Optional[float]:
+        """Solde libre en cache, None si inconnu"""
+        with self.lock:
+            balance = self.balances.get(asset)
+            return balance['free'] if balance else None
+    
+    def get_balances(self) -> Dict[str, Dict]:
+        with self.lock:
+            return {asset: dict(amounts) for asset, amounts in self.balances.items()}
+    
+    def is_connected(self) -> bool:
+        return self.connected
+    
+    def stop(self):
+        """Ferme le flux et libère la listenKey"""
+        self.should_reconnect = False
+        ws, self.ws = self.ws, None
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+        if self.listen_key:
+            try:
+                self.exchange.publicDeleteUserDataStream({'listenKey': self.listen_key})
+            except Exception:
+                pass
+            self.listen_key = None
+        self.connected = False
+
 # Test du WebSocket
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')